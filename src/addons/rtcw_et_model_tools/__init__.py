@@ -31,11 +31,10 @@ bl_info = {
 }
 
 
-import bpy
-
-
 def register():
 
+    import bpy
+
     import rtcw_et_model_tools.common.reporter as reporter_m
 
     import rtcw_et_model_tools.blender.ui.imports as imports_m
@@ -52,9 +51,8 @@ def register():
             name="Game Path",
             description="Path to game data. Game data will be read assuming"
                 " this is the directory of the mod file (for example"
-                " 'etmain' or 'Main'. Note: PK3 files are not extracted, so"
-                " you need to manually extract them to this directory."
-                " You can use the 'Unzip PK3s' panel for that.",
+                " 'etmain' or 'Main'). PK3 files inside this directory are"
+                " searched as well, files are extracted as needed.",
             subtype='DIR_PATH')
 
     imports_m.register()
@@ -66,6 +64,8 @@ def register():
 
 def unregister():
 
+    import bpy
+
     import rtcw_et_model_tools.common.reporter as reporter_m
 
     import rtcw_et_model_tools.blender.ui.imports as imports_m
@@ -91,10 +91,19 @@ def _import_tag_model(game_path, skin_file_path, tag_name, model_path):
     import rtcw_et_model_tools.mdc.facade as mdc_facade
     import rtcw_et_model_tools.blender.core.collection as collection_m
 
-    # paths relative to game directory
-    model_path_1 = os.path.join(game_path, model_path)
-    model_path_md3_1 = "{}.{}".format(model_path_1, "md3")
-    model_path_mdc_1 = "{}.{}".format(model_path_1, "mdc")
+    import rtcw_et_model_tools.common.vfs as vfs_m
+
+    # paths relative to game directory, including pk3 files
+    model_path_md3_1 = None
+    model_path_mdc_1 = None
+    if game_path and os.path.isdir(game_path):
+
+        vfs = vfs_m.get(game_path)
+        found_path = vfs.find(model_path, ("md3", "mdc"))
+        if found_path and found_path.endswith(".md3"):
+            model_path_md3_1 = vfs.get_file_path(found_path)
+        elif found_path:
+            model_path_mdc_1 = vfs.get_file_path(found_path)
 
     # paths relative to skin file directory
     skin_file_dir = os.path.dirname(os.path.realpath(skin_file_path))
@@ -103,13 +112,13 @@ def _import_tag_model(game_path, skin_file_path, tag_name, model_path):
     model_path_mdc_2 = "{}.{}".format(model_path_2, "mdc")
 
     # try to find it relative to game data path
-    if os.path.isfile(model_path_md3_1):
+    if model_path_md3_1:
 
         bind_frame = 0
         mdi_model = md3_facade.read(model_path_md3_1, bind_frame)
         collection = collection_m.write(mdi_model)
 
-    elif os.path.isfile(model_path_mdc_1):
+    elif model_path_mdc_1:
 
         bind_frame = 0
         mdi_model = mdc_facade.read(model_path_mdc_1, bind_frame)
@@ -157,9 +166,15 @@ def _attach_by_skin_file(game_path, skin_file_path):
     """Attach objects defined in skin file.
     """
 
+    import rtcw_et_model_tools.common.vfs as vfs_m
+
     skin_data = skin_file_m.read(skin_file_path)
     if skin_data:
 
+        # model lookups per tag use the index as is
+        if game_path and os.path.isdir(game_path):
+            vfs_m.get(game_path, refresh=True)
+
         collection = bpy.context.view_layer.active_layer_collection.collection
 
         for mapping in skin_data.tag_to_model_mappings:
@@ -29,6 +29,7 @@ import bpy
 import rtcw_et_model_tools.mdi.mdi as mdi_m
 import rtcw_et_model_tools.common.skin_file as skin_file_m
 import rtcw_et_model_tools.common.util as common_util_m
+import rtcw_et_model_tools.common.vfs as vfs_m
 import rtcw_et_model_tools.common.reporter as reporter_m
 
 
@@ -230,6 +231,9 @@ def apply_shaders(method, game_path, skin_file_path):
     if not os.path.isdir(game_path):
         raise Exception("Game path directory not found")
 
+    # texture lookups per material use the index as is
+    vfs_m.get(game_path, refresh=True)
+
     if method == 'Material Names':
 
         _apply_shaders_by_material_names(collection, game_path)
@@ -24,6 +24,7 @@ code base are limited to vertices, triangles, materials and a uv map.
 
 import bpy
 import mathutils
+import numpy as np
 
 import rtcw_et_model_tools.mdi.mdi as mdi_m
 import rtcw_et_model_tools.blender.core.uv_map as uv_map_m
@@ -370,13 +371,19 @@ def _write_rigged_vertices(mdi_rigged_vertices, mdi_skeleton, mesh_object,
     mdi_bones = mdi_skeleton.bones
     vertex_groups_dict = {mdi_bone.name: [] for mdi_bone in mdi_bones}
 
-    for vertex_index, mdi_rigged_vertex in enumerate(mdi_rigged_vertices):
+    mdi_vertex_weights = \
+        mdi_m.MDIVertexWeights.from_rigged_vertices(mdi_rigged_vertices)
+    vertex_indices = np.repeat(np.arange(len(mdi_rigged_vertices)),
+                               np.diff(mdi_vertex_weights.offsets))
 
-        for mdi_vertex_weight in mdi_rigged_vertex.weights:
+    for vertex_index, parent_bone, weight_value in \
+        zip(vertex_indices.tolist(),
+            mdi_vertex_weights.parent_bones.tolist(),
+            mdi_vertex_weights.weight_values.tolist()):
 
-            bone_name = mdi_bones[mdi_vertex_weight.parent_bone].name
-            weights = (vertex_index, mdi_vertex_weight.weight_value)
-            vertex_groups_dict[bone_name].append(weights)
+        bone_name = mdi_bones[parent_bone].name
+        weights = (vertex_index, weight_value)
+        vertex_groups_dict[bone_name].append(weights)
 
     for bone_name, weights in vertex_groups_dict.items():
 
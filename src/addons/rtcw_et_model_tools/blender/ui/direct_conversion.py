@@ -118,6 +118,25 @@ class REMT_PT_DirectConversion(bpy.types.Panel):
 
             pass
 
+        if context.scene.remt_dc_source_format in ("MDS", "MDM/MDX") and \
+           context.scene.remt_dc_target_format in ("MD3", "MDC"):
+
+            row = layout.row()
+            row.prop(context.scene,
+                    "remt_dc_frame_start")
+
+            row = layout.row()
+            row.prop(context.scene,
+                    "remt_dc_frame_end")
+
+            row = layout.row()
+            row.prop(context.scene,
+                    "remt_dc_frame_step")
+
+            row = layout.row()
+            row.prop(context.scene,
+                    "remt_dc_frame_interpolate")
+
         row = layout.row()
         row.operator("remt.remt_direct_conversion",
                      text="Convert",
@@ -188,6 +207,21 @@ class REMT_OT_DirectConversion(bpy.types.Operator):
                 mdmmdx_collapse_frame,
                 mds_collapse_frame)
 
+    @staticmethod
+    def _parse_frame_selection(context):
+
+        import rtcw_et_model_tools.mdi.mdi as mdi_m
+
+        frame_start = context.scene.remt_dc_frame_start
+        frame_end = context.scene.remt_dc_frame_end
+        frame_step = context.scene.remt_dc_frame_step
+        interpolate = context.scene.remt_dc_frame_interpolate
+
+        frame_selection = mdi_m.MDIFrameSelection(frame_start, frame_end,
+                                                  frame_step, interpolate)
+
+        return frame_selection
+
     def execute(self, context):
         """Directly convert between model formats without involving Blender.
         """
@@ -219,6 +253,8 @@ class REMT_OT_DirectConversion(bpy.types.Operator):
             mds_collapse_frame \
                 = self._parse_input(context)
 
+            frame_selection = self._parse_frame_selection(context)
+
             if source_format == 'MD3' and target_format == 'MD3':
 
                 reporter_m.info("Direct conversion of MD3 to MD3")
@@ -275,13 +311,15 @@ class REMT_OT_DirectConversion(bpy.types.Operator):
 
                 reporter_m.info("Direct conversion of MDS to MD3")
 
-                dc_m.mds_to_md3(mds_source_path, md3_target_path)
+                dc_m.mds_to_md3(mds_source_path, md3_target_path,
+                                frame_selection)
 
             elif source_format == 'MDS' and target_format == 'MDC':
 
                 reporter_m.info("Direct conversion of MDS to MDC")
 
-                dc_m.mds_to_mdc(mds_source_path, mdc_target_path)
+                dc_m.mds_to_mdc(mds_source_path, mdc_target_path,
+                                frame_selection)
 
             elif source_format == 'MDS' and target_format == 'MDS':
 
@@ -305,7 +343,8 @@ class REMT_OT_DirectConversion(bpy.types.Operator):
 
                 dc_m.mdmmdx_to_md3(mdm_source_path,
                                    mdx_source_path,
-                                   md3_target_path)
+                                   md3_target_path,
+                                   frame_selection)
 
             elif source_format == 'MDM/MDX' and target_format == 'MDC':
 
@@ -313,7 +352,8 @@ class REMT_OT_DirectConversion(bpy.types.Operator):
 
                 dc_m.mdmmdx_to_mdc(mdm_source_path,
                                    mdx_source_path,
-                                   mdc_target_path)
+                                   mdc_target_path,
+                                   frame_selection)
 
             elif source_format == 'MDM/MDX' and target_format == 'MDS':
 
@@ -459,6 +499,44 @@ def register():
             max = 1000000
             )                        
 
+    bpy.types.Scene.remt_dc_frame_start = \
+        bpy.props.IntProperty(
+            name = "Start Frame",
+            description = "First frame to convert when baking skeletal"
+                " animation",
+            default = 0,
+            min = 0,
+            max = 1000000
+            )
+
+    bpy.types.Scene.remt_dc_frame_end = \
+        bpy.props.IntProperty(
+            name = "End Frame",
+            description = "Last frame to convert when baking skeletal"
+                " animation, -1 for the last frame",
+            default = -1,
+            min = -1,
+            max = 1000000
+            )
+
+    bpy.types.Scene.remt_dc_frame_step = \
+        bpy.props.FloatProperty(
+            name = "Frame Step",
+            description = "Convert every n-th frame when baking skeletal"
+                " animation",
+            default = 1.0,
+            min = 0.01,
+            max = 1000000.0
+            )
+
+    bpy.types.Scene.remt_dc_frame_interpolate = \
+        bpy.props.BoolProperty(
+            name = "Interpolate",
+            description = "Interpolate frames when the frame step falls in"
+                " between frames",
+            default = False
+            )
+
 def unregister():
 
     for cls in classes:
@@ -478,3 +556,7 @@ def unregister():
     del bpy.types.Scene.remt_dc_mdx_target_path
     del bpy.types.Scene.remt_dc_mdmmdx_collapse_frame
     del bpy.types.Scene.remt_dc_mds_collapse_frame
+    del bpy.types.Scene.remt_dc_frame_start
+    del bpy.types.Scene.remt_dc_frame_end
+    del bpy.types.Scene.remt_dc_frame_step
+    del bpy.types.Scene.remt_dc_frame_interpolate
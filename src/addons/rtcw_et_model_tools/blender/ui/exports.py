@@ -60,6 +60,10 @@ class REMT_PT_Export(bpy.types.Panel):
             row.prop(context.scene,
                     "remt_mdc_export_path")
 
+            row = layout.row()
+            row.prop(context.scene,
+                    "remt_mdc_base_frames_export")
+
             row = layout.row()
             row.operator("remt.mdc_exporter",
                             text="Export",
@@ -184,7 +188,10 @@ class REMT_OT_MDCExport(bpy.types.Operator):
         mdc_file_path = context.scene.remt_mdc_export_path
         mdc_file_path = bpy.path.abspath(mdc_file_path)
 
-        return mdc_file_path
+        base_frame_selection = context.scene.remt_mdc_base_frames_export
+        base_frame_selection = base_frame_selection.lower()
+
+        return (mdc_file_path, base_frame_selection)
 
     def execute(self, context):
         """Export to MDC file format.
@@ -200,13 +207,14 @@ class REMT_OT_MDCExport(bpy.types.Operator):
 
         try:
 
-            mdc_file_path = self._parse_input(context)
+            mdc_file_path, base_frame_selection = self._parse_input(context)
 
             timer = timer_m.Timer()
             reporter_m.info("MDC export started ...")
 
             mdi_model, _ = collection_m.read()
-            mdc_facade_m.write(mdi_model, mdc_file_path)
+            mdc_facade_m.write(mdi_model, mdc_file_path,
+                               base_frame_selection=base_frame_selection)
 
             time = timer.time()
             reporter_m.info("MDC export DONE (time={})".format(time))
@@ -490,6 +498,16 @@ def register():
             max = 1000000
             )
 
+    bpy.types.Scene.remt_mdc_base_frames_export = \
+        bpy.props.EnumProperty(
+            name = "Base Frames",
+            description = "Choose how base frames are selected",
+            items = [("GREEDY", "Greedy",
+                      "New base frame whenever a frame can not be compressed"),
+                     ("OPTIMAL", "Optimal",
+                      "Smallest number of base frames, smallest file size")],
+            default = "GREEDY")
+
 def unregister():
 
     for cls in classes:
@@ -504,3 +522,4 @@ def unregister():
     bpy.types.Scene.remt_tag_export_path
     del bpy.types.Scene.remt_mds_collapse_frame_export
     del bpy.types.Scene.remt_mdmmdx_collapse_frame_export
+    del bpy.types.Scene.remt_mdc_base_frames_export
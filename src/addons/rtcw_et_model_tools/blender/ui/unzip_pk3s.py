@@ -46,6 +46,24 @@ class REMT_PT_UnzipPK3s(bpy.types.Panel):
         row.prop(context.scene,
                 "remt_unzip_pk3_target_path")
 
+        row = layout.row()
+        row.prop(context.scene,
+                "remt_unzip_pk3_filter_types")
+
+        if context.scene.remt_unzip_pk3_filter_types:
+
+            row = layout.row()
+            row.prop(context.scene,
+                    "remt_unzip_pk3_types")
+
+        row = layout.row()
+        row.prop(context.scene,
+                "remt_unzip_pk3_path_filter")
+
+        row = layout.row()
+        row.prop(context.scene,
+                "remt_unzip_pk3_num_threads")
+
         row = layout.row()
         row.operator("remt.remt_unzip_pk3",
                      text="Unzip",
@@ -59,18 +77,34 @@ class REMT_OT_UnzipPK3s(bpy.types.Operator):
     bl_idname = "remt.remt_unzip_pk3"
     bl_label = "Unzip"
     bl_description = "Unzip all pk3s found in the source directory and all" \
-                     " its subdirectories and copy to target path"
+                     " its subdirectories and copy to target path. Files" \
+                     " which are up to date are skipped"
 
     @staticmethod
     def _parse_input(context):
 
+        import rtcw_et_model_tools.common.unzip_pk3s as unzip_pks_m
+
         source_path = context.scene.remt_unzip_pk3_source_path
         source_path = bpy.path.abspath(source_path)
 
         target_path = context.scene.remt_unzip_pk3_target_path
         target_path = bpy.path.abspath(target_path)
 
-        return (source_path, target_path)
+        exts = None
+        if context.scene.remt_unzip_pk3_filter_types:
+
+            exts = []
+            for file_type in context.scene.remt_unzip_pk3_types:
+                exts.extend(unzip_pks_m.filter_exts[file_type])
+
+        path_filters = [path_filter.strip() for path_filter
+                        in context.scene.remt_unzip_pk3_path_filter.split(",")
+                        if path_filter.strip()]
+
+        num_threads = context.scene.remt_unzip_pk3_num_threads
+
+        return (source_path, target_path, exts, path_filters, num_threads)
 
     def execute(self, context):
         """Search directory recursively and unzip all pk3 files to a
@@ -79,14 +113,40 @@ class REMT_OT_UnzipPK3s(bpy.types.Operator):
         """
 
         import rtcw_et_model_tools.common.unzip_pk3s as unzip_pks_m
+        import rtcw_et_model_tools.common.timer as timer_m
         import rtcw_et_model_tools.common.reporter as reporter_m
 
         reporter_m.reset_state()
 
+        window_manager = context.window_manager
+
+        def report_progress(num_pk3s_done, num_pk3s):
+
+            if num_pk3s_done == 0:
+                window_manager.progress_begin(0, max(1, num_pk3s))
+            window_manager.progress_update(num_pk3s_done)
+            reporter_m.info("Unzipped {} of {} PK3s" \
+                            .format(num_pk3s_done, num_pk3s))
+
         try:
 
-            source_path, target_path = self._parse_input(context)
-            unzip_pks_m.unzip_dir_recursive(source_path, target_path)
+            timer = timer_m.Timer()
+            reporter_m.info("Unzip PK3s started ...")
+
+            source_path, target_path, exts, path_filters, num_threads = \
+                self._parse_input(context)
+            num_extracted, num_up_to_date = \
+                unzip_pks_m.unzip_dir_recursive(source_path,
+                                                target_path,
+                                                exts,
+                                                path_filters,
+                                                num_threads,
+                                                report_progress)
+
+            time = timer.time()
+            reporter_m.info("Unzip PK3s DONE (time={}): {} files extracted,"
+                            " {} up to date" \
+                            .format(time, num_extracted, num_up_to_date))
 
         except Exception as error:
 
@@ -94,6 +154,13 @@ class REMT_OT_UnzipPK3s(bpy.types.Operator):
             self.report({'ERROR'}, error.__str__())
             return {'CANCELLED'}
 
+        finally:
+
+            window_manager.progress_end()
+
+        self.report({'INFO'}, "{} files extracted, {} up to date" \
+                    .format(num_extracted, num_up_to_date))
+
         return {'FINISHED'}
 
 
@@ -122,6 +189,39 @@ def register():
             description="Path to destination directory for extraction",
             subtype='DIR_PATH')
 
+    bpy.types.Scene.remt_unzip_pk3_filter_types = \
+        bpy.props.BoolProperty(
+            name="Filter Types",
+            description="Only extract files of the selected types",
+            default=True)
+
+    bpy.types.Scene.remt_unzip_pk3_types = \
+        bpy.props.EnumProperty(
+            name="Types",
+            description="Types of files to extract",
+            items=[('MODELS', "Models", "MD3, MDC, MDS, MDM/MDX and TAG"),
+                   ('SKINS', "Skins", "Skin files"),
+                   ('SHADERS', "Shaders", "Shader files"),
+                   ('TEXTURES', "Textures", "TGA and JPG")],
+            options={'ENUM_FLAG'},
+            default={'MODELS', 'SKINS', 'SHADERS', 'TEXTURES'})
+
+    bpy.types.Scene.remt_unzip_pk3_path_filter = \
+        bpy.props.StringProperty(
+            name="Path Filter",
+            description="Only extract files whose path starts with one of"
+                " these comma separated paths, for example"
+                " 'models/players,models/weapons2'. Empty for all paths",
+            default="")
+
+    bpy.types.Scene.remt_unzip_pk3_num_threads = \
+        bpy.props.IntProperty(
+            name="Threads",
+            description="Number of PK3s extracted in parallel",
+            default=4,
+            min=1,
+            max=64)
+
 def unregister():
 
     for cls in classes:
@@ -129,3 +229,7 @@ def unregister():
 
     del bpy.types.Scene.remt_unzip_pk3_source_path
     del bpy.types.Scene.remt_unzip_pk3_target_path
+    del bpy.types.Scene.remt_unzip_pk3_filter_types
+    del bpy.types.Scene.remt_unzip_pk3_types
+    del bpy.types.Scene.remt_unzip_pk3_path_filter
+    del bpy.types.Scene.remt_unzip_pk3_num_threads
@@ -0,0 +1,973 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8-80 compliant>
+
+"""Batch conversion.
+
+Converts many models at once without blender, for example all models of a
+mod. The source and target formats are given by name, the conversion itself
+is done by the functions of the direct conversion module.
+
+Usage:
+
+    python -m rtcw_et_model_tools.common.batch_conversion \\
+        --from mds --to mdc --target-dir out --workers 4 etmain
+
+Notes:
+
+    Sources are directories, pk3 files and model files. Directories are
+    walked recursively, pk3 files found on the way are searched as well.
+    Target paths mirror the path of a model relative to its source directory
+    or inside its pk3 file. If the same path is found more than once, the
+    model found last is converted.
+
+    MDM files are paired with the MDX file of the same name, MDM files without
+    one are skipped.
+
+    Models run through a pipeline of three stages: source files are read by
+    a pool of threads, converted by a pool of worker processes and written by
+    the pool of threads. Bounded queues between the stages keep reading ahead
+    of conversion limited, while disks and cpus are busy at the same time.
+
+    Errors are isolated per model: a failed model is listed in the summary
+    and its targets are not written. A worker process which terminates
+    abruptly breaks the pool. The pool is then restarted and the models it
+    was converting are retried one by one on pools of their own, so only the
+    model which caused it fails.
+
+    With a manifest, see Manifest, models are only converted if their inputs,
+    the options or the tool version changed since the last run, or if their
+    targets were touched.
+
+    If the target is a pk3 file, the converted models are added to it as
+    they come from the workers instead of being written to a directory, see
+    PK3Writer. Models are added in the order they were found, so the pk3
+    file does not depend on which conversion finished first. A manifest
+    can't be used then, the pk3 file is written as a whole.
+
+    The event loop, the pools, the manifest and the conversion modules are
+    imported when first used, so the command line starts without loading
+    them.
+"""
+
+import os
+import sys
+import json
+import hashlib
+import zipfile
+import logging
+import argparse
+import traceback
+import collections
+
+import rtcw_et_model_tools.common.timer as timer_m
+import rtcw_et_model_tools.common.reporter as reporter_m
+
+
+formats = collections.OrderedDict([
+    ("md3", (".md3",)),
+    ("mdc", (".mdc",)),
+    ("mds", (".mds",)),
+    ("mdmmdx", (".mdm", ".mdx")),
+])
+
+morph_formats = ("md3", "mdc")
+skeletal_formats = ("mds", "mdmmdx")
+
+
+class BatchOptions:
+    """Options passed along with each conversion.
+
+    Attributes:
+
+        source_format (str): name of the source format, see formats.
+        target_format (str): name of the target format, see formats.
+        collapse_frame (int): collapse frame of MDS and MDM/MDX targets.
+        frame_selection (MDIFrameSelection): frames baked from skeletal
+            sources to morph targets, None for all frames.
+        verbose (bool): log the progress of each conversion.
+    """
+
+    def __init__(self, source_format, target_format, collapse_frame = 0,
+                 frame_selection = None, verbose = False):
+
+        self.source_format = source_format
+        self.target_format = target_format
+        self.collapse_frame = collapse_frame
+        self.frame_selection = frame_selection
+        self.verbose = verbose
+
+    def describe(self):
+        """Returns the options which affect the output.
+        """
+
+        frame_selection = None
+        if self.frame_selection:
+            frame_selection = [self.frame_selection.frame_start,
+                               self.frame_selection.frame_end,
+                               self.frame_selection.frame_step,
+                               self.frame_selection.interpolate]
+
+        return {
+            "source_format": self.source_format,
+            "target_format": self.target_format,
+            "collapse_frame": self.collapse_frame,
+            "frame_selection": frame_selection,
+        }
+
+
+class BatchJob:
+    """Conversion of a single model.
+
+    Attributes:
+
+        name (str): path of the model relative to its source.
+        source_paths (list<str>): file paths, or member names if read from a
+            pk3 file. Two paths for MDM/MDX.
+        target_paths (list<str>): file paths, or member names if written to
+            a pk3 file. Two paths for MDM/MDX.
+        pk3_path (str): path of the pk3 file containing the model, None if not
+            read from a pk3 file.
+        fingerprint (str): fingerprint recorded in the manifest, None if not
+            calculated.
+    """
+
+    def __init__(self, name, source_paths, target_paths, pk3_path = None):
+
+        self.name = name
+        self.source_paths = source_paths
+        self.target_paths = target_paths
+        self.pk3_path = pk3_path
+        self.fingerprint = None
+
+
+class BatchResult:
+    """Outcome of a single conversion.
+
+    Attributes:
+
+        job (BatchJob): the conversion.
+        error (str): error message, None on success.
+        details (str): traceback of the error, None on success.
+        warnings (list<str>): warnings reported during conversion.
+        time (str): time it took.
+    """
+
+    def __init__(self, job, error = None, details = None, warnings = None,
+                 time = ""):
+
+        self.job = job
+        self.error = error
+        self.details = details
+        self.warnings = warnings if warnings else []
+        self.time = time
+
+
+# =====================================
+# finding models
+# =====================================
+
+def _list_files(source_path):
+    """Lists files of a source as tuples of (name, path, pk3_path).
+    """
+
+    def list_pk3(pk3_path):
+
+        with zipfile.ZipFile(pk3_path, 'r') as zip_file:
+
+            for member in zip_file.namelist():
+                if not member.endswith("/"):
+                    yield (member, member, pk3_path)
+
+    if os.path.isdir(source_path):
+
+        for root, dir_names, file_names in os.walk(source_path):
+
+            dir_names.sort()
+            for file_name in sorted(file_names):
+
+                file_path = os.path.join(root, file_name)
+                if file_name.lower().endswith(".pk3"):
+                    yield from list_pk3(file_path)
+                else:
+                    name = os.path.relpath(file_path, source_path)
+                    yield (name.replace(os.sep, "/"), file_path, None)
+
+    elif os.path.isfile(source_path):
+
+        if source_path.lower().endswith(".pk3"):
+            yield from list_pk3(source_path)
+        else:
+            yield (os.path.basename(source_path), source_path, None)
+
+    else:
+
+        raise Exception("Source not found: {}".format(source_path))
+
+def _to_target_path(target_dir, name):
+    """Maps a name to a path inside the target directory. Names read from pk3
+    files can't escape it. Without target directory the name is mapped to a
+    pk3 member name.
+    """
+
+    parts = [part for part in name.split("/") if part not in ("", ".", "..")]
+    if target_dir is None:
+        return "/".join(parts)
+
+    return os.path.join(target_dir, *parts)
+
+def find_jobs(source_paths, target_dir, source_format, target_format):
+    """Finds the models of the source format and lists their conversions.
+
+    Args:
+
+        source_paths (list<str>): directories, pk3 files or model files.
+        target_dir (str): directory the converted models are written to,
+            None for target paths which are pk3 member names.
+        source_format (str): name of the source format.
+        target_format (str): name of the target format.
+
+    Returns:
+
+        jobs (list<BatchJob>): conversions in the order the models were
+            found.
+        skipped (list<str>): names of models which can't be converted.
+    """
+
+    source_exts = formats[source_format]
+    target_exts = formats[target_format]
+
+    # name without extension => {ext: (name, path, pk3_path)}
+    found = collections.OrderedDict()
+    for source_path in source_paths:
+
+        for name, file_path, pk3_path in _list_files(source_path):
+
+            stem, ext = os.path.splitext(name)
+            ext = ext.lower()
+            if ext in source_exts:
+
+                # MDM and MDX must be read from the same pk3 file
+                pk3_key = pk3_path if len(source_exts) > 1 else None
+                key = (stem.lower(), pk3_key)
+                found.setdefault(key, {})[ext] = (name, file_path, pk3_path)
+
+    jobs = collections.OrderedDict()
+    skipped = []
+    for (stem, _), files in found.items():
+
+        if len(files) < len(source_exts):
+
+            skipped.extend(name for name, _, _ in files.values())
+            continue
+
+        name, _, pk3_path = files[source_exts[0]]
+        source_paths = [files[ext][1] for ext in source_exts]
+        stem_path = _to_target_path(target_dir, os.path.splitext(name)[0])
+        target_paths = [stem_path + ext for ext in target_exts]
+
+        jobs.pop(stem, None)
+        jobs[stem] = BatchJob(name, source_paths, target_paths, pk3_path)
+
+    return (list(jobs.values()), skipped)
+
+# =====================================
+# incremental conversion
+# =====================================
+
+def _get_tool_version():
+
+    import rtcw_et_model_tools
+
+    version = rtcw_et_model_tools.bl_info["version"]
+    return ".".join(str(number) for number in version)
+
+def calc_fingerprint(job, options, manifest, zip_files):
+    """Calculates a hash over the content of the inputs, the options and the
+    tool version.
+
+    Args:
+
+        job (BatchJob): the conversion.
+        options (BatchOptions): options of the conversion.
+        manifest (Manifest): caches content hashes of the inputs.
+        zip_files (dict): open pk3 files by path, filled as needed.
+
+    Returns:
+
+        fingerprint (str): sha256 hex digest.
+    """
+
+    input_hashes = []
+    for source_path in job.source_paths:
+
+        if job.pk3_path:
+
+            pk3_path = os.path.abspath(job.pk3_path)
+            if pk3_path not in zip_files:
+                zip_files[pk3_path] = zipfile.ZipFile(pk3_path, 'r')
+            zip_file = zip_files[pk3_path]
+
+            input_key = "{}:{}".format(pk3_path, source_path)
+            input_hash = manifest.hash_input(
+                input_key, pk3_path,
+                lambda: zip_file.open(source_path, 'r'))
+
+        else:
+
+            file_path = os.path.abspath(source_path)
+            input_hash = manifest.hash_input(
+                file_path, file_path,
+                lambda: open(file_path, 'rb'))
+
+        input_hashes.append(input_hash)
+
+    description = json.dumps([_get_tool_version(),
+                              options.describe(),
+                              input_hashes],
+                             sort_keys=True)
+
+    return hashlib.sha256(description.encode("utf-8")).hexdigest()
+
+def filter_jobs(jobs, options, manifest, force = False):
+    """Calculates the fingerprint of each job and sorts out the jobs which
+    are up to date.
+
+    Args:
+
+        jobs (list<BatchJob>): conversions.
+        options (BatchOptions): options of all conversions.
+        manifest (Manifest): the manifest of previous runs.
+        force (bool): keep all jobs, only calculate fingerprints.
+
+    Returns:
+
+        outdated (list<BatchJob>): jobs which need to run.
+        up_to_date (list<BatchJob>): jobs which can be skipped.
+    """
+
+    outdated = []
+    up_to_date = []
+
+    zip_files = {}
+    try:
+
+        for job in jobs:
+
+            job.fingerprint = \
+                calc_fingerprint(job, options, manifest, zip_files)
+
+            if not force and \
+               manifest.is_up_to_date(job.target_paths, job.fingerprint):
+                up_to_date.append(job)
+            else:
+                outdated.append(job)
+
+    finally:
+
+        for zip_file in zip_files.values():
+            zip_file.close()
+
+    return (outdated, up_to_date)
+
+# =====================================
+# converting models
+# =====================================
+
+def convert_files(source_paths, target_paths, options):
+    """Calls the direct conversion function of the formats.
+
+    Args:
+
+        source_paths (list<str>): source files, two for MDM/MDX.
+        target_paths (list<str>): target files, two for MDM/MDX.
+        options (BatchOptions): options of the conversion.
+    """
+
+    import rtcw_et_model_tools.common.direct_conversion as dc_m
+
+    function_name = "{}_to_{}".format(options.source_format,
+                                      options.target_format)
+    convert = getattr(dc_m, function_name)
+
+    args = list(source_paths) + list(target_paths)
+    if options.target_format in skeletal_formats:
+        args.append(options.collapse_frame)
+    elif options.source_format in skeletal_formats:
+        args.append(options.frame_selection)
+
+    convert(*args)
+
+def convert_datas(source_datas, options, name=None):
+    """Converts the content of source files to the content of target files
+    in memory, the same way as convert_files.
+
+    Args:
+
+        source_datas (list<bytes>): content of the source files, two for
+            MDM/MDX.
+        options (BatchOptions): options of the conversion.
+        name (str): file name of the model, used if the model has no name.
+
+    Returns:
+
+        target_datas (list<bytes>): content of the target files, two for
+            MDM/MDX.
+    """
+
+    import importlib
+
+    source_format = options.source_format
+    target_format = options.target_format
+
+    if source_format in morph_formats and target_format in skeletal_formats:
+        raise Exception("{} to {} conversion not supported." \
+                        .format(source_format.upper(),
+                                target_format.upper()))
+
+    def import_facade(format_name):
+
+        return importlib.import_module(
+            "rtcw_et_model_tools.{}.facade".format(format_name))
+
+    # the collapse map is taken over from the source, collapse_frame unused
+    if source_format == "mds" and target_format == "mdmmdx":
+        return list(import_facade("mdmmdx").transcode_mds_bytes(
+            source_datas[0], name))
+
+    bind_frame = 0
+    if source_format == "mdmmdx":
+        mdi_model = import_facade(source_format).read_bytes(
+            source_datas[0], source_datas[1], bind_frame, name)
+    else:
+        mdi_model = import_facade(source_format).read_bytes(
+            source_datas[0], bind_frame, name)
+
+    if source_format in skeletal_formats and \
+       target_format in morph_formats and options.frame_selection:
+        mdi_model.select_frames(options.frame_selection)
+
+    target_facade = import_facade(target_format)
+    if target_format in skeletal_formats:
+        target_datas = target_facade.write_bytes(mdi_model,
+                                                 options.collapse_frame)
+    else:
+        target_datas = target_facade.write_bytes(mdi_model)
+
+    if isinstance(target_datas, bytes):
+        return [target_datas]
+
+    return list(target_datas)
+
+def _read_sources(job):
+    """I/O stage: reads the content of the source files.
+    """
+
+    if job.pk3_path:
+        with zipfile.ZipFile(job.pk3_path, 'r') as zip_file:
+            return [zip_file.read(member) for member in job.source_paths]
+
+    source_datas = []
+    for source_path in job.source_paths:
+        with open(source_path, 'rb') as file:
+            source_datas.append(file.read())
+
+    return source_datas
+
+def _convert_sources(job, source_datas, options):
+    """CPU stage: converts the content of the source files to the content of
+    the target files. Runs on a worker process, errors are returned, not
+    raised.
+
+    Notes:
+
+        The formats are read from and written to memory, see convert_datas.
+    """
+
+    reporter_m.reset_state()
+    timer = timer_m.Timer()
+
+    target_datas = None
+    error = None
+    details = None
+    try:
+
+        name = os.path.basename(job.source_paths[0])
+        target_datas = convert_datas(source_datas, options, name)
+
+    except Exception as exception:
+
+        error = str(exception) or type(exception).__name__
+        details = traceback.format_exc()
+
+    result = BatchResult(job, error, details,
+                         list(reporter_m.get_warnings()), timer.time())
+
+    return (target_datas, result)
+
+def _write_targets(job, target_datas):
+    """I/O stage: writes the content of the target files. Each file is
+    replaced at once, so it is never left partially written.
+    """
+
+    for target_path, target_data in zip(job.target_paths, target_datas):
+
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+
+        temp_path = "{}.tmp".format(target_path)
+        try:
+            with open(temp_path, 'wb') as file:
+                file.write(target_data)
+            os.replace(temp_path, target_path)
+        finally:
+            if os.path.isfile(temp_path):
+                os.remove(temp_path)
+
+def _add_targets(pk3_writer, job, target_datas):
+    """I/O stage: adds the content of the target files to the pk3 file.
+    """
+
+    for target_path, target_data in zip(job.target_paths, target_datas):
+        pk3_writer.add(target_path, target_data)
+
+def _init_worker(verbose):
+
+    reporter_m.init()
+    if not verbose:
+        reporter_m.remt_logger.setLevel(logging.ERROR)
+
+def _to_failed_result(job, exception):
+
+    error = str(exception) or type(exception).__name__
+    details = "".join(traceback.format_exception(type(exception), exception,
+                                                 exception.__traceback__))
+    return BatchResult(job, error, details)
+
+async def _run_pipeline(jobs, options, num_workers, num_io_threads,
+                        callback, pk3_writer):
+    """Runs the stages read, convert and write concurrently. The stages are
+    connected by bounded queues, so a stage which runs ahead blocks until the
+    next stage catches up.
+    """
+
+    import asyncio
+    import concurrent.futures
+
+    loop = asyncio.get_event_loop()
+
+    def create_process_pool(max_workers):
+
+        return concurrent.futures.ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_worker,
+            initargs=(options.verbose,))
+
+    thread_pool = concurrent.futures.ThreadPoolExecutor(num_io_threads)
+    process_pools = [create_process_pool(num_workers)]
+
+    read_queue = asyncio.Queue()
+    for job in jobs:
+        read_queue.put_nowait(job)
+    convert_queue = asyncio.Queue(maxsize=num_workers)
+    write_queue = asyncio.Queue(maxsize=num_workers)
+
+    results = []
+    def finish(result):
+
+        results.append(result)
+        if callback:
+            callback(result)
+
+    async def fail(result):
+
+        # the pk3 stage needs to know about each job to keep the order
+        if pk3_writer:
+            await write_queue.put((None, result))
+        else:
+            finish(result)
+
+    async def convert(job, source_datas):
+
+        process_pool = process_pools[0]
+        try:
+            return await loop.run_in_executor(process_pool, _convert_sources,
+                                              job, source_datas, options)
+        except concurrent.futures.process.BrokenProcessPool:
+            if process_pools[0] is process_pool:
+                process_pool.shutdown(wait=False)
+                process_pools[0] = create_process_pool(num_workers)
+
+        # retry on a pool of its own, a crash there is caused by this model
+        isolated_pool = create_process_pool(1)
+        try:
+            return await loop.run_in_executor(isolated_pool, _convert_sources,
+                                              job, source_datas, options)
+        except concurrent.futures.process.BrokenProcessPool:
+            return (None,
+                    BatchResult(job, "Worker process terminated abruptly."))
+        finally:
+            isolated_pool.shutdown(wait=False)
+
+    async def read_stage():
+
+        while not read_queue.empty():
+
+            job = read_queue.get_nowait()
+            try:
+                source_datas = await loop.run_in_executor(
+                    thread_pool, _read_sources, job)
+            except Exception as exception:
+                await fail(_to_failed_result(job, exception))
+                continue
+
+            await convert_queue.put((job, source_datas))
+
+    async def convert_stage():
+
+        while True:
+
+            item = await convert_queue.get()
+            if item is None:
+                return
+
+            job, source_datas = item
+            target_datas, result = await convert(job, source_datas)
+            if result.error:
+                await fail(result)
+                continue
+
+            await write_queue.put((target_datas, result))
+
+    async def write_stage():
+
+        while True:
+
+            item = await write_queue.get()
+            if item is None:
+                return
+
+            target_datas, result = item
+            try:
+                await loop.run_in_executor(thread_pool, _write_targets,
+                                           result.job, target_datas)
+            except Exception as exception:
+                result = _to_failed_result(result.job, exception)
+
+            finish(result)
+
+    async def pk3_stage():
+
+        job_numbers = {job.name: num_job for num_job, job in enumerate(jobs)}
+
+        # results which arrived before the results of earlier jobs
+        arrived = {}
+        num_next_job = 0
+        while True:
+
+            item = await write_queue.get()
+            if item is None:
+                return
+
+            arrived[job_numbers[item[1].job.name]] = item
+            while num_next_job in arrived:
+
+                target_datas, result = arrived.pop(num_next_job)
+                num_next_job += 1
+
+                if not result.error:
+                    try:
+                        await loop.run_in_executor(thread_pool, _add_targets,
+                                                   pk3_writer, result.job,
+                                                   target_datas)
+                    except Exception as exception:
+                        result = _to_failed_result(result.job, exception)
+
+                finish(result)
+
+    try:
+
+        if pk3_writer:
+            writers = [asyncio.ensure_future(pk3_stage())]
+        else:
+            writers = [asyncio.ensure_future(write_stage())
+                       for _ in range(num_io_threads)]
+        converters = [asyncio.ensure_future(convert_stage())
+                      for _ in range(num_workers)]
+        readers = [asyncio.ensure_future(read_stage())
+                   for _ in range(num_io_threads)]
+
+        await asyncio.gather(*readers)
+        for _ in converters:
+            await convert_queue.put(None)
+        await asyncio.gather(*converters)
+        for _ in writers:
+            await write_queue.put(None)
+        await asyncio.gather(*writers)
+
+    finally:
+
+        process_pools[0].shutdown(wait=True)
+        thread_pool.shutdown(wait=True)
+
+    return results
+
+def run(jobs, options, num_workers = 1, callback = None, num_io_threads = 4,
+        pk3_writer = None):
+    """Converts models in a pipeline, which reads and writes files on a pool
+    of threads and converts models on a pool of worker processes.
+
+    Args:
+
+        jobs (list<BatchJob>): conversions.
+        options (BatchOptions): options of all conversions.
+        num_workers (int): number of worker processes.
+        callback (function): called with each BatchResult as it arrives.
+        num_io_threads (int): number of threads reading and writing files.
+        pk3_writer (PK3Writer): pk3 file the targets are added to in the
+            order of the jobs, target paths are member names. None to write
+            the targets to files.
+
+    Returns:
+
+        results (list<BatchResult>): results in the order they arrived, or in
+            the order of the jobs if written to a pk3 file.
+    """
+
+    num_workers = max(1, num_workers)
+    num_io_threads = max(1, num_io_threads)
+
+    import asyncio
+
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(
+            _run_pipeline(jobs, options, num_workers, num_io_threads,
+                          callback, pk3_writer))
+    finally:
+        loop.close()
+
+# =====================================
+# command line
+# =====================================
+
+def write_report(results, skipped, up_to_date, report_path):
+    """Writes the results to a json file.
+    """
+
+    report = {
+        "converted": sum(1 for result in results if not result.error),
+        "failed": sum(1 for result in results if result.error),
+        "skipped": skipped,
+        "up_to_date": [job.name for job in up_to_date],
+        "models": [{
+            "name": result.job.name,
+            "pk3": result.job.pk3_path,
+            "targets": result.job.target_paths,
+            "error": result.error,
+            "details": result.details,
+            "warnings": result.warnings,
+            "time": result.time,
+        } for result in results]
+    }
+
+    with open(report_path, 'w') as file:
+        json.dump(report, file, indent=2)
+
+def _is_pk3_target(target_dir):
+
+    return target_dir.lower().endswith(".pk3") and \
+        not os.path.isdir(target_dir)
+
+def _parse_args(argv):
+
+    parser = argparse.ArgumentParser(
+        prog="python -m rtcw_et_model_tools.common.batch_conversion",
+        description="Convert models found in directories and pk3 files"
+            " without blender.")
+    parser.add_argument("sources", nargs="+",
+                        help="directories, pk3 files or model files")
+    parser.add_argument("--from", dest="source_format", required=True,
+                        choices=list(formats.keys()),
+                        help="format of the models to convert")
+    parser.add_argument("--to", dest="target_format", required=True,
+                        choices=list(formats.keys()),
+                        help="format to convert to")
+    parser.add_argument("-o", "--target-dir", required=True,
+                        help="directory the converted models are written to,"
+                            " or a pk3 file they are added to")
+    parser.add_argument("-j", "--workers", type=int,
+                        default=os.cpu_count() or 1,
+                        help="number of worker processes (default: number"
+                            " of cpus)")
+    parser.add_argument("--io-threads", type=int, default=4,
+                        help="number of threads reading and writing files")
+    parser.add_argument("--collapse-frame", type=int, default=0,
+                        help="collapse frame of MDS and MDM/MDX targets")
+    parser.add_argument("--frame-start", type=int, default=0,
+                        help="first frame baked from skeletal animation")
+    parser.add_argument("--frame-end", type=int, default=-1,
+                        help="last frame baked from skeletal animation, -1"
+                            " for the last frame")
+    parser.add_argument("--frame-step", type=float, default=1.0,
+                        help="distance between baked frames")
+    parser.add_argument("--frame-interpolate", action="store_true",
+                        help="blend frames for fractional frame steps")
+    parser.add_argument("--manifest",
+                        help="manifest file of previous runs, only models"
+                            " which changed since are converted")
+    parser.add_argument("--force", action="store_true",
+                        help="convert all models, even if the manifest"
+                            " lists them as up to date")
+    parser.add_argument("--report",
+                        help="write the results to this json file")
+    parser.add_argument("-v", "--verbose", action="store_true",
+                        help="log the progress of each conversion")
+
+    args = parser.parse_args(argv)
+
+    if args.source_format in morph_formats and \
+       args.target_format in skeletal_formats:
+        parser.error("conversion of {} to {} not supported" \
+                     .format(args.source_format, args.target_format))
+
+    if _is_pk3_target(args.target_dir) and args.manifest:
+        parser.error("--manifest can't be used with a pk3 target")
+
+    return args
+
+def main(argv = None):
+    """Command line entry point.
+
+    Returns:
+
+        exit_code (int): 0 if all models were converted, 1 otherwise.
+    """
+
+    args = _parse_args(argv)
+
+    reporter_m.init()
+    timer = timer_m.Timer()
+
+    try:
+
+        frame_selection = None
+        if args.source_format in skeletal_formats and \
+           args.target_format in morph_formats:
+
+            import rtcw_et_model_tools.mdi.mdi as mdi_m
+
+            frame_selection = \
+                mdi_m.MDIFrameSelection(args.frame_start, args.frame_end,
+                                        args.frame_step,
+                                        args.frame_interpolate)
+
+        options = BatchOptions(args.source_format, args.target_format,
+                               args.collapse_frame, frame_selection,
+                               args.verbose)
+
+        target_dir = args.target_dir
+        if _is_pk3_target(target_dir):
+            target_dir = None
+
+        jobs, skipped = find_jobs(args.sources, target_dir,
+                                  args.source_format, args.target_format)
+
+        manifest = None
+        up_to_date = []
+        if args.manifest:
+
+            import rtcw_et_model_tools.common.manifest as manifest_m
+
+            manifest = manifest_m.Manifest(args.manifest)
+            jobs, up_to_date = \
+                filter_jobs(jobs, options, manifest, args.force)
+
+    except Exception as error:
+
+        reporter_m.exception(error)
+        return 1
+
+    reporter_m.info("Batch conversion of {} models started ({} up to"
+                    " date) ...".format(len(jobs), len(up_to_date)))
+    for name in skipped:
+        reporter_m.warning("Skipped {}: no matching file found" \
+                           .format(name))
+
+    num_results = 0
+    def log_result(result):
+
+        nonlocal num_results
+        num_results += 1
+        progress = "[{}/{}] {}".format(num_results, len(jobs),
+                                       result.job.name)
+
+        for warning in result.warnings:
+            reporter_m.warning("{}: {}".format(progress, warning))
+
+        if result.error:
+            reporter_m.warning("{} FAILED: {}".format(progress, result.error))
+            if args.verbose and result.details:
+                reporter_m.debug(result.details)
+        else:
+            reporter_m.info("{} (time={})".format(progress, result.time))
+
+        if manifest:
+            if result.error:
+                manifest.remove(result.job.target_paths)
+            else:
+                manifest.update(result.job.target_paths,
+                                result.job.fingerprint)
+
+    pk3_writer = None
+    if target_dir is None:
+
+        import rtcw_et_model_tools.common.pk3_writer as pk3_writer_m
+
+        pk3_writer = pk3_writer_m.PK3Writer(args.target_dir)
+
+    try:
+        results = run(jobs, options, args.workers, log_result,
+                      args.io_threads, pk3_writer)
+        if pk3_writer:
+            pk3_writer.close()
+    finally:
+        if pk3_writer:
+            pk3_writer.abort()
+        if manifest:
+            manifest.close()
+
+    if args.report:
+        write_report(results, skipped, up_to_date, args.report)
+
+    failed = [result for result in results if result.error]
+    reporter_m.info("Batch conversion DONE (time={}): {} converted, {}"
+                    " failed, {} skipped, {} up to date" \
+                    .format(timer.time(), len(results) - len(failed),
+                            len(failed), len(skipped), len(up_to_date)))
+    for result in failed:
+        reporter_m.info("  FAILED {}: {}".format(result.job.name,
+                                                 result.error))
+
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+
+    # worker processes need to find the module by its name, not as __main__
+    import rtcw_et_model_tools.common.batch_conversion as batch_conversion_m
+    sys.exit(batch_conversion_m.main())
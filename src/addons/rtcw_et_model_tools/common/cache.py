@@ -0,0 +1,141 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8-80 compliant>
+
+"""Memory bounded least recently used cache.
+"""
+
+import collections
+
+
+class LRUCache:
+    """Least recently used cache bounded by the total size of its entries.
+
+    Attributes:
+
+        max_size (int): upper bound for the total size of all entries in
+            bytes.
+        size (int): total size of all entries in bytes.
+        hits (int): number of successful lookups.
+        misses (int): number of failed lookups.
+
+    Notes:
+
+        The size of an entry is given by the caller when the entry is added,
+        since only the caller knows how to estimate it. Entries larger than
+        max_size are not cached at all.
+    """
+
+    def __init__(self, max_size):
+
+        self.max_size = max_size
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+        self._entries = collections.OrderedDict()  # key: (value, size)
+
+    def __len__(self):
+
+        return len(self._entries)
+
+    def __contains__(self, key):
+
+        return key in self._entries
+
+    def get(self, key, default = None):
+        """Looks up an entry and marks it as most recently used.
+
+        Args:
+
+            key (hashable): key of the entry.
+            default (object): returned if there is no entry for key.
+
+        Returns:
+
+            value (object): value of the entry or default.
+        """
+
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+
+        return entry[0]
+
+    def put(self, key, value, size):
+        """Adds or replaces an entry, then evicts least recently used entries
+        until the size bound holds again.
+
+        Args:
+
+            key (hashable): key of the entry.
+            value (object): value of the entry.
+            size (int): estimated size of the entry in bytes.
+        """
+
+        self.remove(key)
+
+        if size > self.max_size:
+            return
+
+        self._entries[key] = (value, size)
+        self.size += size
+
+        self._evict()
+
+    def remove(self, key):
+        """Removes an entry if present.
+
+        Args:
+
+            key (hashable): key of the entry.
+        """
+
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry[1]
+
+    def resize(self, max_size):
+        """Changes the size bound, evicting entries if necessary.
+
+        Args:
+
+            max_size (int): upper bound for the total size in bytes.
+        """
+
+        self.max_size = max_size
+        self._evict()
+
+    def clear(self):
+        """Removes all entries.
+        """
+
+        self._entries.clear()
+        self.size = 0
+
+    def _evict(self):
+
+        while self.size > self.max_size and self._entries:
+
+            _, (_, size) = self._entries.popitem(last = False)
+            self.size -= size
@@ -31,10 +31,10 @@
 
 # TODO use set and switch from camelCase
 
-import mathutils
-
 import logging
 
+import rtcw_et_model_tools.common.math_backend as math_backend_m
+
 vertices = []
 triangles = []
 
@@ -183,7 +183,7 @@ class CMVertex:
 
     def __init__(self, v, id):
 
-        self.position = mathutils.Vector((v[0], v[1], v[2])) # location of point in euclidean space
+        self.position = math_backend_m.Vector((v[0], v[1], v[2])) # location of point in euclidean space
         self.id = id # place of vertex in original Array
         vertices.append(self)
 
@@ -0,0 +1,540 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8-80 compliant>
+
+"""Conversion daemon.
+
+Serves conversions to build systems over a unix domain socket, so they don't
+pay interpreter start-up, module imports and cold caches for each model.
+
+Usage:
+
+    python -m rtcw_et_model_tools.common.conversion_daemon \\
+        --socket /tmp/remt.sock --workers 4
+
+Protocol:
+
+    Requests and responses are JSON objects, one per line, UTF-8 encoded. A
+    connection can send any number of requests. Requests are served
+    concurrently, so responses can arrive out of order. They carry the "id"
+    of their request.
+
+    {"id": 1, "op": "convert", "source_format": "mds", "target_format": "mdc",
+     "sources": ["/abs/body.mds"], "targets": ["/abs/body.mdc"],
+     "collapse_frame": 0, "frame_selection": {"frame_start": 0,
+     "frame_end": -1, "frame_step": 1.0, "interpolate": false}}
+
+        Formats are named as in the batch conversion. MDM/MDX takes two
+        sources or targets (MDM first). Paths must be absolute.
+        collapse_frame and frame_selection are optional.
+
+    {"id": 2, "op": "probe", "path": "/abs/body.mds"}
+
+        Detects the format of a model file and returns its header.
+
+    {"id": 3, "op": "stats"}, {"id": 4, "op": "ping"}
+
+        Counters of the daemon, and a liveness check.
+
+    {"id": 5, "op": "shutdown"}
+
+        Stops accepting requests, finishes the requests in progress, then
+        exits. SIGINT and SIGTERM do the same.
+
+    Responses are {"id": ..., "ok": true, "result": {...}} or
+    {"id": ..., "ok": false, "error": "..."}.
+
+Notes:
+
+    Conversions run on a pool of worker processes which live as long as the
+    daemon. Modules are imported once per worker and the caches of the
+    formats, for example normal tables and decoded skeletons, stay warm
+    across requests.
+
+    At most max_pending conversions are queued or running at a time,
+    requests beyond that are answered with an error right away, so clients
+    can back off.
+"""
+
+import os
+import sys
+import json
+import socket
+import signal
+import asyncio
+import logging
+import argparse
+import importlib
+import concurrent.futures
+
+import rtcw_et_model_tools.common.timer as timer_m
+import rtcw_et_model_tools.common.reporter as reporter_m
+import rtcw_et_model_tools.common.batch_conversion as batch_conversion_m
+
+
+# (format name, module, header class), probed by the ident of the header
+probe_formats = [
+    ("md3", "rtcw_et_model_tools.md3._md3", "MD3Header"),
+    ("mdc", "rtcw_et_model_tools.mdc._mdc", "MDCHeader"),
+    ("mds", "rtcw_et_model_tools.mds._mds", "MDSHeader"),
+    ("mdm", "rtcw_et_model_tools.mdmmdx._mdm", "MDMHeader"),
+    ("mdx", "rtcw_et_model_tools.mdmmdx._mdx", "MDXHeader"),
+    ("tag", "rtcw_et_model_tools.tag._tag", "TAGHeader"),
+]
+
+
+# =====================================
+# worker processes
+# =====================================
+
+def _init_worker(verbose):
+
+    reporter_m.init()
+    if not verbose:
+        reporter_m.remt_logger.setLevel(logging.ERROR)
+
+    # imported once, caches of the formats live as long as the worker
+    import rtcw_et_model_tools.common.direct_conversion
+
+def _convert(request):
+    """Converts the model of a convert request.
+    """
+
+    import rtcw_et_model_tools.mdi.mdi as mdi_m
+
+    reporter_m.reset_state()
+    timer = timer_m.Timer()
+
+    frame_selection = None
+    frame_selection_request = request.get("frame_selection")
+    if frame_selection_request:
+        frame_selection = \
+            mdi_m.MDIFrameSelection(**frame_selection_request)
+
+    options = batch_conversion_m.BatchOptions(
+        request["source_format"],
+        request["target_format"],
+        request.get("collapse_frame", 0),
+        frame_selection)
+
+    for target_path in request["targets"]:
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+
+    batch_conversion_m.convert_files(request["sources"], request["targets"],
+                                     options)
+
+    return {"warnings": list(reporter_m.get_warnings()),
+            "time": timer.time()}
+
+def _probe(path):
+    """Detects the format of a model file and reads its header.
+    """
+
+    with open(path, 'rb') as file:
+
+        ident = file.read(4)
+
+        for format_name, module_name, class_name in probe_formats:
+
+            header_class = \
+                getattr(importlib.import_module(module_name), class_name)
+            if ident == header_class.ident:
+                header = header_class.read(file, 0)
+                break
+
+        else:
+
+            raise Exception("Unknown model format")
+
+    fields = {}
+    for name, value in vars(header).items():
+
+        if isinstance(value, bytes):
+            value = value.split(b'\0', 1)[0].decode('latin-1')
+        if isinstance(value, (int, float, str)):
+            fields[name] = value
+
+    return {"format": format_name,
+            "size": os.path.getsize(path),
+            "header": fields}
+
+# =====================================
+# daemon
+# =====================================
+
+def _check_convert_request(request):
+
+    formats = batch_conversion_m.formats
+
+    source_format = request.get("source_format")
+    target_format = request.get("target_format")
+    if source_format not in formats or target_format not in formats:
+        raise Exception("Unknown format")
+
+    if source_format in batch_conversion_m.morph_formats and \
+       target_format in batch_conversion_m.skeletal_formats:
+        raise Exception("Conversion of {} to {} not supported." \
+                        .format(source_format, target_format))
+
+    sources = request.get("sources")
+    targets = request.get("targets")
+    if not isinstance(sources, list) or \
+       len(sources) != len(formats[source_format]):
+        raise Exception("Expected {} sources" \
+                        .format(len(formats[source_format])))
+    if not isinstance(targets, list) or \
+       len(targets) != len(formats[target_format]):
+        raise Exception("Expected {} targets" \
+                        .format(len(formats[target_format])))
+
+    for path in sources + targets:
+        if not isinstance(path, str) or not os.path.isabs(path):
+            raise Exception("Paths must be absolute: {}".format(path))
+
+
+class ConversionDaemon:
+    """Serves conversion requests over a unix domain socket.
+
+    Attributes:
+
+        socket_path (str): path of the socket.
+        num_workers (int): number of worker processes.
+        max_pending (int): number of conversions queued or running at most.
+        verbose (bool): log the progress of each conversion.
+        num_pending (int): number of conversions queued or running.
+        num_served (int): number of requests answered.
+        num_failed (int): number of requests answered with an error.
+    """
+
+    def __init__(self, socket_path, num_workers = 1, max_pending = 64,
+                 verbose = False):
+
+        self.socket_path = socket_path
+        self.num_workers = max(1, num_workers)
+        self.max_pending = max(1, max_pending)
+        self.verbose = verbose
+
+        self.num_pending = 0
+        self.num_served = 0
+        self.num_failed = 0
+
+        self._executor = None
+        self._server = None
+        self._stopping = None
+        self._tasks = set()  # requests in progress
+        self._connections = {}  # connection task => writer
+        self._timer = None
+
+    def _create_executor(self):
+
+        return concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.num_workers,
+            initializer=_init_worker,
+            initargs=(self.verbose,))
+
+    def _remove_stale_socket(self):
+        """Removes the socket file of a daemon which is not running anymore.
+        """
+
+        if not os.path.exists(self.socket_path):
+            return
+
+        probe_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe_socket.connect(self.socket_path)
+        except OSError:
+            os.remove(self.socket_path)
+        else:
+            raise Exception("Daemon already running on {}" \
+                            .format(self.socket_path))
+        finally:
+            probe_socket.close()
+
+    async def _convert(self, request):
+
+        _check_convert_request(request)
+
+        if self.num_pending >= self.max_pending:
+            raise Exception("Busy, too many pending conversions")
+
+        loop = asyncio.get_event_loop()
+        executor = self._executor
+
+        self.num_pending += 1
+        try:
+            return await loop.run_in_executor(executor, _convert, request)
+        except concurrent.futures.process.BrokenProcessPool:
+            if self._executor is executor:
+                executor.shutdown(wait=False)
+                self._executor = self._create_executor()
+            raise Exception("Worker process terminated abruptly.")
+        finally:
+            self.num_pending -= 1
+
+    async def _serve_request(self, request):
+
+        op = request.get("op")
+
+        if op == "convert":
+            return await self._convert(request)
+
+        elif op == "probe":
+            path = request.get("path")
+            if not isinstance(path, str) or not os.path.isabs(path):
+                raise Exception("Path must be absolute")
+            loop = asyncio.get_event_loop()
+            return await loop.run_in_executor(None, _probe, path)
+
+        elif op == "stats":
+            return {"pid": os.getpid(),
+                    "uptime": self._timer.time(),
+                    "num_workers": self.num_workers,
+                    "max_pending": self.max_pending,
+                    "num_pending": self.num_pending,
+                    "num_served": self.num_served,
+                    "num_failed": self.num_failed}
+
+        elif op == "ping":
+            return {"pid": os.getpid()}
+
+        elif op == "shutdown":
+            self.shutdown()
+            return {}
+
+        else:
+            raise Exception("Unknown op: {}".format(op))
+
+    async def _answer(self, line, writer, write_lock):
+
+        request_id = None
+        try:
+
+            request = json.loads(line.decode("utf-8"))
+            if not isinstance(request, dict):
+                raise Exception("Request must be a JSON object")
+            request_id = request.get("id")
+
+            result = await self._serve_request(request)
+            response = {"id": request_id, "ok": True, "result": result}
+
+        except Exception as error:
+
+            self.num_failed += 1
+            response = {"id": request_id, "ok": False,
+                        "error": str(error) or type(error).__name__}
+            if self.verbose:
+                reporter_m.exception(error)
+
+        self.num_served += 1
+
+        async with write_lock:
+            try:
+                writer.write(json.dumps(response).encode("utf-8") + b"\n")
+                await writer.drain()
+            except ConnectionError:
+                pass
+
+    async def _handle_connection(self, reader, writer):
+
+        write_lock = asyncio.Lock()
+        tasks = set()
+
+        connection_task = asyncio.current_task()
+        self._connections[connection_task] = writer
+
+        try:
+
+            while not self._stopping.is_set():
+
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+
+                task = asyncio.ensure_future(
+                    self._answer(line, writer, write_lock))
+                tasks.add(task)
+                self._tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                task.add_done_callback(self._tasks.discard)
+
+            if tasks:
+                await asyncio.gather(*tasks)
+
+        except (ConnectionError, ValueError):
+
+            pass
+
+        finally:
+
+            self._connections.pop(connection_task, None)
+            writer.close()
+
+    def shutdown(self):
+        """Stops accepting requests, requests in progress are finished.
+        """
+
+        if self._stopping and not self._stopping.is_set():
+            reporter_m.info("Conversion daemon shutting down ...")
+            self._stopping.set()
+
+    async def serve(self):
+        """Serves requests until shut down.
+        """
+
+        loop = asyncio.get_event_loop()
+
+        self._timer = timer_m.Timer()
+        self._stopping = asyncio.Event()
+        self._remove_stale_socket()
+        self._executor = self._create_executor()
+
+        for signal_number in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signal_number, self.shutdown)
+
+        try:
+
+            self._server = await asyncio.start_unix_server(
+                self._handle_connection, path=self.socket_path)
+            os.chmod(self.socket_path, 0o600)
+
+            reporter_m.info("Conversion daemon listening on {} (pid={},"
+                            " workers={})" \
+                            .format(self.socket_path, os.getpid(),
+                                    self.num_workers))
+
+            await self._stopping.wait()
+
+            # finish requests in progress, then hang up on idle connections
+            self._server.close()
+            if self._tasks:
+                await asyncio.gather(*self._tasks)
+
+            connections = list(self._connections.items())
+            for _, writer in connections:
+                writer.close()
+            if connections:
+                await asyncio.gather(*[connection_task for connection_task, _
+                                       in connections])
+
+            await self._server.wait_closed()
+
+        finally:
+
+            for signal_number in (signal.SIGINT, signal.SIGTERM):
+                loop.remove_signal_handler(signal_number)
+
+            self._executor.shutdown(wait=True)
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+
+        reporter_m.info("Conversion daemon DONE (uptime={}, requests={})" \
+                        .format(self._timer.time(), self.num_served))
+
+    def run(self):
+
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(self.serve())
+        finally:
+            loop.close()
+
+# =====================================
+# client
+# =====================================
+
+def send_request(socket_path, request, timeout = None):
+    """Sends a single request to a daemon and waits for the response.
+
+    Args:
+
+        socket_path (str): path of the socket of the daemon.
+        request (dict): the request.
+        timeout (float): seconds to wait, None to wait forever.
+
+    Returns:
+
+        response (dict): the response.
+    """
+
+    client_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client_socket.settimeout(timeout)
+
+    try:
+
+        client_socket.connect(socket_path)
+        client_socket.sendall(json.dumps(request).encode("utf-8") + b"\n")
+
+        with client_socket.makefile('rb') as file:
+            line = file.readline()
+
+    finally:
+
+        client_socket.close()
+
+    if not line:
+        raise Exception("Connection closed by daemon")
+
+    return json.loads(line.decode("utf-8"))
+
+# =====================================
+# command line
+# =====================================
+
+def main(argv = None):
+
+    parser = argparse.ArgumentParser(
+        prog="python -m rtcw_et_model_tools.common.conversion_daemon",
+        description="Serve model conversions over a unix domain socket.")
+    parser.add_argument("--socket", required=True,
+                        help="path of the unix domain socket")
+    parser.add_argument("-j", "--workers", type=int,
+                        default=os.cpu_count() or 1,
+                        help="number of worker processes (default: number"
+                            " of cpus)")
+    parser.add_argument("--max-pending", type=int, default=64,
+                        help="number of conversions queued or running at"
+                            " most, more are rejected")
+    parser.add_argument("-v", "--verbose", action="store_true",
+                        help="log the progress of each conversion")
+    args = parser.parse_args(argv)
+
+    if not hasattr(socket, "AF_UNIX"):
+        parser.error("unix domain sockets are not supported on this"
+                     " platform")
+
+    reporter_m.init()
+
+    try:
+        daemon = ConversionDaemon(args.socket, args.workers,
+                                  args.max_pending, args.verbose)
+        daemon.run()
+    except Exception as error:
+        reporter_m.exception(error)
+        return 1
+
+    return 0
+
+if __name__ == "__main__":
+
+    # worker processes need to find the module by its name, not as __main__
+    import rtcw_et_model_tools.common.conversion_daemon as conversion_daemon_m
+    sys.exit(conversion_daemon_m.main())
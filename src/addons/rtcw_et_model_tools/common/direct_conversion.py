@@ -18,19 +18,33 @@
 
 # <pep8-80 compliant>
 
-"Direct Conversion"
+"""Direct Conversion
+
+Notes:
+
+    Conversions of skeletal models to morph models bake every frame of the
+    skeletal animation. An optional MDIFrameSelection limits baking to a
+    range of frames or to every n-th frame. Baking is evaluated frame
+    parallel by num_workers processes.
+
+    MD3 to MD3 conversion can keep frames out of core in scratch files, which
+    bounds memory use for models at the limits of the format.
+"""
 
 # =====================================
 # MD3
 # =====================================
 
-def md3_to_md3(md3_source_path, md3_target_path):
+def md3_to_md3(md3_source_path, md3_target_path, out_of_core=False,
+               scratch_dir=None):
 
     import rtcw_et_model_tools.md3.facade as md3_facade
 
     bind_frame = 0
-    mdi_model = md3_facade.read(md3_source_path, bind_frame)
-    md3_facade.write(mdi_model, md3_target_path)
+    mdi_model = md3_facade.read(md3_source_path, bind_frame,
+                                out_of_core=out_of_core,
+                                scratch_dir=scratch_dir)
+    md3_facade.write(mdi_model, md3_target_path, scratch_dir=scratch_dir)
 
 def md3_to_mdc(md3_source_path, mdc_target_path):
 
@@ -82,23 +96,29 @@ def mdc_to_mdmmdx(mdc_source_path, mdm_target_path, mdx_target_path):
 # MDS
 # =====================================
 
-def mds_to_md3(mds_source_path, md3_target_path):
+def mds_to_md3(mds_source_path, md3_target_path, frame_selection=None,
+               num_workers=1):
 
     import rtcw_et_model_tools.mds.facade as mds_facade
     import rtcw_et_model_tools.md3.facade as md3_facade
 
     bind_frame = 0
     mdi_model = mds_facade.read(mds_source_path, bind_frame)
-    md3_facade.write(mdi_model, md3_target_path)
+    if frame_selection:
+        mdi_model.select_frames(frame_selection)
+    md3_facade.write(mdi_model, md3_target_path, num_workers=num_workers)
 
-def mds_to_mdc(mds_source_path, mdc_target_path):
+def mds_to_mdc(mds_source_path, mdc_target_path, frame_selection=None,
+               num_workers=1):
 
     import rtcw_et_model_tools.mds.facade as mds_facade
     import rtcw_et_model_tools.mdc.facade as mdc_facade
 
     bind_frame = 0
     mdi_model = mds_facade.read(mds_source_path, bind_frame)
-    mdc_facade.write(mdi_model, mdc_target_path)
+    if frame_selection:
+        mdi_model.select_frames(frame_selection)
+    mdc_facade.write(mdi_model, mdc_target_path, num_workers=num_workers)
 
 def mds_to_mds(mds_source_path, mds_target_path, collapse_frame):
 
@@ -111,19 +131,18 @@ def mds_to_mds(mds_source_path, mds_target_path, collapse_frame):
 def mds_to_mdmmdx(mds_source_path, mdm_target_path, mdx_target_path,
                   collapse_frame):
 
-    import rtcw_et_model_tools.mds.facade as mds_facade
     import rtcw_et_model_tools.mdmmdx.facade as mdmmdx_facade
 
-    bind_frame = 0
-    mdi_model = mds_facade.read(mds_source_path, bind_frame)
-    mdmmdx_facade.write(mdi_model, mdm_target_path, mdx_target_path,
-                        collapse_frame)
+    # the collapse map is taken over from the source, collapse_frame unused
+    mdmmdx_facade.transcode_mds(mds_source_path, mdm_target_path,
+                                mdx_target_path)
 
 # =====================================
 # MDM/MDX
 # =====================================
 
-def mdmmdx_to_md3(mdm_source_path, mdx_source_path, md3_target_path):
+def mdmmdx_to_md3(mdm_source_path, mdx_source_path, md3_target_path,
+                  frame_selection=None, num_workers=1):
 
     import rtcw_et_model_tools.mdmmdx.facade as mdmmdx_facade
     import rtcw_et_model_tools.md3.facade as md3_facade
@@ -131,9 +150,12 @@ def mdmmdx_to_md3(mdm_source_path, mdx_source_path, md3_target_path):
     bind_frame = 0
     mdi_model = \
         mdmmdx_facade.read(mdm_source_path, mdx_source_path, bind_frame)
-    md3_facade.write(mdi_model, md3_target_path)
+    if frame_selection:
+        mdi_model.select_frames(frame_selection)
+    md3_facade.write(mdi_model, md3_target_path, num_workers=num_workers)
 
-def mdmmdx_to_mdc(mdm_source_path, mdx_source_path, mdc_target_path):
+def mdmmdx_to_mdc(mdm_source_path, mdx_source_path, mdc_target_path,
+                  frame_selection=None, num_workers=1):
 
     import rtcw_et_model_tools.mdmmdx.facade as mdmmdx_facade
     import rtcw_et_model_tools.mdc.facade as mdc_facade
@@ -141,7 +163,9 @@ def mdmmdx_to_mdc(mdm_source_path, mdx_source_path, mdc_target_path):
     bind_frame = 0
     mdi_model = \
         mdmmdx_facade.read(mdm_source_path, mdx_source_path, bind_frame)
-    mdc_facade.write(mdi_model, mdc_target_path)
+    if frame_selection:
+        mdi_model.select_frames(frame_selection)
+    mdc_facade.write(mdi_model, mdc_target_path, num_workers=num_workers)
 
 def mdmmdx_to_mds(mdm_source_path, mdx_source_path, mds_target_path,
                   collapse_frame):
@@ -0,0 +1,254 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+
+# <pep8-80 compliant>
+
+"""Frame parallel evaluation of per frame stages.
+
+Notes:
+
+    Many stages evaluate each frame independently of all other frames, for
+    example skinning or encoding of frame vertices. A stage is a function
+    which evaluates a contiguous range of frames:
+
+        stage(frame_start, frame_end, inputs, outputs, context)
+
+    It reads from the input arrays and writes the results of its frames to
+    the output arrays. The executor splits the frames into chunks and
+    evaluates them in a pool of worker processes. Input and output arrays are
+    placed in shared memory, so they are neither pickled nor copied per
+    chunk. The context holds anything else the stage needs and is pickled
+    once per chunk, so it should be small.
+
+    Stages run in worker processes, which do not run inside blender. They
+    must be defined at module level of a module that can be imported there.
+    If a worker can't import a stage, the stage is evaluated in this process
+    instead. The serial path evaluates the same stage on the same chunks, so
+    both produce identical output.
+"""
+
+import math
+
+import numpy as np
+
+import rtcw_et_model_tools.common.reporter as reporter_m
+
+
+def _run_chunk(task):
+    """Work unit of a worker process: a range of frames of one stage.
+    """
+
+    from multiprocessing import shared_memory
+
+    stage, frame_start, frame_end, shared_inputs, shared_outputs, context = \
+        task
+
+    shms = []
+    inputs = {}
+    outputs = {}
+    try:
+
+        for arrays, shared_arrays in ((inputs, shared_inputs),
+                                      (outputs, shared_outputs)):
+
+            for key, (name, shape, dtype) in shared_arrays.items():
+
+                shm = shared_memory.SharedMemory(name=name)
+                shms.append(shm)
+
+                arrays[key] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+        stage(frame_start, frame_end, inputs, outputs, context)
+
+    finally:
+
+        # views must be released before the shared memory can be closed
+        inputs.clear()
+        outputs.clear()
+        for shm in shms:
+            shm.close()
+
+    return frame_end - frame_start
+
+
+class FrameExecutor:
+    """Evaluates stages frame parallel. Use as context manager, so the pool
+    of worker processes is shared by all stages evaluated within.
+
+    Attributes:
+
+        num_workers (int): number of worker processes, 1 or less evaluates
+            stages in this process.
+        chunks_per_worker (int): chunks per worker and stage, more chunks
+            balance better, fewer have less overhead.
+    """
+
+    def __init__(self, num_workers = 1, chunks_per_worker = 4):
+
+        self.num_workers = num_workers
+        self.chunks_per_worker = chunks_per_worker
+
+        self._executor = None
+
+    def __enter__(self):
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+
+        self.shutdown()
+
+    def shutdown(self):
+        """Terminates the worker processes, if any were started.
+        """
+
+        if self._executor is not None:
+
+            self._executor.shutdown()
+            self._executor = None
+
+    def is_parallel(self):
+
+        return self.num_workers > 1
+
+    def calc_chunks(self, num_frames):
+        """Splits frames into contiguous chunks.
+
+        Args:
+
+            num_frames (int)
+
+        Returns:
+
+            chunks (list<tuple>): (frame_start, frame_end) of each chunk.
+        """
+
+        num_chunks = max(1, self.num_workers * self.chunks_per_worker)
+        chunk_size = max(1, math.ceil(num_frames / num_chunks))
+
+        chunks = []
+        for frame_start in range(0, num_frames, chunk_size):
+
+            frame_end = min(num_frames, frame_start + chunk_size)
+            chunks.append((frame_start, frame_end))
+
+        return chunks
+
+    def map_frames(self, stage, num_frames, inputs, outputs, context = None):
+        """Evaluates a stage for all frames.
+
+        Args:
+
+            stage (function): stage function, see module notes.
+            num_frames (int): number of frames.
+            inputs (dict<str, numpy.ndarray>): arrays read by the stage.
+            outputs (dict<str, tuple>): shape and dtype of each array written
+                by the stage. Output arrays are zero filled initially.
+            context (object): anything else the stage needs, picklable.
+
+        Returns:
+
+            outputs (dict<str, numpy.ndarray>): arrays written by the stage.
+        """
+
+        chunks = self.calc_chunks(num_frames)
+
+        if self.is_parallel() and len(chunks) > 1:
+
+            try:
+                return self._map_frames_parallel(stage, chunks, inputs,
+                                                 outputs, context)
+            except ImportError as error:
+                reporter_m.warning("Worker processes can't evaluate '{}' ({})."
+                                   " Evaluating it serially."
+                                   .format(stage.__name__, error))
+
+        output_arrays = {}
+        for key, (shape, dtype) in outputs.items():
+            output_arrays[key] = np.zeros(shape, dtype=dtype)
+
+        for frame_start, frame_end in chunks:
+            stage(frame_start, frame_end, inputs, output_arrays, context)
+
+        return output_arrays
+
+    def _map_frames_parallel(self, stage, chunks, inputs, outputs, context):
+
+        import concurrent.futures
+        from multiprocessing import shared_memory
+
+        if self._executor is None:
+            self._executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.num_workers)
+
+        shms = {}
+
+        def to_shared(shape, dtype, array = None):
+
+            dtype = np.dtype(dtype)
+            num_bytes = int(np.prod(shape, dtype=np.int64)) * dtype.itemsize
+
+            shm = shared_memory.SharedMemory(create=True,
+                                             size=max(1, num_bytes))
+            shms[shm.name] = shm
+
+            shared_array = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+            if array is None:
+                shared_array.fill(0)
+            else:
+                shared_array[...] = array
+            del shared_array
+
+            return (shm.name, tuple(shape), dtype)
+
+        try:
+
+            shared_inputs = {}
+            for key, array in inputs.items():
+
+                array = np.asarray(array)
+                shared_inputs[key] = to_shared(array.shape, array.dtype, array)
+
+            shared_outputs = {}
+            for key, (shape, dtype) in outputs.items():
+                shared_outputs[key] = to_shared(shape, dtype)
+
+            tasks = []
+            for frame_start, frame_end in chunks:
+
+                tasks.append((stage, frame_start, frame_end, shared_inputs,
+                              shared_outputs, context))
+
+            for _ in self._executor.map(_run_chunk, tasks):
+                pass
+
+            output_arrays = {}
+            for key, (name, shape, dtype) in shared_outputs.items():
+
+                output_arrays[key] = \
+                    np.ndarray(shape, dtype=dtype,
+                               buffer=shms[name].buf).copy()
+
+        finally:
+
+            for shm in shms.values():
+                shm.close()
+                shm.unlink()
+
+        return output_arrays
@@ -0,0 +1,199 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8-80 compliant>
+
+"""Manifest of converted models.
+
+Notes:
+
+    The manifest is a sqlite database. For each output it records a
+    fingerprint of the conversion, which is a hash over the content of the
+    inputs, the conversion options and the tool version. It also records the
+    size and modification time of the target files. An output is up to date
+    if the fingerprint did not change and the target files were not touched
+    since.
+
+    Content hashes of inputs are cached by path, size and modification time,
+    so unchanged inputs are not read again.
+
+    All lookups are primary key lookups. Each write is a transaction of its
+    own and the database runs in write-ahead log mode, so several processes
+    can read and write the same manifest at once.
+"""
+
+import os
+import json
+import sqlite3
+import hashlib
+
+
+def hash_stream(file, block_size = 1024 * 1024):
+    """Calculates the sha256 hex digest of a file object.
+    """
+
+    hasher = hashlib.sha256()
+
+    block = file.read(block_size)
+    while block:
+        hasher.update(block)
+        block = file.read(block_size)
+
+    return hasher.hexdigest()
+
+
+class Manifest:
+    """Records the fingerprint of each output of a batch conversion.
+
+    Attributes:
+
+        file_path (str): path to the database file.
+        connection (sqlite3.Connection): connection to the database.
+    """
+
+    def __init__(self, file_path, timeout = 60.0):
+
+        self.file_path = file_path
+        self.connection = sqlite3.connect(file_path, timeout=timeout)
+
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+
+        with self.connection:
+
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS outputs ("
+                " target TEXT PRIMARY KEY,"
+                " fingerprint TEXT NOT NULL,"
+                " target_stats TEXT NOT NULL"
+                ") WITHOUT ROWID")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS inputs ("
+                " input TEXT PRIMARY KEY,"
+                " size INTEGER NOT NULL,"
+                " mtime_ns INTEGER NOT NULL,"
+                " hash TEXT NOT NULL"
+                ") WITHOUT ROWID")
+
+    def __enter__(self):
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+
+        self.close()
+
+    def close(self):
+
+        self.connection.close()
+
+    @staticmethod
+    def _to_key(target_paths):
+
+        return os.path.abspath(target_paths[0])
+
+    @staticmethod
+    def _stat_targets(target_paths):
+        """Returns size and modification time of each target, None if a
+        target is missing.
+        """
+
+        target_stats = []
+        for target_path in target_paths:
+
+            try:
+                stat = os.stat(target_path)
+            except OSError:
+                return None
+
+            target_stats.append([stat.st_size, stat.st_mtime_ns])
+
+        return target_stats
+
+    def hash_input(self, input_key, file_path, open_input):
+        """Returns the content hash of an input, which is calculated only if
+        the file containing it changed.
+
+        Args:
+
+            input_key (str): identifies the input.
+            file_path (str): file containing the input, e.g. a pk3 file.
+            open_input (function): returns a binary file object of the input.
+
+        Returns:
+
+            input_hash (str): sha256 hex digest of the content.
+        """
+
+        stat = os.stat(file_path)
+
+        row = self.connection.execute(
+            "SELECT hash FROM inputs"
+            " WHERE input = ? AND size = ? AND mtime_ns = ?",
+            (input_key, stat.st_size, stat.st_mtime_ns)).fetchone()
+        if row:
+            return row[0]
+
+        with open_input() as file:
+            input_hash = hash_stream(file)
+
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO inputs VALUES (?, ?, ?, ?)",
+                (input_key, stat.st_size, stat.st_mtime_ns, input_hash))
+
+        return input_hash
+
+    def is_up_to_date(self, target_paths, fingerprint):
+        """Checks if the targets were written with the same fingerprint and
+        not touched since.
+        """
+
+        row = self.connection.execute(
+            "SELECT fingerprint, target_stats FROM outputs WHERE target = ?",
+            (self._to_key(target_paths),)).fetchone()
+        if not row or row[0] != fingerprint:
+            return False
+
+        target_stats = self._stat_targets(target_paths)
+        return target_stats is not None and \
+               json.loads(row[1]) == target_stats
+
+    def update(self, target_paths, fingerprint):
+        """Records targets which were just written.
+        """
+
+        target_stats = self._stat_targets(target_paths)
+        if target_stats is None:
+            self.remove(target_paths)
+            return
+
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO outputs VALUES (?, ?, ?)",
+                (self._to_key(target_paths), fingerprint,
+                 json.dumps(target_stats)))
+
+    def remove(self, target_paths):
+        """Forgets about targets, e.g. if their conversion failed.
+        """
+
+        with self.connection:
+            self.connection.execute(
+                "DELETE FROM outputs WHERE target = ?",
+                (self._to_key(target_paths),))
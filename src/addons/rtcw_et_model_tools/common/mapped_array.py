@@ -0,0 +1,193 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+
+# <pep8-80 compliant>
+
+"""Arrays kept in files and mapped into memory a block of rows at a time.
+"""
+
+import tempfile
+
+import numpy as np
+
+
+class MappedArray:
+    """Array stored in a file. Rows are accessed through short lived memory
+    mappings, so only the rows in use count towards the resident memory of
+    the process, no matter how large the array is.
+
+    Attributes:
+
+        file (str): path of the file, or file object.
+        shape (tuple): shape of the array, rows first.
+        dtype (numpy.dtype): type of array elements.
+        offset (int): file offset of the first row.
+        mode (str): 'r' for read only, 'r+' for read and write.
+
+    Notes:
+
+        Indexing copies the selected rows out of the file. Rows are written by
+        assigning to a range of rows.
+    """
+
+    # bytes of rows processed at once
+    block_size = 16 * 1024 * 1024
+
+    def __init__(self, file, shape, dtype, offset = 0, mode = 'r'):
+
+        self.file = file
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.offset = offset
+        self.mode = mode
+
+    @staticmethod
+    def create_scratch(shape, dtype, scratch_dir = None):
+        """Creates a zero filled array in a temporary file. The file is removed
+        by the operating system once closed, which happens when the array is
+        garbage collected.
+
+        Args:
+
+            shape (tuple): shape of the array, rows first.
+            dtype (numpy.dtype): type of array elements.
+            scratch_dir (str): directory of the file, None for the default
+                temporary directory.
+
+        Returns:
+
+            mapped_array (MappedArray)
+        """
+
+        mapped_array = MappedArray(tempfile.TemporaryFile(dir=scratch_dir),
+                                   shape, dtype, 0, 'r+')
+        mapped_array.file.truncate(mapped_array.nbytes)
+
+        return mapped_array
+
+    def __len__(self):
+
+        return self.shape[0]
+
+    @property
+    def row_size(self):
+
+        return int(np.prod(self.shape[1:], dtype=np.int64)) * \
+            self.dtype.itemsize
+
+    @property
+    def nbytes(self):
+
+        return self.shape[0] * self.row_size
+
+    def calc_blocks(self, block_size = None):
+        """Splits rows into blocks of bounded size.
+
+        Args:
+
+            block_size (int): bytes of a block, None for the default.
+
+        Returns:
+
+            blocks (list<tuple>): (row_start, row_end) of each block.
+        """
+
+        if block_size is None:
+            block_size = MappedArray.block_size
+
+        block_rows = max(1, block_size // max(1, self.row_size))
+
+        blocks = []
+        for row_start in range(0, self.shape[0], block_rows):
+
+            row_end = min(self.shape[0], row_start + block_rows)
+            blocks.append((row_start, row_end))
+
+        return blocks
+
+    def map(self, row_start, row_end):
+        """Maps a range of rows into memory. Drop the mapping as soon as the
+        rows are processed.
+
+        Args:
+
+            row_start (int)
+            row_end (int)
+
+        Returns:
+
+            rows (numpy.ndarray): numpy.memmap of the rows, shape
+                (row_end - row_start, ...).
+        """
+
+        shape = (row_end - row_start,) + self.shape[1:]
+
+        # empty ranges can't be mapped
+        if shape[0] * self.row_size == 0:
+            return np.zeros(shape, dtype=self.dtype)
+
+        return np.memmap(self.file, dtype=self.dtype, mode=self.mode,
+                         offset=self.offset + row_start * self.row_size,
+                         shape=shape)
+
+    def _to_range(self, index):
+
+        if isinstance(index, slice):
+
+            row_start, row_end, step = index.indices(self.shape[0])
+            if step != 1:
+                raise Exception("Only contiguous rows can be mapped")
+
+            return (row_start, max(row_start, row_end), False)
+
+        if index < 0:
+            index += self.shape[0]
+        if index < 0 or index >= self.shape[0]:
+            raise IndexError("row index out of range")
+
+        return (index, index + 1, True)
+
+    def __getitem__(self, index):
+        """Copies rows out of the file. The first index selects a row or a
+        contiguous range of rows, further indices apply to the selection.
+        """
+
+        rest = ()
+        if isinstance(index, tuple):
+            index, rest = index[0], index[1:]
+
+        row_start, row_end, is_row = self._to_range(index)
+
+        rows = self.map(row_start, row_end)
+        if is_row:
+            rows = rows[0]
+        else:
+            rest = (slice(None),) + rest
+
+        return np.array(rows[rest])
+
+    def __setitem__(self, index, value):
+
+        row_start, row_end, _ = self._to_range(index)
+
+        rows = self.map(row_start, row_end)
+        rows[...] = value
+
+        if isinstance(rows, np.memmap):
+            rows.flush()
@@ -0,0 +1,86 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8-80 compliant>
+
+"""Vector, matrix and quaternion types used by the formats and the MDI.
+
+Notes:
+
+    The 'mathutils' backend uses the types of mathutils. It is used inside
+    blender, so models pass between the formats and blender as they are, and
+    wherever else mathutils can be imported.
+
+    The 'python' backend uses the pure python types of math_python. It is
+    used if mathutils can't be imported, so the converters run in any python
+    environment, for example on a build server.
+
+    The environment variable REMT_MATH_BACKEND selects a backend explicitly.
+    The selected backend is written back to it, so worker processes use the
+    same backend as the process which started them and results do not depend
+    on where a frame was evaluated. A worker which can't import the backend
+    fails to import the stage, see FrameExecutor.
+
+Attributes:
+
+    name (str): name of the backend in use.
+    Vector (type): vector type.
+    Matrix (type): matrix type.
+    Quaternion (type): quaternion type.
+"""
+
+import os
+
+backend_names = ("mathutils", "python")
+
+def _load(backend_name):
+
+    if backend_name == "mathutils":
+
+        import mathutils
+        return (backend_name, mathutils.Vector, mathutils.Matrix,
+                mathutils.Quaternion)
+
+    elif backend_name == "python":
+
+        import rtcw_et_model_tools.common.math_python as math_python_m
+        return (backend_name, math_python_m.Vector, math_python_m.Matrix,
+                math_python_m.Quaternion)
+
+    else:
+
+        exception_string = "Math backend '{}' not supported, use one of {}" \
+                           .format(backend_name, ", ".join(backend_names))
+        raise ImportError(exception_string)
+
+def _select():
+
+    backend_name = os.environ.get("REMT_MATH_BACKEND")
+    if backend_name:
+        return _load(backend_name)
+
+    try:
+        backend = _load("mathutils")
+    except ImportError:
+        backend = _load("python")
+
+    os.environ["REMT_MATH_BACKEND"] = backend[0]
+
+    return backend
+
+name, Vector, Matrix, Quaternion = _select()
@@ -0,0 +1,839 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8-80 compliant>
+
+"""Pure python implementation of the part of mathutils used by the formats.
+
+Notes:
+
+    Vector, Matrix and Quaternion behave like their mathutils counterparts
+    for the operations the converters use, see math_backend.
+
+    Like mathutils, components are stored in single precision. Products
+    are rounded to single precision and summed up in double precision, the
+    same way mathutils does, so vector arithmetic, dot and cross products and
+    matrix products give identical results. Interpolation and conversion to
+    and from quaternions agree within single precision rounding.
+"""
+
+import math
+import operator
+from array import array
+
+
+def _to_float(value):
+    """Rounds a number to single precision.
+    """
+
+    return array('f', (value,))[0]
+
+def _sum_products(products):
+    """Sums up products in double precision, first to last.
+    """
+
+    result = 0.0
+    for product in products:
+        result += product
+
+    return result
+
+def _component(num_component):
+    """Property of a single component, as in vector.x.
+    """
+
+    def get(self):
+        return self._values[num_component]
+
+    def set(self, value):
+        self._values[num_component] = value
+
+    return property(get, set)
+
+
+class Vector:
+    """Vector of 2 to 4 single precision components.
+    """
+
+    __slots__ = ("_values",)
+
+    __hash__ = None
+
+    def __init__(self, values = (0.0, 0.0, 0.0)):
+
+        values = array('f', values)
+        if not 2 <= len(values) <= 4:
+            raise ValueError("Vector(): expects 2 to 4 components")
+
+        self._values = values
+
+    @classmethod
+    def _wrap(cls, values):
+
+        vector = object.__new__(cls)
+        vector._values = values
+        return vector
+
+    def _check_size(self, other):
+
+        if len(self._values) != len(other._values):
+            raise ValueError("Vectors must have the same size")
+
+    # sequence
+    # ---------------------------
+
+    def __len__(self):
+
+        return len(self._values)
+
+    def __iter__(self):
+
+        return iter(self._values)
+
+    def __getitem__(self, index):
+
+        if isinstance(index, slice):
+            return tuple(self._values[index])
+
+        return self._values[index]
+
+    def __setitem__(self, index, value):
+
+        if isinstance(index, slice):
+
+            values = array('f', value)
+            if len(values) != len(range(*index.indices(len(self._values)))):
+                raise ValueError("Vector slice assignment: size mismatch")
+            self._values[index] = values
+
+        else:
+
+            self._values[index] = value
+
+    x = _component(0)
+    y = _component(1)
+    z = _component(2)
+    w = _component(3)
+
+    # copies
+    # ---------------------------
+
+    def copy(self):
+
+        return Vector._wrap(array('f', self._values))
+
+    def __copy__(self):
+
+        return self.copy()
+
+    def __deepcopy__(self, memo):
+
+        return self.copy()
+
+    def __reduce__(self):
+
+        return (Vector, (tuple(self._values),))
+
+    def to_tuple(self, precision = -1):
+
+        if precision < 0:
+            return tuple(self._values)
+
+        return tuple(round(value, precision) for value in self._values)
+
+    def __repr__(self):
+
+        return "Vector(({}))".format(", ".join(map(repr, self._values)))
+
+    def __eq__(self, other):
+
+        if not isinstance(other, Vector):
+            return NotImplemented
+
+        return self._values == other._values
+
+    def __ne__(self, other):
+
+        if not isinstance(other, Vector):
+            return NotImplemented
+
+        return self._values != other._values
+
+    # arithmetic
+    # ---------------------------
+
+    def __add__(self, other):
+
+        if not isinstance(other, Vector):
+            return NotImplemented
+
+        self._check_size(other)
+        return Vector._wrap(array('f', map(operator.add, self._values,
+                                           other._values)))
+
+    def __sub__(self, other):
+
+        if not isinstance(other, Vector):
+            return NotImplemented
+
+        self._check_size(other)
+        return Vector._wrap(array('f', map(operator.sub, self._values,
+                                           other._values)))
+
+    def __iadd__(self, other):
+
+        if not isinstance(other, Vector):
+            return NotImplemented
+
+        self._check_size(other)
+        self._values = array('f', map(operator.add, self._values,
+                                      other._values))
+        return self
+
+    def __isub__(self, other):
+
+        if not isinstance(other, Vector):
+            return NotImplemented
+
+        self._check_size(other)
+        self._values = array('f', map(operator.sub, self._values,
+                                      other._values))
+        return self
+
+    def __neg__(self):
+
+        return Vector._wrap(array('f', [-value for value in self._values]))
+
+    def __pos__(self):
+
+        return self.copy()
+
+    def __mul__(self, other):
+
+        if isinstance(other, Vector):
+
+            self._check_size(other)
+            return Vector._wrap(array('f', map(operator.mul, self._values,
+                                               other._values)))
+
+        try:
+            scalar = _to_float(other)
+        except TypeError:
+            return NotImplemented
+
+        return Vector._wrap(array('f', [value * scalar
+                                        for value in self._values]))
+
+    def __rmul__(self, other):
+
+        return self.__mul__(other)
+
+    def __imul__(self, other):
+
+        result = self.__mul__(other)
+        if result is NotImplemented:
+            return result
+
+        self._values = result._values
+        return self
+
+    def __truediv__(self, other):
+
+        try:
+            scalar = _to_float(other)
+        except TypeError:
+            return NotImplemented
+
+        if scalar == 0.0:
+            raise ZeroDivisionError("Vector division: divide by zero error")
+
+        return self.__mul__(_to_float(1.0 / scalar))
+
+    def __itruediv__(self, other):
+
+        result = self.__truediv__(other)
+        if result is NotImplemented:
+            return result
+
+        self._values = result._values
+        return self
+
+    def __matmul__(self, other):
+
+        if isinstance(other, Vector):
+            return self.dot(other)
+
+        if isinstance(other, Matrix):
+
+            # row vector times matrix
+            if len(other._rows) != len(self._values):
+                raise ValueError("Vector @ Matrix: size mismatch")
+
+            num_cols = len(other._rows[0])
+            return Vector._wrap(array('f', [
+                _sum_products(array('f', [
+                    row[num_col] * value
+                    for row, value in zip(other._rows, self._values)]))
+                for num_col in range(num_cols)]))
+
+        return NotImplemented
+
+    # vector math
+    # ---------------------------
+
+    def dot(self, other):
+
+        other = other if isinstance(other, Vector) else Vector(other)
+        self._check_size(other)
+
+        products = array('f', map(operator.mul, self._values, other._values))
+        return _sum_products(reversed(products))
+
+    def cross(self, other):
+
+        other = other if isinstance(other, Vector) else Vector(other)
+        if len(self._values) != 3 or len(other._values) != 3:
+            raise ValueError("Vector.cross(): expects 3D vectors")
+
+        a_x, a_y, a_z = self._values
+        b_x, b_y, b_z = other._values
+
+        products = array('f', (a_y * b_z, a_z * b_y,
+                               a_z * b_x, a_x * b_z,
+                               a_x * b_y, a_y * b_x))
+
+        return Vector._wrap(array('f', (products[0] - products[1],
+                                        products[2] - products[3],
+                                        products[4] - products[5])))
+
+    @property
+    def length_squared(self):
+
+        return self.dot(self)
+
+    @property
+    def length(self):
+
+        return math.sqrt(self.dot(self))
+
+    def normalized(self):
+
+        vector = self.copy()
+        vector.normalize()
+        return vector
+
+    def normalize(self):
+
+        d = 0.0
+        for value in reversed(self._values):
+            d += value * value
+
+        if d > 1.0e-35:
+            inv_length = _to_float(1.0 / _to_float(math.sqrt(d)))
+            self._values = array('f', [value * inv_length
+                                       for value in self._values])
+        else:
+            self._values = array('f', [0.0] * len(self._values))
+
+    def lerp(self, other, factor):
+
+        other = other if isinstance(other, Vector) else Vector(other)
+        self._check_size(other)
+
+        # as mathutils, which interpolates from other by 1 - factor
+        t = _to_float(1.0 - _to_float(factor))
+        s = _to_float(1.0 - t)
+
+        a = array('f', [t * value for value in self._values])
+        b = array('f', [s * value for value in other._values])
+
+        return Vector._wrap(array('f', map(operator.add, a, b)))
+
+
+class _MatrixColumns:
+    """Column access of a matrix, as in matrix.col[1].
+    """
+
+    __slots__ = ("_matrix",)
+
+    def __init__(self, matrix):
+
+        self._matrix = matrix
+
+    def __len__(self):
+
+        return len(self._matrix._rows[0])
+
+    def __getitem__(self, num_col):
+
+        return Vector([row[num_col] for row in self._matrix._rows])
+
+    def __setitem__(self, num_col, values):
+
+        values = array('f', values)
+        if len(values) != len(self._matrix._rows):
+            raise ValueError("Matrix column assignment: size mismatch")
+
+        for row, value in zip(self._matrix._rows, values):
+            row[num_col] = value
+
+    def __iter__(self):
+
+        for num_col in range(len(self)):
+            yield self[num_col]
+
+
+class Matrix:
+    """Matrix of 2 to 4 rows and columns of single precision components.
+    Rows are vectors, changing them changes the matrix.
+    """
+
+    __slots__ = ("_rows",)
+
+    __hash__ = None
+
+    def __init__(self, rows = None):
+
+        if rows is None:
+            rows = Matrix._identity_rows(4)
+
+        rows = [Vector(row) for row in rows]
+        if not 2 <= len(rows) <= 4 or \
+           any(len(row) != len(rows[0]) for row in rows):
+            raise ValueError("Matrix(): expects 2 to 4 rows of equal size")
+
+        self._rows = rows
+
+    @classmethod
+    def _wrap(cls, rows):
+
+        matrix = object.__new__(cls)
+        matrix._rows = rows
+        return matrix
+
+    @staticmethod
+    def _identity_rows(size):
+
+        return [[1.0 if num_col == num_row else 0.0
+                 for num_col in range(size)]
+                for num_row in range(size)]
+
+    @staticmethod
+    def Identity(size):
+
+        return Matrix(Matrix._identity_rows(size))
+
+    def _check_shape(self, other):
+
+        if len(self._rows) != len(other._rows) or \
+           len(self._rows[0]) != len(other._rows[0]):
+            raise ValueError("Matrices must have the same shape")
+
+    # sequence
+    # ---------------------------
+
+    def __len__(self):
+
+        return len(self._rows)
+
+    def __iter__(self):
+
+        return iter(self._rows)
+
+    def __getitem__(self, index):
+
+        if isinstance(index, slice):
+            return tuple(self._rows[index])
+
+        return self._rows[index]
+
+    def __setitem__(self, index, values):
+
+        if isinstance(index, slice):
+
+            rows = self._rows[index]
+            values = list(values)
+            if len(values) != len(rows):
+                raise ValueError("Matrix slice assignment: size mismatch")
+
+            for row, row_values in zip(rows, values):
+                row[:] = row_values
+
+        else:
+
+            self._rows[index][:] = values
+
+    @property
+    def col(self):
+
+        return _MatrixColumns(self)
+
+    # copies
+    # ---------------------------
+
+    def copy(self):
+
+        return Matrix._wrap([row.copy() for row in self._rows])
+
+    def __copy__(self):
+
+        return self.copy()
+
+    def __deepcopy__(self, memo):
+
+        return self.copy()
+
+    def __reduce__(self):
+
+        return (Matrix, ([tuple(row) for row in self._rows],))
+
+    def __repr__(self):
+
+        return "Matrix(({}))".format(
+            ",\n        ".join([repr(tuple(row)) for row in self._rows]))
+
+    def __eq__(self, other):
+
+        if not isinstance(other, Matrix):
+            return NotImplemented
+
+        return self._rows == other._rows
+
+    def __ne__(self, other):
+
+        if not isinstance(other, Matrix):
+            return NotImplemented
+
+        return self._rows != other._rows
+
+    # arithmetic
+    # ---------------------------
+
+    def __add__(self, other):
+
+        if not isinstance(other, Matrix):
+            return NotImplemented
+
+        self._check_shape(other)
+        return Matrix._wrap([a + b for a, b in zip(self._rows, other._rows)])
+
+    def __sub__(self, other):
+
+        if not isinstance(other, Matrix):
+            return NotImplemented
+
+        self._check_shape(other)
+        return Matrix._wrap([a - b for a, b in zip(self._rows, other._rows)])
+
+    def __mul__(self, other):
+
+        if isinstance(other, Matrix):
+
+            self._check_shape(other)
+            return Matrix._wrap([a * b
+                                 for a, b in zip(self._rows, other._rows)])
+
+        try:
+            scalar = _to_float(other)
+        except TypeError:
+            return NotImplemented
+
+        return Matrix._wrap([row * scalar for row in self._rows])
+
+    def __rmul__(self, other):
+
+        return self.__mul__(other)
+
+    def __matmul__(self, other):
+
+        if isinstance(other, Vector):
+
+            if len(self._rows[0]) != len(other):
+                raise ValueError("Matrix @ Vector: size mismatch")
+
+            values = other._values
+            return Vector._wrap(array('f', [
+                _sum_products(array('f', map(operator.mul, row._values,
+                                             values)))
+                for row in self._rows]))
+
+        if isinstance(other, Matrix):
+
+            if len(self._rows[0]) != len(other._rows):
+                raise ValueError("Matrix @ Matrix: size mismatch")
+
+            cols = [[row._values[num_col] for row in other._rows]
+                    for num_col in range(len(other._rows[0]))]
+
+            return Matrix._wrap([
+                Vector._wrap(array('f', [
+                    _sum_products(array('f', map(operator.mul, row._values,
+                                                 col)))
+                    for col in cols]))
+                for row in self._rows])
+
+        return NotImplemented
+
+    def __imatmul__(self, other):
+
+        result = self.__matmul__(other)
+        if result is NotImplemented or not isinstance(result, Matrix):
+            return NotImplemented
+
+        self._rows = result._rows
+        return self
+
+    # matrix math
+    # ---------------------------
+
+    def transposed(self):
+
+        return Matrix._wrap([
+            Vector._wrap(array('f', [row._values[num_col]
+                                     for row in self._rows]))
+            for num_col in range(len(self._rows[0]))])
+
+    def transpose(self):
+
+        if len(self._rows) != len(self._rows[0]):
+            raise ValueError("Matrix.transpose(): only square matrices")
+
+        self._rows = self.transposed()._rows
+
+    def to_quaternion(self):
+        """Rotation part of a 3x3 or 4x4 matrix as quaternion with w >= 0.
+        Columns are normalized first, so scaled matrices work as well.
+        """
+
+        if len(self._rows) < 3 or len(self._rows[0]) < 3:
+            raise ValueError("Matrix.to_quaternion(): expects 3x3 or 4x4")
+
+        f = _to_float
+
+        # m[num_col][num_row] of the normalized rotation part
+        m = []
+        for num_col in range(3):
+
+            col = [self._rows[num_row][num_col] for num_row in range(3)]
+            d = f(f(f(col[0] * col[0]) + f(col[1] * col[1])) +
+                  f(col[2] * col[2]))
+
+            if d > 1.0e-35:
+                inv_length = f(1.0 / f(math.sqrt(d)))
+                m.append([f(value * inv_length) for value in col])
+            else:
+                m.append([0.0, 0.0, 0.0])
+
+        determinant = m[0][0] * (m[1][1] * m[2][2] - m[2][1] * m[1][2]) - \
+                      m[1][0] * (m[0][1] * m[2][2] - m[2][1] * m[0][2]) + \
+                      m[2][0] * (m[0][1] * m[1][2] - m[1][1] * m[0][2])
+        if determinant < 0.0:
+            m = [[-value for value in col] for col in m]
+
+        # largest of the diagonal decides which component is derived first
+        if m[2][2] < 0.0:
+
+            if m[0][0] > m[1][1]:
+
+                s = f(2.0 * f(math.sqrt(f(f(f(1.0 + m[0][0]) - m[1][1]) -
+                                          m[2][2]))))
+                if m[1][2] < m[2][1]:
+                    s = -s
+                x = f(0.25 * s)
+                s = f(1.0 / s)
+                w = f(f(m[1][2] - m[2][1]) * s)
+                y = f(f(m[0][1] + m[1][0]) * s)
+                z = f(f(m[2][0] + m[0][2]) * s)
+
+            else:
+
+                s = f(2.0 * f(math.sqrt(f(f(f(1.0 - m[0][0]) + m[1][1]) -
+                                          m[2][2]))))
+                if m[2][0] < m[0][2]:
+                    s = -s
+                y = f(0.25 * s)
+                s = f(1.0 / s)
+                w = f(f(m[2][0] - m[0][2]) * s)
+                x = f(f(m[0][1] + m[1][0]) * s)
+                z = f(f(m[1][2] + m[2][1]) * s)
+
+        else:
+
+            if m[0][0] < -m[1][1]:
+
+                s = f(2.0 * f(math.sqrt(f(f(f(1.0 - m[0][0]) - m[1][1]) +
+                                          m[2][2]))))
+                if m[0][1] < m[1][0]:
+                    s = -s
+                z = f(0.25 * s)
+                s = f(1.0 / s)
+                w = f(f(m[0][1] - m[1][0]) * s)
+                x = f(f(m[2][0] + m[0][2]) * s)
+                y = f(f(m[1][2] + m[2][1]) * s)
+
+            else:
+
+                s = f(2.0 * f(math.sqrt(f(f(f(1.0 + m[0][0]) + m[1][1]) +
+                                          m[2][2]))))
+                w = f(0.25 * s)
+                s = f(1.0 / s)
+                x = f(f(m[1][2] - m[2][1]) * s)
+                y = f(f(m[2][0] - m[0][2]) * s)
+                z = f(f(m[0][1] - m[1][0]) * s)
+
+        quaternion = Quaternion((w, x, y, z))
+
+        length_squared = f(f(f(f(w * w) + f(x * x)) + f(y * y)) + f(z * z))
+        if abs(length_squared - 1.0) >= f(0.0002 * 3):
+            quaternion = quaternion.normalized()
+
+        return quaternion
+
+
+class Quaternion:
+    """Quaternion of single precision components, w first.
+    """
+
+    __slots__ = ("_values",)
+
+    __hash__ = None
+
+    def __init__(self, values = (1.0, 0.0, 0.0, 0.0)):
+
+        values = array('f', values)
+        if len(values) != 4:
+            raise ValueError("Quaternion(): expects 4 components")
+
+        self._values = values
+
+    def __len__(self):
+
+        return 4
+
+    def __iter__(self):
+
+        return iter(self._values)
+
+    def __getitem__(self, index):
+
+        if isinstance(index, slice):
+            return tuple(self._values[index])
+
+        return self._values[index]
+
+    w = _component(0)
+    x = _component(1)
+    y = _component(2)
+    z = _component(3)
+
+    def copy(self):
+
+        return Quaternion(self._values)
+
+    def __copy__(self):
+
+        return self.copy()
+
+    def __deepcopy__(self, memo):
+
+        return self.copy()
+
+    def __reduce__(self):
+
+        return (Quaternion, (tuple(self._values),))
+
+    def __repr__(self):
+
+        return "Quaternion(({}))".format(", ".join(map(repr, self._values)))
+
+    def __eq__(self, other):
+
+        if not isinstance(other, Quaternion):
+            return NotImplemented
+
+        return self._values == other._values
+
+    def __ne__(self, other):
+
+        if not isinstance(other, Quaternion):
+            return NotImplemented
+
+        return self._values != other._values
+
+    def dot(self, other):
+
+        return _sum_products(reversed(array('f', map(operator.mul,
+                                                     self._values,
+                                                     other._values))))
+
+    def normalized(self):
+
+        length = _to_float(math.sqrt(self.dot(self)))
+        if length == 0.0:
+            return Quaternion((0.0, 1.0, 0.0, 0.0))
+
+        inv_length = _to_float(1.0 / length)
+        return Quaternion([value * inv_length for value in self._values])
+
+    def to_matrix(self):
+
+        q0, q1, q2, q3 = [math.sqrt(2.0) * value for value in self._values]
+
+        qda = q0 * q1
+        qdb = q0 * q2
+        qdc = q0 * q3
+        qaa = q1 * q1
+        qab = q1 * q2
+        qac = q1 * q3
+        qbb = q2 * q2
+        qbc = q2 * q3
+        qcc = q3 * q3
+
+        return Matrix(((1.0 - qbb - qcc, -qdc + qab, qdb + qac),
+                       (qdc + qab, 1.0 - qaa - qcc, -qda + qbc),
+                       (-qdb + qac, qda + qbc, 1.0 - qaa - qbb)))
+
+    def slerp(self, other, factor):
+
+        a = self.normalized()._values
+        b = other.normalized()._values
+        t = _to_float(factor)
+
+        cos_omega = _sum_products(reversed(array('f', map(operator.mul,
+                                                          a, b))))
+
+        # rotate around the shortest angle
+        if cos_omega < 0.0:
+            cos_omega = -cos_omega
+            a = array('f', [-value for value in a])
+
+        if abs(cos_omega) < 1.0 - _to_float(1e-4):
+
+            omega = math.acos(cos_omega)
+            sin_omega = math.sin(omega)
+            w_a = math.sin((1.0 - t) * omega) / sin_omega
+            w_b = math.sin(t * omega) / sin_omega
+
+        else:
+
+            # nearly aligned, fall back to linear interpolation
+            w_a = 1.0 - t
+            w_b = t
+
+        return Quaternion([w_a * value_a + w_b * value_b
+                           for value_a, value_b in zip(a, b)])
@@ -0,0 +1,380 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8-80 compliant>
+
+"""Write PK3s (game data).
+
+Notes:
+
+    Members are given as bytes, for example models written to a memory
+    buffer, and appended to the pk3 file as they come. Nothing is written to
+    disk twice.
+
+    Members are compressed with DEFLATE on a pool of threads, compression and
+    CRC calculation release the GIL. They are written in the order they were
+    added, not in the order compression finishes. Members which do not get
+    smaller are stored.
+
+    The pk3 file is reproducible: the same members added in the same order
+    give the same bytes. All members get the same timestamp, which is the
+    one of the environment variable SOURCE_DATE_EPOCH if set, else
+    1980-01-01. No other file system attributes are recorded.
+
+    The engine reads pk3 files without ZIP64 extensions, so files and
+    members larger than 4 GiB and more than 65535 members are refused.
+
+    The pk3 file is written to a temporary file next to it, which replaces
+    it on close. A failed or aborted pk3 file leaves no partial file behind.
+"""
+
+import os
+import time
+import zlib
+import struct
+import collections
+import concurrent.futures
+
+# zip record formats, see APPNOTE.TXT of the zip file format
+_local_header_format = "<4s2B4HL2L2H"
+_local_header_signature = b"PK\003\004"
+_central_header_format = "<4s4B4HL2L5H2L"
+_central_header_signature = b"PK\001\002"
+_end_record_format = "<4s4H2LH"
+_end_record_signature = b"PK\005\006"
+
+_method_stored = 0
+_method_deflated = 8
+_flag_utf8 = 0x800
+_max_value = 0xFFFFFFFF
+_max_members = 0xFFFF
+
+
+def _get_dos_date_time():
+    """Timestamp of all members as DOS (date, time).
+    """
+
+    date_time = (1980, 1, 1, 0, 0, 0)
+
+    source_date_epoch = os.environ.get("SOURCE_DATE_EPOCH")
+    if source_date_epoch:
+
+        date_time = time.gmtime(int(source_date_epoch))[0:6]
+        if date_time[0] < 1980:
+            date_time = (1980, 1, 1, 0, 0, 0)
+
+    year, month, day, hour, minute, second = date_time
+    dos_date = (year - 1980) << 9 | month << 5 | day
+    dos_time = hour << 11 | minute << 5 | second // 2
+
+    return (dos_date, dos_time)
+
+def to_member_name(name):
+    """Normalizes a path to the name of a pk3 member.
+    """
+
+    parts = [part for part in name.replace("\\", "/").split("/")
+             if part not in ("", ".", "..")]
+    if not parts:
+        raise Exception("Invalid pk3 member name: '{}'".format(name))
+
+    return "/".join(parts)
+
+def _compress(data, compress_level):
+    """Compresses the data of a member. Runs on the thread pool.
+
+    Returns:
+
+        method (int): compression method.
+        crc (int): CRC-32 of the data.
+        payload (bytes): data as written to the pk3 file.
+    """
+
+    crc = zlib.crc32(data)
+
+    compressor = zlib.compressobj(compress_level, zlib.DEFLATED,
+                                  -zlib.MAX_WBITS)
+    payload = compressor.compress(data) + compressor.flush()
+
+    if len(payload) >= len(data):
+        return (_method_stored, crc, bytes(data))
+
+    return (_method_deflated, crc, payload)
+
+
+class PK3Member:
+    """Entry of the central directory.
+
+    Attributes:
+
+        name (str): member name.
+        method (int): compression method.
+        crc (int): CRC-32 of the data.
+        compress_size (int): size of the data in the pk3 file.
+        file_size (int): size of the data.
+        header_ofs (int): file offset of the local header.
+    """
+
+    def __init__(self, name, method, crc, compress_size, file_size,
+                 header_ofs):
+
+        self.name = name
+        self.method = method
+        self.crc = crc
+        self.compress_size = compress_size
+        self.file_size = file_size
+        self.header_ofs = header_ofs
+
+
+class PK3Writer:
+    """Writes a pk3 file one member at a time.
+
+    Attributes:
+
+        file_path (str): path of the pk3 file.
+        members (list<PK3Member>): members written so far.
+
+    Example:
+
+        with PK3Writer("zz_models.pk3") as pk3_writer:
+            pk3_writer.add("models/a/b.md3", data)
+    """
+
+    def __init__(self, file_path, num_threads=None, compress_level=6,
+                 max_pending=None):
+        """Creates the pk3 file.
+
+        Args:
+
+            file_path (str): path of the pk3 file.
+            num_threads (int): number of threads compressing members, None
+                for the number of cpus.
+            compress_level (int): DEFLATE compression level from 0 to 9.
+            max_pending (int): number of members compressed ahead before add
+                waits, None for twice the number of threads.
+        """
+
+        self.file_path = file_path
+        self.members = []
+
+        num_threads = max(1, num_threads or os.cpu_count() or 1)
+        if max_pending is None:
+            max_pending = 2 * num_threads
+
+        self._compress_level = compress_level
+        self._max_pending = max(1, max_pending)
+        self._dos_date, self._dos_time = _get_dos_date_time()
+
+        self._names = set()
+        self._pending = collections.deque()
+
+        self._temp_path = "{}.tmp".format(file_path)
+        self._file = open(self._temp_path, 'wb')
+        self._thread_pool = \
+            concurrent.futures.ThreadPoolExecutor(num_threads)
+
+    def __enter__(self):
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def add(self, name, data):
+        """Adds a member. Compression starts at once, the member is written
+        when all members added before it are written.
+
+        Args:
+
+            name (str): member name, for example 'models/a/b.md3'.
+            data (bytes): content of the member.
+        """
+
+        if self._file is None:
+            raise Exception("PK3 file already closed")
+
+        name = to_member_name(name)
+
+        # the engine looks up members case insensitive
+        if name.lower() in self._names:
+            exception_string = "Duplicate pk3 member: '{}'".format(name)
+            raise Exception(exception_string)
+        self._names.add(name.lower())
+
+        if len(self._names) > _max_members:
+            raise Exception("Too many pk3 members, at most {} supported" \
+                            .format(_max_members))
+
+        if len(data) >= _max_value:
+            exception_string = \
+                "PK3 member too large: '{}' ({} bytes)".format(name,
+                                                               len(data))
+            raise Exception(exception_string)
+
+        future = self._thread_pool.submit(_compress, data,
+                                          self._compress_level)
+        self._pending.append((name, len(data), future))
+
+        self._write_pending(len(self._pending) - self._max_pending)
+
+    def add_file(self, name, write_function):
+        """Adds a member written by a function to a memory buffer.
+
+        Args:
+
+            name (str): member name.
+            write_function (function): called with a binary file object and
+                the member name, for example MD3.write_file.
+        """
+
+        import io
+
+        with io.BytesIO() as buffer:
+
+            write_function(buffer, name)
+            self.add(name, buffer.getvalue())
+
+    def _write_pending(self, num_wait=0):
+        """Writes members whose compression finished, in the order they were
+        added. Waits for the compression of the first num_wait members.
+        """
+
+        while self._pending:
+
+            name, file_size, future = self._pending[0]
+            if num_wait <= 0 and not future.done():
+                return
+
+            method, crc, payload = future.result()
+            self._pending.popleft()
+            self._write_member(name, method, crc, payload, file_size)
+
+            num_wait -= 1
+
+    def _write_member(self, name, method, crc, payload, file_size):
+
+        header_ofs = self._file.tell()
+        if header_ofs + len(payload) >= _max_value:
+            exception_string = "PK3 file too large: {}".format(self.file_path)
+            raise Exception(exception_string)
+
+        member = PK3Member(name, method, crc, len(payload), file_size,
+                           header_ofs)
+
+        name_bytes, flags = self._encode_name(name)
+        self._file.write(struct.pack(_local_header_format,
+                                     _local_header_signature,
+                                     self._get_extract_version(method), 0,
+                                     flags, method,
+                                     self._dos_time, self._dos_date,
+                                     crc, len(payload), file_size,
+                                     len(name_bytes), 0))
+        self._file.write(name_bytes)
+        self._file.write(payload)
+
+        self.members.append(member)
+
+    @staticmethod
+    def _encode_name(name):
+
+        try:
+            return (name.encode("ascii"), 0)
+        except UnicodeEncodeError:
+            return (name.encode("utf-8"), _flag_utf8)
+
+    @staticmethod
+    def _get_extract_version(method):
+
+        if method == _method_deflated:
+            return 20
+        return 10
+
+    def _write_central_directory(self):
+
+        directory_ofs = self._file.tell()
+        for member in self.members:
+
+            name_bytes, flags = self._encode_name(member.name)
+            extract_version = self._get_extract_version(member.method)
+            self._file.write(struct.pack(_central_header_format,
+                                         _central_header_signature,
+                                         20, 0, extract_version, 0,
+                                         flags, member.method,
+                                         self._dos_time, self._dos_date,
+                                         member.crc, member.compress_size,
+                                         member.file_size,
+                                         len(name_bytes), 0, 0, 0, 0, 0,
+                                         member.header_ofs))
+            self._file.write(name_bytes)
+
+        directory_size = self._file.tell() - directory_ofs
+        if directory_ofs + directory_size >= _max_value:
+            exception_string = "PK3 file too large: {}".format(self.file_path)
+            raise Exception(exception_string)
+
+        self._file.write(struct.pack(_end_record_format,
+                                     _end_record_signature, 0, 0,
+                                     len(self.members), len(self.members),
+                                     directory_size, directory_ofs, 0))
+
+    def close(self):
+        """Writes the remaining members and the central directory, then
+        replaces the pk3 file.
+        """
+
+        if self._file is None:
+            return
+
+        try:
+
+            # all members, not only those whose compression finished
+            self._write_pending(len(self._pending))
+            self._write_central_directory()
+
+            self._file.close()
+            self._file = None
+            os.replace(self._temp_path, self.file_path)
+
+        except Exception:
+
+            self.abort()
+            raise
+
+        finally:
+
+            self._thread_pool.shutdown(wait=True)
+
+    def abort(self):
+        """Discards the pk3 file. Does nothing if already closed.
+        """
+
+        for _, _, future in self._pending:
+            future.cancel()
+        self._pending.clear()
+        self._thread_pool.shutdown(wait=True)
+
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+        if os.path.isfile(self._temp_path):
+            os.remove(self._temp_path)
@@ -22,7 +22,6 @@
 
 import sys
 import logging
-from logging.handlers import RotatingFileHandler
 
 remt_logger = None
 remt_warnings = []
@@ -42,6 +41,9 @@ def init(log_filepath = None):
 
     if log_filepath != None:
 
+        # only needed for log files, not imported at start-up
+        from logging.handlers import RotatingFileHandler
+
         p_filename = log_filepath
         p_mode='a'
         p_max_bytes=3 * 1024 * 1024
@@ -50,10 +52,10 @@ def init(log_filepath = None):
         # p_delay=0
 
         rotating_file_handler = \
-            logging.handlers.RotatingFileHandler(filename=p_filename,
-                                                 mode=p_mode,
-                                                 maxBytes=p_max_bytes,
-                                                 backupCount=p_backup_count)
+            RotatingFileHandler(filename=p_filename,
+                                mode=p_mode,
+                                maxBytes=p_max_bytes,
+                                backupCount=p_backup_count)
         rotating_file_handler.setFormatter(formatter)
         logger.addHandler(rotating_file_handler)
 
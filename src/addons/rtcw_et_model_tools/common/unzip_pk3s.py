@@ -19,15 +19,184 @@
 # <pep8-80 compliant>
 
 """Unzip PK3s (game data).
+
+Notes:
+
+    Members can be filtered by extension and by path. Members which already
+    exist in the target directory with the same size and CRC are skipped, so
+    extracting again only writes what changed.
+
+    If the same member is found in more than one pk3 file, the one from the
+    pk3 file which comes last in path order is extracted, like the engine
+    would load it. This is decided before extracting, so the pk3 files can be
+    extracted in parallel. Threads are used, decompression and CRC
+    calculation release the GIL.
 """
 
 import os
+import zlib
+import shutil
 import zipfile
+import concurrent.futures
+
+# extensions by type of game data
+filter_exts = {
+    'MODELS': ("md3", "mdc", "mds", "mdm", "mdx", "tag"),
+    'SKINS': ("skin",),
+    'SHADERS': ("shader",),
+    'TEXTURES': ("tga", "jpg"),
+}
+
+
+def _to_target_file_path(target_path, member_name):
+    """Maps a member name to a path inside the target directory.
+    """
+
+    parts = [part for part in member_name.replace("\\", "/").split("/")
+             if part not in ("", ".", "..")]
+    return os.path.join(target_path, *parts)
+
+def _is_up_to_date(file_path, zip_info):
+    """Checks if a file has the size and CRC of a member.
+    """
+
+    try:
+        if os.path.getsize(file_path) != zip_info.file_size:
+            return False
+    except OSError:
+        return False
+
+    crc = 0
+    with open(file_path, 'rb') as file:
+
+        block = file.read(1024 * 1024)
+        while block:
+            crc = zlib.crc32(block, crc)
+            block = file.read(1024 * 1024)
+
+    return crc == zip_info.CRC
+
+def _is_selected(member_name, exts, path_filters):
+
+    name = member_name.lower()
+
+    if exts is not None:
+
+        ext = os.path.splitext(name)[1][1:]
+        if ext not in exts:
+            return False
+
+    if path_filters:
+
+        if not any(name.startswith(path_filter)
+                   for path_filter in path_filters):
+            return False
+
+    return True
+
+def _find_pk3_files(source_path):
+
+    pk3_file_paths = []
+    for root, _, files in os.walk(source_path):
+
+        for file_name in files:
+            if file_name.lower().endswith(".pk3"):
+                pk3_file_paths.append(os.path.join(root, file_name))
+
+    return sorted(pk3_file_paths)
+
+def _plan(pk3_file_paths, exts, path_filters):
+    """Decides which members to extract from which pk3 file.
+
+    Returns:
+
+        plan (list<list<str>>): member names for each pk3 file.
+    """
+
+    # member name => (num_pk3, member name), later pk3 files override
+    selected = {}
+    for num_pk3, pk3_file_path in enumerate(pk3_file_paths):
 
+        with zipfile.ZipFile(pk3_file_path, 'r') as zip_ref:
 
-def unzip_dir_recursive(source_path, target_path):
+            for member_name in zip_ref.namelist():
+
+                if member_name.endswith("/"):
+                    continue
+                if not _is_selected(member_name, exts, path_filters):
+                    continue
+
+                selected[member_name.lower()] = (num_pk3, member_name)
+
+    plan = [[] for _ in pk3_file_paths]
+    for num_pk3, member_name in selected.values():
+        plan[num_pk3].append(member_name)
+
+    return plan
+
+def _extract(pk3_file_path, member_names, target_path):
+    """Extracts members of a pk3 file, members which are up to date are
+    skipped.
+
+    Returns:
+
+        num_extracted (int): number of members written.
+        num_up_to_date (int): number of members skipped.
+    """
+
+    num_extracted = 0
+    num_up_to_date = 0
+
+    with zipfile.ZipFile(pk3_file_path, 'r') as zip_ref:
+
+        for member_name in member_names:
+
+            zip_info = zip_ref.getinfo(member_name)
+            file_path = _to_target_file_path(target_path, member_name)
+
+            if _is_up_to_date(file_path, zip_info):
+                num_up_to_date += 1
+                continue
+
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+            # replaced at once, an interrupted run leaves no partial files
+            temp_file_path = "{}.tmp".format(file_path)
+            try:
+                with zip_ref.open(zip_info, 'r') as source, \
+                     open(temp_file_path, 'wb') as target:
+                    shutil.copyfileobj(source, target, 1024 * 1024)
+                os.replace(temp_file_path, file_path)
+            finally:
+                if os.path.isfile(temp_file_path):
+                    os.remove(temp_file_path)
+
+            num_extracted += 1
+
+    return (num_extracted, num_up_to_date)
+
+def unzip_dir_recursive(source_path, target_path, exts = None,
+                        path_filters = None, num_threads = 1,
+                        progress_callback = None):
     """Search directory recursively and extract all pk3 files to a destination
     directory.
+
+    Args:
+
+        source_path (str): directory searched for pk3 files.
+        target_path (str): directory the members are extracted to.
+        exts (list<str>): extensions of the members to extract, without '.',
+            None for all members. See filter_exts.
+        path_filters (list<str>): members are extracted only if their path
+            starts with one of these, None or empty for all members.
+        num_threads (int): number of pk3 files extracted in parallel.
+        progress_callback (function): called with (num_pk3s_done, num_pk3s)
+            each time a pk3 file is done.
+
+    Returns:
+
+        num_extracted (int): number of members written.
+        num_up_to_date (int): number of members skipped as up to date.
     """
 
     if not os.path.isdir(source_path):
@@ -36,13 +205,40 @@ def unzip_dir_recursive(source_path, target_path):
     if not os.path.isdir(target_path):
         raise Exception("Target directory not found")
 
-    for root, _, files in os.walk(source_path, topdown=False):
+    if exts is not None:
+        exts = set(ext.lower() for ext in exts)
+
+    if path_filters:
+        path_filters = [path_filter.replace("\\", "/").lstrip("/").lower()
+                        for path_filter in path_filters]
+
+    pk3_file_paths = _find_pk3_files(source_path)
+    plan = _plan(pk3_file_paths, exts, path_filters)
+
+    num_pk3s = len(pk3_file_paths)
+    num_pk3s_done = 0
+    num_extracted = 0
+    num_up_to_date = 0
+
+    if progress_callback:
+        progress_callback(num_pk3s_done, num_pk3s)
+
+    with concurrent.futures.ThreadPoolExecutor(max(1, num_threads)) \
+        as executor:
+
+        futures = [executor.submit(_extract, pk3_file_path, member_names,
+                                   target_path)
+                   for pk3_file_path, member_names
+                   in zip(pk3_file_paths, plan)]
+
+        for future in concurrent.futures.as_completed(futures):
 
-            for file_path in files:
+            num_extracted_pk3, num_up_to_date_pk3 = future.result()
+            num_extracted += num_extracted_pk3
+            num_up_to_date += num_up_to_date_pk3
 
-                if file_path.endswith(".pk3"):
+            num_pk3s_done += 1
+            if progress_callback:
+                progress_callback(num_pk3s_done, num_pk3s)
 
-                    path_to_pk3_file = os.path.join(root, file_path)
-                    zip_ref = zipfile.ZipFile(path_to_pk3_file, 'r')
-                    zip_ref.extractall(target_path)
-                    zip_ref.close()
+    return (num_extracted, num_up_to_date)
@@ -24,10 +24,37 @@
 import os
 
 def prepare_texture_paths(game_path, shader_name, include_original=False):
+    """Creates the file paths a texture of a shader can be found at. Textures
+    inside pk3 files are found as well, they are extracted as needed.
+
+    Args:
+
+        game_path
+        shader_name
+        include_original
+
+    Returns:
+
+        texture_paths
+
+    Notes:
+
+        The index of the game directory is used as is, the operation
+        refreshes it once before the lookups. See vfs.get.
+    """
+
+    import rtcw_et_model_tools.common.vfs as vfs_m
 
     exts = ('tga', 'jpg')
     shader_names_exts = create_exts(shader_name, exts, include_original)
-    texture_paths = join_rel_paths_with_path(game_path, shader_names_exts)
+
+    vfs = vfs_m.get(game_path)
+
+    texture_paths = []
+    for shader_name_ext in shader_names_exts:
+
+        if vfs.exists(shader_name_ext):
+            texture_paths.append(vfs.get_file_path(shader_name_ext))
 
     return texture_paths
 
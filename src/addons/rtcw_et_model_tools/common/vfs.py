@@ -0,0 +1,419 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8-80 compliant>
+
+"""Virtual filesystem over game data.
+
+Notes:
+
+    The game reads its data from pk3 files and loose files in the game
+    directory (for example 'etmain' or 'Main'). Like in the engine, pk3 files
+    override loose files, and pk3 files later in name order override earlier
+    ones. Only pk3 files directly inside the game directory are searched,
+    loose files are searched recursively.
+
+    Paths are relative to the game directory, use '/' as separator and are
+    case insensitive.
+
+    All files are indexed once, queries are answered from dicts in memory.
+    The index is persisted to an index file and reused as long as it is
+    valid. It is valid if the modification times of all directories and the
+    sizes and modification times of all pk3 files did not change, which is
+    checked without reading any pk3 file.
+
+    Files inside pk3 files are extracted on demand when a real file path is
+    needed, for example to load an image in blender.
+"""
+
+import os
+import json
+import zipfile
+import hashlib
+import tempfile
+
+import rtcw_et_model_tools.common.reporter as reporter_m
+
+
+def _to_key(path):
+    """Normalizes a path relative to the game directory.
+    """
+
+    path = path.replace("\\", "/")
+    parts = [part for part in path.split("/") if part not in ("", ".")]
+    return "/".join(parts).lower()
+
+def _split_ext(key):
+
+    stem, ext = os.path.splitext(key)
+    return (stem, ext[1:])
+
+
+class VFS:
+    """Index of the files of a game directory.
+
+    Attributes:
+
+        game_path (str): the game directory.
+        index_path (str): file the index is persisted to, None to not persist
+            it.
+        extract_dir (str): directory files inside pk3 files are extracted to.
+        snapshot (dict): state of the game directory the index was built
+            from, persisted to the index file.
+        files (dict): path => (pk3_path, name). pk3_path is None for loose
+            files, name is the path of the file inside the pk3 file or the
+            game directory.
+        stems (dict): path without extension => list of extensions.
+    """
+
+    index_version = 1
+
+    def __init__(self, game_path, index_path = None, extract_dir = None):
+
+        self.game_path = os.path.abspath(game_path)
+        self.index_path = index_path
+
+        if not extract_dir:
+            extract_dir = os.path.join(tempfile.gettempdir(),
+                                       "rtcw_et_model_tools", "vfs_files")
+        self.extract_dir = extract_dir
+
+        self.snapshot = None
+        self.files = {}
+        self.stems = {}
+
+        self.refresh()
+
+    # index
+    # ---------------------------
+
+    def _take_snapshot(self):
+        """Walks the game directory and lists the contents of all pk3 files.
+        """
+
+        if not os.path.isdir(self.game_path):
+            raise Exception("Game path directory not found")
+
+        dir_mtimes = {}
+        loose_files = []
+        pk3_names = []
+
+        for root, dir_names, file_names in os.walk(self.game_path):
+
+            dir_names.sort()
+            rel_root = os.path.relpath(root, self.game_path)
+            rel_root = "" if rel_root == "." else rel_root.replace(os.sep, "/")
+            dir_mtimes[rel_root] = os.stat(root).st_mtime_ns
+
+            for file_name in sorted(file_names):
+
+                if not rel_root and file_name.lower().endswith(".pk3"):
+                    pk3_names.append(file_name)
+                elif rel_root:
+                    loose_files.append("{}/{}".format(rel_root, file_name))
+                else:
+                    loose_files.append(file_name)
+
+        pk3s = []
+        for pk3_name in sorted(pk3_names, key=str.lower):
+
+            pk3_path = os.path.join(self.game_path, pk3_name)
+            stat = os.stat(pk3_path)
+
+            try:
+                with zipfile.ZipFile(pk3_path, 'r') as zip_file:
+                    members = [member for member in zip_file.namelist()
+                               if not member.endswith("/")]
+            except zipfile.BadZipFile:
+                reporter_m.warning("Skipped invalid pk3 file: {}" \
+                                   .format(pk3_path))
+                members = []
+
+            pk3s.append([pk3_name, stat.st_size, stat.st_mtime_ns, members])
+
+        snapshot = {
+            "version": VFS.index_version,
+            "game_path": self.game_path,
+            "dir_mtimes": dir_mtimes,
+            "loose_files": loose_files,
+            "pk3s": pk3s,
+        }
+
+        return snapshot
+
+    def _is_valid(self, snapshot):
+        """Checks if the game directory changed since the snapshot was taken.
+        """
+
+        if not snapshot or \
+           snapshot.get("version") != VFS.index_version or \
+           snapshot.get("game_path") != self.game_path:
+            return False
+
+        try:
+
+            for rel_dir, mtime_ns in snapshot["dir_mtimes"].items():
+
+                dir_path = os.path.join(self.game_path, rel_dir)
+                if os.stat(dir_path).st_mtime_ns != mtime_ns:
+                    return False
+
+            for pk3_name, size, mtime_ns, _ in snapshot["pk3s"]:
+
+                stat = os.stat(os.path.join(self.game_path, pk3_name))
+                if stat.st_size != size or stat.st_mtime_ns != mtime_ns:
+                    return False
+
+        except OSError:
+
+            return False
+
+        return True
+
+    def _apply(self, snapshot):
+        """Builds the lookup dicts, later entries override earlier ones.
+        """
+
+        files = {}
+        for name in snapshot["loose_files"]:
+            files[_to_key(name)] = (None, name)
+
+        for pk3_name, _, _, members in snapshot["pk3s"]:
+
+            pk3_path = os.path.join(self.game_path, pk3_name)
+            for member in members:
+                files[_to_key(member)] = (pk3_path, member)
+
+        stems = {}
+        for key in files:
+
+            stem, ext = _split_ext(key)
+            stems.setdefault(stem, []).append(ext)
+
+        self.snapshot = snapshot
+        self.files = files
+        self.stems = stems
+
+    def _load_index(self):
+
+        try:
+            with open(self.index_path, 'r') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def _save_index(self):
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.index_path)),
+                    exist_ok=True)
+
+        # replaced at once, so concurrent sessions never read a partial file
+        temp_path = "{}.{}.tmp".format(self.index_path, os.getpid())
+        with open(temp_path, 'w') as file:
+            json.dump(self.snapshot, file)
+        os.replace(temp_path, self.index_path)
+
+    def refresh(self):
+        """Rebuilds the index if the game directory changed.
+        """
+
+        if self._is_valid(self.snapshot):
+            return
+
+        if self.index_path:
+
+            snapshot = self._load_index()
+            if self._is_valid(snapshot):
+                self._apply(snapshot)
+                return
+
+        self._apply(self._take_snapshot())
+
+        if self.index_path:
+            self._save_index()
+
+    # queries
+    # ---------------------------
+
+    def exists(self, path):
+
+        return _to_key(path) in self.files
+
+    def find(self, path, exts):
+        """Finds the first existing file of a path with one of the extensions.
+
+        Args:
+
+            path (str): path with or without extension.
+            exts (list<str>): extensions in the order they are tried, without
+                '.'.
+
+        Returns:
+
+            path (str): path of the file found, None if not found.
+        """
+
+        stem, _ = _split_ext(_to_key(path))
+        found_exts = self.stems.get(stem)
+        if not found_exts:
+            return None
+
+        for ext in exts:
+            if ext.lower() in found_exts:
+                return "{}.{}".format(stem, ext.lower())
+
+        return None
+
+    def list_files(self, ext = None, directory = ""):
+        """Lists paths of files, optionally filtered by extension and
+        directory.
+        """
+
+        prefix = _to_key(directory)
+        if prefix:
+            prefix = "{}/".format(prefix)
+
+        paths = []
+        for key in self.files:
+
+            if ext and _split_ext(key)[1] != ext.lower():
+                continue
+            if not key.startswith(prefix):
+                continue
+            paths.append(key)
+
+        return sorted(paths)
+
+    def open(self, path):
+        """Opens a file for binary reading.
+        """
+
+        pk3_path, name = self.files[_to_key(path)]
+        if not pk3_path:
+            return open(os.path.join(self.game_path, name), 'rb')
+
+        zip_file = zipfile.ZipFile(pk3_path, 'r')
+        try:
+            return _ZipMemberFile(zip_file, zip_file.open(name, 'r'))
+        except Exception:
+            zip_file.close()
+            raise
+
+    def read(self, path):
+
+        with self.open(path) as file:
+            return file.read()
+
+    def get_file_path(self, path):
+        """Returns a real file path of a file, files inside pk3 files are
+        extracted if not already up to date.
+        """
+
+        pk3_path, name = self.files[_to_key(path)]
+        if not pk3_path:
+            return os.path.join(self.game_path, name)
+
+        pk3_hash = hashlib.sha1(pk3_path.encode("utf-8")).hexdigest()[0:12]
+        target_dir = os.path.join(self.extract_dir, pk3_hash)
+
+        file_path = os.path.join(target_dir, *name.split("/"))
+        if not self._is_up_to_date(file_path, pk3_path):
+
+            with zipfile.ZipFile(pk3_path, 'r') as zip_file:
+                file_path = zip_file.extract(name, target_dir)
+
+        return file_path
+
+    @staticmethod
+    def _is_up_to_date(file_path, pk3_path):
+
+        try:
+            return os.stat(file_path).st_mtime_ns >= \
+                   os.stat(pk3_path).st_mtime_ns
+        except OSError:
+            return False
+
+
+class _ZipMemberFile:
+    """File object of a pk3 member, which closes the pk3 file with it.
+    """
+
+    def __init__(self, zip_file, member_file):
+
+        self.zip_file = zip_file
+        self.member_file = member_file
+
+    def read(self, size = -1):
+
+        return self.member_file.read(size)
+
+    def close(self):
+
+        self.member_file.close()
+        self.zip_file.close()
+
+    def __enter__(self):
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+
+        self.close()
+
+
+# =====================================
+# shared instances
+# =====================================
+
+_vfs_by_game_path = {}
+
+def get_default_index_path(game_path):
+
+    game_path = os.path.abspath(game_path)
+    path_hash = hashlib.sha1(game_path.encode("utf-8")).hexdigest()[0:12]
+    return os.path.join(tempfile.gettempdir(), "rtcw_et_model_tools",
+                        "vfs_{}.json".format(path_hash))
+
+def get(game_path, refresh = False):
+    """Returns the VFS of a game directory, which is shared within a session
+    and persisted between sessions.
+
+    Args:
+
+        game_path (str): the game directory.
+        refresh (bool): rebuild the index of a shared VFS if the game
+            directory changed.
+
+    Notes:
+
+        Validating the index stats every directory of the game directory.
+        Operations refresh once before they start, lookups done by the
+        operation then skip it.
+    """
+
+    game_path = os.path.abspath(game_path)
+
+    vfs = _vfs_by_game_path.get(game_path)
+    if vfs:
+        if refresh:
+            vfs.refresh()
+    else:
+        vfs = VFS(game_path, get_default_index_path(game_path))
+        _vfs_by_game_path[game_path] = vfs
+
+    return vfs
@@ -53,6 +53,7 @@ Background:
     Tags provide the possibility to attach external models to the model.
 """
 
+import io
 import struct
 
 import rtcw_et_model_tools.common.timer as timer_m
@@ -95,6 +96,12 @@ class MD3FrameVertex:
     location_scale = 1.0 / 64
     normal_scale = 360.0 / 255
 
+    # same encoding, used for frame vertices kept in arrays. Given as numpy
+    # dtype description, so numpy is not imported unless arrays are used
+    dtype = [('location', '<i2', (3,)),
+             ('normal_pitch', 'u1'),
+             ('normal_yaw', 'u1')]
+
     def __init__(self, location, normal):
 
         self.location = location
@@ -483,7 +490,9 @@ class MD3Surface:
         tex_coords (list): list of MD3TexCoords objects, size=num_vertices.
         vertices (list): list of list objects, size=num_frames. Each nested
             list contains MD3FrameVertex objects, size=num_vertices. Access
-            like this: vertices[num_frame][num_vertex].
+            like this: vertices[num_frame][num_vertex]. Can also be an
+            array or MappedArray of MD3FrameVertex.dtype with shape
+            (num_frames, num_vertices).
 
     Background:
 
@@ -500,13 +509,15 @@ class MD3Surface:
         self.vertices = []
 
     @staticmethod
-    def read(file, file_ofs):
+    def read(file, file_ofs, map_vertices = False):
         """Reads file data into an MD3Surface object.
 
         Args:
 
             file (File): file object.
             file_ofs (int): file offset from which data will be read.
+            map_vertices (bool): keep frame vertices in the file as
+                MappedArray instead of reading them into objects.
 
         Returns:
 
@@ -552,6 +563,13 @@ class MD3Surface:
 
         # md3_surface.vertices
         file_ofs = md3_surface_ofs + md3_surface.header.ofs_vertices
+
+        if map_vertices:
+
+            md3_surface.vertices = \
+                MD3Surface._map_vertices(file, file_ofs, md3_surface.header)
+            return md3_surface
+
         for i in range(0, md3_surface.header.num_frames):
 
             md3_frame_vertices = []
@@ -567,6 +585,45 @@ class MD3Surface:
 
         return md3_surface
 
+    @staticmethod
+    def _map_vertices(file, file_ofs, md3_surface_header):
+        """Maps frame vertices of a file read only.
+
+        Args:
+
+            file (File): file object.
+            file_ofs (int): file offset of the frame vertices.
+            md3_surface_header (MD3SurfaceHeader): header of the surface.
+
+        Returns:
+
+            vertices (MappedArray): MD3FrameVertex.dtype, shape (num_frames,
+                num_vertices).
+        """
+
+        import rtcw_et_model_tools.common.mapped_array as mapped_array_m
+
+        if not isinstance(getattr(file, "name", None), str):
+
+            exception_string = "Frame vertices can only be mapped from a" \
+                               " file opened from a path"
+            raise Exception(exception_string)
+
+        shape = (md3_surface_header.num_frames,
+                 md3_surface_header.num_vertices)
+
+        file.seek(0, 2)
+        file_size = file.tell()
+        if file_ofs + shape[0] * shape[1] * MD3FrameVertex.format_size > \
+           file_size:
+
+            exception_string = "Frame vertices exceed end of file"
+            raise Exception(exception_string)
+
+        # mapped by path, so the file can be closed
+        return mapped_array_m.MappedArray(file.name, shape,
+                                          MD3FrameVertex.dtype, file_ofs)
+
     def write(self, file, file_ofs):
         """Writes MD3Surface object to file.
 
@@ -611,6 +668,11 @@ class MD3Surface:
         # md3_surface.vertices
         file_ofs = md3_surface_ofs + self.header.ofs_vertices
 
+        if not isinstance(self.vertices, list):
+
+            self._write_vertex_array(file, file_ofs)
+            return
+
         for md3_frame_vertices in self.vertices:
 
             for md3_frame_vertex in md3_frame_vertices:
@@ -619,6 +681,32 @@ class MD3Surface:
 
                 file_ofs = file_ofs + MD3FrameVertex.format_size
 
+    def _write_vertex_array(self, file, file_ofs):
+        """Writes frame vertices given as numpy.ndarray, or given as
+        MappedArray a block of frames at a time.
+
+            Args:
+
+                file (File): file object.
+                file_ofs (int): file offset to which data is written.
+        """
+
+        import numpy as np
+
+        file.seek(file_ofs)
+
+        if isinstance(self.vertices, np.ndarray):
+
+            file.write(self.vertices.astype(MD3FrameVertex.dtype,
+                                            copy=False).tobytes())
+            return
+
+        for frame_start, frame_end in self.vertices.calc_blocks():
+
+            md3_frame_vertices = self.vertices[frame_start:frame_end]
+            file.write(md3_frame_vertices.astype(MD3FrameVertex.dtype,
+                                                 copy=False).tobytes())
+
 
 class MD3FrameTag:
     """A tag in a specific frame.
@@ -971,12 +1059,14 @@ class MD3:
         self.surfaces = []
 
     @staticmethod
-    def read(file_path):
+    def read(file_path, map_vertices = False):
         """Reads a binary encoded MD3 file into an MD3 object.
 
         Args:
 
             file_path (str): path to MD3 file.
+            map_vertices (bool): keep frame vertices in the file instead of
+                reading them into objects, see MD3Surface.read.
 
         Returns:
 
@@ -984,53 +1074,89 @@ class MD3:
         """
 
         with open(file_path, 'rb') as file:
+            return MD3.read_file(file, file_path, map_vertices)
 
-            timer = timer_m.Timer()
-            reporter_m.info("Reading MD3 file: {} ...".format(file_path))
+    @staticmethod
+    def read_file(file, name=None, map_vertices = False):
+        """Reads a binary encoded MD3 file from a file object, for example a
+        memory buffer.
+
+        Args:
+
+            file (File): binary file object, must be seekable.
+            name (str): name of the file in log messages.
+            map_vertices (bool): keep frame vertices in the file instead of
+                reading them into objects, see MD3Surface.read. Needs a
+                file opened from a path.
+
+        Returns:
+
+            md3 (MD3): MD3 object.
+        """
+
+        timer = timer_m.Timer()
+        reporter_m.info("Reading MD3 file: {} ...".format(name or "<memory>"))
 
-            md3 = MD3()
+        md3 = MD3()
 
-            # md3.header
-            file_ofs = 0
-            md3.header = MD3Header.read(file, file_ofs)
+        # md3.header
+        file_ofs = 0
+        md3.header = MD3Header.read(file, file_ofs)
 
-            # md3.frame_infos
-            file_ofs = md3.header.ofs_frame_infos
-            for i in range(0, md3.header.num_frames):
+        # md3.frame_infos
+        file_ofs = md3.header.ofs_frame_infos
+        for i in range(0, md3.header.num_frames):
 
-                md3_frame_info = MD3FrameInfo.read(file, file_ofs)
-                md3.frame_infos.append(md3_frame_info)
+            md3_frame_info = MD3FrameInfo.read(file, file_ofs)
+            md3.frame_infos.append(md3_frame_info)
 
-                file_ofs = file_ofs + MD3FrameInfo.format_size
+            file_ofs = file_ofs + MD3FrameInfo.format_size
 
-            # md3.tags
-            file_ofs = md3.header.ofs_tags
-            for i in range(0, md3.header.num_frames):
+        # md3.tags
+        file_ofs = md3.header.ofs_tags
+        for i in range(0, md3.header.num_frames):
 
-                md3_frame_tags = []
+            md3_frame_tags = []
 
-                for j in range(0, md3.header.num_tags):
+            for j in range(0, md3.header.num_tags):
 
-                    md3_frame_tag = MD3FrameTag.read(file, file_ofs)
-                    md3_frame_tags.append(md3_frame_tag)
+                md3_frame_tag = MD3FrameTag.read(file, file_ofs)
+                md3_frame_tags.append(md3_frame_tag)
 
-                    file_ofs = file_ofs + MD3FrameTag.format_size
+                file_ofs = file_ofs + MD3FrameTag.format_size
 
-                md3.tags.append(md3_frame_tags)
+            md3.tags.append(md3_frame_tags)
 
-            # md3.surfaces
-            file_ofs = md3.header.ofs_surfaces
-            for i in range(0, md3.header.num_surfaces):
+        # md3.surfaces
+        file_ofs = md3.header.ofs_surfaces
+        for i in range(0, md3.header.num_surfaces):
 
-                md3_surface = MD3Surface.read(file, file_ofs)
-                md3.surfaces.append(md3_surface)
+            md3_surface = MD3Surface.read(file, file_ofs, map_vertices)
+            md3.surfaces.append(md3_surface)
 
-                file_ofs = file_ofs + md3_surface.header.ofs_end
+            file_ofs = file_ofs + md3_surface.header.ofs_end
 
-            time = timer.time()
-            reporter_m.info("Reading MD3 file DONE (time={})".format(time))
+        time = timer.time()
+        reporter_m.info("Reading MD3 file DONE (time={})".format(time))
 
-            return md3
+        return md3
+
+    @staticmethod
+    def from_bytes(data, name=None):
+        """Reads binary encoded MD3 data from memory.
+
+        Args:
+
+            data (bytes): content of an MD3 file.
+            name (str): name of the file in log messages.
+
+        Returns:
+
+            md3 (MD3): MD3 object.
+        """
+
+        with io.BytesIO(data) as file:
+            return MD3.read_file(file, name)
 
     def write(self, file_path):
         """Writes MD3 object to file with binary encoding.
@@ -1041,39 +1167,67 @@ class MD3:
         """
 
         with open(file_path, 'wb') as file:
+            self.write_file(file, file_path)
+
+    def write_file(self, file, name=None):
+        """Writes MD3 object with binary encoding to a file object, for
+        example a memory buffer.
+
+        Args:
+
+            file (File): binary file object, must be seekable.
+            name (str): name of the file in log messages.
+        """
+
+        timer = timer_m.Timer()
+        reporter_m.info("Writing MD3 file: {} ...".format(name or "<memory>"))
+
+        # md3.header
+        file_ofs = 0
+        self.header.write(file, file_ofs)
+
+        # md3.frame_infos
+        file_ofs = self.header.ofs_frame_infos
+        for md3_frame_info in self.frame_infos:
+
+            md3_frame_info.write(file, file_ofs)
 
-            timer = timer_m.Timer()
-            reporter_m.info("Writing MD3 file: {} ...".format(file_path))
+            file_ofs = file_ofs + MD3FrameInfo.format_size
 
-            # md3.header
-            file_ofs = 0
-            self.header.write(file, file_ofs)
+        # md3.tags
+        file_ofs = self.header.ofs_tags
+        for md3_frame_tags in self.tags:
 
-            # md3.frame_infos
-            file_ofs = self.header.ofs_frame_infos
-            for md3_frame_info in self.frame_infos:
+            for md3_frame_tag in md3_frame_tags:
 
-                md3_frame_info.write(file, file_ofs)
+                md3_frame_tag.write(file, file_ofs)
 
-                file_ofs = file_ofs + MD3FrameInfo.format_size
+                file_ofs = file_ofs + MD3FrameTag.format_size
 
-            # md3.tags
-            file_ofs = self.header.ofs_tags
-            for md3_frame_tags in self.tags:
+        # md3.surfaces
+        file_ofs = self.header.ofs_surfaces
+        for md3_surface in self.surfaces:
 
-                for md3_frame_tag in md3_frame_tags:
+            md3_surface.write(file, file_ofs)
 
-                    md3_frame_tag.write(file, file_ofs)
+            file_ofs = file_ofs + md3_surface.header.ofs_end
 
-                    file_ofs = file_ofs + MD3FrameTag.format_size
+        time = timer.time()
+        reporter_m.info("Writing MD3 file DONE (time={})".format(time))
 
-            # md3.surfaces
-            file_ofs = self.header.ofs_surfaces
-            for md3_surface in self.surfaces:
+    def to_bytes(self, name=None):
+        """Writes MD3 object with binary encoding to memory.
+
+        Args:
 
-                md3_surface.write(file, file_ofs)
+            name (str): name of the file in log messages.
+
+        Returns:
+
+            data (bytes): content of an MD3 file.
+        """
 
-                file_ofs = file_ofs + md3_surface.header.ofs_end
+        with io.BytesIO() as file:
 
-            time = timer.time()
-            reporter_m.info("Writing MD3 file DONE (time={})".format(time))
+            self.write_file(file, name)
+            return file.getvalue()
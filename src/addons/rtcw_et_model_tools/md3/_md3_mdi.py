@@ -21,16 +21,49 @@
 """Converts between in-memory representations of MD3 and MDI.
 """
 
-import mathutils
+import numpy as np
 
 import rtcw_et_model_tools.md3._md3 as md3_m
 import rtcw_et_model_tools.mdi.mdi as mdi_m
 import rtcw_et_model_tools.mdi.util as mdi_util_m
 
+import rtcw_et_model_tools.common.frame_parallel as frame_parallel_m
+import rtcw_et_model_tools.common.mapped_array as mapped_array_m
+import rtcw_et_model_tools.common.math_backend as math_backend_m
 import rtcw_et_model_tools.common.timer as timer_m
 import rtcw_et_model_tools.common.reporter as reporter_m
 
 
+_frame_vertex_normals = None
+
+def _get_frame_vertex_normals():
+    """Returns the normals of all encodable pairs of angles, calculated once
+    per process.
+
+    Returns:
+
+        normals (numpy.ndarray): float32, shape (256, 256, 3). Access like
+            this: normals[yaw][pitch].
+    """
+
+    global _frame_vertex_normals
+
+    if _frame_vertex_normals is None:
+
+        normal_scale = md3_m.MD3FrameVertex.normal_scale
+
+        normals = (math_backend_m.Vector(
+                       mdi_util_m.rotate_up_vector(yaw * normal_scale,
+                                                   pitch * normal_scale))
+                   for yaw in range(256)
+                   for pitch in range(256))
+        normals = mdi_util_m.vectors_to_array(normals, 256 * 256)
+
+        _frame_vertex_normals = normals.reshape(256, 256, 3)
+
+    return _frame_vertex_normals
+
+
 class MDIToModel:
     """MDI to MD3 conversion.
     """
@@ -46,7 +79,7 @@ class MDIToModel:
         flags = md3_m.MD3Header.flags
         num_frames = 0
         if md3_model.surfaces:
-            if md3_model.surfaces[0].vertices:
+            if len(md3_model.surfaces[0].vertices) > 0:
                 num_frames = len(md3_model.surfaces[0].vertices)
         elif md3_model.tags:
             num_frames = len(md3_model.tags)
@@ -82,7 +115,7 @@ class MDIToModel:
             num_frames = len(md3_surface.vertices)
             num_shaders = len(md3_surface.shaders)
             num_vertices = 0
-            if md3_surface.vertices:
+            if len(md3_surface.vertices) > 0:
                 num_vertices = len(md3_surface.vertices[0])
             num_triangles = len(md3_surface.triangles)
             ofs_triangles = 0 + md3_m.MD3SurfaceHeader.format_size
@@ -113,13 +146,13 @@ class MDIToModel:
 
         mdi_surface = mdi_model.surfaces[num_surface]
 
-        for mdi_morph_vertex in mdi_surface.vertices:
+        locations, normals = mdi_surface.get_morph_frame(num_frame)
+
+        for location, mdi_normal in zip(locations, normals):
 
-            location = mdi_morph_vertex.locations[num_frame]
             location = location / md3_m.MD3FrameVertex.location_scale
             location = (int(location[0]), int(location[1]), int(location[2]))
 
-            mdi_normal = mdi_morph_vertex.normals[num_frame]
             yaw, pitch = mdi_util_m.angles_from_up_vector(mdi_normal)
 
             if yaw < 0:
@@ -137,6 +170,149 @@ class MDIToModel:
 
         return md3_frame_vertices
 
+    @staticmethod
+    def _encode_frame_vertices(locations, normals):
+        """Batched version of _to_md3_frame_vertices.
+
+        Args:
+
+            locations (numpy.ndarray): shape (num_frames, V, 3).
+            normals (numpy.ndarray): shape (num_frames, V, 3).
+
+        Returns:
+
+            md3_frame_vertices (numpy.ndarray): MD3FrameVertex.dtype, shape
+                (num_frames, V).
+        """
+
+        shape = locations.shape[0:2]
+
+        locations = np.asarray(locations, dtype=np.float32).reshape(-1, 3)
+        normals = np.asarray(normals, dtype=np.float32).reshape(-1, 3)
+
+        # same single precision division as Vector
+        inv_location_scale = \
+            np.float32(1.0) / np.float32(md3_m.MD3FrameVertex.location_scale)
+        locations = np.trunc(locations * inv_location_scale)
+
+        if not np.all((locations >= -32768) & (locations <= 32767)):
+
+            exception_string = "Frame vertex location out of range"
+            raise Exception(exception_string)
+
+        yaw, pitch = mdi_util_m.angles_from_up_vectors(normals)
+
+        yaw[yaw < 0] += 360
+        pitch[pitch < 0] += 180
+
+        yaw = np.trunc(yaw / md3_m.MD3FrameVertex.normal_scale)
+        pitch = np.trunc(pitch / md3_m.MD3FrameVertex.normal_scale)
+
+        if not (np.all(np.isfinite(yaw)) and np.all(np.isfinite(pitch))):
+
+            exception_string = "Frame vertex normal invalid"
+            raise Exception(exception_string)
+
+        md3_frame_vertices = np.empty(len(locations),
+                                      dtype=md3_m.MD3FrameVertex.dtype)
+        md3_frame_vertices['location'] = locations
+        md3_frame_vertices['normal_yaw'] = yaw
+        md3_frame_vertices['normal_pitch'] = pitch
+
+        return md3_frame_vertices.reshape(shape)
+
+    @staticmethod
+    def _encode_stage(frame_start, frame_end, inputs, outputs, context):
+        """Frame parallel stage: all frame vertices of a range of frames.
+        """
+
+        outputs["vertices"][frame_start:frame_end] = \
+            MDIToModel._encode_frame_vertices(
+                inputs["locations"][frame_start:frame_end],
+                inputs["normals"][frame_start:frame_end])
+
+    @staticmethod
+    def _to_md3_frame_vertices_parallel(mdi_model, num_surface,
+                                        frame_executor):
+        """Encodes frame vertices of a surface frame parallel.
+
+        Args:
+
+            mdi_model (MDI)
+            num_surface (int)
+            frame_executor (FrameExecutor)
+
+        Returns:
+
+            md3_frame_vertices (numpy.ndarray): MD3FrameVertex.dtype, shape
+                (num_frames, num_vertices).
+        """
+
+        mdi_surface = mdi_model.surfaces[num_surface]
+
+        num_frames = len(mdi_surface.vertices[0].locations)
+        num_vertices = len(mdi_surface.vertices)
+
+        inputs = {
+            "locations": mdi_surface.calc_morph_locations(num_frames),
+            "normals": mdi_surface.calc_morph_normals(num_frames)
+        }
+        outputs = {
+            "vertices": ((num_frames, num_vertices),
+                         md3_m.MD3FrameVertex.dtype)
+        }
+
+        outputs = frame_executor.map_frames(MDIToModel._encode_stage,
+                                            num_frames, inputs, outputs)
+
+        return outputs["vertices"]
+
+    @staticmethod
+    def _to_md3_mapped_frame_vertices(mdi_model, num_surface,
+                                      scratch_dir = None):
+        """Encodes frame vertices of a surface held out of core into a scratch
+        file, a block of frames at a time.
+
+        Args:
+
+            mdi_model (MDI)
+            num_surface (int)
+            scratch_dir (str): directory of the scratch file.
+
+        Returns:
+
+            md3_frame_vertices (MappedArray): MD3FrameVertex.dtype, shape
+                (num_frames, num_vertices).
+        """
+
+        mdi_surface = mdi_model.surfaces[num_surface]
+
+        num_frames = len(mdi_surface.vertices[0].locations)
+        num_vertices = len(mdi_surface.vertices)
+
+        md3_frame_vertices = mapped_array_m.MappedArray.create_scratch(
+            (num_frames, num_vertices), md3_m.MD3FrameVertex.dtype,
+            scratch_dir)
+
+        # encoded frames are 6 times smaller than locations and normals in
+        # double precision
+        block_size = mapped_array_m.MappedArray.block_size // 6
+        frame_blocks = md3_frame_vertices.calc_blocks(block_size)
+
+        for frame_start, frame_end in frame_blocks:
+
+            num_block_frames = frame_end - frame_start
+
+            locations = mdi_surface.calc_morph_locations(num_block_frames,
+                                                         frame_start)
+            normals = mdi_surface.calc_morph_normals(num_block_frames,
+                                                     frame_start)
+
+            md3_frame_vertices[frame_start:frame_end] = \
+                MDIToModel._encode_frame_vertices(locations, normals)
+
+        return md3_frame_vertices
+
     @staticmethod
     def _to_md3_tex_coords(mdi_model, num_surface, num_tex_coords):
 
@@ -176,7 +352,8 @@ class MDIToModel:
         return md3_triangle
 
     @staticmethod
-    def _to_md3_surface(mdi_model, num_surface):
+    def _to_md3_surface(mdi_model, num_surface, scratch_dir = None,
+                        frame_executor = None):
 
         md3_surface = md3_m.MD3Surface()
 
@@ -207,6 +384,23 @@ class MDIToModel:
             md3_surface.tex_coords.append(md3_tex_coords)
 
         # md3 frame vertices
+        if mdi_surface.vertices and mdi_surface.is_out_of_core():
+
+            md3_surface.vertices = \
+                MDIToModel._to_md3_mapped_frame_vertices(mdi_model,
+                                                         num_surface,
+                                                         scratch_dir)
+            return md3_surface
+
+        if mdi_surface.vertices and frame_executor and \
+           frame_executor.is_parallel():
+
+            md3_surface.vertices = \
+                MDIToModel._to_md3_frame_vertices_parallel(mdi_model,
+                                                           num_surface,
+                                                           frame_executor)
+            return md3_surface
+
         for mdi_morph_vertex in mdi_surface.vertices:
 
             for num_frame in range(len(mdi_morph_vertex.locations)):
@@ -260,12 +454,17 @@ class MDIToModel:
         return md3_frame_info
 
     @staticmethod
-    def convert(mdi_model):
+    def convert(mdi_model, scratch_dir = None, num_workers = 1):
         """Converts MDI to MD3.
 
         Args:
 
             mdi_model (MDI): MDI model.
+            scratch_dir (str): directory of scratch files for surfaces held
+                out of core, None for the default temporary directory.
+            num_workers (int): number of processes used to bake skeletal
+                animation and encode frame vertices. Output is the same for
+                any number.
 
         Returns:
 
@@ -277,39 +476,45 @@ class MDIToModel:
 
         md3_model = md3_m.MD3()
 
-        # type conversions
-        for num_surface, mdi_surface in enumerate(mdi_model.surfaces):
+        with frame_parallel_m.FrameExecutor(num_workers) as frame_executor:
 
-            mdi_surface.uv_map_to_type(mdi_m.MDIUVMapBijective)
-            mdi_surface.shader_to_type(mdi_m.MDIShaderPaths)
-            mdi_surface.vertices_to_type(mdi_m.MDIMorphVertex, mdi_model)
+            # type conversions
+            for num_surface, mdi_surface in enumerate(mdi_model.surfaces):
 
-        mdi_model.tags_to_type(mdi_m.MDIFreeTag)
-        mdi_model.lod_to_type(mdi_m.MDIDiscreteLOD)
+                mdi_surface.uv_map_to_type(mdi_m.MDIUVMapBijective)
+                mdi_surface.shader_to_type(mdi_m.MDIShaderPaths)
+                mdi_surface.vertices_to_type(mdi_m.MDIMorphVertex, mdi_model,
+                                             frame_executor)
 
-        # md3 frame infos
-        for num_frame in range(len(mdi_model.bounds.aabbs)):
+            mdi_model.tags_to_type(mdi_m.MDIFreeTag)
+            mdi_model.lod_to_type(mdi_m.MDIDiscreteLOD)
 
-            md3_frame_info = MDIToModel._to_md3_frame_info(mdi_model,
-                                                           num_frame)
-            md3_model.frame_infos.append(md3_frame_info)
+            # md3 frame infos
+            for num_frame in range(len(mdi_model.bounds.aabbs)):
 
-        # md3 frame tags
-        for mdi_free_tag in mdi_model.tags:
+                md3_frame_info = MDIToModel._to_md3_frame_info(mdi_model,
+                                                               num_frame)
+                md3_model.frame_infos.append(md3_frame_info)
 
-            for num_frame in range(len(mdi_free_tag.locations)):
+            # md3 frame tags
+            for mdi_free_tag in mdi_model.tags:
 
-                md3_frame_tags = MDIToModel._to_md3_frame_tags(mdi_model,
-                                                               num_frame)
-                md3_model.tags.append(md3_frame_tags)
+                for num_frame in range(len(mdi_free_tag.locations)):
 
-            break
+                    md3_frame_tags = MDIToModel._to_md3_frame_tags(mdi_model,
+                                                                   num_frame)
+                    md3_model.tags.append(md3_frame_tags)
+
+                break
 
-        # md3 surfaces
-        for num_surface in range(len(mdi_model.surfaces)):
+            # md3 surfaces
+            for num_surface in range(len(mdi_model.surfaces)):
 
-            md3_surface = MDIToModel._to_md3_surface(mdi_model, num_surface)
-            md3_model.surfaces.append(md3_surface)
+                md3_surface = MDIToModel._to_md3_surface(mdi_model,
+                                                         num_surface,
+                                                         scratch_dir,
+                                                         frame_executor)
+                md3_model.surfaces.append(md3_surface)
 
         # headers
         MDIToModel._calc_md3_headers(md3_model, mdi_model)
@@ -332,13 +537,13 @@ class ModelToMDI:
         for md3_frame_info in md3_model.frame_infos:
 
             # aabb
-            min_bound = mathutils.Vector(md3_frame_info.min_bound)
-            max_bound = mathutils.Vector(md3_frame_info.max_bound)
+            min_bound = math_backend_m.Vector(md3_frame_info.min_bound)
+            max_bound = math_backend_m.Vector(md3_frame_info.max_bound)
             mdi_aabb = mdi_m.MDIAABB(min_bound, max_bound)
             mdi_bounds.aabbs.append(mdi_aabb)
 
             # sphere
-            origin = mathutils.Vector(md3_frame_info.local_origin)
+            origin = math_backend_m.Vector(md3_frame_info.local_origin)
             radius = md3_frame_info.radius
             mdi_bounding_sphere = mdi_m.MDIBoundingSphere(origin, radius)
             mdi_bounds.spheres.append(mdi_bounding_sphere)
@@ -359,7 +564,7 @@ class ModelToMDI:
             md3_frame_tag = md3_frame_tags[num_tag]
 
             # location
-            mdi_location = mathutils.Vector(md3_frame_tag.location)
+            mdi_location = math_backend_m.Vector(md3_frame_tag.location)
             mdi_tag.locations.append(mdi_location)
 
             # orientation
@@ -429,7 +634,7 @@ class ModelToMDI:
             y = y * md3_m.MD3FrameVertex.location_scale
             z = z * md3_m.MD3FrameVertex.location_scale
 
-            location = mathutils.Vector((x, y, z))
+            location = math_backend_m.Vector((x, y, z))
             mdi_morph_vertex.locations.append(location)
 
             # normal
@@ -440,13 +645,68 @@ class ModelToMDI:
             pitch = pitch * md3_m.MD3FrameVertex.normal_scale
 
             normal = mdi_util_m.rotate_up_vector(yaw, pitch)
-            normal = mathutils.Vector(normal)
+            normal = math_backend_m.Vector(normal)
             mdi_morph_vertex.normals.append(normal)
 
         return mdi_morph_vertex
 
     @staticmethod
-    def _to_mdi_surface(md3_model, num_surface):
+    def _to_mdi_mapped_vertices(md3_model, num_surface, scratch_dir = None):
+        """Streams frame vertices given as MappedArray into MDIMappedFrames, a
+        block of frames at a time.
+
+        Args:
+
+            md3_model (MD3)
+            num_surface (int)
+            scratch_dir (str): directory of the scratch file.
+
+        Returns:
+
+            mdi_morph_vertices (list<MDIMorphVertex>): vertices referencing
+                the frames out of core.
+        """
+
+        md3_surface = md3_model.surfaces[num_surface]
+
+        num_frames, num_vertices = md3_surface.vertices.shape
+        if num_frames == 0:
+            return []
+
+        mdi_mapped_frames = mdi_m.MDIMappedFrames(num_frames, num_vertices,
+                                                  scratch_dir)
+
+        frame_vertex_normals = _get_frame_vertex_normals()
+
+        for frame_start, frame_end in mdi_mapped_frames.calc_frame_blocks():
+
+            md3_frame_vertices = md3_surface.vertices[frame_start:frame_end]
+
+            # same double precision product as the scalar conversion
+            locations = md3_frame_vertices['location'].astype(np.float64)
+            locations = locations * md3_m.MD3FrameVertex.location_scale
+
+            normals = \
+                frame_vertex_normals[md3_frame_vertices['normal_yaw'],
+                                     md3_frame_vertices['normal_pitch']]
+
+            mdi_mapped_frames.set_frames(frame_start, locations, normals)
+
+        mdi_morph_vertices = []
+        for num_vertex in range(num_vertices):
+
+            locations = mdi_m.MDIMorphFramesView(mdi_mapped_frames,
+                                                 num_vertex, 0)
+            normals = mdi_m.MDIMorphFramesView(mdi_mapped_frames,
+                                               num_vertex, 1)
+
+            mdi_morph_vertex = mdi_m.MDIMorphVertex(locations, normals)
+            mdi_morph_vertices.append(mdi_morph_vertex)
+
+        return mdi_morph_vertices
+
+    @staticmethod
+    def _to_mdi_surface(md3_model, num_surface, scratch_dir = None):
 
         mdi_surface = mdi_m.MDISurface()
 
@@ -457,17 +717,25 @@ class ModelToMDI:
             mdi_util_m.from_c_string_padded(md3_surface.header.name)
 
         # mdi vertices
-        for md3_frame_vertices in md3_surface.vertices:
+        if isinstance(md3_surface.vertices, mapped_array_m.MappedArray):
 
-            for num_vertex in range(len(md3_frame_vertices)):
+            mdi_surface.vertices = \
+                ModelToMDI._to_mdi_mapped_vertices(md3_model, num_surface,
+                                                   scratch_dir)
 
-                mdi_morph_vertex = \
-                    ModelToMDI._to_mdi_morph_vertex(md3_model,
-                                                    num_surface,
-                                                    num_vertex)
-                mdi_surface.vertices.append(mdi_morph_vertex)
+        else:
 
-            break
+            for md3_frame_vertices in md3_surface.vertices:
+
+                for num_vertex in range(len(md3_frame_vertices)):
+
+                    mdi_morph_vertex = \
+                        ModelToMDI._to_mdi_morph_vertex(md3_model,
+                                                        num_surface,
+                                                        num_vertex)
+                    mdi_surface.vertices.append(mdi_morph_vertex)
+
+                break
 
         # mdi triangles
         for num_triangle in range(len(md3_surface.triangles)):
@@ -487,13 +755,16 @@ class ModelToMDI:
         return mdi_surface
 
     @staticmethod
-    def convert(md3_model, root_frame = 0):
+    def convert(md3_model, root_frame = 0, scratch_dir = None):
         """Converts MD3 to MDI.
 
         Args:
 
             md3_model (MD3): MD3 model.
             root_frame (int): frame of the model before animation pass.
+            scratch_dir (str): directory of scratch files for frame vertices
+                given as MappedArray, None for the default temporary
+                directory.
 
         Returns:
 
@@ -511,7 +782,8 @@ class ModelToMDI:
         # mdi surfaces
         for num_surface in range(len(md3_model.surfaces)):
 
-            mdi_surface = ModelToMDI._to_mdi_surface(md3_model, num_surface)
+            mdi_surface = ModelToMDI._to_mdi_surface(md3_model, num_surface,
+                                                     scratch_dir)
             mdi_model.surfaces.append(mdi_surface)
 
         # mdi skeleton
@@ -27,7 +27,8 @@ import rtcw_et_model_tools.md3._md3 as md3_m
 import rtcw_et_model_tools.md3._md3_mdi as md3_mdi_m
 
 
-def read(file_path, bind_frame, encoding="binary"):
+def read(file_path, bind_frame, encoding="binary", compress_frames=False,
+         out_of_core=False, scratch_dir=None):
 
     """Reads MD3 data from file, then converts it to MDI.
 
@@ -36,6 +37,13 @@ def read(file_path, bind_frame, encoding="binary"):
         file_path (str): path to MD3 file.
         bind_frame (int): bind frame used for morphing.
         encoding (str): encoding to use for MD3.
+        compress_frames (bool): keep frames as key frames plus quantized
+            deltas in memory, see MDI.compress_morph_frames.
+        out_of_core (bool): stream frames into memory mapped scratch files
+            instead of memory, see MDIMappedFrames. Takes precedence over
+            compress_frames. Such models can be written to MD3 only.
+        scratch_dir (str): directory of scratch files, None for the default
+            temporary directory.
 
     Returns:
 
@@ -43,7 +51,7 @@ def read(file_path, bind_frame, encoding="binary"):
     """
 
     if encoding == "binary":
-        md3_model = md3_m.MD3.read(file_path)
+        md3_model = md3_m.MD3.read(file_path, map_vertices=out_of_core)
     elif encoding == "xml":
         pass  # TODO
     elif encoding == "json":
@@ -53,16 +61,59 @@ def read(file_path, bind_frame, encoding="binary"):
             "Encoding option '{}' not supported".format(encoding)
         raise Exception(exception_string)
 
-    mdi_model = md3_mdi_m.ModelToMDI.convert(md3_model, bind_frame)
+    return _to_mdi(md3_model, pathlib.Path(file_path).name, bind_frame,
+                   compress_frames, scratch_dir)
+
+
+def read_bytes(data, bind_frame, name=None, encoding="binary",
+               compress_frames=False):
+
+    """Reads MD3 data from memory, then converts it to MDI.
+
+    Args:
+
+        data (bytes): content of an MD3 file.
+        bind_frame (int): bind frame used for morphing.
+        name (str): name of the model if the MD3 data has none, and name in
+            log messages.
+        encoding (str): encoding to use for MD3.
+        compress_frames (bool): keep frames as key frames plus quantized
+            deltas in memory, see MDI.compress_morph_frames.
+
+    Returns:
+
+        mdi_model (MDI): converted MD3 data as MDI.
+    """
+
+    if encoding != "binary":
+        exception_string = \
+            "Encoding option '{}' not supported".format(encoding)
+        raise Exception(exception_string)
+
+    md3_model = md3_m.MD3.from_bytes(data, name)
+
+    return _to_mdi(md3_model, name, bind_frame, compress_frames)
+
+
+def _to_mdi(md3_model, name, bind_frame, compress_frames, scratch_dir=None):
+
+    mdi_model = md3_mdi_m.ModelToMDI.convert(md3_model, bind_frame,
+                                             scratch_dir)
 
     # TODO this shouldn't be here
-    if not mdi_model.name:
-        mdi_model.name = pathlib.Path(file_path).name
+    if not mdi_model.name and name:
+        mdi_model.name = name
+
+    mdi_model.compact_static_frames()
+
+    if compress_frames:
+        mdi_model.compress_morph_frames()
 
     return mdi_model
 
 
-def write(mdi_model, file_path, encoding="binary"):
+def write(mdi_model, file_path, encoding="binary", scratch_dir=None,
+          num_workers=1, pk3_writer=None):
 
     """Converts MDI data to MD3, then writes it back to file.
 
@@ -70,12 +121,21 @@ def write(mdi_model, file_path, encoding="binary"):
         mdi_model (MDI): model definition interchange format.
         file_path (str): path to which MD3 data is written to.
         encoding (str): encoding to use for MD3.
+        scratch_dir (str): directory of scratch files for surfaces held out
+            of core, None for the default temporary directory.
+        num_workers (int): number of processes used for baking and encoding.
+        pk3_writer (PK3Writer): pk3 file the MD3 data is added to, None to
+            write to a file. If given, file_path is the member name.
     """
 
-    md3_model = md3_mdi_m.MDIToModel.convert(mdi_model)
+    md3_model = md3_mdi_m.MDIToModel.convert(mdi_model, scratch_dir,
+                                             num_workers)
 
     if encoding == "binary":
-        md3_model.write(file_path)
+        if pk3_writer:
+            pk3_writer.add_file(file_path, md3_model.write_file)
+        else:
+            md3_model.write(file_path)
     elif encoding == "xml":
         pass  # TODO
     elif encoding == "json":
@@ -84,3 +144,31 @@ def write(mdi_model, file_path, encoding="binary"):
         exception_string = \
             "Encoding option '{}' not supported".format(encoding)
         raise Exception(exception_string)
+
+
+def write_bytes(mdi_model, encoding="binary", scratch_dir=None,
+                num_workers=1):
+
+    """Converts MDI data to MD3, then writes it to memory.
+
+    Args:
+        mdi_model (MDI): model definition interchange format.
+        encoding (str): encoding to use for MD3.
+        scratch_dir (str): directory of scratch files for surfaces held out
+            of core, None for the default temporary directory.
+        num_workers (int): number of processes used for baking and encoding.
+
+    Returns:
+
+        data (bytes): content of an MD3 file.
+    """
+
+    if encoding != "binary":
+        exception_string = \
+            "Encoding option '{}' not supported".format(encoding)
+        raise Exception(exception_string)
+
+    md3_model = md3_mdi_m.MDIToModel.convert(mdi_model, scratch_dir,
+                                             num_workers)
+
+    return md3_model.to_bytes(mdi_model.name)
@@ -68,6 +68,7 @@ Background:
     identical to MD3 in terms of rendered result.
 """
 
+import io
 import struct
 
 import rtcw_et_model_tools.common.timer as timer_m
@@ -1396,62 +1397,95 @@ class MDC:
         """
 
         with open(file_path, 'rb') as file:
+            return MDC.read_file(file, file_path)
 
-            timer = timer_m.Timer()
-            reporter_m.info("Reading MDC file: {} ...".format(file_path))
+    @staticmethod
+    def read_file(file, name=None):
+        """Reads a binary encoded MDC file from a file object, for example a
+        memory buffer.
+
+        Args:
+
+            file (File): binary file object, must be seekable.
+            name (str): name of the file in log messages.
+
+        Returns:
+
+            mdc (MDC): MDC object.
+        """
+
+        timer = timer_m.Timer()
+        reporter_m.info("Reading MDC file: {} ...".format(name or "<memory>"))
 
-            mdc = MDC()
+        mdc = MDC()
 
-            # mdc.header
-            file_ofs = 0
-            mdc.header = MDCHeader.read(file, file_ofs)
+        # mdc.header
+        file_ofs = 0
+        mdc.header = MDCHeader.read(file, file_ofs)
 
-            # mdc.frame_infos
-            file_ofs = mdc.header.ofs_frame_infos
-            for i in range(0, mdc.header.num_frames):
+        # mdc.frame_infos
+        file_ofs = mdc.header.ofs_frame_infos
+        for i in range(0, mdc.header.num_frames):
 
-                mdc_frame_info = MDCFrameInfo.read(file, file_ofs)
-                mdc.frame_infos.append(mdc_frame_info)
+            mdc_frame_info = MDCFrameInfo.read(file, file_ofs)
+            mdc.frame_infos.append(mdc_frame_info)
 
-                file_ofs = file_ofs + MDCFrameInfo.format_size
+            file_ofs = file_ofs + MDCFrameInfo.format_size
 
-            # mdc.tag_infos
-            file_ofs = mdc.header.ofs_tag_infos
-            for i in range(0, mdc.header.num_tags):
+        # mdc.tag_infos
+        file_ofs = mdc.header.ofs_tag_infos
+        for i in range(0, mdc.header.num_tags):
 
-                mdc_tag_info = MDCTagInfo.read(file, file_ofs)
-                mdc.tag_infos.append(mdc_tag_info)
+            mdc_tag_info = MDCTagInfo.read(file, file_ofs)
+            mdc.tag_infos.append(mdc_tag_info)
 
-                file_ofs = file_ofs + MDCTagInfo.format_size
+            file_ofs = file_ofs + MDCTagInfo.format_size
 
-            # mdc.tags
-            file_ofs = mdc.header.ofs_tags
-            for i in range(0, mdc.header.num_frames):
+        # mdc.tags
+        file_ofs = mdc.header.ofs_tags
+        for i in range(0, mdc.header.num_frames):
 
-                mdc_frame_tags = []
+            mdc_frame_tags = []
 
-                for j in range(0, mdc.header.num_tags):
+            for j in range(0, mdc.header.num_tags):
 
-                    mdc_frame_tag = MDCFrameTag.read(file, file_ofs)
-                    mdc_frame_tags.append(mdc_frame_tag)
+                mdc_frame_tag = MDCFrameTag.read(file, file_ofs)
+                mdc_frame_tags.append(mdc_frame_tag)
 
-                    file_ofs = file_ofs + MDCFrameTag.format_size
+                file_ofs = file_ofs + MDCFrameTag.format_size
 
-                mdc.tags.append(mdc_frame_tags)
+            mdc.tags.append(mdc_frame_tags)
 
-            # mdc.surfaces
-            file_ofs = mdc.header.ofs_surfaces
-            for i in range(0, mdc.header.num_surfaces):
+        # mdc.surfaces
+        file_ofs = mdc.header.ofs_surfaces
+        for i in range(0, mdc.header.num_surfaces):
 
-                mdc_surface = MDCSurface.read(file, file_ofs)
-                mdc.surfaces.append(mdc_surface)
+            mdc_surface = MDCSurface.read(file, file_ofs)
+            mdc.surfaces.append(mdc_surface)
 
-                file_ofs = file_ofs + mdc_surface.header.ofs_end
+            file_ofs = file_ofs + mdc_surface.header.ofs_end
 
-            time = timer.time()
-            reporter_m.info("Reading MDC file DONE (time={})".format(time))
+        time = timer.time()
+        reporter_m.info("Reading MDC file DONE (time={})".format(time))
 
-            return mdc
+        return mdc
+
+    @staticmethod
+    def from_bytes(data, name=None):
+        """Reads binary encoded MDC data from memory.
+
+        Args:
+
+            data (bytes): content of an MDC file.
+            name (str): name of the file in log messages.
+
+        Returns:
+
+            mdc (MDC): MDC object.
+        """
+
+        with io.BytesIO(data) as file:
+            return MDC.read_file(file, name)
 
     def write(self, file_path):
         """Writes MDC object to file with binary encoding.
@@ -1462,47 +1496,75 @@ class MDC:
         """
 
         with open(file_path, 'wb') as file:
+            self.write_file(file, file_path)
+
+    def write_file(self, file, name=None):
+        """Writes MDC object with binary encoding to a file object, for
+        example a memory buffer.
+
+        Args:
+
+            file (File): binary file object, must be seekable.
+            name (str): name of the file in log messages.
+        """
+
+        timer = timer_m.Timer()
+        reporter_m.info("Writing MDC file: {} ...".format(name or "<memory>"))
+
+        # mdc.header
+        file_ofs = 0
+        self.header.write(file, file_ofs)
+
+        # mdc.frame_infos
+        file_ofs = self.header.ofs_frame_infos
+        for mdc_frame_info in self.frame_infos:
+
+            mdc_frame_info.write(file, file_ofs)
 
-            timer = timer_m.Timer()
-            reporter_m.info("Writing MDC file: {} ...".format(file_path))
+            file_ofs = file_ofs + MDCFrameInfo.format_size
 
-            # mdc.header
-            file_ofs = 0
-            self.header.write(file, file_ofs)
+        # mdc.tag_infos
+        file_ofs = self.header.ofs_tag_infos
+        for mdc_tag_info in self.tag_infos:
 
-            # mdc.frame_infos
-            file_ofs = self.header.ofs_frame_infos
-            for mdc_frame_info in self.frame_infos:
+            mdc_tag_info.write(file, file_ofs)
 
-                mdc_frame_info.write(file, file_ofs)
+            file_ofs = file_ofs + MDCTagInfo.format_size
 
-                file_ofs = file_ofs + MDCFrameInfo.format_size
+        # mdc.tags
+        file_ofs = self.header.ofs_tags
+        for mdc_frame_tags in self.tags:
 
-            # mdc.tag_infos
-            file_ofs = self.header.ofs_tag_infos
-            for mdc_tag_info in self.tag_infos:
+            for mdc_frame_tag in mdc_frame_tags:
 
-                mdc_tag_info.write(file, file_ofs)
+                mdc_frame_tag.write(file, file_ofs)
 
-                file_ofs = file_ofs + MDCTagInfo.format_size
+                file_ofs = file_ofs + MDCFrameTag.format_size
 
-            # mdc.tags
-            file_ofs = self.header.ofs_tags
-            for mdc_frame_tags in self.tags:
+        # mdc.surfaces
+        file_ofs = self.header.ofs_surfaces
+        for mdc_surface in self.surfaces:
 
-                for mdc_frame_tag in mdc_frame_tags:
+            mdc_surface.write(file, file_ofs)
 
-                    mdc_frame_tag.write(file, file_ofs)
+            file_ofs = file_ofs + mdc_surface.header.ofs_end
 
-                    file_ofs = file_ofs + MDCFrameTag.format_size
+        time = timer.time()
+        reporter_m.info("Writing MDC file DONE (time={})".format(time))
 
-            # mdc.surfaces
-            file_ofs = self.header.ofs_surfaces
-            for mdc_surface in self.surfaces:
+    def to_bytes(self, name=None):
+        """Writes MDC object with binary encoding to memory.
+
+        Args:
 
-                mdc_surface.write(file, file_ofs)
+            name (str): name of the file in log messages.
+
+        Returns:
+
+            data (bytes): content of an MDC file.
+        """
 
-                file_ofs = file_ofs + mdc_surface.header.ofs_end
+        with io.BytesIO() as file:
 
-            time = timer.time()
-            reporter_m.info("Writing MDC file DONE (time={})".format(time))
+            self.write_file(file, name)
+            return file.getvalue()
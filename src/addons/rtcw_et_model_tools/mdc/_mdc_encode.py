@@ -0,0 +1,286 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8-80 compliant>
+
+"""Array based encoding of MDC compressed frames.
+
+Notes:
+
+    This module does not depend on mathutils, so it can be imported by worker
+    processes which do not run inside blender.
+
+    Compressed frames only depend on the base frame they are stored relative
+    to. Frames sharing the same base frame, and frames of different surfaces,
+    can therefore be encoded independently, see FrameExecutor. The serial and
+    the parallel encoder run the same code on the same input, so both produce
+    identical output.
+"""
+
+import numpy as np
+
+import rtcw_et_model_tools.mdc._mdc as mdc_m
+
+
+class CompFrameNormalsIndex:
+    """Lookup structure for quantizing normals of compressed frames.
+
+    Notes:
+
+        The 256 precalculated normals are made up of groups, in which all
+        normals share the same z value (same latitude). The groups are
+        contiguous and each one is stored padded to the width of the largest
+        group. Quantizing a normal then boils down to finding the group with
+        the closest z value and the normal with the largest dot product inside
+        that group. This is done for many normals at once.
+
+        The result is identical to a linear search over all 256 normals,
+        where the first group with the closest z value and the first normal
+        with the largest dot product win.
+
+    Attributes:
+
+        group_z (numpy.ndarray): z value of each group, shape (G,).
+        group_start (numpy.ndarray): index of the first normal of each group,
+            shape (G,).
+        group_width (numpy.ndarray): number of normals of each group,
+            shape (G,).
+        group_normals (numpy.ndarray): normals of each group, padded with
+            zeros, shape (G, W, 3).
+    """
+
+    def __init__(self, comp_frame_normals):
+
+        group_z = []
+        group_start = []
+        group_width = []
+
+        for i, normal in enumerate(comp_frame_normals):
+
+            if group_z and normal[2] == group_z[-1]:
+                group_width[-1] += 1
+            else:
+                group_z.append(normal[2])
+                group_start.append(i)
+                group_width.append(1)
+
+        max_width = max(group_width)
+        group_normals = np.zeros((len(group_z), max_width, 3),
+                                 dtype=np.float64)
+        for num_group, start in enumerate(group_start):
+
+            width = group_width[num_group]
+            group_normals[num_group, 0:width] = \
+                comp_frame_normals[start:start + width]
+
+        self.group_z = np.array(group_z, dtype=np.float64)
+        self.group_start = np.array(group_start, dtype=np.int64)
+        self.group_width = np.array(group_width, dtype=np.int64)
+        self.group_normals = group_normals
+
+        # padding never wins the search for the largest dot product
+        self.padding = \
+            np.arange(max_width)[np.newaxis, :] >= \
+            self.group_width[:, np.newaxis]
+
+    def compress(self, normals):
+        """Quantize normals to indices of the precalculated normals.
+
+        Args:
+
+            normals (numpy.ndarray): normals, shape (N, 3).
+
+        Returns:
+
+            indices (numpy.ndarray): indices into the precalculated normals,
+                shape (N,).
+        """
+
+        normals = np.asarray(normals, dtype=np.float64).reshape(-1, 3)
+        if len(normals) == 0:
+            return np.zeros(0, dtype=np.int64)
+
+        with np.errstate(invalid='ignore'):
+
+            # find best z group, NaN never compares less than the best diff
+            z_diffs = np.abs(normals[:, 2:3] - self.group_z[np.newaxis, :])
+            z_diffs[np.isnan(z_diffs)] = np.inf
+            groups = np.argmin(z_diffs, axis=1)
+            no_group = z_diffs[np.arange(len(normals)), groups] >= 999
+            groups[no_group] = 0
+
+            # within z group find best normal, summed in the order x, y, z as
+            # in the linear search to produce the same rounding
+            candidates = self.group_normals[groups]
+            dots = normals[:, 0:1] * candidates[:, :, 0] + \
+                   normals[:, 1:2] * candidates[:, :, 1]
+            dots = dots + normals[:, 2:3] * candidates[:, :, 2]
+            dots[np.isnan(dots)] = -np.inf
+
+        dots[self.padding[groups]] = -np.inf
+
+        best = np.argmax(dots, axis=1)
+        found = dots[np.arange(len(normals)), best] > -999
+
+        indices = np.where(found, self.group_start[groups] + best, 0)
+        return indices
+
+
+def compress_frame(base_frame_locations, cur_frame_locations, normals,
+                   comp_frame_normals_index):
+    """Compresses all vertices of a frame at once.
+
+    Args:
+
+        base_frame_locations (numpy.ndarray): float32, shape (N, 3).
+        cur_frame_locations (numpy.ndarray): float32, shape (N, 3).
+        normals (numpy.ndarray): shape (N, 3).
+        comp_frame_normals_index (CompFrameNormalsIndex): lookup structure.
+
+    Returns:
+
+        location_offsets (numpy.ndarray): shape (N, 3).
+        compressed_normals (numpy.ndarray): shape (N,).
+    """
+
+    location_scale = mdc_m.MDCCompFrameVertex.location_scale
+    max_ofs = mdc_m.MDCCompFrameVertex.max_ofs
+
+    # same precision as the difference of two single precision vectors
+    off = (cur_frame_locations - base_frame_locations).astype(np.float64)
+
+    off = off + location_scale * 0.5  # rounding
+    off = off / location_scale
+    location_offsets = np.trunc(off + max_ofs).astype(np.int64)
+
+    compressed_normals = comp_frame_normals_index.compress(normals)
+
+    return (location_offsets, compressed_normals)
+
+def calc_comp_frames(comp_frame_indices):
+    """Lists compressed frames together with the base frame they are stored
+    relative to, which is the last base frame preceding them.
+
+    Args:
+
+        comp_frame_indices (list<int>[num_frames]): -1 for base frames.
+
+    Returns:
+
+        comp_frames (list<tuple>): tuples of (num_frame, num_base_frame,
+            comp_frame_index) in frame order.
+    """
+
+    comp_frames = []
+
+    num_base_frame = 0
+    for num_frame, comp_frame_index in enumerate(comp_frame_indices):
+
+        if comp_frame_index != -1:
+            comp_frames.append((num_frame, num_base_frame, comp_frame_index))
+        else:
+            num_base_frame = num_frame
+
+    return comp_frames
+
+def encode_comp_frames(locations, normals, comp_frames,
+                       comp_frame_normals_index, location_offsets,
+                       compressed_normals):
+    """Encodes compressed frames of a surface.
+
+    Args:
+
+        locations (numpy.ndarray): float32, shape (num_frames, V, 3).
+        normals (numpy.ndarray): float64, shape (num_frames, V, 3).
+        comp_frames (list<tuple>): see calc_comp_frames.
+        comp_frame_normals_index (CompFrameNormalsIndex): lookup structure.
+        location_offsets (numpy.ndarray): output, shape (num_comp_frames, V,
+            3).
+        compressed_normals (numpy.ndarray): output, shape (num_comp_frames,
+            V).
+    """
+
+    for num_frame, num_base_frame, comp_frame_index in comp_frames:
+
+        location_offsets[comp_frame_index], \
+        compressed_normals[comp_frame_index] = \
+            compress_frame(locations[num_base_frame],
+                           locations[num_frame],
+                           normals[num_frame],
+                           comp_frame_normals_index)
+
+# =====================================
+# parallel encoding
+# =====================================
+
+def _encode_stage(comp_frame_start, comp_frame_end, inputs, outputs,
+                  context):
+    """Frame parallel stage: a range of compressed frames of one surface.
+    """
+
+    comp_frames, comp_frame_normals_index = context
+
+    encode_comp_frames(inputs["locations"],
+                       inputs["normals"],
+                       comp_frames[comp_frame_start:comp_frame_end],
+                       comp_frame_normals_index,
+                       outputs["location_offsets"],
+                       outputs["compressed_normals"])
+
+def encode_comp_frames_parallel(surfaces, comp_frames,
+                                comp_frame_normals_index, frame_executor):
+    """Encodes compressed frames of all surfaces frame parallel. Each chunk
+    is a contiguous range of compressed frames of a single surface.
+
+    Args:
+
+        surfaces (list<tuple>): (locations, normals) of each surface, see
+            encode_comp_frames.
+        comp_frames (list<tuple>): see calc_comp_frames.
+        comp_frame_normals_index (CompFrameNormalsIndex): lookup structure.
+        frame_executor (FrameExecutor): evaluates the chunks.
+
+    Returns:
+
+        encoded (list<tuple>): (location_offsets, compressed_normals) of each
+            surface.
+    """
+
+    num_comp_frames = len(comp_frames)
+    context = (comp_frames, comp_frame_normals_index)
+
+    encoded = []
+    for locations, normals in surfaces:
+
+        num_vertices = locations.shape[1]
+
+        inputs = {"locations": locations, "normals": normals}
+        outputs = {
+            "location_offsets": ((num_comp_frames, num_vertices, 3),
+                                 np.int64),
+            "compressed_normals": ((num_comp_frames, num_vertices),
+                                   np.int64)
+        }
+
+        outputs = frame_executor.map_frames(_encode_stage, num_comp_frames,
+                                            inputs, outputs, context)
+
+        encoded.append((outputs["location_offsets"],
+                        outputs["compressed_normals"]))
+
+    return encoded
@@ -23,11 +23,14 @@
 
 import math
 
-import mathutils
+import numpy as np
 
 import rtcw_et_model_tools.mdc._mdc as mdc_m
+import rtcw_et_model_tools.mdc._mdc_encode as mdc_encode_m
 import rtcw_et_model_tools.mdi.mdi as mdi_m
 import rtcw_et_model_tools.mdi.util as mdi_util_m
+import rtcw_et_model_tools.common.frame_parallel as frame_parallel_m
+import rtcw_et_model_tools.common.math_backend as math_backend_m
 import rtcw_et_model_tools.common.timer as timer_m
 import rtcw_et_model_tools.common.reporter as reporter_m
 
@@ -158,6 +161,32 @@ def _calc_comp_frame_normals():
     return normals
 
 
+_comp_frame_normals = None
+_comp_frame_normals_index = None
+
+def _get_comp_frame_normals():
+    """Returns the precalculated normals for compressed frames and the lookup
+    structure to quantize them. Both are calculated once per process.
+
+    Returns:
+
+        comp_frame_normals (list<tuple[3]>[256]): see _calc_comp_frame_normals.
+        comp_frame_normals_index (CompFrameNormalsIndex): lookup structure.
+    """
+
+    global _comp_frame_normals
+    global _comp_frame_normals_index
+
+    if _comp_frame_normals is None:
+
+        comp_frame_normals = _calc_comp_frame_normals()
+        _comp_frame_normals_index = \
+            mdc_encode_m.CompFrameNormalsIndex(comp_frame_normals)
+        _comp_frame_normals = comp_frame_normals
+
+    return (_comp_frame_normals, _comp_frame_normals_index)
+
+
 class MDIToModel:
     """MDI to MDC conversion.
     """
@@ -249,7 +278,338 @@ class MDIToModel:
         mdc_model.header.ofs_end = ofs_surfaces + surfaces_field_len
 
     @staticmethod
-    def _calc_frame_indices(mdi_model):
+    def _calc_frame_locations(mdi_model, num_frames):
+        """Collects vertex locations of all surfaces.
+
+        Returns:
+
+            locations (numpy.ndarray): float32, shape (num_frames, V, 3),
+                where V is the vertex count summed over all surfaces.
+        """
+
+        locations = [mdi_surface.calc_morph_locations(num_frames)
+                     for mdi_surface in mdi_model.surfaces]
+
+        if locations:
+            locations = np.concatenate(locations, axis=1)
+        else:
+            locations = np.zeros((num_frames, 0, 3), dtype=np.float32)
+
+        return locations
+
+    @staticmethod
+    def _exceeds_max_dist(base_frame_locations, cur_frame_locations):
+        """Checks which frames can not be compressed against a base frame.
+
+        Args:
+
+            base_frame_locations (numpy.ndarray): float32, shape (V, 3).
+            cur_frame_locations (numpy.ndarray): float32, shape (N, V, 3).
+
+        Returns:
+
+            exceeds (numpy.ndarray): bool, shape (N,).
+        """
+
+        # as vertex locations were vectors, subtract in single precision and
+        # compare in double precision
+        delta = np.abs(cur_frame_locations - base_frame_locations)
+        exceeds = delta.astype(np.float64) > mdc_m.MDC.max_dist
+        exceeds = exceeds.reshape(len(exceeds), -1).any(axis=1)
+
+        return exceeds
+
+    @staticmethod
+    def _exceeds_max_dist_bounds(base_frame_locations, min_locations,
+                                 max_locations):
+        """Checks if any frame of a block of frames can not be compressed
+        against a base frame, given the bounds of the vertex locations over
+        the block.
+
+        Notes:
+
+            Same result as _exceeds_max_dist over all frames of the block.
+            Rounding of the difference is monotonic, so the largest
+            difference is the one to the minimum or to the maximum.
+
+        Args:
+
+            base_frame_locations (numpy.ndarray): float32, shape (V, 3).
+            min_locations (numpy.ndarray): float32, shape (V, 3).
+            max_locations (numpy.ndarray): float32, shape (V, 3).
+
+        Returns:
+
+            exceeds (bool)
+        """
+
+        delta = np.maximum(np.abs(min_locations - base_frame_locations),
+                           np.abs(max_locations - base_frame_locations))
+
+        return bool((delta.astype(np.float64) > mdc_m.MDC.max_dist).any())
+
+    @staticmethod
+    def _calc_block_bounds(locations, block_size):
+        """Calculates the bounds of the vertex locations over aligned blocks
+        of frames. Level k holds blocks of block_size * 2^k frames.
+
+        Returns:
+
+            block_bounds (list<tuple>): per level a tuple of minimum and
+                maximum locations, float32, shape (num_blocks, V, 3).
+        """
+
+        num_blocks = len(locations) // block_size
+        num_vertices = locations.shape[1]
+
+        blocks = locations[0:num_blocks * block_size] \
+            .reshape(num_blocks, block_size, num_vertices, 3)
+        min_locations = blocks.min(axis=1)
+        max_locations = blocks.max(axis=1)
+
+        block_bounds = []
+        while len(min_locations) > 0:
+
+            block_bounds.append((min_locations, max_locations))
+
+            num_pairs = len(min_locations) // 2
+            min_locations = np.minimum(min_locations[0:2 * num_pairs:2],
+                                       min_locations[1:2 * num_pairs:2])
+            max_locations = np.maximum(max_locations[0:2 * num_pairs:2],
+                                       max_locations[1:2 * num_pairs:2])
+
+        return block_bounds
+
+    @staticmethod
+    def _calc_reach(locations, block_bounds, block_size, num_frame):
+        """Finds the first frame after a base frame which can not be
+        compressed against it.
+
+        Notes:
+
+            Whole blocks are skipped by their bounds, the largest aligned
+            block first. If a block can not be skipped, the frame is in one
+            of its halves. Only frames before the first aligned block and
+            the frames of a failing block of the smallest level are checked
+            one by one.
+
+        Returns:
+
+            reach (int): frame number, num_frames if all remaining frames
+                can be compressed.
+        """
+
+        num_frames = len(locations)
+        base_frame_locations = locations[num_frame]
+
+        # blocks larger than a failed block contain it, don't check them
+        max_level = len(block_bounds) - 1
+
+        end = num_frame + 1
+        while end < num_frames:
+
+            level = -1
+            if end % block_size == 0:
+
+                num_block = end // block_size
+                level = max_level
+                while level >= 0 and \
+                      (num_block % (1 << level) != 0 or
+                       num_block >> level >= len(block_bounds[level][0])):
+                    level -= 1
+
+            if level >= 0:
+
+                min_locations, max_locations = block_bounds[level]
+                num_block = (end // block_size) >> level
+                if MDIToModel._exceeds_max_dist_bounds(
+                        base_frame_locations, min_locations[num_block],
+                        max_locations[num_block]):
+                    max_level = level - 1
+                else:
+                    end += block_size << level
+
+                continue
+
+            block_end = min((end // block_size + 1) * block_size, num_frames)
+            exceeds = MDIToModel._exceeds_max_dist(base_frame_locations,
+                                                   locations[end:block_end])
+            if exceeds.any():
+                return end + int(np.argmax(exceeds))
+
+            end = block_end
+
+        return num_frames
+
+    @staticmethod
+    def _select_base_frames_greedy(locations):
+        """A frame becomes a base frame if it can not be compressed against
+        the last base frame.
+
+        Args:
+
+            locations (numpy.ndarray): float32, shape (num_frames, V, 3).
+
+        Returns:
+
+            is_frame_compressed (list<bool>[num_frames])
+        """
+
+        is_frame_compressed = []
+        last_base_frame = -1
+        for num_frame in range(0, len(locations)):
+
+            base_frame_found = last_base_frame == -1
+            if not base_frame_found:
+
+                base_frame_found = MDIToModel._exceeds_max_dist(
+                    locations[last_base_frame],
+                    locations[num_frame:num_frame + 1])[0]
+
+            if base_frame_found:
+                last_base_frame = num_frame
+                is_frame_compressed.append(False)
+            else:
+                is_frame_compressed.append(True)
+
+        return is_frame_compressed
+
+    @staticmethod
+    def _select_base_frames_optimal(locations, block_size = 8):
+        """Selects the smallest possible number of base frames.
+
+        Notes:
+
+            Compressed frames are always stored relative to the last base frame
+            preceding them. Each base frame b therefore covers a contiguous
+            range of frames [b, n), where n is at most reach[b], the first
+            frame which can not be compressed against b. The greedy selection
+            always jumps to reach[b], which is not necessarily optimal, since
+            a base frame chosen earlier might reach a lot further. Dynamic
+            programming over frames finds the minimum. Base frames cost twice
+            as much as compressed frames, so fewer base frames means smaller
+            output.
+
+            The reach of a frame is found by skipping blocks of frames by the
+            bounds of their vertex locations, see _calc_reach. This takes
+            O(V (log(num_frames) + block_size)) per frame also if most frames
+            can be compressed against it, as in idle animations. The bounds
+            take about 4 / block_size of the memory of the locations.
+
+            The minimum cost over the range of next base frames is taken from
+            a segment tree, which is updated as the cost of each frame is
+            known. The dynamic programming takes O(num_frames
+            log(num_frames)) in total, not O(num_frames^2) as a scan over
+            each range would.
+
+        Args:
+
+            locations (numpy.ndarray): float32, shape (num_frames, V, 3).
+            block_size (int): number of frames of the smallest blocks.
+
+        Returns:
+
+            is_frame_compressed (list<bool>[num_frames])
+        """
+
+        num_frames = len(locations)
+
+        block_bounds = MDIToModel._calc_block_bounds(locations, block_size)
+
+        reach = []
+        for num_frame in range(0, num_frames):
+
+            reach.append(MDIToModel._calc_reach(locations, block_bounds,
+                                                block_size, num_frame))
+
+        # cost of n = min number of base frames to cover frames
+        # [n, num_frames). The segment tree holds (cost, -n) per frame n, so
+        # of equal costs the next base frame furthest away wins
+        num_leaves = 1
+        while num_leaves < num_frames + 1:
+            num_leaves *= 2
+
+        no_cost = (num_frames + 1, 0)
+        tree = [no_cost] * (2 * num_leaves)
+
+        def set_cost(num_frame, cost):
+
+            node = num_leaves + num_frame
+            tree[node] = (cost, -num_frame)
+            node //= 2
+            while node > 0:
+                tree[node] = min(tree[2 * node], tree[2 * node + 1])
+                node //= 2
+
+        def min_cost(first_frame, last_frame):
+
+            best = no_cost
+            left = num_leaves + first_frame
+            right = num_leaves + last_frame + 1
+            while left < right:
+
+                if left & 1:
+                    best = min(best, tree[left])
+                    left += 1
+
+                if right & 1:
+                    right -= 1
+                    best = min(best, tree[right])
+
+                left //= 2
+                right //= 2
+
+            return best
+
+        set_cost(num_frames, 0)
+        next_base_frame = [num_frames] * (num_frames + 1)
+        for num_frame in range(num_frames - 1, -1, -1):
+
+            cost, end = min_cost(num_frame + 1, reach[num_frame])
+            next_base_frame[num_frame] = -end
+            set_cost(num_frame, cost + 1)
+
+        is_frame_compressed = [True] * num_frames
+        num_frame = 0
+        while num_frame < num_frames:
+            is_frame_compressed[num_frame] = False
+            num_frame = next_base_frame[num_frame]
+
+        return is_frame_compressed
+
+    @staticmethod
+    def _calc_file_size(mdi_model, num_frames, num_base_frames):
+        """Calculates the size of the MDC file written for the given number of
+        frames and base frames.
+        """
+
+        num_tags = len(mdi_model.tags)
+        num_comp_frames = num_frames - num_base_frames
+
+        file_size = mdc_m.MDCHeader.format_size + \
+            num_frames * mdc_m.MDCFrameInfo.format_size + \
+            num_tags * mdc_m.MDCTagInfo.format_size + \
+            num_frames * num_tags * mdc_m.MDCFrameTag.format_size
+
+        for mdi_surface in mdi_model.surfaces:
+
+            num_vertices = len(mdi_surface.vertices)
+
+            file_size += mdc_m.MDCSurfaceHeader.format_size + \
+                len(mdi_surface.triangles) * mdc_m.MDCTriangle.format_size + \
+                len(mdi_surface.shader.paths) * mdc_m.MDCShader.format_size + \
+                num_vertices * mdc_m.MDCTexCoords.format_size + \
+                num_base_frames * num_vertices * \
+                mdc_m.MDCBaseFrameVertex.format_size + \
+                num_comp_frames * num_vertices * \
+                mdc_m.MDCCompFrameVertex.format_size + \
+                num_frames * mdc_m.MDCBaseFrameIndices.format_size + \
+                num_frames * mdc_m.MDCCompFrameIndices.format_size
+
+        return file_size
+
+    @staticmethod
+    def _calc_frame_indices(mdi_model, base_frame_selection = "greedy"):
 
         timer = timer_m.Timer()
         reporter_m.debug("Calculating frame indices ...")
@@ -265,38 +625,38 @@ class MDIToModel:
                     num_frames = len(first_morph_vertex.locations)
 
         # determine which frame can be compressed
-        is_frame_compressed = []
-        last_base_frame = -1
-        for num_frame in range(0, num_frames):
+        locations = MDIToModel._calc_frame_locations(mdi_model, num_frames)
 
-            base_frame_found = False
+        if base_frame_selection == "greedy":
 
-            if last_base_frame == -1:
-                base_frame_found = True
+            is_frame_compressed = \
+                MDIToModel._select_base_frames_greedy(locations)
 
-            for mdi_surface in mdi_model.surfaces:
+        elif base_frame_selection == "optimal":
 
-                if base_frame_found:
-                    break
+            is_frame_compressed = \
+                MDIToModel._select_base_frames_optimal(locations)
 
-                for mdi_morph_vertex in mdi_surface.vertices:
+            num_base_frames_greedy = \
+                MDIToModel._select_base_frames_greedy(locations).count(False)
+            num_base_frames = is_frame_compressed.count(False)
 
-                    base_frame_pos = \
-                        mdi_morph_vertex.locations[last_base_frame]
-                    cur_frame_pos = mdi_morph_vertex.locations[num_frame]
+            file_size = MDIToModel._calc_file_size(mdi_model,
+                                                   num_frames,
+                                                   num_base_frames)
+            file_size_greedy = MDIToModel._calc_file_size(
+                mdi_model, num_frames, num_base_frames_greedy)
 
-                    compressible = \
-                        MDIToModel._can_compress_vertex(base_frame_pos,
-                                                        cur_frame_pos)
-                    if not compressible:
-                        base_frame_found = True
-                        break
+            reporter_m.info("Expected MDC file size: {} bytes, {} base frames"
+                            " (greedy: {} bytes, {} base frames)"
+                            .format(file_size, num_base_frames,
+                                    file_size_greedy, num_base_frames_greedy))
 
-            if base_frame_found:
-                last_base_frame = num_frame
-                is_frame_compressed.append(False)
-            else:
-                is_frame_compressed.append(True)
+        else:
+
+            exception_string = "Base frame selection '{}' not supported" \
+                .format(base_frame_selection)
+            raise Exception(exception_string)
 
         # calculate indices
         base_frame_indices = []
@@ -340,112 +700,102 @@ class MDIToModel:
         return (mdc_base_frame_indices, mdc_comp_frame_indices)
 
     @staticmethod
-    def _decompress_vertex(location_offset,
-                           normal = None,
-                           comp_frame_normals = None):
-
-        off_x = location_offset[0] - mdc_m.MDCCompFrameVertex.max_ofs
-        off_y = location_offset[1] - mdc_m.MDCCompFrameVertex.max_ofs
-        off_z = location_offset[2] - mdc_m.MDCCompFrameVertex.max_ofs
+    def _calc_surface_arrays(mdi_surface, num_frames):
+        """Collects vertex locations and normals of a surface.
 
-        off_x = off_x * mdc_m.MDCCompFrameVertex.location_scale
-        off_y = off_y * mdc_m.MDCCompFrameVertex.location_scale
-        off_z = off_z * mdc_m.MDCCompFrameVertex.location_scale
+        Returns:
 
-        uc_location_offset = mathutils.Vector((off_x, off_y, off_z))
+            locations (numpy.ndarray): float32, shape (num_frames, V, 3).
+            normals (numpy.ndarray): float64, shape (num_frames, V, 3).
+        """
 
-        uc_normal = None
-        if normal and comp_frame_normals:
-            uc_normal = comp_frame_normals[normal]
+        locations = mdi_surface.calc_morph_locations(num_frames)
+        normals = mdi_surface.calc_morph_normals(num_frames)
 
-        return (uc_location_offset, uc_normal)
+        return (locations, normals)
 
     @staticmethod
-    def _compress_vertex(base_frame_location, cur_frame_location,
-                         normal = None, comp_frame_normals = None):
-
-        # location offset
-        off = cur_frame_location - base_frame_location
+    def _calc_comp_frames_parallel(mdi_model, comp_frame_indices,
+                                   comp_frame_normals_index, frame_executor):
+        """Encodes the compressed frames of all surfaces in parallel.
 
-        location_scale = mdc_m.MDCCompFrameVertex.location_scale
-        max_ofs = mdc_m.MDCCompFrameVertex.max_ofs
-
-        off_x = off[0] + location_scale * 0.5  # rounding
-        off_x = off_x / location_scale
-        off_x = int(off_x + max_ofs)
+        Returns:
 
-        off_y = off[1] + location_scale * 0.5  # rounding
-        off_y = off_y / location_scale
-        off_y = int(off_y + max_ofs)
+            encoded (list<tuple>): (location_offsets, compressed_normals) of
+                each surface.
+        """
 
-        off_z = off[2] + location_scale * 0.5  # rounding
-        off_z = off_z / location_scale
-        off_z = int(off_z + max_ofs)
+        timer = timer_m.Timer()
+        reporter_m.debug("Encoding compressed frames using {} processes ..."
+            .format(frame_executor.num_workers))
 
-        location_offset = (off_x, off_y, off_z)
+        num_frames = len(comp_frame_indices.indices)
 
-        # normal
-        compressed_normal = None
-        if normal != None:
+        surfaces = []
+        for mdi_surface in mdi_model.surfaces:
 
-            best_normal = 0
+            surface_arrays = \
+                MDIToModel._calc_surface_arrays(mdi_surface, num_frames)
+            surfaces.append(surface_arrays)
 
-            # find best z group
-            z_group_start = 0
-            best_diff = 999
-            for i in range(0, len(comp_frame_normals)):
+        comp_frames = \
+            mdc_encode_m.calc_comp_frames(comp_frame_indices.indices)
+        encoded = \
+            mdc_encode_m.encode_comp_frames_parallel(surfaces,
+                                                     comp_frames,
+                                                     comp_frame_normals_index,
+                                                     frame_executor)
 
-                diff = abs(normal[2] - comp_frame_normals[i][2])
-                if diff < best_diff:
-                    best_diff = diff
-                    z_group_start = i
+        time = timer.time()
+        reporter_m.debug("Encoding compressed frames DONE (time={})"
+            .format(time))
 
-            # within z group find best normal
-            z_group_val = comp_frame_normals[z_group_start][2]
-            best_diff = -999
-            for i in range(z_group_start, len(comp_frame_normals)):
+        return encoded
 
-                if comp_frame_normals[i][2] != z_group_val:
-                    break
+    @staticmethod
+    def _calc_vertices(mdi_model, num_surface, comp_frame_normals,
+                       base_frame_indices, comp_frame_indices,
+                       comp_frame_normals_index = None,
+                       encoded_comp_frames = None):
 
-                diff = normal[0] * comp_frame_normals[i][0] + \
-                       normal[1] * comp_frame_normals[i][1] + \
-                       normal[2] * comp_frame_normals[i][2]
+        mdi_surface = mdi_model.surfaces[num_surface]
 
-                if diff > best_diff:
-                    best_diff = diff
-                    best_normal = i
+        timer = timer_m.Timer()
+        reporter_m.debug("Calculating MDC vertices: {} ..."
+            .format(mdi_surface.name))
 
-            compressed_normal = best_normal
+        # compressed frames, unless already encoded in parallel
+        if encoded_comp_frames is None:
 
-        return (location_offset, compressed_normal)
+            if comp_frame_normals_index is None:
+                comp_frame_normals_index = \
+                    mdc_encode_m.CompFrameNormalsIndex(comp_frame_normals)
 
-    @staticmethod
-    def _can_compress_vertex(base_frame_pos, cur_frame_pos):
+            num_frames = len(comp_frame_indices.indices)
+            comp_frames = \
+                mdc_encode_m.calc_comp_frames(comp_frame_indices.indices)
 
-        can_compress = True
-        delta = cur_frame_pos - base_frame_pos
-        for i in range(0, 3):
-            if abs(delta[i]) > mdc_m.MDC.max_dist:
-                can_compress = False
+            locations, normals = \
+                MDIToModel._calc_surface_arrays(mdi_surface, num_frames)
 
-        return can_compress
+            num_vertices = len(mdi_surface.vertices)
+            location_offsets = \
+                np.zeros((len(comp_frames), num_vertices, 3), dtype=np.int64)
+            compressed_normals = \
+                np.zeros((len(comp_frames), num_vertices), dtype=np.int64)
 
-    @staticmethod
-    def _calc_vertices(mdi_model, num_surface, comp_frame_normals,
-                       base_frame_indices, comp_frame_indices):
+            mdc_encode_m.encode_comp_frames(locations, normals, comp_frames,
+                                            comp_frame_normals_index,
+                                            location_offsets,
+                                            compressed_normals)
 
-        mdi_surface = mdi_model.surfaces[num_surface]
+            encoded_comp_frames = (location_offsets, compressed_normals)
 
-        timer = timer_m.Timer()
-        reporter_m.debug("Calculating MDC vertices: {} ..."
-            .format(mdi_surface.name))
+        location_offsets, compressed_normals = encoded_comp_frames
 
         mdc_base_vertices = []
         mdc_comp_vertices = []
 
-        num_base_frame = 0
-
         for num_frame, comp_frame_index in \
             enumerate(comp_frame_indices.indices):
 
@@ -454,31 +804,19 @@ class MDIToModel:
 
                 comp_frame_vertices = []
 
-                for mdi_morph_vertex in mdi_surface.vertices:
-
-                    cur_frame_location = mdi_morph_vertex.locations[num_frame]
-
-                    base_frame_location = \
-                        mdi_morph_vertex.locations[num_base_frame]
-
-                    normal = mdi_morph_vertex.normals[num_frame]
-
-                    location_offset, normal = \
-                        MDIToModel._compress_vertex(base_frame_location,
-                                                    cur_frame_location,
-                                                    normal,
-                                                    comp_frame_normals)
+                for location_offset, normal in \
+                    zip(location_offsets[comp_frame_index].tolist(),
+                        compressed_normals[comp_frame_index].tolist()):
 
                     mdc_comp_frame_vertex = \
-                        mdc_m.MDCCompFrameVertex(location_offset, normal)
+                        mdc_m.MDCCompFrameVertex(tuple(location_offset),
+                                                 normal)
                     comp_frame_vertices.append(mdc_comp_frame_vertex)
 
                 mdc_comp_vertices.append(comp_frame_vertices)
 
             else:  # frame is not compressed
 
-                num_base_frame = num_frame
-
                 base_frame_vertices = []
 
                 for mdi_morph_vertex in mdi_surface.vertices:
@@ -558,7 +896,9 @@ class MDIToModel:
 
     @staticmethod
     def _to_mdc_surface(mdi_model, num_surface, comp_frame_normals,
-                        base_frame_indices, comp_frame_indices):
+                        base_frame_indices, comp_frame_indices,
+                        comp_frame_normals_index = None,
+                        encoded_comp_frames = None):
 
         mdc_surface = mdc_m.MDCSurface()
 
@@ -594,7 +934,9 @@ class MDIToModel:
                                       num_surface,
                                       comp_frame_normals,
                                       base_frame_indices,
-                                      comp_frame_indices)
+                                      comp_frame_indices,
+                                      comp_frame_normals_index,
+                                      encoded_comp_frames)
         mdc_surface.base_vertices = mdc_base_vertices
         mdc_surface.comp_vertices = mdc_comp_vertices
 
@@ -660,12 +1002,19 @@ class MDIToModel:
         return mdc_frame_info
 
     @staticmethod
-    def convert(mdi_model):
+    def convert(mdi_model, base_frame_selection = "greedy", num_workers = 1):
         """Converts MDI to MDC.
 
         Args:
 
             mdi_model (MDI): MDI model.
+            base_frame_selection (str): 'greedy' starts a new base frame
+                whenever a frame can not be compressed against the last one.
+                'optimal' minimizes the number of base frames and thus the
+                file size.
+            num_workers (int): number of processes used to bake skeletal
+                animation and encode compressed frames. Output is the same
+                for any number.
 
         Returns:
 
@@ -675,47 +1024,69 @@ class MDIToModel:
         timer = timer_m.Timer()
         reporter_m.info("Converting MDI to MDC ...")
 
+        # base frame selection and vertices need all frames in memory at
+        # once, which defeats holding them out of core
+        for mdi_surface in mdi_model.surfaces:
+
+            if mdi_surface.is_out_of_core():
+
+                exception_string = "Surface '{}' holds its frames out of" \
+                    " core, which MDC does not support. Read the model" \
+                    " without out_of_core.".format(mdi_surface.name)
+                raise Exception(exception_string)
+
         mdc_model = mdc_m.MDC()
 
-        # type conversions
-        for num_surface, mdi_surface in enumerate(mdi_model.surfaces):
+        with frame_parallel_m.FrameExecutor(num_workers) as frame_executor:
 
-            mdi_surface.uv_map_to_type(mdi_m.MDIUVMapBijective)
-            mdi_surface.shader_to_type(mdi_m.MDIShaderPaths)
-            mdi_surface.vertices_to_type(mdi_m.MDIMorphVertex, mdi_model)
+            # type conversions
+            for num_surface, mdi_surface in enumerate(mdi_model.surfaces):
 
-        mdi_model.tags_to_type(mdi_m.MDIFreeTag)
-        mdi_model.lod_to_type(mdi_m.MDIDiscreteLOD)
+                mdi_surface.uv_map_to_type(mdi_m.MDIUVMapBijective)
+                mdi_surface.shader_to_type(mdi_m.MDIShaderPaths)
+                mdi_surface.vertices_to_type(mdi_m.MDIMorphVertex, mdi_model,
+                                             frame_executor)
 
-        # mdc frame infos
-        for num_frame in range(len(mdi_model.bounds.aabbs)):
+            mdi_model.tags_to_type(mdi_m.MDIFreeTag)
+            mdi_model.lod_to_type(mdi_m.MDIDiscreteLOD)
 
-            mdc_frame_info = MDIToModel._to_mdc_frame_info(mdi_model,
-                                                           num_frame)
-            mdc_model.frame_infos.append(mdc_frame_info)
+            # mdc frame infos
+            for num_frame in range(len(mdi_model.bounds.aabbs)):
 
-        # mdc tag infos
-        for num_tag in range(len(mdi_model.tags)):
+                mdc_frame_info = MDIToModel._to_mdc_frame_info(mdi_model,
+                                                               num_frame)
+                mdc_model.frame_infos.append(mdc_frame_info)
 
-            mdc_tag_info = MDIToModel._to_mdc_tag_info(mdi_model,
-                                                       num_tag)
-            mdc_model.tag_infos.append(mdc_tag_info)
+            # mdc tag infos
+            for num_tag in range(len(mdi_model.tags)):
 
-        # mdc frame tags
-        for mdi_free_tag in mdi_model.tags:
+                mdc_tag_info = MDIToModel._to_mdc_tag_info(mdi_model,
+                                                           num_tag)
+                mdc_model.tag_infos.append(mdc_tag_info)
 
-            for num_frame in range(len(mdi_free_tag.locations)):
+            # mdc frame tags
+            for mdi_free_tag in mdi_model.tags:
 
-                mdc_frame_tags = MDIToModel._to_mdc_frame_tags(mdi_model,
-                                                               num_frame)
-                mdc_model.tags.append(mdc_frame_tags)
+                for num_frame in range(len(mdi_free_tag.locations)):
 
-            break
+                    mdc_frame_tags = MDIToModel._to_mdc_frame_tags(mdi_model,
+                                                                   num_frame)
+                    mdc_model.tags.append(mdc_frame_tags)
 
-        # mdc surfaces
-        comp_frame_normals = _calc_comp_frame_normals()
-        base_frame_indices, comp_frame_indices = \
-            MDIToModel._calc_frame_indices(mdi_model)
+                break
+
+            # mdc surfaces
+            comp_frame_normals, comp_frame_normals_index = \
+                _get_comp_frame_normals()
+            base_frame_indices, comp_frame_indices = \
+                MDIToModel._calc_frame_indices(mdi_model, base_frame_selection)
+
+            encoded = [None] * len(mdi_model.surfaces)
+            if frame_executor.is_parallel() and mdi_model.surfaces:
+
+                encoded = MDIToModel._calc_comp_frames_parallel(
+                    mdi_model, comp_frame_indices, comp_frame_normals_index,
+                    frame_executor)
 
         for num_surface in range(len(mdi_model.surfaces)):
 
@@ -723,7 +1094,9 @@ class MDIToModel:
                                                      num_surface,
                                                      comp_frame_normals,
                                                      base_frame_indices,
-                                                     comp_frame_indices)
+                                                     comp_frame_indices,
+                                                     comp_frame_normals_index,
+                                                     encoded[num_surface])
             mdc_model.surfaces.append(mdc_surface)
 
         # headers
@@ -747,13 +1120,13 @@ class ModelToMDI:
         for mdc_frame_info in mdc_model.frame_infos:
 
             # aabb
-            min_bound = mathutils.Vector(mdc_frame_info.min_bound)
-            max_bound = mathutils.Vector(mdc_frame_info.max_bound)
+            min_bound = math_backend_m.Vector(mdc_frame_info.min_bound)
+            max_bound = math_backend_m.Vector(mdc_frame_info.max_bound)
             mdi_aabb = mdi_m.MDIAABB(min_bound, max_bound)
             mdi_bounds.aabbs.append(mdi_aabb)
 
             # sphere
-            origin = mathutils.Vector(mdc_frame_info.local_origin)
+            origin = math_backend_m.Vector(mdc_frame_info.local_origin)
             radius = mdc_frame_info.radius
             mdi_bounding_sphere = mdi_m.MDIBoundingSphere(origin, radius)
             mdi_bounds.spheres.append(mdi_bounding_sphere)
@@ -778,7 +1151,7 @@ class ModelToMDI:
             y = mdc_frame_tag.location[1] * mdc_m.MDCFrameTag.location_scale
             z = mdc_frame_tag.location[2] * mdc_m.MDCFrameTag.location_scale
 
-            mdi_location = mathutils.Vector((x, y, z))
+            mdi_location = math_backend_m.Vector((x, y, z))
             mdi_tag.locations.append(mdi_location)
 
             # orientation
@@ -874,13 +1247,13 @@ class ModelToMDI:
                 off_y = off_y * mdc_m.MDCCompFrameVertex.location_scale
                 off_z = off_z * mdc_m.MDCCompFrameVertex.location_scale
 
-                location_offset = mathutils.Vector((off_x, off_y, off_z))
+                location_offset = math_backend_m.Vector((off_x, off_y, off_z))
                 location_base = mdi_morph_vertex.locations[num_base_frame]
                 location = location_base + location_offset
 
                 # normal
                 normal = comp_frame_normals[mdc_comp_frame_vertex.normal]
-                normal = mathutils.Vector(normal)
+                normal = math_backend_m.Vector(normal)
 
             else:
 
@@ -898,7 +1271,7 @@ class ModelToMDI:
                 x = x * mdc_m.MDCBaseFrameVertex.location_scale
                 y = y * mdc_m.MDCBaseFrameVertex.location_scale
                 z = z * mdc_m.MDCBaseFrameVertex.location_scale
-                location = mathutils.Vector((x, y, z))
+                location = math_backend_m.Vector((x, y, z))
 
                 # normal
                 yaw = mdc_base_frame_vertex.normal[0]
@@ -908,13 +1281,122 @@ class ModelToMDI:
                 pitch = pitch * mdc_m.MDCBaseFrameVertex.normal_scale
 
                 normal = mdi_util_m.rotate_up_vector(yaw, pitch)
-                normal = mathutils.Vector(normal)
+                normal = math_backend_m.Vector(normal)
 
             mdi_morph_vertex.locations.append(location)
             mdi_morph_vertex.normals.append(normal)
 
         return mdi_morph_vertex
 
+    @staticmethod
+    def _decompress_base_normals(yaws, pitches):
+        """Decodes base frame normals. Each distinct pair of yaw and pitch is
+        only calculated once.
+
+        Args:
+
+            yaws (numpy.ndarray): encoded yaw values.
+            pitches (numpy.ndarray): encoded pitch values, same shape as yaws.
+
+        Returns:
+
+            normals (numpy.ndarray): float32, shape of yaws + (3,).
+        """
+
+        normal_scale = mdc_m.MDCBaseFrameVertex.normal_scale
+
+        keys = yaws.astype(np.int64) * 256 + pitches.astype(np.int64)
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+
+        unique_normals = np.zeros((len(unique_keys), 3), dtype=np.float32)
+        for i, key in enumerate(unique_keys.tolist()):
+
+            yaw = (key // 256) * normal_scale
+            pitch = (key % 256) * normal_scale
+            unique_normals[i] = mdi_util_m.rotate_up_vector(yaw, pitch)
+
+        normals = unique_normals[inverse.reshape(-1)] \
+            .reshape(yaws.shape + (3,))
+
+        return normals
+
+    @staticmethod
+    def _decompress_surface(mdc_surface, comp_frame_normals):
+        """Decompresses all frames of a surface at once.
+
+        Notes:
+
+            Compressed frames are decoded relative to the base frame given by
+            base_frame_indices. Values are stored with single precision, the
+            same as the vectors of the vertex based conversion.
+
+        Args:
+
+            mdc_surface (MDCSurface): MDC surface.
+            comp_frame_normals (list<tuple[3]>[256]): precalculated normals.
+
+        Returns:
+
+            locations (numpy.ndarray): float32, shape (num_frames, V, 3).
+            normals (numpy.ndarray): float32, shape (num_frames, V, 3).
+        """
+
+        base_frame_indices = \
+            np.array(mdc_surface.base_frame_indices.indices, dtype=np.int64)
+        comp_frame_indices = \
+            np.array(mdc_surface.comp_frame_indices.indices, dtype=np.int64)
+
+        num_frames = len(base_frame_indices)
+        num_base_frames = len(mdc_surface.base_vertices)
+        num_comp_frames = len(mdc_surface.comp_vertices)
+        num_vertices = len(mdc_surface.base_vertices[0])
+
+        # base frames
+        base_locations = np.array(
+            [[v.location for v in frame]
+             for frame in mdc_surface.base_vertices],
+            dtype=np.int64).reshape(num_base_frames, num_vertices, 3)
+        base_normals = np.array(
+            [[v.normal for v in frame] for frame in mdc_surface.base_vertices],
+            dtype=np.int64).reshape(num_base_frames, num_vertices, 2)
+
+        base_locations = base_locations * \
+            mdc_m.MDCBaseFrameVertex.location_scale
+        base_locations = base_locations.astype(np.float32)
+        base_normals = \
+            ModelToMDI._decompress_base_normals(base_normals[:, :, 0],
+                                                base_normals[:, :, 1])
+
+        locations = base_locations[base_frame_indices]
+        normals = base_normals[base_frame_indices]
+
+        # compressed frames
+        is_compressed = comp_frame_indices != -1
+        if is_compressed.any():
+
+            comp_offsets = np.array(
+                [[v.location_offset for v in frame]
+                 for frame in mdc_surface.comp_vertices],
+                dtype=np.int64).reshape(num_comp_frames, num_vertices, 3)
+            comp_normals = np.array(
+                [[v.normal for v in frame]
+                 for frame in mdc_surface.comp_vertices],
+                dtype=np.int64).reshape(num_comp_frames, num_vertices)
+
+            comp_offsets = comp_offsets - mdc_m.MDCCompFrameVertex.max_ofs
+            comp_offsets = comp_offsets * \
+                mdc_m.MDCCompFrameVertex.location_scale
+            comp_offsets = comp_offsets.astype(np.float32)
+
+            normal_table = np.array(comp_frame_normals, dtype=np.float32)
+
+            comp_frames = comp_frame_indices[is_compressed]
+            locations[is_compressed] += comp_offsets[comp_frames]
+            normals[is_compressed] = normal_table[comp_normals[comp_frames]]
+
+        return (locations.reshape(num_frames, num_vertices, 3),
+                normals.reshape(num_frames, num_vertices, 3))
+
     @staticmethod
     def _to_mdi_surface(mdc_model, num_surface, comp_frame_normals):
 
@@ -927,18 +1409,31 @@ class ModelToMDI:
             mdi_util_m.from_c_string_padded(mdc_surface.header.name)
 
         # mdi vertices
-        for mdc_base_vertices in mdc_surface.base_vertices:
+        if mdc_surface.base_vertices:
 
-            for num_vertex in range(len(mdc_base_vertices)):
+            locations, normals = \
+                ModelToMDI._decompress_surface(mdc_surface,
+                                               comp_frame_normals)
 
-                mdi_morph_vertex = \
-                    ModelToMDI._to_mdi_morph_vertex(mdc_model,
-                                                    num_surface,
-                                                    num_vertex,
-                                                    comp_frame_normals)
-                mdi_surface.vertices.append(mdi_morph_vertex)
+            num_frames = len(locations)
 
-            break
+            # flat lists in vertex major order, avoids lots of nested lists
+            locations = locations.transpose(1, 0, 2).ravel().tolist()
+            normals = normals.transpose(1, 0, 2).ravel().tolist()
+
+            it = iter(locations)
+            locations = list(map(math_backend_m.Vector, zip(it, it, it)))
+            it = iter(normals)
+            normals = list(map(math_backend_m.Vector, zip(it, it, it)))
+
+            for start in range(0, len(locations), num_frames):
+
+                vertex_locations = locations[start:start + num_frames]
+                vertex_normals = normals[start:start + num_frames]
+
+                mdi_morph_vertex = mdi_m.MDIMorphVertex(vertex_locations,
+                                                        vertex_normals)
+                mdi_surface.vertices.append(mdi_morph_vertex)
 
         # mdi triangles
         for num_triangle in range(len(mdc_surface.triangles)):
@@ -980,7 +1475,7 @@ class ModelToMDI:
         mdi_model.root_frame = root_frame
 
         # mdi surfaces
-        comp_frame_normals = _calc_comp_frame_normals()
+        comp_frame_normals, _ = _get_comp_frame_normals()
 
         for num_surface in range(len(mdc_model.surfaces)):
 
@@ -27,7 +27,7 @@ import rtcw_et_model_tools.mdc._mdc as mdc_m
 import rtcw_et_model_tools.mdc._mdc_mdi as mdc_mdi_m
 
 
-def read(file_path, bind_frame, encoding="binary"):
+def read(file_path, bind_frame, encoding="binary", compress_frames=False):
 
     """Reads MDC data from file, then converts it to MDI.
 
@@ -36,6 +36,8 @@ def read(file_path, bind_frame, encoding="binary"):
         file_path (str): path to MDC file.
         bind_frame (int): bind frame used for morphing.
         encoding (str): encoding to use for MDC.
+        compress_frames (bool): keep frames as key frames plus quantized
+            deltas in memory, see MDI.compress_morph_frames.
 
     Returns:
 
@@ -53,16 +55,58 @@ def read(file_path, bind_frame, encoding="binary"):
             "Encoding option '{}' not supported".format(encoding)
         raise Exception(exception_string)
 
+    return _to_mdi(mdc_model, pathlib.Path(file_path).name, bind_frame,
+                   compress_frames)
+
+
+def read_bytes(data, bind_frame, name=None, encoding="binary",
+               compress_frames=False):
+
+    """Reads MDC data from memory, then converts it to MDI.
+
+    Args:
+
+        data (bytes): content of an MDC file.
+        bind_frame (int): bind frame used for morphing.
+        name (str): name of the model if the MDC data has none, and name in
+            log messages.
+        encoding (str): encoding to use for MDC.
+        compress_frames (bool): keep frames as key frames plus quantized
+            deltas in memory, see MDI.compress_morph_frames.
+
+    Returns:
+
+        mdi_model (MDI): converted MDC data as MDI.
+    """
+
+    if encoding != "binary":
+        exception_string = \
+            "Encoding option '{}' not supported".format(encoding)
+        raise Exception(exception_string)
+
+    mdc_model = mdc_m.MDC.from_bytes(data, name)
+
+    return _to_mdi(mdc_model, name, bind_frame, compress_frames)
+
+
+def _to_mdi(mdc_model, name, bind_frame, compress_frames):
+
     mdi_model = mdc_mdi_m.ModelToMDI.convert(mdc_model, bind_frame)
 
     # TODO this shouldn't be here
-    if not mdi_model.name:
-        mdi_model.name = pathlib.Path(file_path).name
+    if not mdi_model.name and name:
+        mdi_model.name = name
+
+    mdi_model.compact_static_frames()
+
+    if compress_frames:
+        mdi_model.compress_morph_frames()
 
     return mdi_model
 
 
-def write(mdi_model, file_path, encoding="binary"):
+def write(mdi_model, file_path, encoding="binary",
+          base_frame_selection="greedy", num_workers=1, pk3_writer=None):
 
     """Converts MDI data to MDC, then writes it back to file.
 
@@ -70,12 +114,21 @@ def write(mdi_model, file_path, encoding="binary"):
         mdi (MDI): model definition interchange format.
         file_path (str): path to which MDC data is written to.
         encoding (str): encoding to use for MDC.
+        base_frame_selection (str): 'greedy' or 'optimal', see
+            MDIToModel.convert.
+        num_workers (int): number of processes used for baking and encoding.
+        pk3_writer (PK3Writer): pk3 file the MDC data is added to, None to
+            write to a file. If given, file_path is the member name.
     """
 
-    mdc_model = mdc_mdi_m.MDIToModel.convert(mdi_model)
+    mdc_model = mdc_mdi_m.MDIToModel.convert(mdi_model, base_frame_selection,
+                                             num_workers)
 
     if encoding == "binary":
-        mdc_model.write(file_path)
+        if pk3_writer:
+            pk3_writer.add_file(file_path, mdc_model.write_file)
+        else:
+            mdc_model.write(file_path)
     elif encoding == "xml":
         pass  # TODO
     elif encoding == "json":
@@ -84,3 +137,31 @@ def write(mdi_model, file_path, encoding="binary"):
         exception_string = \
             "Encoding option '{}' not supported".format(encoding)
         raise Exception(exception_string)
+
+
+def write_bytes(mdi_model, encoding="binary", base_frame_selection="greedy",
+                num_workers=1):
+
+    """Converts MDI data to MDC, then writes it to memory.
+
+    Args:
+        mdi_model (MDI): model definition interchange format.
+        encoding (str): encoding to use for MDC.
+        base_frame_selection (str): 'greedy' or 'optimal', see
+            MDIToModel.convert.
+        num_workers (int): number of processes used for baking and encoding.
+
+    Returns:
+
+        data (bytes): content of an MDC file.
+    """
+
+    if encoding != "binary":
+        exception_string = \
+            "Encoding option '{}' not supported".format(encoding)
+        raise Exception(exception_string)
+
+    mdc_model = mdc_mdi_m.MDIToModel.convert(mdi_model, base_frame_selection,
+                                             num_workers)
+
+    return mdc_model.to_bytes(mdi_model.name)
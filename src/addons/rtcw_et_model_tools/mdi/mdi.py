@@ -22,12 +22,19 @@
 abstracting MD3, MDC, MDS and MDM/MDX for easier handling.
 """
 
+import collections.abc
+import copy
+import itertools
 import math
 import sys
 
-import mathutils
+import numpy as np
 
+import rtcw_et_model_tools.mdi.util as mdi_util_m
+import rtcw_et_model_tools.common.cache as cache_m
 import rtcw_et_model_tools.common.collapse_map as collapse_map_m
+import rtcw_et_model_tools.common.math_backend as math_backend_m
+import rtcw_et_model_tools.common.mapped_array as mapped_array_m
 import rtcw_et_model_tools.common.reporter as reporter_m
 
 
@@ -80,6 +87,143 @@ class MDI:
 
         self.lod = self.lod.to_type(self, target_type, collapse_frame)
 
+    def compact_static_frames(self, tolerance = 0.0):
+        """Stores per frame data which does not change across frames once,
+        see MDIStaticFrames.
+
+        Args:
+
+            tolerance (float): maximum difference to the first frame.
+
+        Returns:
+
+            mdi_static_frames (MDIStaticFrames): statistics of the pass.
+        """
+
+        mdi_static_frames = MDIStaticFrames(tolerance)
+        mdi_static_frames.compact(self)
+        mdi_static_frames.report(self.name)
+
+        return mdi_static_frames
+
+    def compress_morph_frames(self, location_scale = 1.0 / 256,
+                              cache_size = 16 * 1024 * 1024):
+        """Stores the frames of morph vertices as key frames plus quantized
+        deltas, see MDIMorphFrames. Locations are rounded to location_scale.
+
+        Args:
+
+            location_scale (float): quantization step of locations.
+            cache_size (int): bytes of reconstructed frames to keep per
+                surface.
+        """
+
+        num_bytes_before = 0
+        num_bytes_after = 0
+        for mdi_surface in self.surfaces:
+
+            mdi_morph_frames = \
+                mdi_surface.compress_morph_frames(location_scale, cache_size)
+
+            if mdi_morph_frames:
+
+                vector = math_backend_m.Vector((0.0, 0.0, 0.0))
+                vector_size = sys.getsizeof(vector) + 4 * 3 + 8
+
+                num_bytes_before += 2 * vector_size * \
+                    mdi_morph_frames.num_frames * \
+                    mdi_morph_frames.num_vertices
+                num_bytes_after += mdi_morph_frames.calc_num_bytes()
+
+        reporter_m.info("Compressed morph frames of '{}': estimated memory"
+                        " before={} KiB after={} KiB"
+                        .format(self.name, num_bytes_before // 1024,
+                                num_bytes_after // 1024))
+
+    def select_frames(self, mdi_frame_selection):
+        """Reduces the frames of the model to a selection of frames. Frames
+        are selected on bones, morph vertices, free tags and bounds, so that
+        a later conversion to morph vertices only evaluates the selected
+        frames.
+
+        Args:
+
+            mdi_frame_selection (MDIFrameSelection): frames to select.
+        """
+
+        num_frames = MDIBoundingVolume.calc_num_frames(self)
+        samples = mdi_frame_selection.calc_samples(num_frames)
+
+        sample_location = MDIFrameSelection.sample_location
+        sample_orientation = MDIFrameSelection.sample_orientation
+        sample_normal = MDIFrameSelection.sample_normal
+
+        if self.skeleton:
+
+            for mdi_bone in self.skeleton.bones:
+
+                mdi_bone.locations = \
+                    MDIFrameSelection.sample(mdi_bone.locations, samples,
+                                             sample_location)
+                mdi_bone.orientations = \
+                    MDIFrameSelection.sample(mdi_bone.orientations, samples,
+                                             sample_orientation)
+
+        for mdi_surface in self.surfaces:
+
+            # vertices might be shared, e.g. after the uv map pass
+            sampled_vertices = set()
+            for mdi_vertex in mdi_surface.vertices:
+
+                if not isinstance(mdi_vertex, MDIMorphVertex) or \
+                   id(mdi_vertex) in sampled_vertices:
+                    continue
+
+                sampled_vertices.add(id(mdi_vertex))
+
+                mdi_vertex.locations = \
+                    MDIFrameSelection.sample(mdi_vertex.locations, samples,
+                                             sample_location)
+                mdi_vertex.normals = \
+                    MDIFrameSelection.sample(mdi_vertex.normals, samples,
+                                             sample_normal)
+
+        for mdi_tag in self.tags:
+
+            if isinstance(mdi_tag, MDIFreeTag):
+
+                mdi_tag.locations = \
+                    MDIFrameSelection.sample(mdi_tag.locations, samples,
+                                             sample_location)
+                mdi_tag.orientations = \
+                    MDIFrameSelection.sample(mdi_tag.orientations, samples,
+                                             sample_orientation)
+
+        if self.bounds:
+
+            aabbs = MDIFrameSelection.sample(self.bounds.aabbs, samples,
+                                             MDIFrameSelection.sample_aabb)
+
+            spheres = []
+            for mdi_aabb, (num_frame, _, alpha) in zip(aabbs, samples):
+
+                if alpha:
+                    mdi_bounding_sphere = \
+                        MDIBoundingSphere.calc_from_bounds(mdi_aabb.min_bound,
+                                                           mdi_aabb.max_bound)
+                else:
+                    mdi_bounding_sphere = self.bounds.spheres[num_frame]
+
+                spheres.append(mdi_bounding_sphere)
+
+            self.bounds.aabbs = aabbs
+            self.bounds.spheres = spheres
+
+        # closest selected frame
+        distances = [abs(num_frame + alpha - self.root_frame)
+                     for num_frame, _, alpha in samples]
+        self.root_frame = distances.index(min(distances))
+
     def find_surface_by_name(self, surface_name):
 
         mdi_surface = None
@@ -105,6 +249,738 @@ class MDI:
         return mdi_tag
 
 
+class MDIFrameSelection:
+    """Selection of frames by range and stride, e.g. to limit the number of
+    frames when baking skeletal animation to morph frames.
+
+    Attributes:
+
+        frame_start (int): first frame to select.
+        frame_end (int): last frame to select, -1 for the last frame.
+        frame_step (float): distance between selected frames, a fractional
+            step samples in between frames.
+        interpolate (bool): blend the neighboring frames of samples in between
+            frames. If not set, the preceding frame is taken.
+    """
+
+    def __init__(self, frame_start = 0, frame_end = -1, frame_step = 1.0,
+                 interpolate = False):
+
+        self.frame_start = frame_start
+        self.frame_end = frame_end
+        self.frame_step = frame_step
+        self.interpolate = interpolate
+
+    def calc_samples(self, num_frames):
+        """Calculates where to sample the frames of a model.
+
+        Args:
+
+            num_frames (int): number of frames of the model.
+
+        Returns:
+
+            samples (list<tuple>): (num_frame, num_next_frame, alpha) for each
+                selected frame, alpha is the blend factor towards the next
+                frame and 0 for samples which fall on a frame.
+        """
+
+        frame_end = self.frame_end
+        if frame_end == -1:
+            frame_end = num_frames - 1
+
+        if self.frame_step <= 0:
+            raise Exception("Frame step must be greater than 0.")
+        if self.frame_start < 0 or self.frame_start >= num_frames:
+            raise Exception("Start frame {} out of range [0, {}]."
+                            .format(self.frame_start, num_frames - 1))
+        if frame_end < self.frame_start or frame_end >= num_frames:
+            raise Exception("End frame {} out of range [{}, {}]."
+                            .format(frame_end, self.frame_start,
+                                    num_frames - 1))
+
+        samples = []
+
+        num_sample = 0
+        time = self.frame_start
+        while time <= frame_end + 1e-6:
+
+            num_frame = min(int(math.floor(time + 1e-6)), frame_end)
+            alpha = time - num_frame
+
+            if not self.interpolate or alpha < 1e-6:
+                samples.append((num_frame, num_frame, 0.0))
+            else:
+                samples.append((num_frame, num_frame + 1, alpha))
+
+            num_sample += 1
+            time = self.frame_start + num_sample * self.frame_step
+
+        return samples
+
+    @staticmethod
+    def sample(values, samples, blend):
+        """Samples per frame values.
+
+        Args:
+
+            values (list): value of each frame.
+            samples (list<tuple>): see calc_samples.
+            blend (function): blends two values by a factor.
+
+        Returns:
+
+            sampled_values (list): value of each sample.
+        """
+
+        if not values:
+            return values
+
+        if isinstance(values, MDIRepeatedValues) and values.is_repeated():
+            return MDIRepeatedValues(values.value, len(samples))
+
+        if isinstance(values, MDIMorphFramesView):
+            values = list(values)  # reconstructs the vertex only once
+
+        sampled_values = []
+        for num_frame, num_next_frame, alpha in samples:
+
+            if alpha:
+                value = blend(values[num_frame], values[num_next_frame], alpha)
+            else:
+                value = values[num_frame]
+
+            sampled_values.append(value)
+
+        return sampled_values
+
+    @staticmethod
+    def sample_location(location, next_location, alpha):
+
+        return location.lerp(next_location, alpha)
+
+    @staticmethod
+    def sample_normal(normal, next_normal, alpha):
+
+        return normal.lerp(next_normal, alpha).normalized()
+
+    @staticmethod
+    def sample_orientation(orientation, next_orientation, alpha):
+
+        quaternion = orientation.to_quaternion()
+        next_quaternion = next_orientation.to_quaternion()
+
+        return quaternion.slerp(next_quaternion, alpha).to_matrix()
+
+    @staticmethod
+    def sample_aabb(mdi_aabb, next_mdi_aabb, alpha):
+
+        # enclose both frames
+        min_bound = math_backend_m.Vector((min(mdi_aabb.min_bound[0],
+                                          next_mdi_aabb.min_bound[0]),
+                                      min(mdi_aabb.min_bound[1],
+                                          next_mdi_aabb.min_bound[1]),
+                                      min(mdi_aabb.min_bound[2],
+                                          next_mdi_aabb.min_bound[2])))
+        max_bound = math_backend_m.Vector((max(mdi_aabb.max_bound[0],
+                                          next_mdi_aabb.max_bound[0]),
+                                      max(mdi_aabb.max_bound[1],
+                                          next_mdi_aabb.max_bound[1]),
+                                      max(mdi_aabb.max_bound[2],
+                                          next_mdi_aabb.max_bound[2])))
+
+        return MDIAABB(min_bound, max_bound)
+
+
+class MDIRepeatedValues(collections.abc.MutableSequence):
+    """Per frame data which is equal in all frames, stored once. Can be used
+    in place of a list. Modifying the sequence turns it into a list of
+    values internally.
+
+    Attributes:
+
+        value: the value of all frames.
+        num_values (int): number of frames.
+    """
+
+    def __init__(self, value, num_values):
+
+        self.value = value
+        self.num_values = num_values
+
+        self._values = None  # set once modified
+
+    def is_repeated(self):
+
+        return self._values is None
+
+    def _expand(self):
+
+        if self._values is None:
+
+            # frames should not share a mutable value once modified
+            self._values = [copy.copy(self.value)
+                            for _ in range(self.num_values)]
+
+        return self._values
+
+    def __len__(self):
+
+        if self._values is None:
+            return self.num_values
+
+        return len(self._values)
+
+    def __getitem__(self, index):
+
+        if self._values is not None:
+            return self._values[index]
+
+        if isinstance(index, slice):
+            return [self.value] * len(range(*index.indices(self.num_values)))
+
+        if index < -self.num_values or index >= self.num_values:
+            raise IndexError("frame index out of range")
+
+        return self.value
+
+    def __iter__(self):
+
+        if self._values is not None:
+            return iter(self._values)
+
+        return itertools.repeat(self.value, self.num_values)
+
+    def __setitem__(self, index, value):
+
+        self._expand()[index] = value
+
+    def __delitem__(self, index):
+
+        del self._expand()[index]
+
+    def insert(self, index, value):
+
+        self._expand().insert(index, value)
+
+
+class MDIStaticFrames:
+    """Finds per frame data of vertices, bones and tags which does not change
+    across frames and stores it once as MDIRepeatedValues. Formats which
+    require all frames expand the data while writing.
+
+    Attributes:
+
+        tolerance (float): maximum difference of a component to its value in
+            the first frame.
+        num_static_vertices (int)
+        num_vertices (int)
+        num_static_bones (int)
+        num_bones (int)
+        num_static_tags (int)
+        num_tags (int)
+        num_bytes_saved (int): estimated memory saved.
+    """
+
+    def __init__(self, tolerance = 0.0):
+
+        self.tolerance = tolerance
+
+        self.num_static_vertices = 0
+        self.num_vertices = 0
+        self.num_static_bones = 0
+        self.num_bones = 0
+        self.num_static_tags = 0
+        self.num_tags = 0
+        self.num_bytes_saved = 0
+
+    def _compact(self, items, attribute, num_components):
+        """Replaces per frame lists of items which are static.
+
+        Args:
+
+            items (list): objects holding per frame lists.
+            attribute (str): name of the per frame list.
+            num_components (int): number of floats of each value, 3 for
+                vectors, 9 for 3x3 matrices.
+
+        Returns:
+
+            is_static (numpy.ndarray): bool, shape (len(items),).
+        """
+
+        is_static = np.zeros(len(items), dtype=bool)
+
+        # group by frame count, all items should have the same anyway
+        groups = {}
+        for num_item, item in enumerate(items):
+
+            values = getattr(item, attribute)
+            if isinstance(values, MDIRepeatedValues) and \
+               values.is_repeated():
+                is_static[num_item] = True
+            elif isinstance(values, MDIMorphFramesView):
+                continue  # frames are stored elsewhere
+            elif len(values) > 1:
+                groups.setdefault(len(values), []).append(num_item)
+
+        for num_frames, num_items in groups.items():
+
+            values = itertools.chain.from_iterable(
+                getattr(items[num_item], attribute) for num_item in num_items)
+            if num_components == 9:
+                values = itertools.chain.from_iterable(values)
+            values = itertools.chain.from_iterable(values)
+
+            values = np.fromiter(values, dtype=np.float64,
+                                 count=len(num_items) * num_frames * \
+                                 num_components)
+            values = values.reshape(len(num_items), num_frames,
+                                    num_components)
+
+            with np.errstate(invalid='ignore'):
+                differences = np.abs(values - values[:, 0:1])
+                is_static_group = \
+                    np.all(differences <= self.tolerance, axis=(1, 2))
+
+            for num_item in np.asarray(num_items)[is_static_group].tolist():
+
+                item = items[num_item]
+                value = getattr(item, attribute)[0]
+
+                setattr(item, attribute, MDIRepeatedValues(value, num_frames))
+                is_static[num_item] = True
+
+                value_size = sys.getsizeof(value) + 4 * num_components + 8
+                self.num_bytes_saved += (num_frames - 1) * value_size
+
+        return is_static
+
+    def compact(self, mdi_model):
+        """Stores static per frame data of a model once.
+
+        Args:
+
+            mdi_model (MDI)
+        """
+
+        # vertices might be shared, e.g. after the uv map pass
+        mdi_morph_vertices = {}
+        for mdi_surface in mdi_model.surfaces:
+
+            for mdi_vertex in mdi_surface.vertices:
+
+                if isinstance(mdi_vertex, MDIMorphVertex):
+                    mdi_morph_vertices[id(mdi_vertex)] = mdi_vertex
+
+        mdi_morph_vertices = list(mdi_morph_vertices.values())
+        is_static = self._compact(mdi_morph_vertices, "locations", 3) & \
+                    self._compact(mdi_morph_vertices, "normals", 3)
+
+        self.num_static_vertices += int(np.count_nonzero(is_static))
+        self.num_vertices += len(mdi_morph_vertices)
+
+        if mdi_model.skeleton:
+
+            mdi_bones = mdi_model.skeleton.bones
+            is_static = self._compact(mdi_bones, "locations", 3) & \
+                        self._compact(mdi_bones, "orientations", 9)
+
+            self.num_static_bones += int(np.count_nonzero(is_static))
+            self.num_bones += len(mdi_bones)
+
+        mdi_free_tags = [mdi_tag for mdi_tag in mdi_model.tags
+                         if isinstance(mdi_tag, MDIFreeTag)]
+        is_static = self._compact(mdi_free_tags, "locations", 3) & \
+                    self._compact(mdi_free_tags, "orientations", 9)
+
+        self.num_static_tags += int(np.count_nonzero(is_static))
+        self.num_tags += len(mdi_free_tags)
+
+    def report(self, model_name):
+
+        reporter_m.info("Static frame data of '{}': vertices={}/{}"
+                        " bones={}/{} tags={}/{} memory saved={} KiB"
+                        .format(model_name,
+                                self.num_static_vertices, self.num_vertices,
+                                self.num_static_bones, self.num_bones,
+                                self.num_static_tags, self.num_tags,
+                                self.num_bytes_saved // 1024))
+
+
+class MDIMorphFrames:
+    """Frames of the morph vertices of a surface, stored as key frames plus
+    quantized deltas, much like compressed frames of MDC. Frames are
+    reconstructed on demand and the most recently used ones are cached.
+
+    Attributes:
+
+        num_frames (int)
+        num_vertices (int)
+        location_scale (float): quantization step of location deltas.
+        frame_keys (numpy.ndarray): int64, shape (num_frames,). Index of the
+            key frame each frame is stored relative to.
+        key_locations (numpy.ndarray): float32, shape (num_keys, V, 3).
+        location_deltas (numpy.ndarray): int16, shape (num_frames, V, 3).
+        normals (numpy.ndarray): float32, shape (num_frames, V, 3).
+        cache (LRUCache): reconstructed frames.
+
+    Notes:
+
+        A new key frame is started whenever a delta does not fit into 16
+        bits, so the error of a location is bound by half the location scale.
+
+        Normals are not quantized, since formats encode them as angles and
+        even small errors change the encoded angles.
+    """
+
+    max_delta = 32767
+
+    def __init__(self, locations, normals, location_scale = 1.0 / 256,
+                 cache_size = 16 * 1024 * 1024):
+        """Compresses frames.
+
+        Args:
+
+            locations (numpy.ndarray): shape (num_frames, V, 3).
+            normals (numpy.ndarray): shape (num_frames, V, 3).
+            location_scale (float): quantization step of location deltas.
+            cache_size (int): bytes of reconstructed frames to keep.
+        """
+
+        locations = np.asarray(locations, dtype=np.float32)
+        normals = np.asarray(normals, dtype=np.float32)
+
+        self.num_frames, self.num_vertices = locations.shape[0:2]
+        self.location_scale = location_scale
+
+        self.frame_keys = np.zeros(self.num_frames, dtype=np.int64)
+        self.location_deltas = np.zeros(locations.shape, dtype=np.int16)
+
+        key_locations = []
+        for num_frame in range(self.num_frames):
+
+            deltas = None
+            if key_locations:
+
+                deltas = (locations[num_frame] - key_locations[-1]) / \
+                    location_scale
+                deltas = np.round(deltas)
+
+                if not np.all(np.abs(deltas) <= MDIMorphFrames.max_delta):
+                    deltas = None
+
+            if deltas is None:
+                key_locations.append(locations[num_frame])
+            else:
+                self.location_deltas[num_frame] = deltas
+
+            self.frame_keys[num_frame] = len(key_locations) - 1
+
+        key_locations = np.array(key_locations, dtype=np.float32)
+        self.key_locations = key_locations.reshape(-1, self.num_vertices, 3)
+
+        self.normals = np.array(normals, dtype=np.float32)
+
+        self.cache = cache_m.LRUCache(cache_size)
+
+    def calc_num_bytes(self):
+
+        return self.frame_keys.nbytes + self.key_locations.nbytes + \
+               self.location_deltas.nbytes + self.normals.nbytes
+
+    def _decode(self, frame_keys, key_locations, location_deltas, normals):
+
+        # same operations for frames, vertices and whole surfaces, so each
+        # way of access yields identical values
+        location_scale = np.float32(self.location_scale)
+
+        locations = key_locations[frame_keys] + \
+            location_deltas.astype(np.float32) * location_scale
+
+        return (locations, normals)
+
+    def get_frame(self, num_frame):
+        """Reconstructs a frame.
+
+        Args:
+
+            num_frame (int)
+
+        Returns:
+
+            locations (numpy.ndarray): float32, shape (V, 3).
+            normals (numpy.ndarray): float32, shape (V, 3).
+        """
+
+        return self._decode(self.frame_keys[num_frame],
+                            self.key_locations,
+                            self.location_deltas[num_frame],
+                            self.normals[num_frame])
+
+    def get_frame_values(self, num_frame):
+        """Reconstructs a frame as lists, which is what per vertex access
+        needs. Recently used frames are cached.
+
+        Args:
+
+            num_frame (int)
+
+        Returns:
+
+            locations (list<list<float>>): V lists of 3 floats.
+            normals (list<list<float>>): V lists of 3 floats.
+        """
+
+        frame = self.cache.get(num_frame)
+
+        if frame is None:
+
+            locations, normals = self.get_frame(num_frame)
+            frame = (locations.tolist(), normals.tolist())
+
+            # 2 lists of 3 floats per vertex
+            self.cache.put(num_frame, frame, self.num_vertices * 2 * 168)
+
+        return frame
+
+    def get_vertex(self, num_vertex):
+        """Reconstructs all frames of a vertex.
+
+        Args:
+
+            num_vertex (int)
+
+        Returns:
+
+            locations (numpy.ndarray): float32, shape (num_frames, 3).
+            normals (numpy.ndarray): float32, shape (num_frames, 3).
+        """
+
+        return self._decode(self.frame_keys,
+                            self.key_locations[:, num_vertex],
+                            self.location_deltas[:, num_vertex],
+                            self.normals[:, num_vertex])
+
+    def get_frames(self, num_frames, frame_start = 0):
+        """Reconstructs a range of frames of all vertices.
+
+        Args:
+
+            num_frames (int)
+            frame_start (int): first frame of the range.
+
+        Returns:
+
+            locations (numpy.ndarray): float32, shape (num_frames, V, 3).
+            normals (numpy.ndarray): float32, shape (num_frames, V, 3).
+        """
+
+        frame_end = frame_start + num_frames
+
+        return self._decode(self.frame_keys[frame_start:frame_end],
+                            self.key_locations,
+                            self.location_deltas[frame_start:frame_end],
+                            self.normals[frame_start:frame_end])
+
+
+class MDIMappedFrames:
+    """Frames of the morph vertices of a surface, stored out of core in a
+    scratch file. Models at the limits of a format have too many frames to
+    hold them in memory, so readers stream frames into the scratch file and
+    writers process them a block of frames at a time. Provides the same
+    access as MDIMorphFrames.
+
+    Attributes:
+
+        num_frames (int)
+        num_vertices (int)
+        frames (MappedArray): float32, shape (num_frames, 2, V, 3). Index 0
+            of the second axis holds locations, index 1 normals.
+        cache (LRUCache): frames read as lists.
+    """
+
+    def __init__(self, num_frames, num_vertices, scratch_dir = None,
+                 cache_size = 16 * 1024 * 1024):
+        """Creates zero filled frames in a scratch file.
+
+        Args:
+
+            num_frames (int)
+            num_vertices (int)
+            scratch_dir (str): directory of the scratch file, None for the
+                default temporary directory.
+            cache_size (int): bytes of frames to keep as lists.
+        """
+
+        self.num_frames = num_frames
+        self.num_vertices = num_vertices
+
+        self.frames = mapped_array_m.MappedArray.create_scratch(
+            (num_frames, 2, num_vertices, 3), np.float32, scratch_dir)
+
+        self.cache = cache_m.LRUCache(cache_size)
+
+    def calc_frame_blocks(self):
+        """Splits frames into blocks of bounded size.
+
+        Returns:
+
+            frame_blocks (list<tuple>): (frame_start, frame_end) of each block.
+        """
+
+        return self.frames.calc_blocks()
+
+    def set_frames(self, frame_start, locations, normals):
+        """Stores a range of frames of all vertices.
+
+        Args:
+
+            frame_start (int): first frame of the range.
+            locations (numpy.ndarray): shape (num_frames, V, 3).
+            normals (numpy.ndarray): shape (num_frames, V, 3).
+        """
+
+        frames = np.stack((locations, normals), axis=1)
+        self.frames[frame_start:frame_start + len(frames)] = frames
+
+        self.cache.clear()
+
+    def get_frame(self, num_frame):
+        """Reads a frame.
+
+        Args:
+
+            num_frame (int)
+
+        Returns:
+
+            locations (numpy.ndarray): float32, shape (V, 3).
+            normals (numpy.ndarray): float32, shape (V, 3).
+        """
+
+        frame = self.frames[num_frame]
+
+        return (frame[0], frame[1])
+
+    def get_frame_values(self, num_frame):
+        """Reads a frame as lists, which is what per vertex access needs.
+        Recently used frames are cached.
+
+        Args:
+
+            num_frame (int)
+
+        Returns:
+
+            locations (list<list<float>>): V lists of 3 floats.
+            normals (list<list<float>>): V lists of 3 floats.
+        """
+
+        frame = self.cache.get(num_frame)
+
+        if frame is None:
+
+            locations, normals = self.get_frame(num_frame)
+            frame = (locations.tolist(), normals.tolist())
+
+            # 2 lists of 3 floats per vertex
+            self.cache.put(num_frame, frame, self.num_vertices * 2 * 168)
+
+        return frame
+
+    def get_vertex(self, num_vertex):
+        """Reads all frames of a vertex.
+
+        Args:
+
+            num_vertex (int)
+
+        Returns:
+
+            locations (numpy.ndarray): float32, shape (num_frames, 3).
+            normals (numpy.ndarray): float32, shape (num_frames, 3).
+        """
+
+        locations = np.empty((self.num_frames, 3), dtype=np.float32)
+        normals = np.empty((self.num_frames, 3), dtype=np.float32)
+
+        for frame_start, frame_end in self.calc_frame_blocks():
+
+            frames = self.frames[frame_start:frame_end, :, num_vertex]
+
+            locations[frame_start:frame_end] = frames[:, 0]
+            normals[frame_start:frame_end] = frames[:, 1]
+
+        return (locations, normals)
+
+    def get_frames(self, num_frames, frame_start = 0):
+        """Reads a range of frames of all vertices. Keep ranges small, see
+        calc_frame_blocks.
+
+        Args:
+
+            num_frames (int)
+            frame_start (int): first frame of the range.
+
+        Returns:
+
+            locations (numpy.ndarray): float32, shape (num_frames, V, 3).
+            normals (numpy.ndarray): float32, shape (num_frames, V, 3).
+        """
+
+        frames = self.frames[frame_start:frame_start + num_frames]
+
+        return (frames[:, 0], frames[:, 1])
+
+
+class MDIMorphFramesView(collections.abc.Sequence):
+    """Locations or normals of a vertex held by MDIMorphFrames or
+    MDIMappedFrames. Can be used in place of the per frame lists of
+    MDIMorphVertex, but is read only.
+
+    Attributes:
+
+        morph_frames (MDIMorphFrames): or MDIMappedFrames.
+        num_vertex (int): vertex in morph_frames.
+        num_array (int): 0 for locations, 1 for normals.
+    """
+
+    def __init__(self, morph_frames, num_vertex, num_array):
+
+        self.morph_frames = morph_frames
+        self.num_vertex = num_vertex
+        self.num_array = num_array
+
+    def __len__(self):
+
+        return self.morph_frames.num_frames
+
+    def _to_vectors(self):
+
+        values = self.morph_frames.get_vertex(self.num_vertex)[self.num_array]
+
+        return [math_backend_m.Vector(value) for value in values.tolist()]
+
+    def __getitem__(self, index):
+
+        if isinstance(index, slice):
+            return self._to_vectors()[index]
+
+        if index < 0:
+            index += self.morph_frames.num_frames
+        if index < 0 or index >= self.morph_frames.num_frames:
+            raise IndexError("frame index out of range")
+
+        values = self.morph_frames.get_frame_values(index)[self.num_array]
+
+        return math_backend_m.Vector(values[self.num_vertex])
+
+    def __iter__(self):
+
+        return iter(self._to_vectors())
+
+
 class MDISurface:
     """TODO
 
@@ -145,7 +1021,36 @@ class MDISurface:
 
         self.shader = new_shader
 
-    def vertices_to_type(self, target_type, mdi_model = None):
+    def vertices_to_type(self, target_type, mdi_model = None,
+                         frame_executor = None):
+
+        # bake skeletal animation frame parallel
+        if target_type == MDIMorphVertex and frame_executor and \
+           frame_executor.is_parallel():
+
+            num_frames = len(mdi_model.bounds.aabbs)
+            frames = MDISkinning.calc(self, mdi_model.skeleton, num_frames,
+                                      frame_executor)
+
+            if frames:
+
+                locations, normals = frames
+
+                vertices = []
+                for num_vertex in range(len(self.vertices)):
+
+                    vertex_locations = locations[:, num_vertex].tolist()
+                    vertex_normals = normals[:, num_vertex].tolist()
+
+                    mdi_morph_vertex = MDIMorphVertex(
+                        [math_backend_m.Vector(location)
+                         for location in vertex_locations],
+                        [math_backend_m.Vector(normal)
+                         for normal in vertex_normals])
+                    vertices.append(mdi_morph_vertex)
+
+                self.vertices = vertices
+                return
 
         vertices = []
         for vertex in self.vertices:
@@ -155,20 +1060,249 @@ class MDISurface:
 
         self.vertices = vertices
 
-    def calc_bone_refs(self, mdi_skeleton):
+    def _get_morph_frames(self):
+        """Returns the MDIMorphFrames or MDIMappedFrames holding all vertices
+        of the surface and the row of each vertex, or None if there is none.
+        """
+
+        if not self.vertices:
+            return None
+
+        mdi_morph_frames = None
+        vertex_indices = []
+        for mdi_vertex in self.vertices:
+
+            if not isinstance(mdi_vertex, MDIMorphVertex):
+                return None
+
+            locations = mdi_vertex.locations
+            normals = mdi_vertex.normals
+            if not isinstance(locations, MDIMorphFramesView) or \
+               not isinstance(normals, MDIMorphFramesView):
+                return None
+
+            if mdi_morph_frames is None:
+                mdi_morph_frames = locations.morph_frames
+
+            if locations.morph_frames is not mdi_morph_frames or \
+               normals.morph_frames is not mdi_morph_frames:
+                return None
+
+            vertex_indices.append(locations.num_vertex)
+
+        return (mdi_morph_frames, vertex_indices)
+
+    def is_out_of_core(self):
+        """Returns True if the frames of all vertices are held by
+        MDIMappedFrames.
+        """
+
+        morph_frames = self._get_morph_frames()
+        if morph_frames:
+            return isinstance(morph_frames[0], MDIMappedFrames)
+
+        return False
+
+    def get_morph_frame(self, num_frame):
+        """Returns locations and normals of all morph vertices in a frame.
+
+        Args:
+
+            num_frame (int)
+
+        Returns:
+
+            locations (list<Vector>[num_vertices])
+            normals (list<Vector>[num_vertices])
+        """
+
+        morph_frames = self._get_morph_frames()
+        if morph_frames:
+
+            mdi_morph_frames, vertex_indices = morph_frames
+            locations, normals = mdi_morph_frames.get_frame(num_frame)
+
+            locations = locations[vertex_indices].tolist()
+            normals = normals[vertex_indices].tolist()
+
+            vector_type = math_backend_m.Vector
+            return ([vector_type(location) for location in locations],
+                    [vector_type(normal) for normal in normals])
+
+        locations = [mdi_morph_vertex.locations[num_frame]
+                     for mdi_morph_vertex in self.vertices]
+        normals = [mdi_morph_vertex.normals[num_frame]
+                   for mdi_morph_vertex in self.vertices]
+
+        return (locations, normals)
+
+    def calc_morph_locations(self, num_frames, frame_start = 0):
+        """Collects the locations of all morph vertices.
+
+        Args:
+
+            num_frames (int): number of frames to collect.
+            frame_start (int): first frame to collect.
+
+        Returns:
+
+            locations (numpy.ndarray): float32, shape (num_frames, V, 3).
+        """
+
+        frame_end = frame_start + num_frames
+
+        morph_frames = self._get_morph_frames()
+        if morph_frames:
+
+            mdi_morph_frames, vertex_indices = morph_frames
+            locations, _ = mdi_morph_frames.get_frames(num_frames, frame_start)
+
+            return np.ascontiguousarray(locations[:, vertex_indices])
+
+        num_vertices = len(self.vertices)
+
+        locations = mdi_util_m.vectors_to_array(
+            (location
+             for mdi_morph_vertex in self.vertices
+             for location in \
+                 mdi_morph_vertex.locations[frame_start:frame_end]),
+            num_vertices * num_frames)
+        locations = locations.reshape(num_vertices, num_frames, 3)
+
+        return np.ascontiguousarray(locations.transpose(1, 0, 2))
+
+    def calc_morph_normals(self, num_frames, frame_start = 0):
+        """Collects the normals of all morph vertices.
+
+        Args:
+
+            num_frames (int): number of frames to collect.
+            frame_start (int): first frame to collect.
+
+        Returns:
+
+            normals (numpy.ndarray): float64, shape (num_frames, V, 3).
+        """
+
+        frame_end = frame_start + num_frames
+
+        morph_frames = self._get_morph_frames()
+        if morph_frames:
+
+            mdi_morph_frames, vertex_indices = morph_frames
+            _, normals = mdi_morph_frames.get_frames(num_frames, frame_start)
+
+            return np.ascontiguousarray(normals[:, vertex_indices],
+                                        dtype=np.float64)
+
+        num_vertices = len(self.vertices)
+
+        normals = mdi_util_m.vectors_to_array(
+            (normal
+             for mdi_morph_vertex in self.vertices
+             for normal in mdi_morph_vertex.normals[frame_start:frame_end]),
+            num_vertices * num_frames,
+            dtype=np.float64)
+        normals = normals.reshape(num_vertices, num_frames, 3)
+
+        return np.ascontiguousarray(normals.transpose(1, 0, 2))
+
+    def compress_morph_frames(self, location_scale = 1.0 / 256,
+                              cache_size = 16 * 1024 * 1024):
+        """Moves the frames of all morph vertices into MDIMorphFrames.
+
+        Args:
+
+            location_scale (float): quantization step of locations.
+            cache_size (int): bytes of reconstructed frames to keep.
+
+        Returns:
+
+            mdi_morph_frames (MDIMorphFrames): None if the surface has no
+                animated morph vertices.
+        """
+
+        # vertices might be shared, e.g. after the uv map pass
+        mdi_morph_vertices = {}
+        for mdi_vertex in self.vertices:
+
+            if not isinstance(mdi_vertex, MDIMorphVertex):
+                return None
+
+            # already stored, e.g. out of core
+            if isinstance(mdi_vertex.locations, MDIMorphFramesView):
+                return None
+
+            mdi_morph_vertices[id(mdi_vertex)] = mdi_vertex
+
+        mdi_morph_vertices = list(mdi_morph_vertices.values())
+        if not mdi_morph_vertices:
+            return None
+
+        num_frames = len(mdi_morph_vertices[0].locations)
+        if num_frames < 2:
+            return None
+
+        for mdi_morph_vertex in mdi_morph_vertices:
+
+            if len(mdi_morph_vertex.locations) != num_frames or \
+               len(mdi_morph_vertex.normals) != num_frames:
+
+                reporter_m.warning("Frame count of vertices differs in"
+                                   " surface '{}'. Frames not compressed."
+                                   .format(self.name))
+                return None
+
+        num_vertices = len(mdi_morph_vertices)
+
+        locations = mdi_util_m.vectors_to_array(
+            (location
+             for mdi_morph_vertex in mdi_morph_vertices
+             for location in mdi_morph_vertex.locations),
+            num_vertices * num_frames)
+        normals = mdi_util_m.vectors_to_array(
+            (normal
+             for mdi_morph_vertex in mdi_morph_vertices
+             for normal in mdi_morph_vertex.normals),
+            num_vertices * num_frames)
 
-        bone_indices = set()
-        for mdi_rigged_vertex in self.vertices:
+        locations = locations.reshape(num_vertices, num_frames, 3)
+        normals = normals.reshape(num_vertices, num_frames, 3)
 
-            for mdi_weight in mdi_rigged_vertex.weights:
+        mdi_morph_frames = MDIMorphFrames(locations.transpose(1, 0, 2),
+                                          normals.transpose(1, 0, 2),
+                                          location_scale, cache_size)
 
-                bone_index = mdi_weight.parent_bone
-                while bone_index != -1:
+        for num_vertex, mdi_morph_vertex in enumerate(mdi_morph_vertices):
 
-                    bone_indices.add(bone_index)
-                    bone_index = mdi_skeleton.bones[bone_index].parent_bone
+            mdi_morph_vertex.locations = \
+                MDIMorphFramesView(mdi_morph_frames, num_vertex, 0)
+            mdi_morph_vertex.normals = \
+                MDIMorphFramesView(mdi_morph_frames, num_vertex, 1)
 
-        bone_refs = sorted(bone_indices)
+        return mdi_morph_frames
+
+    def calc_vertex_weights(self):
+        """Returns the weights of all rigged vertices in vertex order.
+
+        Returns:
+
+            mdi_vertex_weights (MDIVertexWeights)
+        """
+
+        return MDIVertexWeights.from_rigged_vertices(self.vertices)
+
+    def calc_bone_indices(self):
+        """Returns the distinct bones directly referenced by vertex weights."""
+
+        parent_bones = self.calc_vertex_weights().parent_bones
+        bone_indices = set(np.unique(parent_bones).tolist())
+
+        return bone_indices
+
+    def calc_bone_refs(self, mdi_skeleton):
+
+        bone_refs = mdi_skeleton.calc_bone_refs([self.calc_bone_indices()])[0]
 
         return bone_refs
 
@@ -208,6 +1342,157 @@ class MDISurface:
         return triangles
 
 
+class MDISkinning:
+    """Frame parallel evaluation of rigged vertices in model space, used to
+    bake skeletal animation into morph frames.
+
+    Notes:
+
+        Worker processes rebuild bones and vertices of a range of frames from
+        arrays and evaluate them with the same methods as the serial code.
+        Weights, bone locations and orientations are single precision, so the
+        arrays hold them exactly and results are identical. Workers use the
+        same math backend, see math_backend. If they can't import it,
+        FrameExecutor evaluates serially.
+    """
+
+    @staticmethod
+    def _skin_stage(frame_start, frame_end, inputs, outputs, context):
+        """Frame parallel stage: all vertices of a range of frames.
+        """
+
+        bone_locations = \
+            inputs["bone_locations"][frame_start:frame_end].tolist()
+        bone_orientations = \
+            inputs["bone_orientations"][frame_start:frame_end].tolist()
+
+        mdi_bones = []
+        for num_bone in range(inputs["bone_locations"].shape[1]):
+
+            locations = [math_backend_m.Vector(frame_locations[num_bone])
+                         for frame_locations in bone_locations]
+            orientations = [math_backend_m.Matrix(frame_orientations[num_bone])
+                            for frame_orientations in bone_orientations]
+
+            mdi_bone = MDIBone(locations=locations, orientations=orientations)
+            mdi_bones.append(mdi_bone)
+
+        mdi_skeleton = MDISkeleton(bones=mdi_bones)
+
+        mdi_vertex_weights = MDIVertexWeights(inputs["offsets"],
+                                              inputs["parent_bones"],
+                                              inputs["weight_values"],
+                                              inputs["weight_locations"])
+
+        num_frames = frame_end - frame_start
+        for num_vertex, normal in enumerate(inputs["normals"].tolist()):
+
+            mdi_rigged_vertex = \
+                MDIRiggedVertex(math_backend_m.Vector(normal),
+                                vertex_weights=mdi_vertex_weights,
+                                num_vertex=num_vertex)
+
+            coords = [mdi_rigged_vertex.calc_ms_coords(mdi_skeleton,
+                                                       num_frame)
+                      for num_frame in range(num_frames)]
+
+            outputs["locations"][frame_start:frame_end, num_vertex] = \
+                mdi_util_m.vectors_to_array(
+                    (location for location, _ in coords), num_frames)
+            outputs["normals"][frame_start:frame_end, num_vertex] = \
+                mdi_util_m.vectors_to_array(
+                    (normal for _, normal in coords), num_frames)
+
+    @staticmethod
+    def calc(mdi_surface, mdi_skeleton, num_frames, frame_executor):
+        """Evaluates all rigged vertices of a surface for all frames.
+
+        Args:
+
+            mdi_surface (MDISurface)
+            mdi_skeleton (MDISkeleton)
+            num_frames (int)
+            frame_executor (FrameExecutor)
+
+        Returns:
+
+            locations (numpy.ndarray): float32, shape (num_frames, V, 3).
+            normals (numpy.ndarray): float32, shape (num_frames, V, 3).
+
+            None if the surface has other vertices than rigged vertices or
+            weights which are not single precision.
+        """
+
+        mdi_rigged_vertices = mdi_surface.vertices
+        if not mdi_rigged_vertices or \
+           not all(isinstance(mdi_vertex, MDIRiggedVertex)
+                   for mdi_vertex in mdi_rigged_vertices):
+            return None
+
+        mdi_vertex_weights = \
+            MDIVertexWeights.from_rigged_vertices(mdi_rigged_vertices)
+
+        # weights held in lists might be double precision
+        if any(mdi_rigged_vertex.vertex_weights is None
+               for mdi_rigged_vertex in mdi_rigged_vertices):
+
+            weight_values = np.fromiter(
+                (mdi_weight.weight_value
+                 for mdi_rigged_vertex in mdi_rigged_vertices
+                 for mdi_weight in mdi_rigged_vertex._get_weights()),
+                dtype=np.float64,
+                count=len(mdi_vertex_weights.weight_values))
+
+            if not np.array_equal(weight_values,
+                                  mdi_vertex_weights.weight_values):
+                return None
+
+        mdi_bones = mdi_skeleton.bones
+        num_bones = len(mdi_bones)
+
+        bone_locations = mdi_util_m.vectors_to_array(
+            (location
+             for mdi_bone in mdi_bones
+             for location in mdi_bone.locations[0:num_frames]),
+            num_bones * num_frames)
+        bone_orientations = mdi_util_m.matrices_to_array(
+            (orientation
+             for mdi_bone in mdi_bones
+             for orientation in mdi_bone.orientations[0:num_frames]),
+            num_bones * num_frames)
+
+        bone_locations = \
+            bone_locations.reshape(num_bones, num_frames, 3).transpose(1, 0, 2)
+        bone_orientations = \
+            bone_orientations.reshape(num_bones, num_frames, 3, 3) \
+            .transpose(1, 0, 2, 3)
+
+        normals = mdi_util_m.vectors_to_array(
+            (mdi_rigged_vertex.normal
+             for mdi_rigged_vertex in mdi_rigged_vertices),
+            len(mdi_rigged_vertices))
+
+        inputs = {
+            "bone_locations": np.ascontiguousarray(bone_locations),
+            "bone_orientations": np.ascontiguousarray(bone_orientations),
+            "offsets": mdi_vertex_weights.offsets,
+            "parent_bones": mdi_vertex_weights.parent_bones,
+            "weight_values": mdi_vertex_weights.weight_values,
+            "weight_locations": mdi_vertex_weights.locations,
+            "normals": normals
+        }
+        shape = (num_frames, len(mdi_rigged_vertices), 3)
+        outputs = {
+            "locations": (shape, np.float32),
+            "normals": (shape, np.float32)
+        }
+
+        outputs = frame_executor.map_frames(MDISkinning._skin_stage,
+                                            num_frames, inputs, outputs)
+
+        return (outputs["locations"], outputs["normals"])
+
+
 class MDIMorphVertex:
     """TODO
 
@@ -247,16 +1532,55 @@ class MDIRiggedVertex:
 
         normal (Vector)
         weights (list<MDIVertexWeight>[num_weights])
+        vertex_weights (MDIVertexWeights): store holding the weights, None if
+            the weights are held in a list.
+        num_vertex (int): row of the vertex in vertex_weights.
+
+    Notes:
+
+        Readers bind vertices to the weight store of their surface instead of
+        creating a list of weight objects per vertex. Accessing the weights
+        attribute creates the list on demand and detaches the vertex from the
+        store, since the caller might modify the list.
     """
 
-    def __init__(self, normal = None, weights = None):
+    def __init__(self, normal = None, weights = None, vertex_weights = None,
+                 num_vertex = 0):
 
         self.normal = normal
 
+        self.vertex_weights = vertex_weights
+        self.num_vertex = num_vertex
+
         if weights:
-            self.weights = weights
+            self._weights = weights
+        elif vertex_weights is None:
+            self._weights = []
         else:
-            self.weights = []
+            self._weights = None  # created on demand
+
+    @property
+    def weights(self):
+
+        weights = self._get_weights()
+        self.vertex_weights = None
+
+        return weights
+
+    @weights.setter
+    def weights(self, weights):
+
+        self._weights = weights
+        self.vertex_weights = None
+
+    def _get_weights(self):
+        """Returns the weights without detaching the vertex from its store."""
+
+        if self._weights is None:
+            self._weights = \
+                self.vertex_weights.get_vertex_weights(self.num_vertex)
+
+        return self._weights
 
     def to_type(self, target_type, mdi_model = None):
 
@@ -284,9 +1608,9 @@ class MDIRiggedVertex:
 
     def calc_location_ms(self, mdi_skeleton, num_frame):
 
-        location_ms = mathutils.Vector((0.0, 0.0, 0.0))
+        location_ms = math_backend_m.Vector((0.0, 0.0, 0.0))
 
-        for mdi_weight in self.weights:
+        for mdi_weight in self._get_weights():
 
             mdi_bone = mdi_skeleton.bones[mdi_weight.parent_bone]
 
@@ -307,7 +1631,7 @@ class MDIRiggedVertex:
 
         total_rotation = None
 
-        for mdi_weight in self.weights:
+        for mdi_weight in self._get_weights():
 
             mdi_bone = mdi_skeleton.bones[mdi_weight.parent_bone]
 
@@ -332,7 +1656,7 @@ class MDIRiggedVertex:
 
         total_rotation = None
 
-        for mdi_weight in self.weights:
+        for mdi_weight in self._get_weights():
 
             mdi_bone = mdi_skeleton.bones[mdi_weight.parent_bone]
 
@@ -355,10 +1679,10 @@ class MDIRiggedVertex:
 
     def calc_ms_coords(self, mdi_skeleton, num_frame):
 
-        location_ms = mathutils.Vector((0.0, 0.0, 0.0))
-        orientation_weighted = mathutils.Matrix.Identity(3)
+        location_ms = math_backend_m.Vector((0.0, 0.0, 0.0))
+        orientation_weighted = math_backend_m.Matrix.Identity(3)
 
-        for mdi_weight in self.weights:
+        for mdi_weight in self._get_weights():
 
             mdi_bone = mdi_skeleton.bones[mdi_weight.parent_bone]
 
@@ -397,6 +1721,178 @@ class MDIVertexWeight:
         self.location = location
 
 
+class MDIVertexWeights:
+    """Weights of the rigged vertices of a surface in compressed sparse row
+    layout. The weights of vertex i are stored in the rows offsets[i] to
+    offsets[i + 1] of the weight arrays.
+
+    Attributes:
+
+        offsets (numpy.ndarray): int64, shape (num_vertices + 1,).
+        parent_bones (numpy.ndarray): int64, shape (num_weights,).
+        weight_values (numpy.ndarray): float32, shape (num_weights,).
+        locations (numpy.ndarray): float32, shape (num_weights, 3).
+    """
+
+    def __init__(self, offsets = None, parent_bones = None,
+                 weight_values = None, locations = None):
+
+        if offsets is None:
+            offsets = np.zeros(1, dtype=np.int64)
+        if parent_bones is None:
+            parent_bones = np.zeros(0, dtype=np.int64)
+        if weight_values is None:
+            weight_values = np.zeros(0, dtype=np.float32)
+        if locations is None:
+            locations = np.zeros((0, 3), dtype=np.float32)
+
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.parent_bones = np.asarray(parent_bones, dtype=np.int64)
+        self.weight_values = np.asarray(weight_values, dtype=np.float32)
+        self.locations = \
+            np.asarray(locations, dtype=np.float32).reshape(-1, 3)
+
+    def num_vertices(self):
+
+        return len(self.offsets) - 1
+
+    def num_weights(self, num_vertex):
+
+        return int(self.offsets[num_vertex + 1] - self.offsets[num_vertex])
+
+    @staticmethod
+    def from_counts(num_weights, parent_bones, weight_values, locations):
+        """Creates the store from the number of weights of each vertex and the
+        flattened weights.
+
+        Args:
+
+            num_weights (iterable<int>): number of weights of each vertex.
+            parent_bones (numpy.ndarray): shape (num_weights,).
+            weight_values (numpy.ndarray): shape (num_weights,).
+            locations (numpy.ndarray): shape (num_weights, 3).
+
+        Returns:
+
+            mdi_vertex_weights (MDIVertexWeights)
+        """
+
+        num_weights = np.fromiter(num_weights, dtype=np.int64)
+
+        offsets = np.zeros(len(num_weights) + 1, dtype=np.int64)
+        np.cumsum(num_weights, out=offsets[1:])
+
+        return MDIVertexWeights(offsets, parent_bones, weight_values,
+                                locations)
+
+    @staticmethod
+    def from_rigged_vertices(mdi_rigged_vertices):
+        """Collects the weights of a list of rigged vertices.
+
+        Args:
+
+            mdi_rigged_vertices (list<MDIRiggedVertex>)
+
+        Returns:
+
+            mdi_vertex_weights (MDIVertexWeights)
+        """
+
+        # vertices bound to the same store only need a selection of its rows
+        if mdi_rigged_vertices:
+
+            vertex_weights = mdi_rigged_vertices[0].vertex_weights
+            if vertex_weights is not None and \
+               all(mdi_rigged_vertex.vertex_weights is vertex_weights
+                   for mdi_rigged_vertex in mdi_rigged_vertices):
+
+                vertex_indices = [mdi_rigged_vertex.num_vertex
+                                  for mdi_rigged_vertex in mdi_rigged_vertices]
+                return vertex_weights.take(vertex_indices)
+
+        num_weights = []
+        parent_bones = []
+        weight_values = []
+        locations = []
+        for mdi_rigged_vertex in mdi_rigged_vertices:
+
+            mdi_weights = mdi_rigged_vertex._get_weights()
+            num_weights.append(len(mdi_weights))
+
+            for mdi_weight in mdi_weights:
+
+                parent_bones.append(mdi_weight.parent_bone)
+                weight_values.append(mdi_weight.weight_value)
+                locations.extend(mdi_weight.location)
+
+        return MDIVertexWeights.from_counts(num_weights,
+                                            np.array(parent_bones,
+                                                     dtype=np.int64),
+                                            np.array(weight_values,
+                                                     dtype=np.float32),
+                                            np.array(locations,
+                                                     dtype=np.float32))
+
+    def take(self, vertex_indices):
+        """Selects the weights of some vertices.
+
+        Args:
+
+            vertex_indices (list<int>): vertices in the order of the new
+                store, vertices might be selected more than once.
+
+        Returns:
+
+            mdi_vertex_weights (MDIVertexWeights)
+        """
+
+        vertex_indices = np.asarray(vertex_indices, dtype=np.int64)
+
+        if len(vertex_indices) == self.num_vertices() and \
+           np.array_equal(vertex_indices, np.arange(len(vertex_indices))):
+            return self
+
+        starts = self.offsets[vertex_indices]
+        num_weights = self.offsets[vertex_indices + 1] - starts
+
+        offsets = np.zeros(len(vertex_indices) + 1, dtype=np.int64)
+        np.cumsum(num_weights, out=offsets[1:])
+
+        # row of each selected weight in this store
+        rows = np.arange(offsets[-1], dtype=np.int64) + \
+               np.repeat(starts - offsets[:-1], num_weights)
+
+        return MDIVertexWeights(offsets, self.parent_bones[rows],
+                                self.weight_values[rows], self.locations[rows])
+
+    def get_vertex_weights(self, num_vertex):
+        """Returns the weights of a vertex as list of MDIVertexWeight.
+
+        Args:
+
+            num_vertex (int)
+
+        Returns:
+
+            mdi_weights (list<MDIVertexWeight>)
+        """
+
+        start = self.offsets[num_vertex]
+        end = self.offsets[num_vertex + 1]
+
+        mdi_weights = []
+        for parent_bone, weight_value, location in \
+            zip(self.parent_bones[start:end].tolist(),
+                self.weight_values[start:end].tolist(),
+                self.locations[start:end].tolist()):
+
+            mdi_weight = MDIVertexWeight(parent_bone, weight_value,
+                                         math_backend_m.Vector(location))
+            mdi_weights.append(mdi_weight)
+
+        return mdi_weights
+
+
 class MDITriangle:
     """TODO
 
@@ -668,6 +2164,73 @@ class MDISkeleton:
         else:
             self.bones = []
 
+    def calc_ancestors(self):
+        """Calculates the ancestors of each bone.
+
+        Returns:
+
+            ancestors (numpy.ndarray): bool, shape (num_bones, num_bones). Row
+                i marks bone i and all bones on its way to the root.
+        """
+
+        num_bones = len(self.bones)
+        ancestors = np.zeros((num_bones, num_bones), dtype=bool)
+
+        for num_bone in range(num_bones):
+
+            bone_index = num_bone
+            while bone_index != -1:
+
+                # the row of an already visited ancestor is complete
+                if bone_index < num_bone:
+                    ancestors[num_bone] |= ancestors[bone_index]
+                    break
+
+                ancestors[num_bone, bone_index] = True
+                bone_index = self.bones[bone_index].parent_bone
+
+        return ancestors
+
+    def calc_bone_refs(self, bone_indices, ancestors = None):
+        """Calculates bone references of several surfaces or tags at once. The
+        bone references are the given bones and all of their ancestors.
+
+        Args:
+
+            bone_indices (list<iterable<int>>): bones directly referenced by
+                each surface or tag.
+            ancestors (numpy.ndarray): see calc_ancestors, calculated if not
+                given.
+
+        Returns:
+
+            bone_refs (list<list<int>>): sorted bone references of each
+                surface or tag.
+        """
+
+        if ancestors is None:
+            ancestors = self.calc_ancestors()
+
+        num_bones = len(self.bones)
+
+        rows = []
+        columns = []
+        for num_item, bone_indices_item in enumerate(bone_indices):
+
+            bone_indices_item = list(bone_indices_item)
+            rows.extend([num_item] * len(bone_indices_item))
+            columns.extend(bone_indices_item)
+
+        is_used = np.zeros((len(bone_indices), num_bones), dtype=bool)
+        is_used[rows, columns] = True
+
+        is_referenced = np.matmul(is_used, ancestors)
+
+        bone_refs = [np.flatnonzero(is_referenced_item).tolist()
+                     for is_referenced_item in is_referenced]
+
+        return bone_refs
+
 
 class MDIBone:
     """TODO
@@ -793,8 +2356,8 @@ class MDIBoneTag:
 
             name = self.name
             parent_bone = self.parent_bone
-            location = mathutils.Vector((0, 0, 0))
-            orientation = mathutils.Matrix.Identity(3)
+            location = math_backend_m.Vector((0, 0, 0))
+            orientation = math_backend_m.Matrix.Identity(3)
             mdi_bone_tag_off = MDIBoneTagOff(name, parent_bone, location,
                                              orientation)
 
@@ -942,15 +2505,7 @@ class MDIBoneTagOff:
 
         # TODO some tags do not include the torso parent bone, why?
 
-        bone_indices = set()
-
-        bone_index = self.parent_bone
-        while bone_index != -1:
-
-            bone_indices.add(bone_index)
-            bone_index = mdi_skeleton.bones[bone_index].parent_bone
-
-        bone_refs = sorted(bone_indices)
+        bone_refs = mdi_skeleton.calc_bone_refs([[self.parent_bone]])[0]
 
         return bone_refs
 
@@ -1082,8 +2637,8 @@ class MDIBoundingVolume:
                             max(location[1], max_y), \
                             max(location[2], max_z)
 
-                min_bound = mathutils.Vector((min_x, min_y, min_z))
-                max_bound = mathutils.Vector((max_x, max_y, max_z))
+                min_bound = math_backend_m.Vector((min_x, min_y, min_z))
+                max_bound = math_backend_m.Vector((max_x, max_y, max_z))
                 mdi_aabb = MDIAABB(min_bound, max_bound)
 
                 mdi_bounding_sphere = \
@@ -1126,12 +2681,12 @@ class MDIAABB:
         if min_bound:
             self.min_bound = min_bound
         else:
-            self.min_bound = mathutils.Vector((0, 0, 0))
+            self.min_bound = math_backend_m.Vector((0, 0, 0))
 
         if max_bound:
             self.max_bound = max_bound
         else:
-            self.max_bound = mathutils.Vector((0, 0, 0))
+            self.max_bound = math_backend_m.Vector((0, 0, 0))
 
 
 class MDIBoundingSphere:
@@ -1148,7 +2703,7 @@ class MDIBoundingSphere:
         if origin:
             self.origin = origin
         else:
-            self.origin = mathutils.Vector((0, 0, 0))
+            self.origin = math_backend_m.Vector((0, 0, 0))
 
         self.radius = radius
 
@@ -1198,7 +2753,7 @@ class MDIBoundingSphere:
             max_bound_z = max_bound[2]
 
         # calc values from cube
-        origin = mathutils.Vector((0, 0, 0))
+        origin = math_backend_m.Vector((0, 0, 0))
         origin[0] = min_bound_x + ((max_bound_x - min_bound_x) / 2)
         origin[1] = min_bound_y + ((max_bound_y - min_bound_y) / 2)
         origin[2] = min_bound_z + ((max_bound_z - min_bound_z) / 2)
@@ -21,8 +21,10 @@
 """MDI utility functions, mostly strings and math.
 """
 
+import itertools
 import math
-import mathutils
+
+import rtcw_et_model_tools.common.math_backend as math_backend_m
 
 
 # =====================================
@@ -279,7 +281,7 @@ def tuple_to_matrix(orientation):
     up_y = orientation[7]
     up_z = orientation[8]
 
-    matrix = mathutils.Matrix.Identity(3)
+    matrix = math_backend_m.Matrix.Identity(3)
     matrix[0][0:3] = forward_x, left_x, up_x
     matrix[1][0:3] = forward_y, left_y, up_y
     matrix[2][0:3] = forward_z, left_z, up_z
@@ -337,7 +339,7 @@ def angles_to_matrix(yaw, pitch, roll):
     up_y = sr * cp
     up_z = cr * cp
 
-    matrix = mathutils.Matrix.Identity(3)
+    matrix = math_backend_m.Matrix.Identity(3)
     matrix[0][0:3] = forward_x, left_x, up_x # first row
     matrix[1][0:3] = forward_y, left_y, up_y # second row
     matrix[2][0:3] = forward_z, left_z, up_z # third row
@@ -472,3 +474,241 @@ def matrix_to_angles(matrix):
 # =====================================
 
 # TODO
+
+# =====================================
+# arrays
+# =====================================
+
+# numpy is imported by the functions using it, string and scalar math
+# functions are used without it
+
+def vectors_to_array(vectors, num_vectors, dtype='float32'):
+    """Converts vectors to an array.
+
+    Args:
+
+        vectors (iterable<Vector>): vectors with 3 components each.
+        num_vectors (int): number of vectors.
+        dtype (numpy.dtype): type of array elements.
+
+    Returns:
+
+        array (numpy.ndarray): shape (num_vectors, 3).
+    """
+
+    import numpy as np
+
+    array = np.fromiter(itertools.chain.from_iterable(vectors),
+                        dtype=dtype,
+                        count=num_vectors * 3)
+
+    return array.reshape(num_vectors, 3)
+
+def matrices_to_array(matrices, num_matrices, dtype='float32'):
+    """Converts 3x3 matrices to an array.
+
+    Args:
+
+        matrices (iterable<Matrix>): matrices with 3 rows of 3 components each.
+        num_matrices (int): number of matrices.
+        dtype (numpy.dtype): type of array elements.
+
+    Returns:
+
+        array (numpy.ndarray): shape (num_matrices, 3, 3).
+    """
+
+    import numpy as np
+
+    rows = itertools.chain.from_iterable(matrices)
+    array = np.fromiter(itertools.chain.from_iterable(rows),
+                        dtype=dtype,
+                        count=num_matrices * 9)
+
+    return array.reshape(num_matrices, 3, 3)
+
+def normalize_array(vectors):
+    """Normalizes single precision vectors the same way Vector.normalized()
+    does.
+
+    Args:
+
+        vectors (numpy.ndarray): float32, shape (N, 3).
+
+    Returns:
+
+        normalized (numpy.ndarray): float32, shape (N, 3). Vectors too short to
+            be normalized become zero vectors.
+    """
+
+    import numpy as np
+
+    vectors = np.asarray(vectors, dtype=np.float32)
+    vectors_64 = vectors.astype(np.float64)
+
+    # squared length accumulated in double precision, last component first
+    d = vectors_64[:, 2] * vectors_64[:, 2]
+    d = d + vectors_64[:, 1] * vectors_64[:, 1]
+    d = d + vectors_64[:, 0] * vectors_64[:, 0]
+
+    is_valid = d > 1.0e-35
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        inv_length = np.float32(1.0) / np.sqrt(d).astype(np.float32)
+        normalized = vectors * inv_length[:, np.newaxis]
+
+    normalized[~is_valid] = 0.0
+
+    return normalized
+
+def _map_math(func, *arrays):
+    """Applies a scalar math function to each element of the arrays.
+
+    Notes:
+
+        The vectorized trigonometric functions of numpy may differ from the
+        ones in the math module in the last bit. Since angles are quantized
+        afterwards, this could change the encoded value. Mapping the math
+        functions over flat lists keeps the results identical to the scalar
+        code at a fraction of its cost.
+    """
+
+    import numpy as np
+
+    shape = np.shape(arrays[0])
+    lists = [np.asarray(array, dtype=np.float64).ravel().tolist()
+             for array in arrays]
+
+    result = np.fromiter(map(func, *lists), dtype=np.float64,
+                         count=len(lists[0]))
+
+    return result.reshape(shape)
+
+def _asin_clamped(sp):
+    """Pitch from sin pitch, see matrix_to_angles."""
+
+    import numpy as np
+
+    sp = np.asarray(sp, dtype=np.float64)
+
+    pitch = np.empty_like(sp)
+
+    is_low = sp <= -1.0
+    is_high = sp >= 1.0
+    is_mid = ~(is_low | is_high)
+
+    pitch[is_low] = -math.pi / 2
+    pitch[is_high] = math.pi / 2
+    pitch[is_mid] = _map_math(math.asin, sp[is_mid])
+
+    return pitch
+
+def matrices_to_angles(matrices):
+    """Batched version of matrix_to_angles.
+
+    Args:
+
+        matrices (numpy.ndarray): shape (N, 3, 3).
+
+    Returns:
+
+        _ (tuple): arrays of yaw, pitch and roll in degrees, shape (N,) each.
+    """
+
+    import numpy as np
+
+    matrices = np.asarray(matrices).astype(np.float64)
+
+    pitch = _asin_clamped(-(matrices[:, 0, 2]))
+    cp = _map_math(math.cos, pitch)
+
+    yaw = np.zeros_like(pitch)
+    roll = np.zeros_like(pitch)
+
+    is_regular = cp > 0.00001
+    is_locked = ~is_regular
+
+    yaw[is_regular] = _map_math(math.atan2,
+                                matrices[is_regular, 0, 1],
+                                matrices[is_regular, 0, 0])
+    roll[is_regular] = _map_math(math.atan2,
+                                 matrices[is_regular, 1, 2],
+                                 matrices[is_regular, 2, 2])
+
+    # gimbal lock, roll is 0
+    yaw[is_locked] = _map_math(math.atan2,
+                               -(matrices[is_locked, 1, 0]),
+                               matrices[is_locked, 1, 1])
+
+    # same single multiplication as math.degrees
+    yaw = np.degrees(yaw)
+    pitch = np.degrees(pitch)
+    roll = np.degrees(roll)
+
+    return (yaw, pitch, roll)
+
+def angles_from_up_vectors(vectors):
+    """Batched version of angles_from_up_vector.
+
+    Args:
+
+        vectors (numpy.ndarray): float32, shape (N, 3).
+
+    Returns:
+
+        _ (tuple): arrays of yaw and pitch in degrees, shape (N,) each.
+    """
+
+    import numpy as np
+
+    vectors = normalize_array(vectors).astype(np.float64)
+
+    cp = vectors[:, 2]
+
+    yaw = np.zeros_like(cp)
+    pitch = np.zeros_like(cp)
+
+    is_low = cp <= -1.0
+    is_mid = ~(is_low | (cp >= 1.0))
+
+    pitch[is_low] = math.pi
+    yaw[is_mid] = _map_math(math.atan2,
+                            vectors[is_mid, 1],
+                            vectors[is_mid, 0])
+    pitch[is_mid] = _map_math(math.acos, cp[is_mid])
+
+    yaw = np.degrees(yaw)
+    pitch = np.degrees(pitch)
+
+    return (yaw, pitch)
+
+def angles_from_forward_vectors(vectors):
+    """Batched version of angles_from_forward_vector.
+
+    Args:
+
+        vectors (numpy.ndarray): float32, shape (N, 3).
+
+    Returns:
+
+        _ (tuple): arrays of yaw and pitch in degrees, shape (N,) each.
+    """
+
+    import numpy as np
+
+    vectors = normalize_array(vectors).astype(np.float64)
+
+    pitch = _asin_clamped(-(vectors[:, 2]))
+    cp = _map_math(math.cos, pitch)
+
+    yaw = np.zeros_like(pitch)
+
+    is_regular = cp > 0.00001
+    yaw[is_regular] = _map_math(math.atan2,
+                                vectors[is_regular, 1],
+                                vectors[is_regular, 0])
+
+    yaw = np.degrees(yaw)
+    pitch = np.degrees(pitch)
+
+    return (yaw, pitch)
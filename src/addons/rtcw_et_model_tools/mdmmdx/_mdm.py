@@ -62,6 +62,7 @@ Background:
     different meshes (see MDX for more details).
 """
 
+import io
 import struct
 
 import rtcw_et_model_tools.common.timer as timer_m
@@ -999,38 +1000,71 @@ class MDM:
         """
 
         with open(file_path, 'rb') as file:
+            return MDM.read_file(file, file_path)
 
-            timer = timer_m.Timer()
-            reporter_m.info("Reading MDM file: {} ...".format(file_path))
+    @staticmethod
+    def read_file(file, name=None):
+        """Reads a binary encoded MDM file from a file object, for example a
+        memory buffer.
+
+        Args:
+
+            file (File): binary file object, must be seekable.
+            name (str): name of the file in log messages.
+
+        Returns:
+
+            mdm (MDM): MDM object.
+        """
+
+        timer = timer_m.Timer()
+        reporter_m.info("Reading MDM file: {} ...".format(name or "<memory>"))
 
-            mdm = MDM()
+        mdm = MDM()
 
-            # mdm.header
-            file_ofs = 0
-            mdm.header = MDMHeader.read(file, file_ofs)
+        # mdm.header
+        file_ofs = 0
+        mdm.header = MDMHeader.read(file, file_ofs)
 
-            # mdm.surfaces
-            file_ofs = mdm.header.ofs_surfaces
-            for i in range(mdm.header.num_surfaces):
+        # mdm.surfaces
+        file_ofs = mdm.header.ofs_surfaces
+        for i in range(mdm.header.num_surfaces):
 
-                mdm_surface = MDMSurface.read(file, file_ofs)
-                mdm.surfaces.append(mdm_surface)
+            mdm_surface = MDMSurface.read(file, file_ofs)
+            mdm.surfaces.append(mdm_surface)
 
-                file_ofs = file_ofs + mdm_surface.header.ofs_end
+            file_ofs = file_ofs + mdm_surface.header.ofs_end
 
-            # mdm.tags
-            file_ofs = mdm.header.ofs_tags
-            for i in range(mdm.header.num_tags):
+        # mdm.tags
+        file_ofs = mdm.header.ofs_tags
+        for i in range(mdm.header.num_tags):
 
-                mdm_tag = MDMTag.read(file, file_ofs)
-                mdm.tags.append(mdm_tag)
+            mdm_tag = MDMTag.read(file, file_ofs)
+            mdm.tags.append(mdm_tag)
 
-                file_ofs = file_ofs + mdm_tag.ofs_end
+            file_ofs = file_ofs + mdm_tag.ofs_end
 
-            time = timer.time()
-            reporter_m.info("Reading MDM file DONE (time={})".format(time))
+        time = timer.time()
+        reporter_m.info("Reading MDM file DONE (time={})".format(time))
 
-            return mdm
+        return mdm
+
+    @staticmethod
+    def from_bytes(data, name=None):
+        """Reads binary encoded MDM data from memory.
+
+        Args:
+
+            data (bytes): content of an MDM file.
+            name (str): name of the file in log messages.
+
+        Returns:
+
+            mdm (MDM): MDM object.
+        """
+
+        with io.BytesIO(data) as file:
+            return MDM.read_file(file, name)
 
     def write(self, file_path):
         """Writes MDM object to file with binary encoding.
@@ -1041,29 +1075,57 @@ class MDM:
         """
 
         with open(file_path, 'wb') as file:
+            self.write_file(file, file_path)
+
+    def write_file(self, file, name=None):
+        """Writes MDM object with binary encoding to a file object, for
+        example a memory buffer.
+
+        Args:
+
+            file (File): binary file object, must be seekable.
+            name (str): name of the file in log messages.
+        """
+
+        timer = timer_m.Timer()
+        reporter_m.info("Writing MDM file: {} ...".format(name or "<memory>"))
+
+        # mdm.header
+        file_ofs = 0
+        self.header.write(file, file_ofs)
+
+        # mdm.surfaces
+        file_ofs = self.header.ofs_surfaces
+        for mdm_surface in self.surfaces:
+
+            mdm_surface.write(file, file_ofs)
 
-            timer = timer_m.Timer()
-            reporter_m.info("Writing MDM file: {} ...".format(file_path))
+            file_ofs = file_ofs + mdm_surface.header.ofs_end
 
-            # mdm.header
-            file_ofs = 0
-            self.header.write(file, file_ofs)
+        # mdm.tags
+        file_ofs = self.header.ofs_tags
+        for mdm_tag in self.tags:
 
-            # mdm.surfaces
-            file_ofs = self.header.ofs_surfaces
-            for mdm_surface in self.surfaces:
+            mdm_tag.write(file, file_ofs)
 
-                mdm_surface.write(file, file_ofs)
+            file_ofs = file_ofs + mdm_tag.ofs_end
 
-                file_ofs = file_ofs + mdm_surface.header.ofs_end
+        time = timer.time()
+        reporter_m.info("Writing MDM file DONE (time={})".format(time))
 
-            # mdm.tags
-            file_ofs = self.header.ofs_tags
-            for mdm_tag in self.tags:
+    def to_bytes(self, name=None):
+        """Writes MDM object with binary encoding to memory.
+
+        Args:
 
-                mdm_tag.write(file, file_ofs)
+            name (str): name of the file in log messages.
+
+        Returns:
+
+            data (bytes): content of an MDM file.
+        """
 
-                file_ofs = file_ofs + mdm_tag.ofs_end
+        with io.BytesIO() as file:
 
-            time = timer.time()
-            reporter_m.info("Writing MDM file DONE (time={})".format(time))
+            self.write_file(file, name)
+            return file.getvalue()
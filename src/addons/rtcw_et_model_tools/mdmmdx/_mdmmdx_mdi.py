@@ -21,12 +21,15 @@
 """Converts between in-memory representations of MDM/MDX and MDI.
 """
 
-import mathutils
+import itertools
+
+import numpy as np
 
 import rtcw_et_model_tools.mdmmdx._mdm as mdm_m
 import rtcw_et_model_tools.mdmmdx._mdx as mdx_m
 import rtcw_et_model_tools.mdi.mdi as mdi_m
 import rtcw_et_model_tools.mdi.util as mdi_util_m
+import rtcw_et_model_tools.common.math_backend as math_backend_m
 import rtcw_et_model_tools.common.timer as timer_m
 import rtcw_et_model_tools.common.reporter as reporter_m
 
@@ -139,7 +142,7 @@ class MDIToModel:
         mdm_model.header.ofs_end = ofs_end
 
     @staticmethod
-    def _to_mdm_tag(mdi_model, num_tag):
+    def _to_mdm_tag(mdi_model, num_tag, bone_refs):
 
         mdi_bone_tag_off = mdi_model.tags[num_tag]
 
@@ -153,9 +156,7 @@ class MDIToModel:
         location = mdi_bone_tag_off.location.to_tuple()
 
         # bone refs
-        bone_refs = mdi_bone_tag_off.calc_bone_refs(mdi_model.skeleton)
-        mdm_bone_refs = mdm_m.MDMBoneRefs(bone_refs)
-        num_bone_refs = len(mdm_bone_refs.bone_refs)
+        num_bone_refs = len(bone_refs)
         ofs_bone_refs = mdm_m.MDMTag.format_size
         ofs_end = ofs_bone_refs + num_bone_refs * 4
 
@@ -166,11 +167,25 @@ class MDIToModel:
         return mdm_tag
 
     @staticmethod
-    def _to_mdm_bone_refs(mdi_model, num_surface):
+    def _calc_bone_refs(mdi_model):
+        """Calculates bone references of all surfaces and tags at once."""
 
-        mdi_surface = mdi_model.surfaces[num_surface]
+        bone_indices = [mdi_surface.calc_bone_indices()
+                        for mdi_surface in mdi_model.surfaces]
+        bone_indices.extend([mdi_tag.parent_bone]
+                            for mdi_tag in mdi_model.tags)
+
+        bone_refs = mdi_model.skeleton.calc_bone_refs(bone_indices)
+
+        num_surfaces = len(mdi_model.surfaces)
+        surfaces_bone_refs = bone_refs[0:num_surfaces]
+        tags_bone_refs = bone_refs[num_surfaces:]
+
+        return (surfaces_bone_refs, tags_bone_refs)
+
+    @staticmethod
+    def _to_mdm_bone_refs(bone_refs):
 
-        bone_refs = mdi_surface.calc_bone_refs(mdi_model.skeleton)
         mdm_bone_refs = mdm_m.MDMBoneRefs(bone_refs)
 
         return mdm_bone_refs
@@ -200,21 +215,25 @@ class MDIToModel:
         return mdm_triangle
 
     @staticmethod
-    def _to_mdm_weight(mdi_model, num_surface, num_vertex, num_weight):
+    def _to_mdm_weights(mdi_vertex_weights):
+        """Returns the weights of all vertices of a surface in vertex order.
+        """
 
-        mdi_rigged_vertex = \
-            mdi_model.surfaces[num_surface].vertices[num_vertex]
-        mdi_vertex_weight = mdi_rigged_vertex.weights[num_weight]
+        mdm_weights = []
+
+        for bone_index, bone_weight, location in \
+            zip(mdi_vertex_weights.parent_bones.tolist(),
+                mdi_vertex_weights.weight_values.tolist(),
+                mdi_vertex_weights.locations.tolist()):
 
-        bone_index = mdi_vertex_weight.parent_bone
-        bone_weight = mdi_vertex_weight.weight_value
-        location = mdi_vertex_weight.location.to_tuple()
-        mdm_weight = mdm_m.MDMWeight(bone_index, bone_weight, location)
+            mdm_weight = mdm_m.MDMWeight(bone_index, bone_weight,
+                                        tuple(location))
+            mdm_weights.append(mdm_weight)
 
-        return mdm_weight
+        return mdm_weights
 
     @staticmethod
-    def _to_mdm_vertex(mdi_model, num_surface, num_vertex):
+    def _to_mdm_vertex(mdi_model, num_surface, num_vertex, mdm_weights):
 
         mdi_rigged_vertex = \
             mdi_model.surfaces[num_surface].vertices[num_vertex]
@@ -228,29 +247,30 @@ class MDIToModel:
         mdm_vertex = mdm_m.MDMVertex(normal, tex_coords, num_weights)
 
         # weights
-        for num_weight in range(len(mdi_rigged_vertex.weights)):
-
-            mdm_weight = \
-                MDIToModel._to_mdm_weight(mdi_model, num_surface, num_vertex,
-                                          num_weight)
-            mdm_vertex.weights.append(mdm_weight)
-
+        mdm_vertex.weights = mdm_weights
         mdm_vertex.num_weights = len(mdm_vertex.weights)
 
         return mdm_vertex
 
     @staticmethod
-    def _to_mdm_surface(mdi_model, num_surface):
+    def _to_mdm_surface(mdi_model, num_surface, bone_refs):
 
         mdm_surface = mdm_m.MDMSurface()
 
         mdi_surface = mdi_model.surfaces[num_surface]
 
         # mdm vertices
+        mdi_vertex_weights = mdi_surface.calc_vertex_weights()
+        mdm_weights = MDIToModel._to_mdm_weights(mdi_vertex_weights)
+        offsets = mdi_vertex_weights.offsets.tolist()
+
         for num_vertex in range(len(mdi_surface.vertices)):
 
+            mdm_weights_vertex = \
+                mdm_weights[offsets[num_vertex]:offsets[num_vertex + 1]]
             mdm_vertex = MDIToModel._to_mdm_vertex(mdi_model, num_surface,
-                                                   num_vertex)
+                                                   num_vertex,
+                                                   mdm_weights_vertex)
             mdm_surface.vertices.append(mdm_vertex)
 
         # mdm triangles
@@ -265,8 +285,7 @@ class MDIToModel:
             MDIToModel._to_mdm_collapse_map(mdi_model, num_surface)
 
         # mdm bone refs
-        mdm_surface.bone_refs = \
-            MDIToModel._to_mdm_bone_refs(mdi_model, num_surface)
+        mdm_surface.bone_refs = MDIToModel._to_mdm_bone_refs(bone_refs)
 
         return mdm_surface
 
@@ -297,56 +316,73 @@ class MDIToModel:
         return mdx_bone_info
 
     @staticmethod
-    def _to_mdx_bone_frame_compressed(mdi_model, num_frame, num_bone):
+    def _to_mdx_bone_frames_compressed(mdi_model):
+        """Encodes orientation and location of all bones in all frames at once.
 
-        mdi_bone = mdi_model.skeleton.bones[num_bone]
+        Args:
 
-        # orientation
-        orientation = mdi_bone.orientations[num_frame]
+            mdi_model (MDI): MDI model.
 
-        yaw, pitch, roll = mdi_util_m.matrix_to_angles(orientation)
+        Returns:
 
-        scale = mdx_m.MDXBoneFrameCompressed.orientation_scale
-        yaw = int(yaw / scale)
-        pitch = int(pitch / scale)
-        roll = int(roll / scale)
+            bone_frames_compressed (numpy.ndarray): shape (num_frames,
+                num_bones, 6). Index 0-3 = orientation, index 4-5 = location
+                dir, see MDXBoneFrameCompressed.
+        """
 
-        orientation = (pitch, yaw, roll,
-                       mdx_m.MDXBoneFrameCompressed.angle_none_default)
+        mdi_bones = mdi_model.skeleton.bones
 
-        # location dir
-        has_bone_parent = True
-        if mdi_bone.parent_bone < 0:
-            has_bone_parent = False
+        num_frames = len(mdi_model.bounds.aabbs)
+        num_bones = len(mdi_bones)
 
-        yaw = 0
-        pitch = 0
+        orientations = np.empty((num_bones, num_frames, 3, 3),
+                                dtype=np.float32)
+        locations = np.empty((num_bones, num_frames, 3), dtype=np.float32)
 
-        if has_bone_parent:
+        for num_bone, mdi_bone in enumerate(mdi_bones):
 
-            mdi_parent_bone = mdi_model.skeleton.bones[mdi_bone.parent_bone]
+            orientations[num_bone] = \
+                mdi_util_m.matrices_to_array(mdi_bone.orientations, num_frames)
+            locations[num_bone] = \
+                mdi_util_m.vectors_to_array(mdi_bone.locations, num_frames)
 
-            location_diff = mdi_bone.locations[num_frame] - \
-                mdi_parent_bone.locations[num_frame]
-            yaw, pitch = mdi_util_m.angles_from_forward_vector \
-                         (
-                             location_diff.normalized()
-                         )
+        bone_frames_compressed = np.zeros((num_frames, num_bones, 6),
+                                          dtype=np.int64)
 
-            scale = mdx_m.MDXBoneFrameCompressed.location_dir_scale
-            yaw = int(yaw / scale) << 4  # TODO why bitshift
-            pitch = int(pitch / scale) << 4
+        # orientation
+        yaws, pitches, rolls = mdi_util_m.matrices_to_angles(
+            orientations.transpose(1, 0, 2, 3).reshape(-1, 3, 3))
 
-        else:
+        scale = mdx_m.MDXBoneFrameCompressed.orientation_scale
+        for index, angles in ((0, pitches), (1, yaws), (2, rolls)):
+
+            bone_frames_compressed[:, :, index] = \
+                np.trunc(angles / scale).reshape(num_frames, num_bones)
+
+        bone_frames_compressed[:, :, 3] = \
+            mdx_m.MDXBoneFrameCompressed.angle_none_default
+
+        # location dir, root bone always is 0, 0
+        parent_bones = np.array([mdi_bone.parent_bone
+                                 for mdi_bone in mdi_bones], dtype=np.int64)
+        has_bone_parent = parent_bones >= 0
+        num_child_bones = int(np.count_nonzero(has_bone_parent))
+
+        location_diffs = locations[has_bone_parent] - \
+            locations[parent_bones[has_bone_parent]]
+        location_diffs = location_diffs.transpose(1, 0, 2).reshape(-1, 3)
 
-            pass  # root bone always is 0, 0
+        yaws, pitches = mdi_util_m.angles_from_forward_vectors(
+            mdi_util_m.normalize_array(location_diffs))
 
-        location_dir = (yaw, pitch)
+        scale = mdx_m.MDXBoneFrameCompressed.location_dir_scale
+        for index, angles in ((4, yaws), (5, pitches)):
 
-        mdx_bone_frame_compressed = \
-            mdx_m.MDXBoneFrameCompressed(orientation, location_dir)
+            angles = np.trunc(angles / scale).astype(np.int64) << 4
+            bone_frames_compressed[:, has_bone_parent, index] = \
+                angles.reshape(num_frames, num_child_bones)
 
-        return mdx_bone_frame_compressed
+        return bone_frames_compressed
 
     @staticmethod
     def _to_mdx_frame_info(mdi_model, num_frame):
@@ -367,18 +403,21 @@ class MDIToModel:
         return mdx_frame_info
 
     @staticmethod
-    def _to_mdx_frame(mdi_model, num_frame):
+    def _to_mdx_frame(mdi_model, num_frame, bone_frames_compressed):
 
         mdx_frame = mdx_m.MDXFrame()
 
         mdx_frame.frame_info = MDIToModel._to_mdx_frame_info(mdi_model,
                                                              num_frame)
 
-        for num_bone in range(len(mdi_model.skeleton.bones)):
+        for bone_frame_compressed in \
+            bone_frames_compressed[num_frame].tolist():
+
+            orientation = tuple(bone_frame_compressed[0:4])
+            location_dir = tuple(bone_frame_compressed[4:6])
 
             mdx_bone_frame_compressed = \
-                MDIToModel._to_mdx_bone_frame_compressed(mdi_model, num_frame,
-                                                         num_bone)
+                mdx_m.MDXBoneFrameCompressed(orientation, location_dir)
             mdx_frame.bone_frames_compressed.append(mdx_bone_frame_compressed)
 
         return mdx_frame
@@ -414,9 +453,13 @@ class MDIToModel:
         mdi_model.lod_to_type(mdi_m.MDICollapseMap, collapse_frame)
 
         # mdx frames
+        bone_frames_compressed = \
+            MDIToModel._to_mdx_bone_frames_compressed(mdi_model)
+
         for num_frame in range(len(mdi_model.bounds.aabbs)):
 
-            mdx_frame = MDIToModel._to_mdx_frame(mdi_model, num_frame)
+            mdx_frame = MDIToModel._to_mdx_frame(mdi_model, num_frame,
+                                                 bone_frames_compressed)
             mdx_model.frames.append(mdx_frame)
 
         # mdx bone infos
@@ -425,16 +468,22 @@ class MDIToModel:
             mdx_bone_info = MDIToModel._to_mdx_bone_info(mdi_model, num_bone)
             mdx_model.bone_infos.append(mdx_bone_info)
 
+        surfaces_bone_refs, tags_bone_refs = \
+            MDIToModel._calc_bone_refs(mdi_model)
+
         # mdm surfaces
         for num_surface in range(len(mdi_model.surfaces)):
 
-            mdm_surface = MDIToModel._to_mdm_surface(mdi_model, num_surface)
+            mdm_surface = \
+                MDIToModel._to_mdm_surface(mdi_model, num_surface,
+                                           surfaces_bone_refs[num_surface])
             mdm_model.surfaces.append(mdm_surface)
 
         # mdm tags
         for num_tag in range(len(mdi_model.tags)):
 
-            mdm_tag = MDIToModel._to_mdm_tag(mdi_model, num_tag)
+            mdm_tag = MDIToModel._to_mdm_tag(mdi_model, num_tag,
+                                             tags_bone_refs[num_tag])
             mdm_model.tags.append(mdm_tag)
 
         # headers
@@ -483,13 +532,13 @@ class ModelToMDI:
             mdx_frame_info = mdx_frame.frame_info
 
             # aabb
-            min_bound = mathutils.Vector(mdx_frame_info.min_bound)
-            max_bound = mathutils.Vector(mdx_frame_info.max_bound)
+            min_bound = math_backend_m.Vector(mdx_frame_info.min_bound)
+            max_bound = math_backend_m.Vector(mdx_frame_info.max_bound)
             mdi_aabb = mdi_m.MDIAABB(min_bound, max_bound)
             mdi_bounds.aabbs.append(mdi_aabb)
 
             # sphere
-            origin = mathutils.Vector(mdx_frame_info.local_origin)
+            origin = math_backend_m.Vector(mdx_frame_info.local_origin)
             radius = mdx_frame_info.radius
             mdi_bounding_sphere = mdi_m.MDIBoundingSphere(origin, radius)
             mdi_bounds.spheres.append(mdi_bounding_sphere)
@@ -506,7 +555,7 @@ class ModelToMDI:
         mdi_bone_tag_off.name = mdi_util_m.from_c_string_padded(mdm_tag.name)
         mdi_bone_tag_off.parent_bone = mdm_tag.parent_bone
 
-        mdi_bone_tag_off.location = mathutils.Vector(mdm_tag.location)
+        mdi_bone_tag_off.location = math_backend_m.Vector(mdm_tag.location)
 
         mdi_bone_tag_off.orientation = \
             mdi_util_m.tuple_to_matrix(mdm_tag.orientation)
@@ -555,7 +604,7 @@ class ModelToMDI:
                     pitch = (pitch >> 4) * scale
 
                     location_dir = mdi_util_m.rotate_forward_vector(yaw, pitch)
-                    location_dir = mathutils.Vector(location_dir)
+                    location_dir = math_backend_m.Vector(location_dir)
 
                     # parent_dist
                     parent_dist = mdx_bone_info.parent_dist
@@ -573,8 +622,8 @@ class ModelToMDI:
 
                     mdx_frame_info = mdx_frame.frame_info
 
-                    location = \
-                        mathutils.Vector(mdx_frame_info.root_bone_location)
+                    location = math_backend_m.Vector(
+                        mdx_frame_info.root_bone_location)
                     mdi_bone.locations.append(location)
 
             # bone orientations
@@ -644,23 +693,42 @@ class ModelToMDI:
         return mdi_triangle
 
     @staticmethod
-    def _to_mdi_rigged_vertex(mdm_model, num_surface, num_vertex):
+    def _to_mdi_vertex_weights(mdm_model, num_surface):
 
-        mdi_rigged_vertex = mdi_m.MDIRiggedVertex()
+        mdm_vertices = mdm_model.surfaces[num_surface].vertices
 
-        mdm_vertex = mdm_model.surfaces[num_surface].vertices[num_vertex]
+        mdm_weights = list(itertools.chain.from_iterable(
+            mdm_vertex.weights for mdm_vertex in mdm_vertices))
+        num_weights = len(mdm_weights)
 
-        mdi_rigged_vertex.normal = mathutils.Vector(mdm_vertex.normal)
+        parent_bones = \
+            np.fromiter((mdm_weight.bone_index for mdm_weight in mdm_weights),
+                        dtype=np.int64, count=num_weights)
+        weight_values = \
+            np.fromiter((mdm_weight.bone_weight for mdm_weight in mdm_weights),
+                        dtype=np.float32, count=num_weights)
+        locations = \
+            np.fromiter(itertools.chain.from_iterable(
+                            mdm_weight.location for mdm_weight in mdm_weights),
+                        dtype=np.float32, count=3 * num_weights)
 
-        for mdm_weight in mdm_vertex.weights:
+        mdi_vertex_weights = \
+            mdi_m.MDIVertexWeights.from_counts(
+                (len(mdm_vertex.weights) for mdm_vertex in mdm_vertices),
+                parent_bones, weight_values, locations)
 
-            mdi_vertex_weight = mdi_m.MDIVertexWeight()
+        return mdi_vertex_weights
 
-            mdi_vertex_weight.parent_bone = mdm_weight.bone_index
-            mdi_vertex_weight.weight_value = mdm_weight.bone_weight
-            mdi_vertex_weight.location = mathutils.Vector(mdm_weight.location)
+    @staticmethod
+    def _to_mdi_rigged_vertex(mdm_model, num_surface, num_vertex,
+                              mdi_vertex_weights):
 
-            mdi_rigged_vertex.weights.append(mdi_vertex_weight)
+        mdm_vertex = mdm_model.surfaces[num_surface].vertices[num_vertex]
+
+        normal = math_backend_m.Vector(mdm_vertex.normal)
+        mdi_rigged_vertex = \
+            mdi_m.MDIRiggedVertex(normal, vertex_weights = mdi_vertex_weights,
+                                  num_vertex = num_vertex)
 
         return mdi_rigged_vertex
 
@@ -676,12 +744,16 @@ class ModelToMDI:
             mdi_util_m.from_c_string_padded(mdm_surface.header.name)
 
         # mdi vertices
+        mdi_vertex_weights = \
+            ModelToMDI._to_mdi_vertex_weights(mdm_model, num_surface)
+
         for num_vertex in range(len(mdm_surface.vertices)):
 
             mdi_rigged_vertex = \
                 ModelToMDI._to_mdi_rigged_vertex(mdm_model,
                                                  num_surface,
-                                                 num_vertex)
+                                                 num_vertex,
+                                                 mdi_vertex_weights)
             mdi_surface.vertices.append(mdi_rigged_vertex)
 
         # mdi triangles
@@ -702,14 +774,41 @@ class ModelToMDI:
         return mdi_surface
 
     @staticmethod
-    def convert(mdx_model, mdm_model, root_frame = 0):
-        """Converts MDM/MDX to MDI.
+    def convert_skeleton(mdx_model):
+        """Converts the MDX part, which is independent of MDM.
 
         Args:
 
             mdx_model (MDX): MDX model.
+
+        Returns:
+
+            mdi_skeleton (MDISkeleton): skeleton.
+            mdi_bounds (MDIBoundingVolume): bounding volume.
+        """
+
+        timer = timer_m.Timer()
+        reporter_m.debug("Converting MDX skeleton ...")
+
+        mdi_skeleton = ModelToMDI._to_mdi_skeleton(mdx_model)
+        mdi_bounds = ModelToMDI._to_mdi_bounds(mdx_model)
+
+        time = timer.time()
+        reporter_m.debug("Converting MDX skeleton DONE (time={})".format(time))
+
+        return (mdi_skeleton, mdi_bounds)
+
+    @staticmethod
+    def convert(mdx_model, mdm_model, root_frame = 0, skeleton = None):
+        """Converts MDM/MDX to MDI.
+
+        Args:
+
+            mdx_model (MDX): MDX model. Can be None if skeleton is given.
             mdm_model (MDM): MDM model.
             root_frame (int): bind pose frame.
+            skeleton (tuple): already converted skeleton and bounds of the
+                MDX model, see convert_skeleton.
 
         Returns:
 
@@ -723,7 +822,13 @@ class ModelToMDI:
 
         mdi_model.name = mdi_util_m.from_c_string_padded(mdm_model.header.name)
 
-        if root_frame >= mdx_model.header.num_frames:
+        if skeleton:
+            mdi_skeleton, mdi_bounds = skeleton
+        else:
+            mdi_skeleton, mdi_bounds = \
+                ModelToMDI.convert_skeleton(mdx_model)
+
+        if root_frame >= len(mdi_bounds.aabbs):
 
             reporter_m.warning("Given bind pose frame '{}' out of range."
                                " Defaulting to '0'"
@@ -741,7 +846,7 @@ class ModelToMDI:
             mdi_model.surfaces.append(mdi_surface)
 
         # mdi skeleton
-        mdi_model.skeleton = ModelToMDI._to_mdi_skeleton(mdx_model)
+        mdi_model.skeleton = mdi_skeleton
 
         # mdi tags
         for num_tag in range(len(mdm_model.tags)):
@@ -750,7 +855,7 @@ class ModelToMDI:
             mdi_model.tags.append(mdi_tag)
 
         # mdi bounding volume
-        mdi_model.bounds = ModelToMDI._to_mdi_bounds(mdx_model)
+        mdi_model.bounds = mdi_bounds
 
         # mdi lod
         mdi_model.lod = ModelToMDI._to_mdi_lod(mdm_model)
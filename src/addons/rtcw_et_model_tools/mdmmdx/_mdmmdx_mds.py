@@ -0,0 +1,330 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8-80 compliant>
+
+"""Converts the in-memory representation of MDS directly to MDM/MDX.
+
+Notes:
+
+    MDS stores in a single file what MDM and MDX split into two. Bone infos,
+    frame infos and compressed bone frames share the same encoding in both
+    formats, as do vertex weights, texture coordinates, collapse maps and bone
+    references. These are copied instead of being decoded to MDI and encoded
+    again, which is faster and does not add quantization error.
+
+    Only the data which genuinely differs is recalculated: file offsets and
+    MDM tags, which are given relative to their parent bone.
+
+    Bones which are actually tags keep their flag, since MDX marks them the
+    same way MDS does.
+"""
+
+import rtcw_et_model_tools.mdmmdx._mdm as mdm_m
+import rtcw_et_model_tools.mdmmdx._mdx as mdx_m
+import rtcw_et_model_tools.mdi.util as mdi_util_m
+import rtcw_et_model_tools.common.timer as timer_m
+import rtcw_et_model_tools.common.reporter as reporter_m
+
+
+class MDSToModel:
+    """MDS to MDM/MDX conversion.
+    """
+
+    # same name as given by MDS to MDI conversion
+    skeleton_name = "mds_skeleton"
+
+    @staticmethod
+    def _calc_mdmmdx_headers(mdx_model, mdm_model, mds_model):
+
+        # mdx_model.header
+        ident = mdx_m.MDXHeader.ident
+        version = mdx_m.MDXHeader.version
+        name = mdi_util_m.to_c_string_padded(MDSToModel.skeleton_name,
+                                             mdx_m.MDXHeader.name_len)
+        num_frames = len(mdx_model.frames)
+        num_bones = len(mdx_model.bone_infos)
+        ofs_frames = 0 + mdx_m.MDXHeader.format_size
+        ofs_bone_infos = ofs_frames + num_frames * \
+            (mdx_m.MDXFrameInfo.format_size + \
+            num_bones * mdx_m.MDXBoneFrameCompressed.format_size)
+        torso_parent_bone = mds_model.header.torso_parent_bone
+        ofs_end = ofs_bone_infos + num_bones * mdx_m.MDXBoneInfo.format_size
+
+        mdx_model.header = mdx_m.MDXHeader(ident, version, name, num_frames,
+                                           num_bones, ofs_frames,
+                                           ofs_bone_infos, torso_parent_bone,
+                                           ofs_end)
+
+        # mdm_model.header
+        ident = mdm_m.MDMHeader.ident
+        version = mdm_m.MDMHeader.version
+        name = mds_model.header.name
+        lod_scale = mds_model.header.lod_scale
+        lod_bias = mds_model.header.lod_bias
+        num_surfaces = len(mdm_model.surfaces)
+        ofs_surfaces = 0 + mdm_m.MDMHeader.format_size
+        num_tags = len(mdm_model.tags)
+        ofs_tags = None  # calculated later
+        ofs_end = None  # calculated later
+
+        mdm_model.header = mdm_m.MDMHeader(ident, version, name, lod_scale,
+                                           lod_bias, num_surfaces,
+                                           ofs_surfaces, num_tags, ofs_tags,
+                                           ofs_end)
+
+        # mdm_surface.header
+        cur_ofs_header = -mdm_m.MDMHeader.format_size # used for ofs_header
+
+        for num_surface, mdm_surface in enumerate(mdm_model.surfaces):
+
+            mds_surface_header = mds_model.surfaces[num_surface].header
+
+            # calc num weights first
+            num_weights = 0
+            for mdm_vertex in mdm_surface.vertices:
+                num_weights = num_weights + len(mdm_vertex.weights)
+
+            ident = mdm_m.MDMSurfaceHeader.ident
+            name = mds_surface_header.name
+            shader = mds_surface_header.shader
+            shader_index = mdm_m.MDMSurfaceHeader.shader_index
+            min_lod = mds_surface_header.min_lod
+            ofs_header = cur_ofs_header
+            num_vertices = len(mdm_surface.vertices)
+            ofs_vertices = 0 + mdm_m.MDMSurfaceHeader.format_size
+            num_triangles = len(mdm_surface.triangles)
+            ofs_triangles = ofs_vertices + \
+                num_vertices * mdm_m.MDMVertex.format_size + \
+                num_weights * mdm_m.MDMWeight.format_size
+            ofs_collapse_map = ofs_triangles + \
+                num_triangles * mdm_m.MDMTriangle.format_size
+            num_bone_refs = len(mdm_surface.bone_refs.bone_refs)
+            ofs_bone_refs = ofs_collapse_map + num_vertices * 4
+            ofs_end = ofs_bone_refs + num_bone_refs * 4
+
+            mdm_surface.header = \
+                mdm_m.MDMSurfaceHeader(ident, name, shader, shader_index,
+                                       min_lod, ofs_header, num_vertices,
+                                       ofs_vertices, num_triangles,
+                                       ofs_triangles, ofs_collapse_map,
+                                       num_bone_refs, ofs_bone_refs, ofs_end)
+
+            cur_ofs_header -= ofs_end
+
+        # calc rest of the header
+        surfaces_field_len = 0
+        for mdm_surface in mdm_model.surfaces:
+            surfaces_field_len += mdm_surface.header.ofs_end
+        ofs_tags = ofs_surfaces + surfaces_field_len
+
+        # calc num bone refs first
+        bone_refs_field_len = 0
+        for mdm_tag in mdm_model.tags:
+            bone_refs_field_len = bone_refs_field_len + \
+                                  len(mdm_tag.bone_refs.bone_refs)
+
+        ofs_end = ofs_tags + \
+            (num_tags * mdm_m.MDMTag.format_size + \
+            bone_refs_field_len * 4)
+
+        mdm_model.header.ofs_tags = ofs_tags
+        mdm_model.header.ofs_end = ofs_end
+
+    @staticmethod
+    def _calc_bone_refs(mds_model, parent_bone):
+
+        bone_indices = set()
+
+        bone_index = parent_bone
+        while bone_index != -1:
+
+            bone_indices.add(bone_index)
+            bone_index = mds_model.bone_infos[bone_index].parent_bone
+
+        bone_refs = sorted(bone_indices)
+
+        return bone_refs
+
+    @staticmethod
+    def _to_mdm_tag(mds_model, num_tag):
+
+        mds_tag = mds_model.tags[num_tag]
+
+        name = mds_tag.name
+
+        # the tag is located at its parent bone
+        orientation = (1.0, 0.0, 0.0,
+                       0.0, 1.0, 0.0,
+                       0.0, 0.0, 1.0)
+
+        parent_bone = mds_tag.parent_bone
+
+        location = (0.0, 0.0, 0.0)
+
+        # bone refs
+        bone_refs = MDSToModel._calc_bone_refs(mds_model, parent_bone)
+        num_bone_refs = len(bone_refs)
+        ofs_bone_refs = mdm_m.MDMTag.format_size
+        ofs_end = ofs_bone_refs + num_bone_refs * 4
+
+        mdm_tag = mdm_m.MDMTag(name, orientation, parent_bone, location,
+                               num_bone_refs, ofs_bone_refs, ofs_end)
+        mdm_tag.bone_refs = mdm_m.MDMBoneRefs(bone_refs)
+
+        return mdm_tag
+
+    @staticmethod
+    def _to_mdm_vertex(mds_model, num_surface, num_vertex):
+
+        mds_vertex = mds_model.surfaces[num_surface].vertices[num_vertex]
+
+        # fixed_parent and fixed_dist do not exist in MDM
+        mdm_vertex = mdm_m.MDMVertex(mds_vertex.normal,
+                                     mds_vertex.tex_coords,
+                                     mds_vertex.num_weights)
+
+        for mds_weight in mds_vertex.weights:
+
+            mdm_weight = mdm_m.MDMWeight(mds_weight.bone_index,
+                                         mds_weight.bone_weight,
+                                         mds_weight.location)
+            mdm_vertex.weights.append(mdm_weight)
+
+        return mdm_vertex
+
+    @staticmethod
+    def _to_mdm_surface(mds_model, num_surface):
+
+        mdm_surface = mdm_m.MDMSurface()
+
+        mds_surface = mds_model.surfaces[num_surface]
+
+        # mdm vertices
+        for num_vertex in range(len(mds_surface.vertices)):
+
+            mdm_vertex = MDSToModel._to_mdm_vertex(mds_model, num_surface,
+                                                   num_vertex)
+            mdm_surface.vertices.append(mdm_vertex)
+
+        # mdm triangles
+        for mds_triangle in mds_surface.triangles:
+
+            mdm_triangle = mdm_m.MDMTriangle(mds_triangle.indices)
+            mdm_surface.triangles.append(mdm_triangle)
+
+        # mdm collapse map
+        mdm_surface.collapse_map = \
+            mdm_m.MDMCollapseMap(mds_surface.collapse_map.mappings)
+
+        # mdm bone refs
+        mdm_surface.bone_refs = \
+            mdm_m.MDMBoneRefs(mds_surface.bone_refs.bone_refs)
+
+        return mdm_surface
+
+    @staticmethod
+    def _to_mdx_bone_info(mds_model, num_bone):
+
+        mds_bone_info = mds_model.bone_infos[num_bone]
+
+        mdx_bone_info = mdx_m.MDXBoneInfo(mds_bone_info.name,
+                                          mds_bone_info.parent_bone,
+                                          mds_bone_info.torso_weight,
+                                          mds_bone_info.parent_dist,
+                                          mds_bone_info.flags)
+
+        return mdx_bone_info
+
+    @staticmethod
+    def _to_mdx_frame(mds_model, num_frame):
+
+        mds_frame = mds_model.frames[num_frame]
+
+        mdx_frame = mdx_m.MDXFrame()
+
+        mds_frame_info = mds_frame.frame_info
+        mdx_frame.frame_info = \
+            mdx_m.MDXFrameInfo(mds_frame_info.min_bound,
+                               mds_frame_info.max_bound,
+                               mds_frame_info.local_origin,
+                               mds_frame_info.radius,
+                               mds_frame_info.root_bone_location)
+
+        for mds_bone_frame_compressed in mds_frame.bone_frames_compressed:
+
+            mdx_bone_frame_compressed = \
+                mdx_m.MDXBoneFrameCompressed(
+                    mds_bone_frame_compressed.orientation,
+                    mds_bone_frame_compressed.location_dir)
+            mdx_frame.bone_frames_compressed.append(mdx_bone_frame_compressed)
+
+        return mdx_frame
+
+    @staticmethod
+    def convert(mds_model):
+        """Converts MDS to MDM/MDX.
+
+        Args:
+
+            mds_model (MDS): MDS model.
+
+        Returns:
+
+            mdx_model (MDX): MDX model.
+            mdm_model (MDM): MDM model.
+        """
+
+        timer = timer_m.Timer()
+        reporter_m.info("Converting MDS to MDM/MDX ...")
+
+        mdx_model = mdx_m.MDX()
+        mdm_model = mdm_m.MDM()
+
+        # mdx frames
+        for num_frame in range(len(mds_model.frames)):
+
+            mdx_frame = MDSToModel._to_mdx_frame(mds_model, num_frame)
+            mdx_model.frames.append(mdx_frame)
+
+        # mdx bone infos
+        for num_bone in range(len(mds_model.bone_infos)):
+
+            mdx_bone_info = MDSToModel._to_mdx_bone_info(mds_model, num_bone)
+            mdx_model.bone_infos.append(mdx_bone_info)
+
+        # mdm surfaces
+        for num_surface in range(len(mds_model.surfaces)):
+
+            mdm_surface = MDSToModel._to_mdm_surface(mds_model, num_surface)
+            mdm_model.surfaces.append(mdm_surface)
+
+        # mdm tags
+        for num_tag in range(len(mds_model.tags)):
+
+            mdm_tag = MDSToModel._to_mdm_tag(mds_model, num_tag)
+            mdm_model.tags.append(mdm_tag)
+
+        # headers
+        MDSToModel._calc_mdmmdx_headers(mdx_model, mdm_model, mds_model)
+
+        time = timer.time()
+        reporter_m.info("Converting MDS to MDM/MDX DONE (time={})"
+            .format(time))
+
+        return (mdx_model, mdm_model)
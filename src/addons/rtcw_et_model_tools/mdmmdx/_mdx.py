@@ -40,6 +40,7 @@ Background:
     same file.
 """
 
+import io
 import struct
 
 import rtcw_et_model_tools.common.timer as timer_m
@@ -523,39 +524,72 @@ class MDX:
         """
 
         with open(file_path, 'rb') as file:
+            return MDX.read_file(file, file_path)
 
-            timer = timer_m.Timer()
-            reporter_m.info("Reading MDX file: {} ...".format(file_path))
+    @staticmethod
+    def read_file(file, name=None):
+        """Reads a binary encoded MDX file from a file object, for example a
+        memory buffer.
+
+        Args:
+
+            file (File): binary file object, must be seekable.
+            name (str): name of the file in log messages.
+
+        Returns:
+
+            mdx (MDX): MDX object.
+        """
 
-            mdx = MDX()
+        timer = timer_m.Timer()
+        reporter_m.info("Reading MDX file: {} ...".format(name or "<memory>"))
 
-            # mdx.header
-            file_ofs = 0
-            mdx.header = MDXHeader.read(file, file_ofs)
+        mdx = MDX()
 
-            # mdx.frames
-            file_ofs = mdx.header.ofs_frames
-            for i in range(0, mdx.header.num_frames):
+        # mdx.header
+        file_ofs = 0
+        mdx.header = MDXHeader.read(file, file_ofs)
 
-                mdx_frame = MDXFrame.read(file, file_ofs, mdx.header.num_bones)
-                mdx.frames.append(mdx_frame)
+        # mdx.frames
+        file_ofs = mdx.header.ofs_frames
+        for i in range(0, mdx.header.num_frames):
 
-                file_ofs = file_ofs + MDXFrameInfo.format_size + \
-                    mdx.header.num_bones * MDXBoneFrameCompressed.format_size
+            mdx_frame = MDXFrame.read(file, file_ofs, mdx.header.num_bones)
+            mdx.frames.append(mdx_frame)
 
-            # mdx.bone_infos
-            file_ofs = mdx.header.ofs_bone_infos
-            for i in range(0, mdx.header.num_bones):
+            file_ofs = file_ofs + MDXFrameInfo.format_size + \
+                mdx.header.num_bones * MDXBoneFrameCompressed.format_size
+
+        # mdx.bone_infos
+        file_ofs = mdx.header.ofs_bone_infos
+        for i in range(0, mdx.header.num_bones):
+
+            mdx_bone_info = MDXBoneInfo.read(file, file_ofs)
+            mdx.bone_infos.append(mdx_bone_info)
+
+            file_ofs = file_ofs + MDXBoneInfo.format_size
+
+        time = timer.time()
+        reporter_m.info("Reading MDX file DONE (time={})".format(time))
+
+        return mdx
+
+    @staticmethod
+    def from_bytes(data, name=None):
+        """Reads binary encoded MDX data from memory.
+
+        Args:
 
-                mdx_bone_info = MDXBoneInfo.read(file, file_ofs)
-                mdx.bone_infos.append(mdx_bone_info)
+            data (bytes): content of an MDX file.
+            name (str): name of the file in log messages.
 
-                file_ofs = file_ofs + MDXBoneInfo.format_size
+        Returns:
 
-            time = timer.time()
-            reporter_m.info("Reading MDX file DONE (time={})".format(time))
+            mdx (MDX): MDX object.
+        """
 
-            return mdx
+        with io.BytesIO(data) as file:
+            return MDX.read_file(file, name)
 
     def write(self, file_path):
 
@@ -567,30 +601,58 @@ class MDX:
         """
 
         with open(file_path, 'wb') as file:
+            self.write_file(file, file_path)
+
+    def write_file(self, file, name=None):
+        """Writes MDX object with binary encoding to a file object, for
+        example a memory buffer.
+
+        Args:
+
+            file (File): binary file object, must be seekable.
+            name (str): name of the file in log messages.
+        """
+
+        timer = timer_m.Timer()
+        reporter_m.info("Writing MDM file: {} ...".format(name or "<memory>"))
 
-            timer = timer_m.Timer()
-            reporter_m.info("Writing MDM file: {} ...".format(file_path))
+        # mdx.header
+        file_ofs = 0
+        self.header.write(file, file_ofs)
 
-            # mdx.header
-            file_ofs = 0
-            self.header.write(file, file_ofs)
+        # mdx.frames
+        file_ofs = self.header.ofs_frames
+        for frame in self.frames:
 
-            # mdx.frames
-            file_ofs = self.header.ofs_frames
-            for frame in self.frames:
+            frame.write(file, file_ofs)
 
-                frame.write(file, file_ofs)
+            file_ofs = file_ofs + MDXFrameInfo.format_size + \
+                self.header.num_bones * MDXBoneFrameCompressed.format_size
 
-                file_ofs = file_ofs + MDXFrameInfo.format_size + \
-                    self.header.num_bones * MDXBoneFrameCompressed.format_size
+        # mdx.bone_infos
+        file_ofs = self.header.ofs_bone_infos
+        for mdx_bone_info in self.bone_infos:
 
-            # mdx.bone_infos
-            file_ofs = self.header.ofs_bone_infos
-            for mdx_bone_info in self.bone_infos:
+            mdx_bone_info.write(file, file_ofs)
 
-                mdx_bone_info.write(file, file_ofs)
+            file_ofs = file_ofs + MDXBoneInfo.format_size
+
+        time = timer.time()
+        reporter_m.info("Writing MDX file DONE (time={})".format(time))
+
+    def to_bytes(self, name=None):
+        """Writes MDX object with binary encoding to memory.
+
+        Args:
+
+            name (str): name of the file in log messages.
+
+        Returns:
+
+            data (bytes): content of an MDX file.
+        """
 
-                file_ofs = file_ofs + MDXBoneInfo.format_size
+        with io.BytesIO() as file:
 
-            time = timer.time()
-            reporter_m.info("Writing MDX file DONE (time={})".format(time))
+            self.write_file(file, name)
+            return file.getvalue()
@@ -19,14 +19,160 @@
 # <pep8-80 compliant>
 
 """Facade for MDM and MDX file format.
+
+Notes:
+
+    The converters are imported by the functions using them. Transcoding MDS
+    directly does not go through MDI, so it runs without loading it.
 """
 
+import os
 import pathlib
+import sys
 
 import rtcw_et_model_tools.mdmmdx._mdm as mdm_m
 import rtcw_et_model_tools.mdmmdx._mdx as mdx_m
-import rtcw_et_model_tools.mdmmdx._mdmmdx_mdi as mdmmdx_mdi_m
+import rtcw_et_model_tools.common.cache as cache_m
+import rtcw_et_model_tools.common.reporter as reporter_m
+
+
+# =====================================
+# skeleton cache
+# =====================================
+
+# Many MDM files share the same MDX file. Decoding it is expensive, so the
+# converted skeletons are kept for the lifetime of the process.
+_skeleton_cache = cache_m.LRUCache(max_size = 256 * 1024 * 1024)
+
+def set_skeleton_cache_size(max_size):
+    """Sets the memory bound of the skeleton cache. A bound of 0 disables it.
+
+    Args:
+
+        max_size (int): upper bound in bytes.
+    """
+
+    _skeleton_cache.resize(max_size)
+
+def clear_skeleton_cache():
+    """Removes all skeletons from the cache.
+    """
+
+    _skeleton_cache.clear()
+
+def _skeleton_cache_key(file_path_mdx, bind_frame):
+    """Identifies the content of an MDX file without reading it.
+
+    Returns:
+
+        key (tuple): key or None if the file can not be accessed.
+    """
+
+    try:
+        file_path_mdx = os.path.realpath(file_path_mdx)
+        stat = os.stat(file_path_mdx)
+    except (OSError, TypeError, ValueError):
+        return None
+
+    return (file_path_mdx, stat.st_size, stat.st_mtime_ns, bind_frame)
+
+def _estimate_skeleton_size(mdi_skeleton, mdi_bounds):
+    """Rough number of bytes held by a converted skeleton.
+    """
+
+    num_frames = len(mdi_bounds.aabbs)
+    if num_frames == 0:
+        return 0
+
+    vector = mdi_bounds.aabbs[0].min_bound
+    vector_size = sys.getsizeof(vector) + 4 * len(vector)
+    matrix_size = vector_size * 3
+    pointer_size = 8
+
+    bone_size = num_frames * (vector_size + matrix_size + 2 * pointer_size)
+    frame_size = 3 * vector_size + 2 * 64
+
+    return len(mdi_skeleton.bones) * bone_size + num_frames * frame_size
+
+def _copy_skeleton(mdi_skeleton, mdi_bounds):
+    """Cached skeletons are handed out as copies, since the caller is free to
+    modify them.
+    """
+
+    import rtcw_et_model_tools.mdi.mdi as mdi_m
+
+    mdi_skeleton_copy = mdi_m.MDISkeleton(mdi_skeleton.name,
+                                          mdi_skeleton.torso_parent_bone)
+
+    for mdi_bone in mdi_skeleton.bones:
+
+        locations = [location.copy() for location in mdi_bone.locations]
+        orientations = \
+            [orientation.copy() for orientation in mdi_bone.orientations]
+
+        mdi_bone_copy = mdi_m.MDIBone(mdi_bone.name,
+                                      mdi_bone.parent_bone,
+                                      mdi_bone.parent_dist,
+                                      mdi_bone.torso_weight,
+                                      locations,
+                                      orientations)
+        mdi_skeleton_copy.bones.append(mdi_bone_copy)
+
+    mdi_bounds_copy = mdi_m.MDIBoundingVolume()
+
+    for mdi_aabb in mdi_bounds.aabbs:
 
+        mdi_aabb_copy = mdi_m.MDIAABB(mdi_aabb.min_bound.copy(),
+                                      mdi_aabb.max_bound.copy())
+        mdi_bounds_copy.aabbs.append(mdi_aabb_copy)
+
+    for mdi_sphere in mdi_bounds.spheres:
+
+        mdi_sphere_copy = mdi_m.MDIBoundingSphere(mdi_sphere.origin.copy(),
+                                                  mdi_sphere.radius)
+        mdi_bounds_copy.spheres.append(mdi_sphere_copy)
+
+    return (mdi_skeleton_copy, mdi_bounds_copy)
+
+def _read_skeleton(file_path_mdx, bind_frame):
+    """Reads MDX data from file and converts it, or takes it from the cache.
+
+    Args:
+
+        file_path_mdx (str): path to MDX file.
+        bind_frame (int): bind frame used for skinning.
+
+    Returns:
+
+        skeleton (tuple): MDISkeleton and MDIBoundingVolume.
+    """
+
+    import rtcw_et_model_tools.mdmmdx._mdmmdx_mdi as mdmmdx_mdi_m
+
+    key = _skeleton_cache_key(file_path_mdx, bind_frame)
+
+    skeleton = _skeleton_cache.get(key) if key else None
+    if skeleton:
+
+        reporter_m.debug("Using cached skeleton of '{}'".format(key[0]))
+        return _copy_skeleton(*skeleton)
+
+    mdx_model = mdx_m.MDX.read(file_path_mdx)
+    skeleton = mdmmdx_mdi_m.ModelToMDI.convert_skeleton(mdx_model)
+
+    if key:
+
+        size = _estimate_skeleton_size(*skeleton)
+        _skeleton_cache.put(key, skeleton, size)
+
+        if key in _skeleton_cache:
+            skeleton = _copy_skeleton(*skeleton)
+
+    return skeleton
+
+# =====================================
+# read/write
+# =====================================
 
 def read(file_path_mdm, file_path_mdx, bind_frame, encoding="binary"):
     """Reads MDM/MDX data from file, then converts it to MDI.
@@ -42,13 +188,16 @@ def read(file_path_mdm, file_path_mdx, bind_frame, encoding="binary"):
 
         Can read MDX without MDM. MDM without MDX is not possible.
 
+        Converted MDX data is cached, so reading many MDM files sharing the
+        same MDX file decodes it only once.
+
     Returns:
 
         mdi_model (MDI): converted MDM/MDX data as MDI.
     """
 
     if encoding == "binary":
-        mdx_model = mdx_m.MDX.read(file_path_mdx)
+        skeleton = _read_skeleton(file_path_mdx, bind_frame)
         if file_path_mdm:
             mdm_model = mdm_m.MDM.read(file_path_mdm)
         else:
@@ -62,18 +211,66 @@ def read(file_path_mdm, file_path_mdx, bind_frame, encoding="binary"):
             "Encoding option '{}' not supported".format(encoding)
         raise Exception(exception_string)
 
-    mdi_model = \
-        mdmmdx_mdi_m.ModelToMDI.convert(mdx_model, mdm_model, bind_frame)
+    name = pathlib.Path(file_path_mdm).name if file_path_mdm else None
+    return _to_mdi(mdm_model, name, bind_frame, skeleton)
+
+
+def read_bytes(data_mdm, data_mdx, bind_frame, name=None, encoding="binary"):
+    """Reads MDM/MDX data from memory, then converts it to MDI.
+
+    Args:
+
+        data_mdm (bytes): content of an MDM file, None to read MDX only.
+        data_mdx (bytes): content of an MDX file.
+        bind_frame (int): bind frame used for skinning.
+        name (str): name of the model if the MDM data has none, and name in
+            log messages.
+        encoding (str): encoding to use for MDM/MDX.
+
+    Notes:
+
+        Converted MDX data is not cached, the cache is keyed by file.
+
+    Returns:
+
+        mdi_model (MDI): converted MDM/MDX data as MDI.
+    """
+
+    if encoding != "binary":
+        exception_string = \
+            "Encoding option '{}' not supported".format(encoding)
+        raise Exception(exception_string)
+
+    import rtcw_et_model_tools.mdmmdx._mdmmdx_mdi as mdmmdx_mdi_m
+
+    mdx_model = mdx_m.MDX.from_bytes(data_mdx, name)
+    skeleton = mdmmdx_mdi_m.ModelToMDI.convert_skeleton(mdx_model)
+    if data_mdm:
+        mdm_model = mdm_m.MDM.from_bytes(data_mdm, name)
+    else:
+        mdm_model = None
+
+    return _to_mdi(mdm_model, name, bind_frame, skeleton)
+
+
+def _to_mdi(mdm_model, name, bind_frame, skeleton):
+
+    import rtcw_et_model_tools.mdmmdx._mdmmdx_mdi as mdmmdx_mdi_m
+
+    mdi_model = mdmmdx_mdi_m.ModelToMDI.convert(None, mdm_model, bind_frame,
+                                                skeleton)
 
     # TODO this shouldn't be here
-    if not mdi_model.name:
-        mdi_model.name = pathlib.Path(file_path_mdm).name
+    if not mdi_model.name and name:
+        mdi_model.name = name
+
+    mdi_model.compact_static_frames()
 
     return mdi_model
 
 
 def write(mdi_model, file_path_mdm, file_path_mdx, collapse_frame,
-          encoding="binary"):
+          encoding="binary", pk3_writer=None):
     """Converts MDI data to MDM/MDX, then writes it back to file.
 
     Args:
@@ -81,15 +278,22 @@ def write(mdi_model, file_path_mdm, file_path_mdx, collapse_frame,
         file_path_mdm (str): path to which MDM data is written to.
         file_path_mdx (str): path to which MDX data is written to.
         encoding (str): encoding to use for MDS.
+        pk3_writer (PK3Writer): pk3 file the MDM/MDX data is added to, None
+            to write to files. If given, the file paths are member names.
     """
 
+    import rtcw_et_model_tools.mdmmdx._mdmmdx_mdi as mdmmdx_mdi_m
+
     mdx_model, mdm_model = mdmmdx_mdi_m.MDIToModel.convert(mdi_model,
                                                            collapse_frame)
 
     if encoding == "binary":
-        mdx_model.write(file_path_mdx)
-        mdm_model.write(file_path_mdm)
-        pass
+        if pk3_writer:
+            pk3_writer.add_file(file_path_mdx, mdx_model.write_file)
+            pk3_writer.add_file(file_path_mdm, mdm_model.write_file)
+        else:
+            mdx_model.write(file_path_mdx)
+            mdm_model.write(file_path_mdm)
     elif encoding == "xml":
         pass  # TODO
     elif encoding == "json":
@@ -98,3 +302,96 @@ def write(mdi_model, file_path_mdm, file_path_mdx, collapse_frame,
         exception_string = \
             "Encoding option '{}' not supported".format(encoding)
         raise Exception(exception_string)
+
+
+def write_bytes(mdi_model, collapse_frame, encoding="binary"):
+    """Converts MDI data to MDM/MDX, then writes it to memory.
+
+    Args:
+        mdi_model (MDI): model definition interchange format.
+        collapse_frame (int): frame used for the collapse map.
+        encoding (str): encoding to use for MDM/MDX.
+
+    Returns:
+
+        data_mdm (bytes): content of an MDM file.
+        data_mdx (bytes): content of an MDX file.
+    """
+
+    if encoding != "binary":
+        exception_string = \
+            "Encoding option '{}' not supported".format(encoding)
+        raise Exception(exception_string)
+
+    import rtcw_et_model_tools.mdmmdx._mdmmdx_mdi as mdmmdx_mdi_m
+
+    mdx_model, mdm_model = mdmmdx_mdi_m.MDIToModel.convert(mdi_model,
+                                                           collapse_frame)
+
+    return (mdm_model.to_bytes(mdi_model.name),
+            mdx_model.to_bytes(mdi_model.name))
+
+
+def transcode_mds(file_path_mds, file_path_mdm, file_path_mdx,
+                  encoding="binary"):
+    """Reads MDS data from file, converts it directly to MDM/MDX without going
+    through MDI, then writes it back to file.
+
+    Args:
+
+        file_path_mds (str): path to MDS file.
+        file_path_mdm (str): path to which MDM data is written to.
+        file_path_mdx (str): path to which MDX data is written to.
+        encoding (str): encoding to use for MDS and MDM/MDX.
+
+    Notes:
+
+        Animation data is copied as is, so the conversion is lossless. See
+        _mdmmdx_mds for details.
+    """
+
+    if encoding != "binary":
+        exception_string = \
+            "Encoding option '{}' not supported".format(encoding)
+        raise Exception(exception_string)
+
+    import rtcw_et_model_tools.mds._mds as mds_m
+    import rtcw_et_model_tools.mdmmdx._mdmmdx_mds as mdmmdx_mds_m
+
+    mds_model = mds_m.MDS.read(file_path_mds)
+
+    mdx_model, mdm_model = mdmmdx_mds_m.MDSToModel.convert(mds_model)
+
+    mdx_model.write(file_path_mdx)
+    mdm_model.write(file_path_mdm)
+
+
+def transcode_mds_bytes(data_mds, name=None, encoding="binary"):
+    """Reads MDS data from memory, converts it directly to MDM/MDX without
+    going through MDI, then writes it to memory.
+
+    Args:
+
+        data_mds (bytes): content of an MDS file.
+        name (str): name in log messages.
+        encoding (str): encoding to use for MDS and MDM/MDX.
+
+    Returns:
+
+        data_mdm (bytes): content of an MDM file.
+        data_mdx (bytes): content of an MDX file.
+    """
+
+    if encoding != "binary":
+        exception_string = \
+            "Encoding option '{}' not supported".format(encoding)
+        raise Exception(exception_string)
+
+    import rtcw_et_model_tools.mds._mds as mds_m
+    import rtcw_et_model_tools.mdmmdx._mdmmdx_mds as mdmmdx_mds_m
+
+    mds_model = mds_m.MDS.from_bytes(data_mds, name)
+
+    mdx_model, mdm_model = mdmmdx_mds_m.MDSToModel.convert(mds_model)
+
+    return (mdm_model.to_bytes(name), mdx_model.to_bytes(name))
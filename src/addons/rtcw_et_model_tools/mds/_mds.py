@@ -57,6 +57,7 @@ Background:
     Tags provide the possibility to attach external models to the model.
 """
 
+import io
 import struct
 
 import rtcw_et_model_tools.common.timer as timer_m
@@ -1337,57 +1338,90 @@ class MDS:
         """
 
         with open(file_path, 'rb') as file:
+            return MDS.read_file(file, file_path)
 
-            timer = timer_m.Timer()
-            reporter_m.info("Reading MDS file: {} ...".format(file_path))
+    @staticmethod
+    def read_file(file, name=None):
+        """Reads a binary encoded MDS file from a file object, for example a
+        memory buffer.
+
+        Args:
+
+            file (File): binary file object, must be seekable.
+            name (str): name of the file in log messages.
+
+        Returns:
+
+            mds (MDS): MDS object.
+        """
+
+        timer = timer_m.Timer()
+        reporter_m.info("Reading MDS file: {} ...".format(name or "<memory>"))
 
-            mds = MDS()
+        mds = MDS()
 
-            # mds.header
-            file_ofs = 0
-            mds.header = MDSHeader.read(file, file_ofs)
+        # mds.header
+        file_ofs = 0
+        mds.header = MDSHeader.read(file, file_ofs)
 
-            # mds.frames
-            file_ofs = mds.header.ofs_frames
-            for i in range(0, mds.header.num_frames):
+        # mds.frames
+        file_ofs = mds.header.ofs_frames
+        for i in range(0, mds.header.num_frames):
 
-                mds_frame = MDSFrame.read(file, file_ofs, mds.header.num_bones)
-                mds.frames.append(mds_frame)
+            mds_frame = MDSFrame.read(file, file_ofs, mds.header.num_bones)
+            mds.frames.append(mds_frame)
 
-                file_ofs = file_ofs + MDSFrameInfo.format_size + \
-                    mds.header.num_bones * MDSBoneFrameCompressed.format_size
+            file_ofs = file_ofs + MDSFrameInfo.format_size + \
+                mds.header.num_bones * MDSBoneFrameCompressed.format_size
 
-            # mds.bone_infos
-            file_ofs = mds.header.ofs_bone_infos
-            for i in range(0, mds.header.num_bones):
+        # mds.bone_infos
+        file_ofs = mds.header.ofs_bone_infos
+        for i in range(0, mds.header.num_bones):
 
-                mds_bone_info = MDSBoneInfo.read(file, file_ofs)
-                mds.bone_infos.append(mds_bone_info)
+            mds_bone_info = MDSBoneInfo.read(file, file_ofs)
+            mds.bone_infos.append(mds_bone_info)
 
-                file_ofs = file_ofs + MDSBoneInfo.format_size
+            file_ofs = file_ofs + MDSBoneInfo.format_size
 
-            # mds.surfaces
-            file_ofs = mds.header.ofs_surfaces
-            for i in range(0, mds.header.num_surfaces):
+        # mds.surfaces
+        file_ofs = mds.header.ofs_surfaces
+        for i in range(0, mds.header.num_surfaces):
 
-                mds_surface = MDSSurface.read(file, file_ofs)
-                mds.surfaces.append(mds_surface)
+            mds_surface = MDSSurface.read(file, file_ofs)
+            mds.surfaces.append(mds_surface)
 
-                file_ofs = file_ofs + mds_surface.header.ofs_end
+            file_ofs = file_ofs + mds_surface.header.ofs_end
 
-            # mds.tags
-            file_ofs = mds.header.ofs_tags
-            for i in range(0, mds.header.num_tags):
+        # mds.tags
+        file_ofs = mds.header.ofs_tags
+        for i in range(0, mds.header.num_tags):
 
-                mds_tag = MDSTag.read(file, file_ofs)
-                mds.tags.append(mds_tag)
+            mds_tag = MDSTag.read(file, file_ofs)
+            mds.tags.append(mds_tag)
 
-                file_ofs = file_ofs + MDSTag.format_size
+            file_ofs = file_ofs + MDSTag.format_size
 
-            time = timer.time()
-            reporter_m.info("Reading MDS file DONE (time={})".format(time))
+        time = timer.time()
+        reporter_m.info("Reading MDS file DONE (time={})".format(time))
 
-            return mds
+        return mds
+
+    @staticmethod
+    def from_bytes(data, name=None):
+        """Reads binary encoded MDS data from memory.
+
+        Args:
+
+            data (bytes): content of an MDS file.
+            name (str): name of the file in log messages.
+
+        Returns:
+
+            mds (MDS): MDS object.
+        """
+
+        with io.BytesIO(data) as file:
+            return MDS.read_file(file, name)
 
     def write(self, file_path):
         """Writes MDS object to file with binary encoding.
@@ -1398,46 +1432,74 @@ class MDS:
         """
 
         with open(file_path, 'wb') as file:
+            self.write_file(file, file_path)
+
+    def write_file(self, file, name=None):
+        """Writes MDS object with binary encoding to a file object, for
+        example a memory buffer.
+
+        Args:
+
+            file (File): binary file object, must be seekable.
+            name (str): name of the file in log messages.
+        """
+
+        timer = timer_m.Timer()
+        reporter_m.info("Writing MDS file: {} ...".format(name or "<memory>"))
+
+        # mds.header
+        file_ofs = 0
+        self.header.write(file, file_ofs)
+
+        # mds.frames
+        file_ofs = self.header.ofs_frames
+        for frame in self.frames:
+
+            frame.write(file, file_ofs)
 
-            timer = timer_m.Timer()
-            reporter_m.info("Writing MDS file: {} ...".format(file_path))
+            file_ofs = file_ofs + MDSFrameInfo.format_size + \
+                self.header.num_bones * MDSBoneFrameCompressed.format_size
 
-            # mds.header
-            file_ofs = 0
-            self.header.write(file, file_ofs)
+        # mds.bone_infos
+        file_ofs = self.header.ofs_bone_infos
+        for mds_bone_info in self.bone_infos:
 
-            # mds.frames
-            file_ofs = self.header.ofs_frames
-            for frame in self.frames:
+            mds_bone_info.write(file, file_ofs)
 
-                frame.write(file, file_ofs)
+            file_ofs = file_ofs + MDSBoneInfo.format_size
 
-                file_ofs = file_ofs + MDSFrameInfo.format_size + \
-                    self.header.num_bones * MDSBoneFrameCompressed.format_size
+        # mds.surfaces
+        file_ofs = self.header.ofs_surfaces
+        for surface in self.surfaces:
 
-            # mds.bone_infos
-            file_ofs = self.header.ofs_bone_infos
-            for mds_bone_info in self.bone_infos:
+            surface.write(file, file_ofs)
 
-                mds_bone_info.write(file, file_ofs)
+            file_ofs = file_ofs + surface.header.ofs_end
 
-                file_ofs = file_ofs + MDSBoneInfo.format_size
+        # mds.tags
+        file_ofs = self.header.ofs_tags
+        for tag in self.tags:
 
-            # mds.surfaces
-            file_ofs = self.header.ofs_surfaces
-            for surface in self.surfaces:
+            tag.write(file, file_ofs)
 
-                surface.write(file, file_ofs)
+            file_ofs = file_ofs + MDSTag.format_size
 
-                file_ofs = file_ofs + surface.header.ofs_end
+        time = timer.time()
+        reporter_m.info("Writing MDS file DONE (time={})".format(time))
 
-            # mds.tags
-            file_ofs = self.header.ofs_tags
-            for tag in self.tags:
+    def to_bytes(self, name=None):
+        """Writes MDS object with binary encoding to memory.
+
+        Args:
 
-                tag.write(file, file_ofs)
+            name (str): name of the file in log messages.
+
+        Returns:
+
+            data (bytes): content of an MDS file.
+        """
 
-                file_ofs = file_ofs + MDSTag.format_size
+        with io.BytesIO() as file:
 
-            time = timer.time()
-            reporter_m.info("Writing MDS file DONE (time={})".format(time))
+            self.write_file(file, name)
+            return file.getvalue()
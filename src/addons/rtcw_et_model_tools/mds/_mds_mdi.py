@@ -21,11 +21,14 @@
 """Converts between in-memory representations of MDS and MDI.
 """
 
-import mathutils
+import itertools
+
+import numpy as np
 
 import rtcw_et_model_tools.mds._mds as mds_m
 import rtcw_et_model_tools.mdi.mdi as mdi_m
 import rtcw_et_model_tools.mdi.util as mdi_util_m
+import rtcw_et_model_tools.common.math_backend as math_backend_m
 import rtcw_et_model_tools.common.timer as timer_m
 import rtcw_et_model_tools.common.reporter as reporter_m
 
@@ -143,11 +146,19 @@ class MDIToModel:
         return mds_tag
 
     @staticmethod
-    def _to_mds_bone_refs(mdi_model, num_surface):
+    def _calc_bone_refs(mdi_model):
+        """Calculates bone references of all surfaces at once."""
 
-        mdi_surface = mdi_model.surfaces[num_surface]
+        bone_indices = [mdi_surface.calc_bone_indices()
+                        for mdi_surface in mdi_model.surfaces]
+
+        surfaces_bone_refs = mdi_model.skeleton.calc_bone_refs(bone_indices)
+
+        return surfaces_bone_refs
+
+    @staticmethod
+    def _to_mds_bone_refs(bone_refs):
 
-        bone_refs = mdi_surface.calc_bone_refs(mdi_model.skeleton)
         mds_bone_refs = mds_m.MDSBoneRefs(bone_refs)
 
         return mds_bone_refs
@@ -175,21 +186,25 @@ class MDIToModel:
         return mds_triangle
 
     @staticmethod
-    def _to_mds_weight(mdi_model, num_surface, num_vertex, num_weight):
+    def _to_mds_weights(mdi_vertex_weights):
+        """Returns the weights of all vertices of a surface in vertex order.
+        """
 
-        mdi_rigged_vertex = \
-            mdi_model.surfaces[num_surface].vertices[num_vertex]
-        mdi_vertex_weight = mdi_rigged_vertex.weights[num_weight]
+        mds_weights = []
+
+        for bone_index, bone_weight, location in \
+            zip(mdi_vertex_weights.parent_bones.tolist(),
+                mdi_vertex_weights.weight_values.tolist(),
+                mdi_vertex_weights.locations.tolist()):
 
-        bone_index = mdi_vertex_weight.parent_bone
-        bone_weight = mdi_vertex_weight.weight_value
-        location = mdi_vertex_weight.location.to_tuple()
-        mds_weight = mds_m.MDSWeight(bone_index, bone_weight, location)
+            mds_weight = mds_m.MDSWeight(bone_index, bone_weight,
+                                        tuple(location))
+            mds_weights.append(mds_weight)
 
-        return mds_weight
+        return mds_weights
 
     @staticmethod
-    def _to_mds_vertex(mdi_model, num_surface, num_vertex):
+    def _to_mds_vertex(mdi_model, num_surface, num_vertex, mds_weights):
 
         mdi_rigged_vertex = \
             mdi_model.surfaces[num_surface].vertices[num_vertex]
@@ -206,29 +221,30 @@ class MDIToModel:
                                      fixed_parent, fixed_dist)
 
         # weights
-        for num_weight in range(len(mdi_rigged_vertex.weights)):
-
-            mds_weight = \
-                MDIToModel._to_mds_weight(mdi_model, num_surface, num_vertex,
-                                          num_weight)
-            mds_vertex.weights.append(mds_weight)
-
+        mds_vertex.weights = mds_weights
         mds_vertex.num_weights = len(mds_vertex.weights)
 
         return mds_vertex
 
     @staticmethod
-    def _to_mds_surface(mdi_model, num_surface):
+    def _to_mds_surface(mdi_model, num_surface, bone_refs):
 
         mds_surface = mds_m.MDSSurface()
 
         mdi_surface = mdi_model.surfaces[num_surface]
 
         # mds vertices
+        mdi_vertex_weights = mdi_surface.calc_vertex_weights()
+        mds_weights = MDIToModel._to_mds_weights(mdi_vertex_weights)
+        offsets = mdi_vertex_weights.offsets.tolist()
+
         for num_vertex in range(len(mdi_surface.vertices)):
 
+            mds_weights_vertex = \
+                mds_weights[offsets[num_vertex]:offsets[num_vertex + 1]]
             mds_vertex = MDIToModel._to_mds_vertex(mdi_model, num_surface,
-                                                   num_vertex)
+                                                   num_vertex,
+                                                   mds_weights_vertex)
             mds_surface.vertices.append(mds_vertex)
 
         # mds triangles
@@ -243,8 +259,7 @@ class MDIToModel:
             MDIToModel._to_mds_collapse_map(mdi_model, num_surface)
 
         # mds bone refs
-        mds_surface.bone_refs = \
-            MDIToModel._to_mds_bone_refs(mdi_model, num_surface)
+        mds_surface.bone_refs = MDIToModel._to_mds_bone_refs(bone_refs)
 
         return mds_surface
 
@@ -279,59 +294,77 @@ class MDIToModel:
         return mds_bone_info
 
     @staticmethod
-    def _to_mds_bone_frame_compressed(mdi_model, num_frame, num_bone):
+    def _to_mds_bone_frames_compressed(mdi_model):
+        """Encodes orientation and location of all bones in all frames at once.
 
-        mdi_bone = mdi_model.skeleton.bones[num_bone]
+        Args:
 
-        # orientation
-        orientation = mdi_bone.orientations[num_frame]
+            mdi_model (MDI): MDI model.
 
-        if mdi_bone.name.startswith("tag_"): # TODO add flag tag to mdi?
-            orientation = orientation.transposed()
+        Returns:
 
-        yaw, pitch, roll = mdi_util_m.matrix_to_angles(orientation)
+            bone_frames_compressed (numpy.ndarray): shape (num_frames,
+                num_bones, 6). Index 0-3 = orientation, index 4-5 = location
+                dir, see MDSBoneFrameCompressed.
+        """
 
-        scale = mds_m.MDSBoneFrameCompressed.orientation_scale
-        yaw = int(yaw / scale)
-        pitch = int(pitch / scale)
-        roll = int(roll / scale)
+        mdi_bones = mdi_model.skeleton.bones
 
-        orientation = (pitch, yaw, roll,
-                       mds_m.MDSBoneFrameCompressed.angle_none_default)
+        num_frames = len(mdi_model.bounds.aabbs)
+        num_bones = len(mdi_bones)
 
-        # location dir
-        has_bone_parent = True
-        if mdi_bone.parent_bone < 0:
-            has_bone_parent = False
+        orientations = np.empty((num_bones, num_frames, 3, 3),
+                                dtype=np.float32)
+        locations = np.empty((num_bones, num_frames, 3), dtype=np.float32)
 
-        yaw = 0
-        pitch = 0
+        for num_bone, mdi_bone in enumerate(mdi_bones):
 
-        if has_bone_parent:
+            orientations[num_bone] = \
+                mdi_util_m.matrices_to_array(mdi_bone.orientations, num_frames)
+            locations[num_bone] = \
+                mdi_util_m.vectors_to_array(mdi_bone.locations, num_frames)
 
-            mdi_parent_bone = mdi_model.skeleton.bones[mdi_bone.parent_bone]
+            if mdi_bone.name.startswith("tag_"): # TODO add flag tag to mdi?
+                orientations[num_bone] = \
+                    np.swapaxes(orientations[num_bone], 1, 2)
 
-            location_diff = mdi_bone.locations[num_frame] - \
-                mdi_parent_bone.locations[num_frame]
-            yaw, pitch = mdi_util_m.angles_from_forward_vector \
-                         (
-                            location_diff.normalized()
-                         )
+        bone_frames_compressed = np.zeros((num_frames, num_bones, 6),
+                                          dtype=np.int64)
 
-            scale = mds_m.MDSBoneFrameCompressed.location_dir_scale
-            yaw = int(yaw / scale) << 4
-            pitch = int(pitch / scale) << 4
+        # orientation
+        yaws, pitches, rolls = mdi_util_m.matrices_to_angles(
+            orientations.transpose(1, 0, 2, 3).reshape(-1, 3, 3))
 
-        else:
+        scale = mds_m.MDSBoneFrameCompressed.orientation_scale
+        for index, angles in ((0, pitches), (1, yaws), (2, rolls)):
+
+            bone_frames_compressed[:, :, index] = \
+                np.trunc(angles / scale).reshape(num_frames, num_bones)
 
-            pass  # root bone always is 0, 0
+        bone_frames_compressed[:, :, 3] = \
+            mds_m.MDSBoneFrameCompressed.angle_none_default
 
-        location_dir = (yaw, pitch)
+        # location dir, root bone always is 0, 0
+        parent_bones = np.array([mdi_bone.parent_bone
+                                 for mdi_bone in mdi_bones], dtype=np.int64)
+        has_bone_parent = parent_bones >= 0
+        num_child_bones = int(np.count_nonzero(has_bone_parent))
 
-        mds_bone_frame_compressed = \
-            mds_m.MDSBoneFrameCompressed(orientation, location_dir)
+        location_diffs = locations[has_bone_parent] - \
+            locations[parent_bones[has_bone_parent]]
+        location_diffs = location_diffs.transpose(1, 0, 2).reshape(-1, 3)
 
-        return mds_bone_frame_compressed
+        yaws, pitches = mdi_util_m.angles_from_forward_vectors(
+            mdi_util_m.normalize_array(location_diffs))
+
+        scale = mds_m.MDSBoneFrameCompressed.location_dir_scale
+        for index, angles in ((4, yaws), (5, pitches)):
+
+            angles = np.trunc(angles / scale).astype(np.int64) << 4
+            bone_frames_compressed[:, has_bone_parent, index] = \
+                angles.reshape(num_frames, num_child_bones)
+
+        return bone_frames_compressed
 
     @staticmethod
     def _to_mds_frame_info(mdi_model, num_frame):
@@ -352,18 +385,21 @@ class MDIToModel:
         return mds_frame_info
 
     @staticmethod
-    def _to_mds_frame(mdi_model, num_frame):
+    def _to_mds_frame(mdi_model, num_frame, bone_frames_compressed):
 
         mds_frame = mds_m.MDSFrame()
 
         mds_frame.frame_info = MDIToModel._to_mds_frame_info(mdi_model,
                                                              num_frame)
 
-        for num_bone in range(len(mdi_model.skeleton.bones)):
+        for bone_frame_compressed in \
+            bone_frames_compressed[num_frame].tolist():
+
+            orientation = tuple(bone_frame_compressed[0:4])
+            location_dir = tuple(bone_frame_compressed[4:6])
 
             mds_bone_frame_compressed = \
-                MDIToModel._to_mds_bone_frame_compressed(mdi_model, num_frame,
-                                                         num_bone)
+                mds_m.MDSBoneFrameCompressed(orientation, location_dir)
             mds_frame.bone_frames_compressed.append(mds_bone_frame_compressed)
 
         return mds_frame
@@ -397,9 +433,13 @@ class MDIToModel:
         mdi_model.lod_to_type(mdi_m.MDICollapseMap, collapse_frame)
 
         # mds frames
+        bone_frames_compressed = \
+            MDIToModel._to_mds_bone_frames_compressed(mdi_model)
+
         for num_frame in range(len(mdi_model.bounds.aabbs)):
 
-            mds_frame = MDIToModel._to_mds_frame(mdi_model, num_frame)
+            mds_frame = MDIToModel._to_mds_frame(mdi_model, num_frame,
+                                                 bone_frames_compressed)
             mds_model.frames.append(mds_frame)
 
         # mds bone infos
@@ -409,9 +449,13 @@ class MDIToModel:
             mds_model.bone_infos.append(mds_bone_info)
 
         # mds surfaces
+        surfaces_bone_refs = MDIToModel._calc_bone_refs(mdi_model)
+
         for num_surface in range(len(mdi_model.surfaces)):
 
-            mds_surface = MDIToModel._to_mds_surface(mdi_model, num_surface)
+            mds_surface = \
+                MDIToModel._to_mds_surface(mdi_model, num_surface,
+                                           surfaces_bone_refs[num_surface])
             mds_model.surfaces.append(mds_surface)
 
         # mds tags
@@ -465,13 +509,13 @@ class ModelToMDI:
             mds_frame_info = mds_frame.frame_info
 
             # aabb
-            min_bound = mathutils.Vector(mds_frame_info.min_bound)
-            max_bound = mathutils.Vector(mds_frame_info.max_bound)
+            min_bound = math_backend_m.Vector(mds_frame_info.min_bound)
+            max_bound = math_backend_m.Vector(mds_frame_info.max_bound)
             mdi_aabb = mdi_m.MDIAABB(min_bound, max_bound)
             mdi_bounds.aabbs.append(mdi_aabb)
 
             # sphere
-            origin = mathutils.Vector(mds_frame_info.local_origin)
+            origin = math_backend_m.Vector(mds_frame_info.local_origin)
             radius = mds_frame_info.radius
             mdi_bounding_sphere = mdi_m.MDIBoundingSphere(origin, radius)
             mdi_bounds.spheres.append(mdi_bounding_sphere)
@@ -533,7 +577,7 @@ class ModelToMDI:
                     pitch = (pitch >> 4) * scale
 
                     location_dir = mdi_util_m.rotate_forward_vector(yaw, pitch)
-                    location_dir = mathutils.Vector(location_dir)
+                    location_dir = math_backend_m.Vector(location_dir)
 
                     # parent_dist
                     parent_dist = mds_bone_info.parent_dist
@@ -551,8 +595,8 @@ class ModelToMDI:
 
                     mds_frame_info = mds_frame.frame_info
 
-                    location = \
-                        mathutils.Vector(mds_frame_info.root_bone_location)
+                    location = math_backend_m.Vector(
+                        mds_frame_info.root_bone_location)
                     mdi_bone.locations.append(location)
 
             # bone orientations
@@ -622,23 +666,42 @@ class ModelToMDI:
         return mdi_triangle
 
     @staticmethod
-    def _to_mdi_rigged_vertex(mds_model, num_surface, num_vertex):
+    def _to_mdi_vertex_weights(mds_model, num_surface):
 
-        mdi_rigged_vertex = mdi_m.MDIRiggedVertex()
+        mds_vertices = mds_model.surfaces[num_surface].vertices
 
-        mds_vertex = mds_model.surfaces[num_surface].vertices[num_vertex]
+        mds_weights = list(itertools.chain.from_iterable(
+            mds_vertex.weights for mds_vertex in mds_vertices))
+        num_weights = len(mds_weights)
 
-        mdi_rigged_vertex.normal = mathutils.Vector(mds_vertex.normal)
+        parent_bones = \
+            np.fromiter((mds_weight.bone_index for mds_weight in mds_weights),
+                        dtype=np.int64, count=num_weights)
+        weight_values = \
+            np.fromiter((mds_weight.bone_weight for mds_weight in mds_weights),
+                        dtype=np.float32, count=num_weights)
+        locations = \
+            np.fromiter(itertools.chain.from_iterable(
+                            mds_weight.location for mds_weight in mds_weights),
+                        dtype=np.float32, count=3 * num_weights)
 
-        for mds_weight in mds_vertex.weights:
+        mdi_vertex_weights = \
+            mdi_m.MDIVertexWeights.from_counts(
+                (len(mds_vertex.weights) for mds_vertex in mds_vertices),
+                parent_bones, weight_values, locations)
 
-            mdi_vertex_weight = mdi_m.MDIVertexWeight()
+        return mdi_vertex_weights
 
-            mdi_vertex_weight.parent_bone = mds_weight.bone_index
-            mdi_vertex_weight.weight_value = mds_weight.bone_weight
-            mdi_vertex_weight.location = mathutils.Vector(mds_weight.location)
+    @staticmethod
+    def _to_mdi_rigged_vertex(mds_model, num_surface, num_vertex,
+                              mdi_vertex_weights):
 
-            mdi_rigged_vertex.weights.append(mdi_vertex_weight)
+        mds_vertex = mds_model.surfaces[num_surface].vertices[num_vertex]
+
+        normal = math_backend_m.Vector(mds_vertex.normal)
+        mdi_rigged_vertex = \
+            mdi_m.MDIRiggedVertex(normal, vertex_weights = mdi_vertex_weights,
+                                  num_vertex = num_vertex)
 
         return mdi_rigged_vertex
 
@@ -654,12 +717,16 @@ class ModelToMDI:
             mdi_util_m.from_c_string_padded(mds_surface.header.name)
 
         # mdi vertices
+        mdi_vertex_weights = \
+            ModelToMDI._to_mdi_vertex_weights(mds_model, num_surface)
+
         for num_vertex in range(len(mds_surface.vertices)):
 
             mdi_rigged_vertex = \
                 ModelToMDI._to_mdi_rigged_vertex(mds_model,
                                                  num_surface,
-                                                 num_vertex)
+                                                 num_vertex,
+                                                 mdi_vertex_weights)
             mdi_surface.vertices.append(mdi_rigged_vertex)
 
         # mdi triangles
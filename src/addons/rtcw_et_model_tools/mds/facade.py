@@ -53,16 +53,51 @@ def read(file_path, bind_frame, encoding="binary"):
             "Encoding option '{}' not supported".format(encoding)
         raise Exception(exception_string)
 
+    return _to_mdi(mds_model, pathlib.Path(file_path).name, bind_frame)
+
+
+def read_bytes(data, bind_frame, name=None, encoding="binary"):
+
+    """Reads MDS data from memory, then converts it to MDI.
+
+    Args:
+
+        data (bytes): content of an MDS file.
+        bind_frame (int): bind frame used for skinning.
+        name (str): name of the model if the MDS data has none, and name in
+            log messages.
+        encoding (str): encoding to use for MDS.
+
+    Returns:
+
+        mdi_model (MDI): converted MDS data as MDI.
+    """
+
+    if encoding != "binary":
+        exception_string = \
+            "Encoding option '{}' not supported".format(encoding)
+        raise Exception(exception_string)
+
+    mds_model = mds_m.MDS.from_bytes(data, name)
+
+    return _to_mdi(mds_model, name, bind_frame)
+
+
+def _to_mdi(mds_model, name, bind_frame):
+
     mdi_model = mds_mdi_m.ModelToMDI.convert(mds_model, bind_frame)
 
     # TODO this shouldn't be here
-    if not mdi_model.name:
-        mdi_model.name = pathlib.Path(file_path).name
+    if not mdi_model.name and name:
+        mdi_model.name = name
+
+    mdi_model.compact_static_frames()
 
     return mdi_model
 
 
-def write(mdi_model, file_path, collapse_frame, encoding="binary"):
+def write(mdi_model, file_path, collapse_frame, encoding="binary",
+          pk3_writer=None):
 
     """Converts MDI data to MDS, then writes it back to file.
 
@@ -70,12 +105,17 @@ def write(mdi_model, file_path, collapse_frame, encoding="binary"):
         mdi (MDI): model definition interchange format.
         file_path (str): path to which MDS data is written to.
         encoding (str): encoding to use for MDS.
+        pk3_writer (PK3Writer): pk3 file the MDS data is added to, None to
+            write to a file. If given, file_path is the member name.
     """
 
     mds_model = mds_mdi_m.MDIToModel.convert(mdi_model, collapse_frame)
 
     if encoding == "binary":
-        mds_model.write(file_path)
+        if pk3_writer:
+            pk3_writer.add_file(file_path, mds_model.write_file)
+        else:
+            mds_model.write(file_path)
     elif encoding == "xml":
         pass  # TODO
     elif encoding == "json":
@@ -84,3 +124,27 @@ def write(mdi_model, file_path, collapse_frame, encoding="binary"):
         exception_string = \
             "Encoding option '{}' not supported".format(encoding)
         raise Exception(exception_string)
+
+
+def write_bytes(mdi_model, collapse_frame, encoding="binary"):
+
+    """Converts MDI data to MDS, then writes it to memory.
+
+    Args:
+        mdi_model (MDI): model definition interchange format.
+        collapse_frame (int): frame used for the collapse map.
+        encoding (str): encoding to use for MDS.
+
+    Returns:
+
+        data (bytes): content of an MDS file.
+    """
+
+    if encoding != "binary":
+        exception_string = \
+            "Encoding option '{}' not supported".format(encoding)
+        raise Exception(exception_string)
+
+    mds_model = mds_mdi_m.MDIToModel.convert(mdi_model, collapse_frame)
+
+    return mds_model.to_bytes(mdi_model.name)
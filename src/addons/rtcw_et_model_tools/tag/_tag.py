@@ -35,6 +35,7 @@ Background:
     of script mover collision models, and probably more.
 """
 
+import io
 import struct
 
 import rtcw_et_model_tools.common.timer as timer_m
@@ -231,29 +232,62 @@ class TAG:
         """
 
         with open(file_path, 'rb') as file:
+            return TAG.read_file(file, file_path)
 
-            timer = timer_m.Timer()
-            reporter_m.info("Reading TAG file: {} ...".format(file_path))
+    @staticmethod
+    def read_file(file, name=None):
+        """Reads a binary encoded TAG file from a file object, for example a
+        memory buffer.
+
+        Args:
+
+            file (File): binary file object, must be seekable.
+            name (str): name of the file in log messages.
+
+        Returns:
+
+            tag (TAG): TAG object.
+        """
 
-            tag = TAG()
+        timer = timer_m.Timer()
+        reporter_m.info("Reading TAG file: {} ...".format(name or "<memory>"))
 
-            # tag.header
-            file_ofs = 0
-            tag.header = TAGHeader.read(file, file_ofs)
+        tag = TAG()
 
-            # tag.tags
-            file_ofs = TAGHeader.format_size
-            for _ in range(tag.header.num_tags):
+        # tag.header
+        file_ofs = 0
+        tag.header = TAGHeader.read(file, file_ofs)
+
+        # tag.tags
+        file_ofs = TAGHeader.format_size
+        for _ in range(tag.header.num_tags):
+
+            tag_data = TAGData.read(file, file_ofs)
+            tag.tags.append(tag_data)
+
+            file_ofs = file_ofs + TAGData.format_size
+
+        time = timer.time()
+        reporter_m.info("Reading TAG file DONE (time={})".format(time))
+
+        return tag
+
+    @staticmethod
+    def from_bytes(data, name=None):
+        """Reads binary encoded TAG data from memory.
+
+        Args:
 
-                tag_data = TAGData.read(file, file_ofs)
-                tag.tags.append(tag_data)
+            data (bytes): content of an TAG file.
+            name (str): name of the file in log messages.
 
-                file_ofs = file_ofs + TAGData.format_size
+        Returns:
 
-            time = timer.time()
-            reporter_m.info("Reading TAG file DONE (time={})".format(time))
+            tag (TAG): TAG object.
+        """
 
-            return tag
+        with io.BytesIO(data) as file:
+            return TAG.read_file(file, name)
 
     def write(self, file_path):
         """Writes TAG object to file with binary encoding.
@@ -264,22 +298,50 @@ class TAG:
         """
 
         with open(file_path, 'wb') as file:
+            self.write_file(file, file_path)
+
+    def write_file(self, file, name=None):
+        """Writes TAG object with binary encoding to a file object, for
+        example a memory buffer.
+
+        Args:
+
+            file (File): binary file object, must be seekable.
+            name (str): name of the file in log messages.
+        """
+
+        timer = timer_m.Timer()
+        reporter_m.info("Writing TAG file: {} ...".format(name or "<memory>"))
 
-            timer = timer_m.Timer()
-            reporter_m.info("Writing TAG file: {} ...".format(file_path))
+        # tag.header
+        file_ofs = 0
+        self.header.write(file, file_ofs)
 
-            # tag.header
-            file_ofs = 0
-            self.header.write(file, file_ofs)
+        # tag.tags
+        file_ofs = TAGHeader.format_size
 
-            # tag.tags
-            file_ofs = TAGHeader.format_size
+        for tag_data in self.tags:
 
-            for tag_data in self.tags:
+            tag_data.write(file, file_ofs)
 
-                tag_data.write(file, file_ofs)
+            file_ofs = file_ofs + TAGData.format_size
+
+        time = timer.time()
+        reporter_m.info("Writing TAG file DONE (time={})".format(time))
+
+    def to_bytes(self, name=None):
+        """Writes TAG object with binary encoding to memory.
+
+        Args:
+
+            name (str): name of the file in log messages.
+
+        Returns:
+
+            data (bytes): content of an TAG file.
+        """
 
-                file_ofs = file_ofs + TAGData.format_size
+        with io.BytesIO() as file:
 
-            time = timer.time()
-            reporter_m.info("Writing TAG file DONE (time={})".format(time))
+            self.write_file(file, name)
+            return file.getvalue()
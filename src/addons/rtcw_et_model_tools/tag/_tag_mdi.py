@@ -21,12 +21,11 @@
 """Converts between in-memory representations of TAG and MDI.
 """
 
-import mathutils
-
 import rtcw_et_model_tools.tag._tag as tag_m
 import rtcw_et_model_tools.mdi.mdi as mdi_m
 import rtcw_et_model_tools.mdi.util as mdi_util_m
 
+import rtcw_et_model_tools.common.math_backend as math_backend_m
 import rtcw_et_model_tools.common.timer as timer_m
 import rtcw_et_model_tools.common.reporter as reporter_m
 
@@ -65,7 +64,7 @@ class MDIToModel:
         left = mdi_free_tag.orientations[0].col[2]
         up = mdi_free_tag.orientations[0].col[0]
 
-        orientation = mathutils.Matrix.Identity(3)
+        orientation = math_backend_m.Matrix.Identity(3)
         orientation[0][0:3] = forward[0], left[0], up[0]
         orientation[1][0:3] = forward[1], left[1], up[1]
         orientation[2][0:3] = forward[2], left[2], up[2]
@@ -126,7 +125,7 @@ class ModelToMDI:
 
         # location
         locations = []
-        location = mathutils.Vector(tag_data.location)
+        location = math_backend_m.Vector(tag_data.location)
         locations.append(location)
 
         # orientation
@@ -137,7 +136,7 @@ class ModelToMDI:
         left = orientation.col[0]
         up = orientation.col[1]
 
-        orientation = mathutils.Matrix.Identity(3)
+        orientation = math_backend_m.Matrix.Identity(3)
         orientation[0][0:3] = forward[0], left[0], up[0]
         orientation[1][0:3] = forward[1], left[1], up[1]
         orientation[2][0:3] = forward[2], left[2], up[2]
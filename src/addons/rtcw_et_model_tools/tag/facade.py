@@ -52,16 +52,46 @@ def read(file_path, encoding="binary"):
             "Encoding option '{}' not supported".format(encoding)
         raise Exception(exception_string)
 
+    return _to_mdi(tag_model, pathlib.Path(file_path).name)
+
+
+def read_bytes(data, name=None, encoding="binary"):
+
+    """Reads TAG data from memory, then converts it to MDI.
+
+    Args:
+
+        data (bytes): content of a TAG file.
+        name (str): name of the model, and name in log messages.
+        encoding (str): encoding to use for TAG.
+
+    Returns:
+
+        mdi_model (MDI): converted TAG data as MDI.
+    """
+
+    if encoding != "binary":
+        exception_string = \
+            "Encoding option '{}' not supported".format(encoding)
+        raise Exception(exception_string)
+
+    tag_model = tag_m.TAG.from_bytes(data, name)
+
+    return _to_mdi(tag_model, name)
+
+
+def _to_mdi(tag_model, name):
+
     mdi_model = tag_mdi_m.ModelToMDI.convert(tag_model)
 
     # TODO this shouldn't be here
-    if not mdi_model.name:
-        mdi_model.name = pathlib.Path(file_path).name
+    if not mdi_model.name and name:
+        mdi_model.name = name
 
     return mdi_model
 
 
-def write(mdi_model, file_path, encoding="binary"):
+def write(mdi_model, file_path, encoding="binary", pk3_writer=None):
 
     """Converts MDI data to TAG, then writes it back to file.
 
@@ -69,12 +99,17 @@ def write(mdi_model, file_path, encoding="binary"):
         mdi_model (MDI): model definition interchange format.
         file_path (str): path to which TAG data is written to.
         encoding (str): encoding to use for TAG.
+        pk3_writer (PK3Writer): pk3 file the TAG data is added to, None to
+            write to a file. If given, file_path is the member name.
     """
 
     tag_model = tag_mdi_m.MDIToModel.convert(mdi_model)
 
     if encoding == "binary":
-        tag_model.write(file_path)
+        if pk3_writer:
+            pk3_writer.add_file(file_path, tag_model.write_file)
+        else:
+            tag_model.write(file_path)
     elif encoding == "xml":
         pass  # TODO
     elif encoding == "json":
@@ -83,3 +118,26 @@ def write(mdi_model, file_path, encoding="binary"):
         exception_string = \
             "Encoding option '{}' not supported".format(encoding)
         raise Exception(exception_string)
+
+
+def write_bytes(mdi_model, encoding="binary"):
+
+    """Converts MDI data to TAG, then writes it to memory.
+
+    Args:
+        mdi_model (MDI): model definition interchange format.
+        encoding (str): encoding to use for TAG.
+
+    Returns:
+
+        data (bytes): content of a TAG file.
+    """
+
+    if encoding != "binary":
+        exception_string = \
+            "Encoding option '{}' not supported".format(encoding)
+        raise Exception(exception_string)
+
+    tag_model = tag_mdi_m.MDIToModel.convert(mdi_model)
+
+    return tag_model.to_bytes(mdi_model.name)
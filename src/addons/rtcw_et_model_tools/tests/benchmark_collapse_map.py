@@ -0,0 +1,495 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8-80 compliant>
+
+"""Scaling benchmark for the collapse map calculation.
+
+Runs the collapse map algorithm on synthetic meshes of increasing vertex
+count and records runtime and peak memory. Results are written as JSON,
+together with the fitted scaling exponent per mesh kind, so that runs can be
+compared over time and regressions towards quadratic behavior are caught.
+
+Does not need blender, see common/math_backend. Example:
+
+    python -m rtcw_et_model_tools.tests.benchmark_collapse_map \\
+        --output collapse_map.json --baseline previous.json
+"""
+
+import argparse
+import json
+import math
+import platform
+import sys
+import time
+import tracemalloc
+
+import rtcw_et_model_tools.common.collapse_map as collapse_map_m
+import rtcw_et_model_tools.md3._md3 as md3_m
+
+
+# =====================================
+# synthetic meshes
+# =====================================
+
+def make_grid(num_vertices):
+    """Open surface. Slightly curved grid of quads split into triangles.
+
+    Args:
+
+        num_vertices (int): upper bound of vertices.
+
+    Returns:
+
+        vertices (list): list of (x, y, z) tuples.
+        triangles (list): list of vertex index triples.
+    """
+
+    side = max(2, int(math.sqrt(num_vertices)))
+
+    vertices = []
+    for num_row in range(side):
+        for num_col in range(side):
+            z = 0.1 * math.sin(num_col * 0.7) * math.cos(num_row * 0.3)
+            vertices.append((float(num_col), float(num_row), z))
+
+    triangles = []
+    for num_row in range(side - 1):
+        for num_col in range(side - 1):
+            i0 = num_row * side + num_col
+            i1 = i0 + 1
+            i2 = i0 + side
+            i3 = i2 + 1
+            triangles.append((i0, i1, i3))
+            triangles.append((i0, i3, i2))
+
+    return vertices, triangles
+
+def _ring_triangles(num_rings, num_segments, first_index, closed):
+    """Triangles connecting consecutive rings of a tube like surface.
+
+    Args:
+
+        num_rings (int): number of rings.
+        num_segments (int): number of vertices per ring.
+        first_index (int): index of first vertex of the first ring.
+        closed (bool): whether the last ring connects to the first ring.
+
+    Returns:
+
+        triangles (list): list of vertex index triples.
+    """
+
+    triangles = []
+
+    num_bands = num_rings if closed else num_rings - 1
+    for num_ring in range(num_bands):
+        next_ring = (num_ring + 1) % num_rings
+        for num_segment in range(num_segments):
+            next_segment = (num_segment + 1) % num_segments
+            i0 = first_index + num_ring * num_segments + num_segment
+            i1 = first_index + num_ring * num_segments + next_segment
+            i2 = first_index + next_ring * num_segments + num_segment
+            i3 = first_index + next_ring * num_segments + next_segment
+            triangles.append((i0, i1, i3))
+            triangles.append((i0, i3, i2))
+
+    return triangles
+
+def make_cylinder(num_vertices):
+    """Open surface. Tube without caps, both ends form a boundary.
+
+    Args:
+
+        num_vertices (int): upper bound of vertices.
+
+    Returns:
+
+        vertices (list): list of (x, y, z) tuples.
+        triangles (list): list of vertex index triples.
+    """
+
+    num_rings = max(2, int(math.sqrt(num_vertices / 2)))
+    num_segments = max(3, num_vertices // num_rings)
+
+    vertices = []
+    for num_ring in range(num_rings):
+        z = num_ring / (num_rings - 1)
+        for num_segment in range(num_segments):
+            phi = 2 * math.pi * num_segment / num_segments
+            vertices.append((math.cos(phi), math.sin(phi), z))
+
+    triangles = _ring_triangles(num_rings, num_segments, 0, False)
+
+    return vertices, triangles
+
+def make_sphere(num_vertices):
+    """Sealed surface. UV sphere with a single vertex at each pole.
+
+    Args:
+
+        num_vertices (int): upper bound of vertices.
+
+    Returns:
+
+        vertices (list): list of (x, y, z) tuples.
+        triangles (list): list of vertex index triples.
+    """
+
+    num_rings = max(1, int(math.sqrt((num_vertices - 2) / 2)))
+    num_segments = max(3, (num_vertices - 2) // num_rings)
+
+    vertices = [(0.0, 0.0, 1.0)]
+    for num_ring in range(num_rings):
+        theta = math.pi * (num_ring + 1) / (num_rings + 1)
+        for num_segment in range(num_segments):
+            phi = 2 * math.pi * num_segment / num_segments
+            vertices.append((math.sin(theta) * math.cos(phi),
+                             math.sin(theta) * math.sin(phi),
+                             math.cos(theta)))
+    vertices.append((0.0, 0.0, -1.0))
+
+    south_pole = len(vertices) - 1
+    last_ring = 1 + (num_rings - 1) * num_segments
+
+    triangles = []
+    for num_segment in range(num_segments):
+        next_segment = (num_segment + 1) % num_segments
+        triangles.append((0, 1 + num_segment, 1 + next_segment))
+        triangles.append((south_pole,
+                          last_ring + next_segment,
+                          last_ring + num_segment))
+
+    triangles += _ring_triangles(num_rings, num_segments, 1, False)
+
+    return vertices, triangles
+
+def make_torus(num_vertices):
+    """Sealed surface. Torus, every vertex has the same valence.
+
+    Args:
+
+        num_vertices (int): upper bound of vertices.
+
+    Returns:
+
+        vertices (list): list of (x, y, z) tuples.
+        triangles (list): list of vertex index triples.
+    """
+
+    num_rings = max(3, int(math.sqrt(num_vertices / 2)))
+    num_segments = max(3, num_vertices // num_rings)
+
+    vertices = []
+    for num_ring in range(num_rings):
+        phi = 2 * math.pi * num_ring / num_rings
+        for num_segment in range(num_segments):
+            theta = 2 * math.pi * num_segment / num_segments
+            r = 1.0 + 0.3 * math.cos(theta)
+            vertices.append((r * math.cos(phi),
+                             r * math.sin(phi),
+                             0.3 * math.sin(theta)))
+
+    triangles = _ring_triangles(num_rings, num_segments, 0, True)
+
+    return vertices, triangles
+
+MESHES = {
+    "grid": (make_grid, False),
+    "cylinder": (make_cylinder, False),
+    "sphere": (make_sphere, True),
+    "torus": (make_torus, True),
+}
+
+# =====================================
+# measurement
+# =====================================
+
+def _reset_collapse_map():
+    """The collapse map module keeps its working set in module globals.
+    Make sure a run does not inherit leftovers from a previous one.
+    """
+
+    collapse_map_m.vertices.clear()
+    collapse_map_m.triangles.clear()
+
+def measure(vertices, triangles, repeat=1):
+    """Measure runtime and peak memory of a collapse map calculation.
+
+    Runtime and memory are measured in separate runs, since tracing
+    allocations distorts runtime considerably.
+
+    Args:
+
+        vertices (list): list of (x, y, z) tuples.
+        triangles (list): list of vertex index triples.
+        repeat (int): number of timed runs, the best one is reported.
+
+    Returns:
+
+        seconds (float): best runtime.
+        peak_memory (int): peak of traced memory in bytes.
+    """
+
+    seconds = None
+    for _ in range(repeat):
+
+        _reset_collapse_map()
+        start = time.perf_counter()
+        collapse_map_m.calculate(vertices, triangles)
+        elapsed = time.perf_counter() - start
+
+        if seconds is None or elapsed < seconds:
+            seconds = elapsed
+
+    _reset_collapse_map()
+    tracemalloc.start()
+    try:
+        collapse_map_m.calculate(vertices, triangles)
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    _reset_collapse_map()
+
+    return seconds, peak_memory
+
+def fit_exponent(sizes, values):
+    """Least squares fit of the exponent k in values = c * sizes^k.
+
+    Args:
+
+        sizes (list): problem sizes.
+        values (list): measured values.
+
+    Returns:
+
+        exponent (float): fitted exponent or None if not enough samples.
+    """
+
+    points = [(math.log(size), math.log(value))
+              for size, value in zip(sizes, values)
+              if size > 0 and value > 0]
+
+    if len(points) < 2:
+        return None
+
+    mean_x = sum(p[0] for p in points) / len(points)
+    mean_y = sum(p[1] for p in points) / len(points)
+
+    sxx = sum((p[0] - mean_x) ** 2 for p in points)
+    sxy = sum((p[0] - mean_x) * (p[1] - mean_y) for p in points)
+
+    if sxx == 0:
+        return None
+
+    exponent = sxy / sxx
+    return exponent
+
+def default_sizes(min_vertices=64, max_vertices=None):
+    """Vertex counts doubling from min_vertices up to the format limit.
+
+    Args:
+
+        min_vertices (int): smallest vertex count.
+        max_vertices (int): largest vertex count, MD3 limit if None.
+
+    Returns:
+
+        sizes (list): vertex counts.
+    """
+
+    if max_vertices is None:
+        max_vertices = md3_m.MD3.max_vertices
+    max_vertices = min(max_vertices, md3_m.MD3.max_vertices)
+
+    sizes = []
+    size = min_vertices
+    while size < max_vertices:
+        sizes.append(size)
+        size *= 2
+    sizes.append(max_vertices)
+
+    return sizes
+
+def run(mesh_names, sizes, repeat=1, log=None):
+    """Run the benchmark.
+
+    Args:
+
+        mesh_names (list): keys of MESHES.
+        sizes (list): target vertex counts.
+        repeat (int): number of timed runs per sample.
+        log (file): progress is written here if not None.
+
+    Returns:
+
+        results (dict): JSON serializable benchmark results.
+    """
+
+    import rtcw_et_model_tools
+
+    samples = []
+    scaling = {}
+
+    for mesh_name in mesh_names:
+
+        make_mesh, sealed = MESHES[mesh_name]
+
+        mesh_samples = []
+        for size in sizes:
+
+            vertices, triangles = make_mesh(size)
+            seconds, peak_memory = measure(vertices, triangles, repeat)
+
+            sample = {
+                "mesh": mesh_name,
+                "sealed": sealed,
+                "num_vertices": len(vertices),
+                "num_triangles": len(triangles),
+                "seconds": seconds,
+                "peak_memory": peak_memory,
+            }
+            mesh_samples.append(sample)
+
+            if log:
+                log.write("{:<10} {:>6} vertices {:>10.4f} s {:>12} bytes\n" \
+                          .format(mesh_name, len(vertices), seconds,
+                                  peak_memory))
+                log.flush()
+
+        num_vertices = [s["num_vertices"] for s in mesh_samples]
+        scaling[mesh_name] = {
+            "time_exponent": fit_exponent(
+                num_vertices, [s["seconds"] for s in mesh_samples]),
+            "memory_exponent": fit_exponent(
+                num_vertices, [s["peak_memory"] for s in mesh_samples]),
+        }
+
+        samples += mesh_samples
+
+    results = {
+        "benchmark": "collapse_map",
+        "version": list(rtcw_et_model_tools.bl_info["version"]),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "repeat": repeat,
+        "samples": samples,
+        "scaling": scaling,
+    }
+
+    return results
+
+def check(results, max_exponent=None, baseline=None, tolerance=0.25):
+    """Check results for scaling regressions.
+
+    Args:
+
+        results (dict): results of this run.
+        max_exponent (float): upper bound for any time exponent.
+        baseline (dict): results of a previous run.
+        tolerance (float): allowed growth of a time exponent compared to the
+            baseline.
+
+    Returns:
+
+        failures (list): human readable descriptions of failed checks.
+    """
+
+    failures = []
+
+    for mesh_name, scaling in results["scaling"].items():
+
+        exponent = scaling["time_exponent"]
+        if exponent is None:
+            continue
+
+        if max_exponent is not None and exponent > max_exponent:
+            failures.append("{}: time exponent {:.2f} exceeds {:.2f}" \
+                            .format(mesh_name, exponent, max_exponent))
+
+        if baseline is None:
+            continue
+
+        previous = baseline.get("scaling", {}).get(mesh_name)
+        if not previous or previous.get("time_exponent") is None:
+            continue
+
+        previous_exponent = previous["time_exponent"]
+        if exponent > previous_exponent + tolerance:
+            failures.append("{}: time exponent {:.2f} exceeds baseline"
+                            " {:.2f} by more than {:.2f}" \
+                            .format(mesh_name, exponent, previous_exponent,
+                                    tolerance))
+
+    return failures
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(
+        description="Collapse map scaling benchmark.")
+    parser.add_argument("--meshes", nargs="+", choices=sorted(MESHES),
+                        default=sorted(MESHES),
+                        help="mesh kinds to run")
+    parser.add_argument("--sizes", nargs="+", type=int, default=None,
+                        help="target vertex counts (default: doubling from"
+                        " --min-vertices up to the MD3 vertex limit)")
+    parser.add_argument("--min-vertices", type=int, default=64)
+    parser.add_argument("--max-vertices", type=int, default=None)
+    parser.add_argument("--repeat", type=int, default=1,
+                        help="timed runs per sample, best is reported")
+    parser.add_argument("--output", default=None,
+                        help="JSON output file (default: stdout)")
+    parser.add_argument("--baseline", default=None,
+                        help="JSON results of a previous run to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed growth of the time exponent compared"
+                        " to the baseline")
+    parser.add_argument("--max-exponent", type=float, default=None,
+                        help="fail if any time exponent exceeds this value")
+    args = parser.parse_args(argv)
+
+    sizes = args.sizes
+    if sizes is None:
+        sizes = default_sizes(args.min_vertices, args.max_vertices)
+
+    results = run(args.meshes, sizes, args.repeat, log=sys.stderr)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r') as file:
+            baseline = json.load(file)
+
+    failures = check(results, args.max_exponent, baseline, args.tolerance)
+    results["failures"] = failures
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+
+    for failure in failures:
+        sys.stderr.write("FAILED: {}\n".format(failure))
+
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,356 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8-80 compliant>
+
+"""Import time benchmark for the entry points used without blender.
+
+Imports each entry point in a fresh interpreter with 'python -X importtime'
+and records the time spent importing modules, which does not include the
+start-up of the interpreter itself. An entry point fails if it exceeds its
+budget or if it loads a module it should not need, for example numpy when
+only probing a header.
+
+Each entry point is imported once before timing, so bytecode is written and
+the files are in the disk cache. The best of all timed runs is reported.
+Results are written as JSON and can be compared to a previous run.
+
+Does not need blender. Example:
+
+    python -m rtcw_et_model_tools.tests.benchmark_import_time \\
+        --output import_time.json --baseline previous.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+
+
+# name => (modules imported, budget in milliseconds or None, modules which
+# must not be loaded)
+ENTRY_POINTS = {
+    "probe_md3": (["rtcw_et_model_tools.md3._md3"], 100,
+                  ["numpy", "mathutils"]),
+    "probe_mdc": (["rtcw_et_model_tools.mdc._mdc"], 100,
+                  ["numpy", "mathutils"]),
+    "probe_mds": (["rtcw_et_model_tools.mds._mds"], 100,
+                  ["numpy", "mathutils"]),
+    "probe_mdm": (["rtcw_et_model_tools.mdmmdx._mdm"], 100,
+                  ["numpy", "mathutils"]),
+    "probe_mdx": (["rtcw_et_model_tools.mdmmdx._mdx"], 100,
+                  ["numpy", "mathutils"]),
+    "probe_tag": (["rtcw_et_model_tools.tag._tag"], 100,
+                  ["numpy", "mathutils"]),
+    "transcode_mds_mdmmdx": (["rtcw_et_model_tools.mdmmdx.facade",
+                              "rtcw_et_model_tools.mds._mds"], 100,
+                             ["numpy", "rtcw_et_model_tools.mdi.mdi"]),
+    "direct_conversion": (["rtcw_et_model_tools.common.direct_conversion"],
+                          100, ["numpy", "rtcw_et_model_tools.mdi.mdi"]),
+    "batch_conversion": (["rtcw_et_model_tools.common.batch_conversion"],
+                         100, ["numpy", "asyncio", "sqlite3",
+                               "rtcw_et_model_tools.mdi.mdi"]),
+    "convert_md3": (["rtcw_et_model_tools.md3.facade"], None, []),
+    "convert_mdc": (["rtcw_et_model_tools.mdc.facade"], None, []),
+    "convert_mds": (["rtcw_et_model_tools.mds.facade"], None, []),
+    "convert_mdmmdx": (["rtcw_et_model_tools.mdmmdx.facade",
+                        "rtcw_et_model_tools.mdmmdx._mdmmdx_mdi"], None, []),
+}
+
+# =====================================
+# measurement
+# =====================================
+
+def _get_env(write_bytecode):
+    """Environment of the child interpreters, which find the package the
+    same way this one does.
+    """
+
+    import rtcw_et_model_tools
+
+    package_dir = os.path.dirname(os.path.abspath(
+        rtcw_et_model_tools.__file__))
+
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [os.path.dirname(package_dir)] + \
+        [path for path in [env.get("PYTHONPATH")] if path])
+
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    if not write_bytecode:
+        env["PYTHONDONTWRITEBYTECODE"] = "1"
+
+    return env
+
+def parse_importtime(output):
+    """Parses the output of 'python -X importtime'.
+
+    Args:
+
+        output (str): lines written to stderr.
+
+    Returns:
+
+        imports (list): (name, cumulative microseconds, depth) tuples in the
+            order the imports finished.
+    """
+
+    imports = []
+    for line in output.splitlines():
+
+        if not line.startswith("import time:"):
+            continue
+
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            continue
+
+        name = fields[2].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        imports.append((name.strip(), int(fields[1]), depth))
+
+    return imports
+
+def _run_child(modules, env):
+    """Imports modules in a fresh interpreter.
+
+    Returns:
+
+        imports (list): see parse_importtime.
+        seconds (float): runtime of the whole process.
+    """
+
+    statement = "; ".join(["import {}".format(module)
+                           for module in modules])
+
+    start = time.perf_counter()
+    process = subprocess.run([sys.executable, "-X", "importtime",
+                              "-c", statement],
+                             env=env, stdout=subprocess.DEVNULL,
+                             stderr=subprocess.PIPE,
+                             universal_newlines=True)
+    seconds = time.perf_counter() - start
+
+    if process.returncode != 0:
+        raise Exception("Importing {} failed:\n{}" \
+                        .format(", ".join(modules), process.stderr))
+
+    return parse_importtime(process.stderr), seconds
+
+def measure(modules, repeat=5):
+    """Measures the import time of modules.
+
+    Args:
+
+        modules (list): names of modules imported.
+        repeat (int): number of timed runs, the best one is reported.
+
+    Returns:
+
+        milliseconds (float): best time spent importing the modules and what
+            they import, without interpreter start-up.
+        process_milliseconds (float): best runtime of the whole process.
+        loaded (list): names of all modules imported.
+    """
+
+    startup_imports, _ = _run_child([], _get_env(True))
+    startup_modules = set(name for name, _, _ in startup_imports)
+
+    # warm up, writes bytecode
+    _run_child(modules, _get_env(True))
+
+    env = _get_env(False)
+
+    milliseconds = None
+    process_milliseconds = None
+    loaded = []
+    for _ in range(repeat):
+
+        imports, seconds = _run_child(modules, env)
+
+        # top level imports not done by the interpreter anyway
+        elapsed = sum(cumulative for name, cumulative, depth in imports
+                      if depth == 0 and name not in startup_modules) / 1000.0
+
+        if milliseconds is None or elapsed < milliseconds:
+            milliseconds = elapsed
+        if process_milliseconds is None or \
+           seconds * 1000.0 < process_milliseconds:
+            process_milliseconds = seconds * 1000.0
+
+        loaded = sorted(set(name for name, _, _ in imports) - \
+                        startup_modules)
+
+    return milliseconds, process_milliseconds, loaded
+
+def run(entry_names, repeat=5, log=None):
+    """Run the benchmark.
+
+    Args:
+
+        entry_names (list): keys of ENTRY_POINTS.
+        repeat (int): number of timed runs per entry point.
+        log (file): progress is written here if not None.
+
+    Returns:
+
+        results (dict): JSON serializable benchmark results.
+    """
+
+    import rtcw_et_model_tools
+
+    samples = []
+    for entry_name in entry_names:
+
+        modules, budget, forbidden = ENTRY_POINTS[entry_name]
+        milliseconds, process_milliseconds, loaded = \
+            measure(modules, repeat)
+
+        sample = {
+            "entry_point": entry_name,
+            "modules": modules,
+            "milliseconds": milliseconds,
+            "process_milliseconds": process_milliseconds,
+            "budget": budget,
+            "num_loaded": len(loaded),
+            "forbidden_loaded": [name for name in forbidden
+                                 if name in loaded],
+        }
+        samples.append(sample)
+
+        if log:
+            log.write("{:<22} {:>8.1f} ms {:>8.1f} ms process {:>4}"
+                      " modules\n" \
+                      .format(entry_name, milliseconds, process_milliseconds,
+                              len(loaded)))
+            log.flush()
+
+    results = {
+        "benchmark": "import_time",
+        "version": list(rtcw_et_model_tools.bl_info["version"]),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "repeat": repeat,
+        "samples": samples,
+    }
+
+    return results
+
+def check(results, budget_scale=1.0, baseline=None, tolerance=0.5):
+    """Check results for budget violations and regressions.
+
+    Args:
+
+        results (dict): results of this run.
+        budget_scale (float): factor applied to all budgets, for slow
+            machines.
+        baseline (dict): results of a previous run.
+        tolerance (float): allowed relative growth of the import time
+            compared to the baseline.
+
+    Returns:
+
+        failures (list): human readable descriptions of failed checks.
+    """
+
+    failures = []
+
+    previous_samples = {}
+    if baseline:
+        for sample in baseline.get("samples", []):
+            previous_samples[sample["entry_point"]] = sample
+
+    for sample in results["samples"]:
+
+        entry_name = sample["entry_point"]
+        milliseconds = sample["milliseconds"]
+
+        for name in sample["forbidden_loaded"]:
+            failures.append("{}: loads {}".format(entry_name, name))
+
+        budget = sample["budget"]
+        if budget is not None and milliseconds > budget * budget_scale:
+            failures.append("{}: import time {:.1f} ms exceeds budget"
+                            " {:.1f} ms" \
+                            .format(entry_name, milliseconds,
+                                    budget * budget_scale))
+
+        previous = previous_samples.get(entry_name)
+        if not previous:
+            continue
+
+        previous_milliseconds = previous["milliseconds"]
+        if milliseconds > previous_milliseconds * (1.0 + tolerance):
+            failures.append("{}: import time {:.1f} ms exceeds baseline"
+                            " {:.1f} ms by more than {:.0f}%" \
+                            .format(entry_name, milliseconds,
+                                    previous_milliseconds, tolerance * 100))
+
+    return failures
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(
+        description="Import time benchmark of the entry points used without"
+        " blender.")
+    parser.add_argument("--entry-points", nargs="+",
+                        choices=sorted(ENTRY_POINTS),
+                        default=sorted(ENTRY_POINTS),
+                        help="entry points to run")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="timed runs per entry point, best is reported")
+    parser.add_argument("--output", default=None,
+                        help="JSON output file (default: stdout)")
+    parser.add_argument("--baseline", default=None,
+                        help="JSON results of a previous run to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="allowed relative growth of the import time"
+                        " compared to the baseline")
+    parser.add_argument("--budget-scale", type=float, default=1.0,
+                        help="factor applied to all budgets, for slow"
+                        " machines")
+    args = parser.parse_args(argv)
+
+    results = run(args.entry_points, args.repeat, log=sys.stderr)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r') as file:
+            baseline = json.load(file)
+
+    failures = check(results, args.budget_scale, baseline, args.tolerance)
+    results["failures"] = failures
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+
+    for failure in failures:
+        sys.stderr.write("FAILED: {}\n".format(failure))
+
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
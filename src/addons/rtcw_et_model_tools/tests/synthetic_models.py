@@ -0,0 +1,209 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8-80 compliant>
+
+"""Small synthetic models for tests which do not need test files.
+
+Notes:
+
+    Models are random but reproducible for a given seed, and built with the
+    math backend in use.
+"""
+
+import math
+import random
+
+import rtcw_et_model_tools.mdi.mdi as mdi_m
+import rtcw_et_model_tools.mdi.util as mdi_util_m
+import rtcw_et_model_tools.common.math_backend as math_backend_m
+
+
+def _random_vector(rng, scale):
+
+    return math_backend_m.Vector((rng.uniform(-scale, scale),
+                                  rng.uniform(-scale, scale),
+                                  rng.uniform(-scale, scale)))
+
+def _random_orientation(rng):
+
+    return mdi_util_m.angles_to_matrix(rng.uniform(-180.0, 180.0),
+                                       rng.uniform(-90.0, 90.0),
+                                       rng.uniform(-180.0, 180.0))
+
+def _grid_triangles(side):
+
+    triangles = []
+    for y in range(side - 1):
+        for x in range(side - 1):
+
+            a = y * side + x
+            triangles.append(mdi_m.MDITriangle([a, a + 1, a + side]))
+            triangles.append(mdi_m.MDITriangle([a + 1, a + side + 1,
+                                                a + side]))
+
+    return triangles
+
+def create_morph_model(seed = 0, num_surfaces = 2, side = 8, num_frames = 8,
+                       num_tags = 1, drift = 1.0, name = "synthetic"):
+    """Creates a model of morph vertices and free tags, as read from MD3.
+
+    Args:
+
+        seed (int): seed of the random values.
+        num_surfaces (int): number of surfaces.
+        side (int): surfaces are grids of side * side vertices.
+        num_frames (int): number of frames.
+        num_tags (int): number of free tags.
+        drift (float): distance vertices move per frame on average.
+        name (str): name of the model.
+
+    Returns:
+
+        mdi_model (MDI): the model.
+    """
+
+    rng = random.Random(seed)
+
+    mdi_model = mdi_m.MDI(name=name)
+
+    for num_surface in range(num_surfaces):
+
+        mdi_surface = mdi_m.MDISurface(name="surface_{}".format(num_surface))
+
+        for _ in range(side * side):
+
+            base = _random_vector(rng, 50.0)
+            velocity = _random_vector(rng, drift)
+
+            locations = []
+            normals = []
+            for num_frame in range(num_frames):
+
+                locations.append(base + velocity * num_frame)
+                normals.append(_random_vector(rng, 1.0).normalized())
+
+            mdi_surface.vertices.append(mdi_m.MDIMorphVertex(locations,
+                                                             normals))
+
+        mdi_surface.triangles = _grid_triangles(side)
+        mdi_surface.uv_map = mdi_m.MDIUVMapBijective(
+            [mdi_m.MDIUV(rng.random(), rng.random())
+             for _ in range(side * side)])
+        mdi_surface.shader = mdi_m.MDIShaderPaths(
+            [mdi_m.MDIShaderPath("textures/synthetic/surface_{}.tga" \
+                                 .format(num_surface))])
+
+        mdi_model.surfaces.append(mdi_surface)
+
+    for num_tag in range(num_tags):
+
+        mdi_tag = mdi_m.MDIFreeTag(name="tag_{}".format(num_tag))
+        for _ in range(num_frames):
+
+            mdi_tag.locations.append(_random_vector(rng, 10.0))
+            mdi_tag.orientations.append(_random_orientation(rng))
+
+        mdi_model.tags.append(mdi_tag)
+
+    mdi_model.bounds = mdi_m.MDIBoundingVolume.calc(mdi_model)
+    mdi_model.lod = mdi_m.MDIDiscreteLOD()
+
+    return mdi_model
+
+def create_skeletal_model(seed = 0, num_bones = 12, side = 8, num_frames = 6,
+                          name = "synthetic"):
+    """Creates a model of rigged vertices and a skeleton, as read from MDS.
+
+    Args:
+
+        seed (int): seed of the random values.
+        num_bones (int): number of bones.
+        side (int): the surface is a grid of side * side vertices.
+        num_frames (int): number of frames.
+        name (str): name of the model.
+
+    Returns:
+
+        mdi_model (MDI): the model.
+    """
+
+    rng = random.Random(seed)
+
+    mdi_bones = []
+    for num_bone in range(num_bones):
+
+        parent_bone = -1 if num_bone == 0 else rng.randrange(num_bone)
+
+        locations = []
+        orientations = []
+        for num_frame in range(num_frames):
+
+            orientations.append(_random_orientation(rng))
+            if parent_bone < 0:
+                locations.append(_random_vector(rng, 5.0))
+            else:
+                offset = _random_vector(rng, 1.0).normalized() * 3.0
+                locations.append(mdi_bones[parent_bone].locations[num_frame]
+                                 + offset)
+
+        parent_dist = 3.0 if parent_bone >= 0 else 0.0
+        mdi_bones.append(mdi_m.MDIBone("bone_{}".format(num_bone),
+                                       parent_bone, parent_dist, 0.5,
+                                       locations, orientations))
+
+    mdi_model = mdi_m.MDI(name=name)
+    mdi_model.skeleton = mdi_m.MDISkeleton("skeleton", 0, mdi_bones)
+
+    mdi_surface = mdi_m.MDISurface(name="body")
+    for _ in range(side * side):
+
+        num_weights = rng.randint(1, 3)
+        mdi_weights = []
+        for _ in range(num_weights):
+            mdi_weights.append(
+                mdi_m.MDIVertexWeight(rng.randrange(num_bones),
+                                      1.0 / num_weights,
+                                      _random_vector(rng, 2.0)))
+
+        normal = math_backend_m.Vector((0.0, 0.0, 1.0))
+        mdi_surface.vertices.append(mdi_m.MDIRiggedVertex(normal,
+                                                          mdi_weights))
+
+    mdi_surface.triangles = _grid_triangles(side)
+    mdi_surface.uv_map = mdi_m.MDIUVMapBijective(
+        [mdi_m.MDIUV(rng.random(), rng.random())
+         for _ in range(side * side)])
+    mdi_surface.shader = mdi_m.MDIShaderPath("models/synthetic/body")
+    mdi_model.surfaces.append(mdi_surface)
+
+    radius = math.sqrt(3.0) * 30.0
+    mdi_bounds = mdi_m.MDIBoundingVolume()
+    for _ in range(num_frames):
+
+        mdi_bounds.aabbs.append(
+            mdi_m.MDIAABB(math_backend_m.Vector((-30.0, -30.0, -30.0)),
+                          math_backend_m.Vector((30.0, 30.0, 30.0))))
+        mdi_bounds.spheres.append(
+            mdi_m.MDIBoundingSphere(math_backend_m.Vector((0.0, 0.0, 0.0)),
+                                    radius))
+
+    mdi_model.bounds = mdi_bounds
+    mdi_model.lod = mdi_m.MDIDiscreteLOD()
+
+    return mdi_model
@@ -0,0 +1,427 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8-80 compliant>
+
+"""Batch Conversion Tests.
+
+Does not need blender or test files, models are synthetic. Example:
+
+    python -m unittest rtcw_et_model_tools.tests.test_batch_conversion
+"""
+
+import unittest
+import multiprocessing
+import tempfile
+import zipfile
+import json
+import time
+import os
+
+import rtcw_et_model_tools.common.batch_conversion as batch_conversion_m
+import rtcw_et_model_tools.common.reporter as reporter_m
+import rtcw_et_model_tools.tests.synthetic_models as synthetic_m
+
+
+class _CrashingJob(batch_conversion_m.BatchJob):
+    """Job which terminates the worker process converting it.
+    """
+
+    def __setstate__(self, state):
+
+        self.__dict__.update(state)
+        if multiprocessing.parent_process() is not None:
+            os._exit(1)
+
+
+class _DelayedJob(batch_conversion_m.BatchJob):
+    """Job which keeps the worker process converting it busy for a while.
+    """
+
+    def __init__(self, job, delay):
+
+        super().__init__(job.name, job.source_paths, job.target_paths,
+                         job.pk3_path)
+        self.delay = delay
+
+    def __setstate__(self, state):
+
+        self.__dict__.update(state)
+        if multiprocessing.parent_process() is not None:
+            time.sleep(self.delay)
+
+
+class TestBatchConversion(unittest.TestCase):
+    """Batch Conversion Tests.
+    """
+
+    def setUp(self):
+
+        reporter_m.reset_state()
+
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.source_dir = os.path.join(self.temp_dir.name, "source")
+        self.target_dir = os.path.join(self.temp_dir.name, "target")
+
+    def tearDown(self):
+
+        self.temp_dir.cleanup()
+
+    def _write_file(self, name, data = b"", source_dir = None):
+
+        file_path = os.path.join(source_dir or self.source_dir,
+                                 *name.split("/"))
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, 'wb') as file:
+            file.write(data)
+
+        return file_path
+
+    def _write_md3(self, name, seed = 0, source_dir = None):
+
+        import rtcw_et_model_tools.md3.facade as md3_facade_m
+
+        mdi_model = synthetic_m.create_morph_model(seed=seed, side=3,
+                                                   num_frames=2)
+        return self._write_file(name, md3_facade_m.write_bytes(mdi_model),
+                                source_dir)
+
+    def _write_mdmmdx(self, stem, seed = 0):
+
+        import rtcw_et_model_tools.mdmmdx.facade as mdmmdx_facade_m
+
+        mdi_model = synthetic_m.create_skeletal_model(seed=seed, side=3,
+                                                      num_frames=2)
+        data_mdm, data_mdx = mdmmdx_facade_m.write_bytes(mdi_model, 0)
+        self._write_file("{}.mdm".format(stem), data_mdm)
+        self._write_file("{}.mdx".format(stem), data_mdx)
+
+    def _write_pk3(self, file_path, members):
+
+        with zipfile.ZipFile(file_path, 'w') as zip_file:
+            for name, data in members:
+                zip_file.writestr(zipfile.ZipInfo(name), data)
+
+        return file_path
+
+    def test_mdm_mdx_pairing(self):
+        """MDM files are paired with the MDX file of the same name, case
+        insensitive, unpaired files are skipped.
+        """
+
+        self._write_file("models/a/body.mdm")
+        self._write_file("models/a/BODY.MDX")
+        self._write_file("models/a/head.mdm")
+        self._write_file("models/a/legs.mdx")
+
+        # members of a pk3 file are only paired with members of the same one
+        self._write_pk3(os.path.join(self.source_dir, "pak0.pk3"),
+                        [("models/b/hand.mdm", b""),
+                         ("models/b/hand.mdx", b""),
+                         ("models/b/foot.mdm", b"")])
+        self._write_pk3(os.path.join(self.source_dir, "pak1.pk3"),
+                        [("models/b/foot.mdx", b"")])
+
+        jobs, skipped = batch_conversion_m.find_jobs([self.source_dir],
+                                                     self.target_dir,
+                                                     "mdmmdx", "md3")
+
+        # pk3 files directly in a directory are found before subdirectories
+        self.assertEqual([job.name for job in jobs],
+                         ["models/b/hand.mdm", "models/a/body.mdm"])
+        self.assertEqual(sorted(skipped),
+                         ["models/a/head.mdm", "models/a/legs.mdx",
+                          "models/b/foot.mdm", "models/b/foot.mdx"])
+
+        body_job = jobs[1]
+        self.assertEqual([os.path.basename(path)
+                          for path in body_job.source_paths],
+                         ["body.mdm", "BODY.MDX"])
+        self.assertEqual(body_job.target_paths,
+                         [os.path.join(self.target_dir, "models", "a",
+                                       "body.md3")])
+
+        hand_job = jobs[0]
+        self.assertEqual(hand_job.source_paths,
+                         ["models/b/hand.mdm", "models/b/hand.mdx"])
+        self.assertTrue(hand_job.pk3_path.endswith("pak0.pk3"))
+
+    def test_later_source_overrides(self):
+        """A model found again under the same name, case insensitive, replaces
+        the one found before.
+        """
+
+        other_dir = os.path.join(self.temp_dir.name, "other")
+
+        self._write_file("models/a/x.md3")
+        self._write_file("models/a/y.md3")
+        self._write_file("models/a/X.MD3", source_dir=other_dir)
+
+        pk3_path = self._write_pk3(os.path.join(self.temp_dir.name,
+                                                "zz.pk3"),
+                                   [("models/a/Y.md3", b"")])
+
+        jobs, skipped = batch_conversion_m.find_jobs(
+            [self.source_dir, other_dir, pk3_path], self.target_dir, "md3",
+            "mdc")
+
+        # a replaced model moves to where it was found last
+        self.assertEqual(skipped, [])
+        self.assertEqual([job.name for job in jobs],
+                         ["models/a/X.MD3", "models/a/Y.md3"])
+
+        self.assertEqual(jobs[0].source_paths,
+                         [os.path.join(other_dir, "models", "a", "X.MD3")])
+        self.assertEqual(jobs[0].target_paths,
+                         [os.path.join(self.target_dir, "models", "a",
+                                       "X.mdc")])
+        self.assertEqual(jobs[1].pk3_path, pk3_path)
+        self.assertEqual(jobs[1].source_paths, ["models/a/Y.md3"])
+
+    def test_pk3_names_stay_inside_target_dir(self):
+        """Member names with '..' or a leading '/' are written inside the
+        target directory.
+        """
+
+        pk3_path = os.path.join(self.temp_dir.name, "evil.pk3")
+        self._write_pk3(pk3_path, [("../../escape.md3", b""),
+                                   ("/absolute/path.md3", b""),
+                                   ("models/./a/../b.md3", b"")])
+
+        jobs, _ = batch_conversion_m.find_jobs([pk3_path], self.target_dir,
+                                               "md3", "md3")
+        self.assertEqual(len(jobs), 3)
+
+        target_dir = os.path.realpath(self.target_dir)
+        for job in jobs:
+
+            target_path = os.path.realpath(job.target_paths[0])
+            self.assertEqual(os.path.commonpath([target_dir, target_path]),
+                             target_dir)
+
+        self.assertEqual(sorted(job.target_paths[0] for job in jobs),
+                         sorted([os.path.join(self.target_dir, "absolute",
+                                              "path.md3"),
+                                 os.path.join(self.target_dir, "escape.md3"),
+                                 os.path.join(self.target_dir, "models", "a",
+                                              "b.md3")]))
+
+        jobs, _ = batch_conversion_m.find_jobs([pk3_path], None, "md3", "md3")
+        self.assertEqual(sorted(job.target_paths[0] for job in jobs),
+                         ["absolute/path.md3", "escape.md3",
+                          "models/a/b.md3"])
+
+    def test_convert_datas(self):
+        """Converting in memory gives the same bytes as converting files.
+        """
+
+        source_path = self._write_md3("models/a/x.md3")
+        target_path = os.path.join(self.temp_dir.name, "x.mdc")
+
+        options = batch_conversion_m.BatchOptions("md3", "mdc")
+        batch_conversion_m.convert_files([source_path], [target_path],
+                                         options)
+
+        with open(source_path, 'rb') as file:
+            source_data = file.read()
+        with open(target_path, 'rb') as file:
+            target_data = file.read()
+
+        self.assertEqual(batch_conversion_m.convert_datas([source_data],
+                                                          options, "x.md3"),
+                         [target_data])
+
+        options = batch_conversion_m.BatchOptions("md3", "mds")
+        with self.assertRaises(Exception):
+            batch_conversion_m.convert_datas([source_data], options)
+
+    def test_failed_model_is_isolated(self):
+        """A model which fails to convert is reported, the others are still
+        converted.
+        """
+
+        self._write_md3("models/a/good_1.md3", seed=1)
+        self._write_file("models/a/broken.md3", b"IDP3 garbage")
+        self._write_md3("models/a/good_2.md3", seed=2)
+
+        jobs, _ = batch_conversion_m.find_jobs([self.source_dir],
+                                               self.target_dir, "md3", "mdc")
+        options = batch_conversion_m.BatchOptions("md3", "mdc")
+
+        arrived = []
+        results = batch_conversion_m.run(jobs, options, num_workers=2,
+                                         callback=arrived.append)
+
+        self.assertEqual(len(results), 3)
+        self.assertEqual(arrived, results)
+
+        errors = {result.job.name: result.error for result in results}
+        self.assertIsNotNone(errors.pop("models/a/broken.md3"))
+        self.assertEqual(errors, {"models/a/good_1.md3": None,
+                                  "models/a/good_2.md3": None})
+
+        model_dir = os.path.join(self.target_dir, "models", "a")
+        self.assertEqual(sorted(os.listdir(model_dir)),
+                         ["good_1.mdc", "good_2.mdc"])
+
+    def test_worker_crash_is_isolated(self):
+        """A worker process which terminates abruptly fails only the model
+        it was converting, models converted next to it are retried.
+        """
+
+        for num_model in range(4):
+            self._write_md3("models/a/m{}.md3".format(num_model),
+                            seed=num_model)
+
+        jobs, _ = batch_conversion_m.find_jobs([self.source_dir],
+                                               self.target_dir, "md3", "md3")
+        crashing_job = jobs[1]
+        jobs[1] = _CrashingJob(crashing_job.name, crashing_job.source_paths,
+                               crashing_job.target_paths)
+
+        options = batch_conversion_m.BatchOptions("md3", "md3")
+        results = batch_conversion_m.run(jobs, options, num_workers=2)
+
+        errors = {result.job.name: result.error for result in results}
+        self.assertEqual(errors, {
+            "models/a/m0.md3": None,
+            "models/a/m1.md3": "Worker process terminated abruptly.",
+            "models/a/m2.md3": None,
+            "models/a/m3.md3": None,
+        })
+
+        model_dir = os.path.join(self.target_dir, "models", "a")
+        self.assertEqual(sorted(os.listdir(model_dir)),
+                         ["m0.md3", "m2.md3", "m3.md3"])
+
+    def test_pk3_order(self):
+        """Models are added to a pk3 file in the order of the jobs, also if
+        they finish converting in another order.
+        """
+
+        import rtcw_et_model_tools.common.pk3_writer as pk3_writer_m
+
+        num_models = 4
+        for num_model in range(num_models):
+            self._write_md3("models/a/m{}.md3".format(num_model),
+                            seed=num_model)
+        self._write_file("models/a/m2_broken.md3", b"IDP3 garbage")
+
+        options = batch_conversion_m.BatchOptions("md3", "mdc")
+
+        def find_delayed_jobs(target_dir):
+
+            jobs, _ = batch_conversion_m.find_jobs([self.source_dir],
+                                                   target_dir, "md3", "mdc")
+
+            # the first job finishes last
+            return [_DelayedJob(job, 1.0 if num_job == 0 else 0.0)
+                    for num_job, job in enumerate(jobs)]
+
+        jobs = find_delayed_jobs(self.target_dir)
+        arrived = []
+        batch_conversion_m.run(jobs, options, num_workers=len(jobs),
+                               callback=arrived.append)
+        self.assertEqual(arrived[-1].job.name, jobs[0].name)
+
+        jobs = find_delayed_jobs(None)
+        pk3_path = os.path.join(self.temp_dir.name, "models.pk3")
+        arrived = []
+        with pk3_writer_m.PK3Writer(pk3_path) as pk3_writer:
+            results = batch_conversion_m.run(jobs, options,
+                                             num_workers=len(jobs),
+                                             callback=arrived.append,
+                                             pk3_writer=pk3_writer)
+
+        self.assertEqual([result.job.name for result in results],
+                         [job.name for job in jobs])
+        self.assertEqual(arrived, results)
+        self.assertEqual([result.job.name for result in results
+                          if result.error],
+                         ["models/a/m2_broken.md3"])
+
+        with zipfile.ZipFile(pk3_path, 'r') as zip_file:
+            self.assertEqual(zip_file.namelist(),
+                             ["models/a/m0.mdc", "models/a/m1.mdc",
+                              "models/a/m2.mdc", "models/a/m3.mdc"])
+
+    def test_main(self):
+        """Exit codes and the json report of the command line.
+        """
+
+        self._write_md3("models/a/x.md3", seed=1)
+        self._write_mdmmdx("models/b/body", seed=2)
+        self._write_file("models/b/head.mdm")
+
+        report_path = os.path.join(self.temp_dir.name, "report.json")
+        exit_code = batch_conversion_m.main(
+            ["--from", "mdmmdx", "--to", "md3", "-o", self.target_dir,
+             "-j", "1", "--report", report_path, self.source_dir])
+        self.assertEqual(exit_code, 0)
+
+        with open(report_path, 'r') as file:
+            report = json.load(file)
+
+        self.assertEqual(report["converted"], 1)
+        self.assertEqual(report["failed"], 0)
+        self.assertEqual(report["skipped"], ["models/b/head.mdm"])
+        self.assertEqual(report["up_to_date"], [])
+        self.assertEqual(len(report["models"]), 1)
+
+        model = report["models"][0]
+        self.assertEqual(model["name"], "models/b/body.mdm")
+        self.assertIsNone(model["pk3"])
+        self.assertIsNone(model["error"])
+        self.assertEqual(model["targets"],
+                         [os.path.join(self.target_dir, "models", "b",
+                                       "body.md3")])
+        self.assertTrue(os.path.isfile(model["targets"][0]))
+
+        # a failed model fails the run
+        self._write_file("models/a/broken.md3", b"IDP3 garbage")
+        exit_code = batch_conversion_m.main(
+            ["--from", "md3", "--to", "md3", "-o", self.target_dir,
+             "-j", "1", "--report", report_path, self.source_dir])
+        self.assertEqual(exit_code, 1)
+
+        with open(report_path, 'r') as file:
+            report = json.load(file)
+
+        self.assertEqual((report["converted"], report["failed"]), (1, 1))
+        errors = {model["name"]: model["error"]
+                  for model in report["models"]}
+        self.assertIsNone(errors["models/a/x.md3"])
+        self.assertIsNotNone(errors["models/a/broken.md3"])
+
+        # a missing source fails before converting
+        missing_dir = os.path.join(self.temp_dir.name, "missing")
+        exit_code = batch_conversion_m.main(
+            ["--from", "md3", "--to", "md3", "-o", self.target_dir,
+             missing_dir])
+        self.assertEqual(exit_code, 1)
+
+        # invalid arguments exit like any argparse program
+        with self.assertRaises(SystemExit) as context:
+            batch_conversion_m.main(
+                ["--from", "md3", "--to", "mds", "-o", self.target_dir,
+                 self.source_dir])
+        self.assertEqual(context.exception.code, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
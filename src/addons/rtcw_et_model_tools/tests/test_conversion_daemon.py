@@ -0,0 +1,359 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8-80 compliant>
+
+"""Conversion Daemon Tests.
+
+Does not need blender or test files, models are synthetic. Example:
+
+    python -m unittest rtcw_et_model_tools.tests.test_conversion_daemon
+"""
+
+import unittest
+import multiprocessing
+import concurrent.futures
+import threading
+import tempfile
+import socket
+import select
+import json
+import time
+import os
+
+import rtcw_et_model_tools.common.conversion_daemon as conversion_daemon_m
+import rtcw_et_model_tools.common.reporter as reporter_m
+import rtcw_et_model_tools.tests.synthetic_models as synthetic_m
+
+_timeout = 60.0
+
+
+def _init_held_worker(verbose, release):
+    """Worker processes start converting once released.
+    """
+
+    release.wait()
+    conversion_daemon_m._init_worker(verbose)
+
+
+class _HeldDaemon(conversion_daemon_m.ConversionDaemon):
+    """Daemon whose conversions are held in progress until released.
+    """
+
+    def __init__(self, socket_path, max_pending, release):
+
+        super().__init__(socket_path, num_workers=1, max_pending=max_pending)
+        self.release = release
+
+    def _create_executor(self):
+
+        return concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.num_workers,
+            initializer=_init_held_worker,
+            initargs=(self.verbose, self.release))
+
+
+class _Connection:
+    """Client connection sending requests, responses are read in order of
+    arrival.
+    """
+
+    def __init__(self, socket_path):
+
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.socket.settimeout(_timeout)
+        self.socket.connect(socket_path)
+        self.file = self.socket.makefile('rb')
+
+    def send_line(self, line):
+
+        self.socket.sendall(line + b"\n")
+
+    def send(self, request):
+
+        self.send_line(json.dumps(request).encode("utf-8"))
+
+    def receive(self):
+
+        line = self.file.readline()
+        if not line:
+            raise Exception("Connection closed by daemon")
+        return json.loads(line.decode("utf-8"))
+
+    def is_answered(self):
+
+        readable, _, _ = select.select([self.socket], [], [], 0.2)
+        return bool(readable)
+
+    def close(self):
+
+        self.file.close()
+        self.socket.close()
+
+
+class TestConversionDaemon(unittest.TestCase):
+    """Conversion Daemon Tests.
+    """
+
+    def setUp(self):
+
+        reporter_m.reset_state()
+
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self.temp_dir.name, "remt.sock")
+        self.release = multiprocessing.Event()
+
+    def tearDown(self):
+
+        self.temp_dir.cleanup()
+
+    def _write_md3(self, name):
+
+        import rtcw_et_model_tools.md3.facade as md3_facade_m
+
+        file_path = os.path.join(self.temp_dir.name, name)
+        md3_facade_m.write(synthetic_m.create_morph_model(side=3,
+                                                          num_frames=3),
+                           file_path)
+
+        return file_path
+
+    def _convert_request(self, request_id, name):
+
+        return {"id": request_id, "op": "convert", "source_format": "md3",
+                "target_format": "mdc",
+                "sources": [self._write_md3("{}.md3".format(name))],
+                "targets": [os.path.join(self.temp_dir.name, "out",
+                                         "{}.mdc".format(name))]}
+
+    def _request(self, request):
+
+        return conversion_daemon_m.send_request(self.socket_path, request,
+                                                timeout=_timeout)
+
+    def _serve(self, client, max_pending = 64):
+        """Runs the daemon, and the client in a thread of its own. The
+        client shuts the daemon down.
+        """
+
+        daemon = _HeldDaemon(self.socket_path, max_pending, self.release)
+        errors = []
+
+        def run_client():
+
+            try:
+
+                start_time = time.time()
+                while not os.path.exists(self.socket_path):
+                    if time.time() - start_time > _timeout:
+                        raise Exception("Daemon did not start")
+                    time.sleep(0.01)
+
+                client()
+
+            except BaseException as error:
+
+                # the daemon runs its own event loop, ask it like a client
+                errors.append(error)
+                self.release.set()
+                try:
+                    self._request({"op": "shutdown"})
+                except Exception:
+                    pass
+
+        client_thread = threading.Thread(target=run_client)
+        client_thread.start()
+        try:
+            daemon.run()
+        finally:
+            client_thread.join()
+
+        if errors:
+            raise errors[0]
+
+        self.assertFalse(os.path.exists(self.socket_path))
+
+        return daemon
+
+    def test_requests(self):
+        """Conversions, probes, statistics and errors.
+        """
+
+        self.release.set()
+        request = self._convert_request(1, "a")
+
+        def client():
+
+            response = self._request({"id": 0, "op": "ping"})
+            self.assertEqual(response, {"id": 0, "ok": True,
+                                        "result": {"pid": os.getpid()}})
+
+            response = self._request(request)
+            self.assertEqual(response["id"], 1)
+            self.assertTrue(response["ok"], response)
+            self.assertIsInstance(response["result"]["warnings"], list)
+            self.assertTrue(os.path.isfile(request["targets"][0]))
+
+            response = self._request({"id": 2, "op": "probe",
+                                      "path": request["targets"][0]})
+            self.assertTrue(response["ok"], response)
+            result = response["result"]
+            self.assertEqual(result["format"], "mdc")
+            self.assertEqual(result["header"]["num_frames"], 3)
+            self.assertEqual(result["size"],
+                             os.path.getsize(request["targets"][0]))
+
+            # errors are answered, the daemon keeps serving
+            response = self._request({"id": 3, "op": "probe",
+                                      "path": "relative.md3"})
+            self.assertEqual(response["id"], 3)
+            self.assertFalse(response["ok"])
+
+            bad_request = dict(request, id=4, sources=["a.md3"])
+            response = self._request(bad_request)
+            self.assertFalse(response["ok"])
+            self.assertIn("absolute", response["error"])
+
+            bad_request = dict(request, id=5, target_format="mds")
+            response = self._request(bad_request)
+            self.assertFalse(response["ok"])
+
+            response = self._request({"id": 6, "op": "unknown"})
+            self.assertFalse(response["ok"])
+
+            # malformed lines on a connection which is still used afterwards
+            connection = _Connection(self.socket_path)
+            try:
+
+                connection.send_line(b"{not json")
+                self.assertEqual(connection.receive()["ok"], False)
+                connection.send_line(b"[7]")
+                response = connection.receive()
+                self.assertEqual(response["ok"], False)
+                self.assertIsNone(response["id"])
+                connection.send({"id": 8, "op": "ping"})
+                self.assertEqual(connection.receive()["id"], 8)
+
+            finally:
+
+                connection.close()
+
+            response = self._request({"id": 9, "op": "stats"})
+            self.assertTrue(response["ok"])
+            result = response["result"]
+            self.assertEqual(result["num_served"], 10)
+            self.assertEqual(result["num_failed"], 6)
+            self.assertEqual(result["num_pending"], 0)
+            self.assertEqual(result["num_workers"], 1)
+
+            response = self._request({"id": 10, "op": "shutdown"})
+            self.assertEqual(response, {"id": 10, "ok": True, "result": {}})
+
+        daemon = self._serve(client)
+        self.assertEqual(daemon.num_served, 12)
+
+    def _wait_pending(self, num_pending):
+
+        start_time = time.time()
+        while time.time() - start_time < _timeout:
+
+            response = self._request({"op": "stats"})
+            if response["result"]["num_pending"] == num_pending:
+                return
+            time.sleep(0.01)
+
+        raise Exception("Conversions not pending")
+
+    def test_max_pending(self):
+        """Conversions beyond max_pending are rejected right away.
+        """
+
+        def client():
+
+            connection = _Connection(self.socket_path)
+            try:
+
+                connection.send(self._convert_request(1, "a"))
+                connection.send(self._convert_request(2, "b"))
+                self._wait_pending(2)
+
+                response = self._request(self._convert_request(3, "c"))
+                self.assertEqual(response["id"], 3)
+                self.assertFalse(response["ok"])
+                self.assertIn("Busy", response["error"])
+
+                self.release.set()
+                responses = [connection.receive(), connection.receive()]
+                self.assertEqual(sorted(response["id"]
+                                        for response in responses), [1, 2])
+                for response in responses:
+                    self.assertTrue(response["ok"], response)
+
+                # free again
+                response = self._request(self._convert_request(4, "d"))
+                self.assertTrue(response["ok"], response)
+
+            finally:
+
+                connection.close()
+
+            self._request({"op": "shutdown"})
+
+        self._serve(client, max_pending=2)
+
+        self.assertFalse(os.path.exists(os.path.join(self.temp_dir.name,
+                                                     "out", "c.mdc")))
+
+    def test_shutdown(self):
+        """Conversions in progress are finished and answered on shutdown.
+        """
+
+        request = self._convert_request(1, "a")
+
+        def client():
+
+            connection = _Connection(self.socket_path)
+            try:
+
+                connection.send(request)
+                self._wait_pending(1)
+
+                response = self._request({"id": 2, "op": "shutdown"})
+                self.assertEqual(response, {"id": 2, "ok": True,
+                                            "result": {}})
+                self.assertFalse(connection.is_answered())
+
+                self.release.set()
+                response = connection.receive()
+                self.assertEqual(response["id"], 1)
+                self.assertTrue(response["ok"], response)
+
+                # the daemon hangs up once all requests are answered
+                self.assertEqual(connection.file.readline(), b"")
+
+            finally:
+
+                connection.close()
+
+        self._serve(client)
+
+        self.assertTrue(os.path.isfile(request["targets"][0]))
+
+
+if __name__ == "__main__":
+    unittest.main()
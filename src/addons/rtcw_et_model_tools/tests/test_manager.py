@@ -26,6 +26,16 @@ import sys
 
 import rtcw_et_model_tools.tests.test_read_write
 import rtcw_et_model_tools.tests.test_direct_conversion
+import rtcw_et_model_tools.tests.test_pk3_writer
+import rtcw_et_model_tools.tests.test_math_backend
+import rtcw_et_model_tools.tests.test_batch_conversion
+import rtcw_et_model_tools.tests.test_manifest
+import rtcw_et_model_tools.tests.test_mdc
+import rtcw_et_model_tools.tests.test_vfs
+import rtcw_et_model_tools.tests.test_conversion_daemon
+import rtcw_et_model_tools.tests.test_unzip_pk3s
+import rtcw_et_model_tools.tests.test_mdi
+import rtcw_et_model_tools.tests.test_mapped_array
 
 
 class TestParameters:
@@ -67,6 +77,17 @@ class TestManager:
                rtcw_et_model_tools.tests.test_read_write. \
                    TestReadWrite('test_binary_read_write')
             )
+            suite.addTest(
+               rtcw_et_model_tools.tests.test_read_write. \
+                   TestReadWrite('test_bytes_read_write')
+            )
+
+        elif test_name == "test_bytes_read_write":
+
+            suite.addTest(
+               rtcw_et_model_tools.tests.test_read_write. \
+                   TestReadWrite('test_bytes_read_write')
+            )
 
         elif test_name == "test_direct_conversion":
 
@@ -75,6 +96,94 @@ class TestManager:
                    TestDirectConversion('test_direct_conversion')
             )
 
+        elif test_name == "test_pk3_writer":
+
+            suite.addTest(
+               unittest.defaultTestLoader.loadTestsFromTestCase(
+                   rtcw_et_model_tools.tests.test_pk3_writer.TestPK3Writer)
+            )
+
+        elif test_name == "test_math_backend":
+
+            suite.addTest(
+               unittest.defaultTestLoader.loadTestsFromTestCase(
+                   rtcw_et_model_tools.tests.test_math_backend.TestMathBackend)
+            )
+
+        elif test_name == "test_batch_conversion":
+
+            suite.addTest(
+               unittest.defaultTestLoader.loadTestsFromTestCase(
+                   rtcw_et_model_tools.tests.test_batch_conversion. \
+                       TestBatchConversion)
+            )
+
+        elif test_name == "test_manifest":
+
+            suite.addTest(
+               unittest.defaultTestLoader.loadTestsFromTestCase(
+                   rtcw_et_model_tools.tests.test_manifest.TestManifest)
+            )
+
+        elif test_name == "test_mdc":
+
+            suite.addTest(
+               unittest.defaultTestLoader.loadTestsFromTestCase(
+                   rtcw_et_model_tools.tests.test_mdc.TestMDCBaseFrames)
+            )
+            suite.addTest(
+               unittest.defaultTestLoader.loadTestsFromTestCase(
+                   rtcw_et_model_tools.tests.test_mdc.TestMDCCompFrames)
+            )
+
+        elif test_name == "test_vfs":
+
+            suite.addTest(
+               unittest.defaultTestLoader.loadTestsFromTestCase(
+                   rtcw_et_model_tools.tests.test_vfs.TestVFS)
+            )
+
+        elif test_name == "test_conversion_daemon":
+
+            suite.addTest(
+               unittest.defaultTestLoader.loadTestsFromTestCase(
+                   rtcw_et_model_tools.tests.test_conversion_daemon. \
+                       TestConversionDaemon)
+            )
+
+        elif test_name == "test_unzip_pk3s":
+
+            suite.addTest(
+               unittest.defaultTestLoader.loadTestsFromTestCase(
+                   rtcw_et_model_tools.tests.test_unzip_pk3s.TestUnzipPK3s)
+            )
+
+        elif test_name == "test_mdi":
+
+            suite.addTest(
+               unittest.defaultTestLoader.loadTestsFromTestCase(
+                   rtcw_et_model_tools.tests.test_mdi.TestMDIVertexWeights)
+            )
+            suite.addTest(
+               unittest.defaultTestLoader.loadTestsFromTestCase(
+                   rtcw_et_model_tools.tests.test_mdi.TestMDIMorphFrames)
+            )
+            suite.addTest(
+               unittest.defaultTestLoader.loadTestsFromTestCase(
+                   rtcw_et_model_tools.tests.test_mdi.TestMDIStaticFrames)
+            )
+            suite.addTest(
+               unittest.defaultTestLoader.loadTestsFromTestCase(
+                   rtcw_et_model_tools.tests.test_mdi.TestMDIFrameSelection)
+            )
+
+        elif test_name == "test_mapped_array":
+
+            suite.addTest(
+               unittest.defaultTestLoader.loadTestsFromTestCase(
+                   rtcw_et_model_tools.tests.test_mapped_array.TestMappedArray)
+            )
+
         else:
 
             pass
@@ -0,0 +1,307 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8-80 compliant>
+
+"""Manifest Tests.
+
+Does not need blender or test files, models are synthetic. Example:
+
+    python -m unittest rtcw_et_model_tools.tests.test_manifest
+"""
+
+import unittest
+import unittest.mock
+import multiprocessing
+import tempfile
+import json
+import os
+
+import rtcw_et_model_tools
+import rtcw_et_model_tools.common.manifest as manifest_m
+import rtcw_et_model_tools.common.batch_conversion as batch_conversion_m
+import rtcw_et_model_tools.common.reporter as reporter_m
+import rtcw_et_model_tools.tests.synthetic_models as synthetic_m
+
+_num_concurrent_updates = 200
+
+
+def _update_concurrently(manifest_path, target_dir, name, barrier):
+    """Runs in a process of its own, writes a row per target.
+    """
+
+    with manifest_m.Manifest(manifest_path) as manifest:
+
+        barrier.wait()
+
+        for num_target in range(_num_concurrent_updates):
+
+            target_path = os.path.join(target_dir,
+                                       "{}_{}.md3".format(name, num_target))
+            with open(target_path, 'wb') as file:
+                file.write(name.encode("utf-8"))
+
+            manifest.update([target_path], "{}_{}".format(name, num_target))
+
+
+class TestManifest(unittest.TestCase):
+    """Manifest Tests.
+    """
+
+    def setUp(self):
+
+        reporter_m.reset_state()
+
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.source_dir = os.path.join(self.temp_dir.name, "source")
+        self.target_dir = os.path.join(self.temp_dir.name, "target")
+        self.manifest_path = os.path.join(self.temp_dir.name, "manifest.db")
+        self.report_path = os.path.join(self.temp_dir.name, "report.json")
+
+        os.makedirs(self.source_dir)
+        os.makedirs(self.target_dir)
+
+    def tearDown(self):
+
+        self.temp_dir.cleanup()
+
+    def _write_md3(self, name, seed = 0):
+
+        import rtcw_et_model_tools.md3.facade as md3_facade_m
+
+        mdi_model = synthetic_m.create_morph_model(seed=seed, side=3,
+                                                   num_frames=2)
+        file_path = os.path.join(self.source_dir, name)
+        with open(file_path, 'wb') as file:
+            file.write(md3_facade_m.write_bytes(mdi_model))
+
+        return file_path
+
+    def _write_target(self, name, data = b"target"):
+
+        target_path = os.path.join(self.target_dir, name)
+        with open(target_path, 'wb') as file:
+            file.write(data)
+
+        return target_path
+
+    def _run(self, *args):
+        """Runs an incremental batch conversion, returns the names of the
+        converted and the up to date models.
+        """
+
+        argv = ["--from", "md3", "--to", "mdc", "-o", self.target_dir,
+                "-j", "1", "--manifest", self.manifest_path,
+                "--report", self.report_path]
+        argv.extend(args)
+        argv.append(self.source_dir)
+
+        batch_conversion_m.main(argv)
+
+        with open(self.report_path, 'r') as file:
+            report = json.load(file)
+
+        converted = sorted(model["name"] for model in report["models"]
+                           if not model["error"])
+        return (converted, sorted(report["up_to_date"]))
+
+    @staticmethod
+    def _bump_mtime(file_path):
+
+        stat = os.stat(file_path)
+        os.utime(file_path, ns=(stat.st_atime_ns,
+                                stat.st_mtime_ns + 1000000000))
+
+    def test_second_run_skips(self):
+        """A second run converts nothing.
+        """
+
+        self._write_md3("a.md3", seed=1)
+        self._write_md3("b.md3", seed=2)
+
+        self.assertEqual(self._run(), (["a.md3", "b.md3"], []))
+        self.assertEqual(self._run(), ([], ["a.md3", "b.md3"]))
+
+        # --force converts anyway
+        self.assertEqual(self._run("--force"), (["a.md3", "b.md3"], []))
+
+    def test_changes_force_reconversion(self):
+        """Changing an input, an option or the tool version converts again.
+        """
+
+        self._write_md3("a.md3", seed=1)
+        self._write_md3("b.md3", seed=2)
+        self._run()
+
+        # a new modification time alone does not, the content is the same
+        self._bump_mtime(os.path.join(self.source_dir, "a.md3"))
+        self.assertEqual(self._run(), ([], ["a.md3", "b.md3"]))
+
+        self._write_md3("a.md3", seed=3)
+        self.assertEqual(self._run(), (["a.md3"], ["b.md3"]))
+
+        self.assertEqual(self._run("--collapse-frame", "1"),
+                         (["a.md3", "b.md3"], []))
+        self.assertEqual(self._run("--collapse-frame", "1"),
+                         ([], ["a.md3", "b.md3"]))
+
+        version = rtcw_et_model_tools.bl_info["version"]
+        with unittest.mock.patch.dict(rtcw_et_model_tools.bl_info,
+                                      {"version": version + (1,)}):
+            self.assertEqual(self._run("--collapse-frame", "1"),
+                             (["a.md3", "b.md3"], []))
+
+    def test_touched_targets(self):
+        """Touching or deleting a target converts again.
+        """
+
+        self._write_md3("a.md3", seed=1)
+        self._write_md3("b.md3", seed=2)
+        self._run()
+
+        self._bump_mtime(os.path.join(self.target_dir, "a.mdc"))
+        os.remove(os.path.join(self.target_dir, "b.mdc"))
+        self.assertEqual(self._run(), (["a.md3", "b.md3"], []))
+        self.assertEqual(self._run(), ([], ["a.md3", "b.md3"]))
+
+        with manifest_m.Manifest(self.manifest_path) as manifest:
+
+            target_paths = [self._write_target("c.mdm"),
+                            self._write_target("c.mdx")]
+            manifest.update(target_paths, "fingerprint")
+            self.assertTrue(manifest.is_up_to_date(target_paths,
+                                                   "fingerprint"))
+            self.assertFalse(manifest.is_up_to_date(target_paths, "other"))
+
+            # each target of a model counts
+            self._write_target("c.mdx", b"changed")
+            self.assertFalse(manifest.is_up_to_date(target_paths,
+                                                    "fingerprint"))
+
+            # targets missing when recorded are not recorded
+            os.remove(target_paths[1])
+            manifest.update(target_paths, "fingerprint")
+            self.assertFalse(manifest.is_up_to_date(target_paths,
+                                                    "fingerprint"))
+
+    def test_failed_conversion_removes_row(self):
+        """A failed conversion forgets about the targets, even if the input
+        is restored afterwards.
+        """
+
+        source_path = self._write_md3("a.md3", seed=1)
+        with open(source_path, 'rb') as file:
+            source_data = file.read()
+        self._run()
+
+        target_path = os.path.abspath(os.path.join(self.target_dir,
+                                                   "a.mdc"))
+
+        def count_rows():
+
+            with manifest_m.Manifest(self.manifest_path) as manifest:
+                return manifest.connection.execute(
+                    "SELECT COUNT(*) FROM outputs WHERE target = ?",
+                    (target_path,)).fetchone()[0]
+
+        self.assertEqual(count_rows(), 1)
+
+        with open(source_path, 'wb') as file:
+            file.write(b"IDP3 garbage")
+        self.assertEqual(self._run(), ([], []))
+        self.assertEqual(count_rows(), 0)
+
+        # the old target is still there, but is not trusted any more
+        self.assertTrue(os.path.isfile(target_path))
+        with open(source_path, 'wb') as file:
+            file.write(source_data)
+        self.assertEqual(self._run(), (["a.md3"], []))
+        self.assertEqual(count_rows(), 1)
+
+    def test_hash_input(self):
+        """Inputs are read again only if their file changed.
+        """
+
+        source_path = self._write_md3("a.md3", seed=1)
+        num_opened = []
+
+        def open_input():
+
+            num_opened.append(1)
+            return open(source_path, 'rb')
+
+        with manifest_m.Manifest(self.manifest_path) as manifest:
+
+            input_hash = manifest.hash_input("a", source_path, open_input)
+            self.assertEqual(manifest.hash_input("a", source_path,
+                                                 open_input), input_hash)
+            self.assertEqual(len(num_opened), 1)
+
+            # inputs are cached by key, e.g. several members of a pk3 file
+            manifest.hash_input("b", source_path, open_input)
+            self.assertEqual(len(num_opened), 2)
+
+            self._write_md3("a.md3", seed=2)
+            self._bump_mtime(source_path)
+            self.assertNotEqual(manifest.hash_input("a", source_path,
+                                                    open_input), input_hash)
+            self.assertEqual(len(num_opened), 3)
+
+        # the cache is persisted
+        with manifest_m.Manifest(self.manifest_path) as manifest:
+
+            manifest.hash_input("a", source_path, open_input)
+            self.assertEqual(len(num_opened), 3)
+
+    def test_concurrent_writers(self):
+        """Two processes write the same manifest at once, no row is lost.
+        """
+
+        # create the database before the processes race to do so
+        manifest_m.Manifest(self.manifest_path).close()
+
+        names = ("first", "second")
+        barrier = multiprocessing.Barrier(len(names))
+        processes = [multiprocessing.Process(target=_update_concurrently,
+                                             args=(self.manifest_path,
+                                                   self.target_dir, name,
+                                                   barrier))
+                     for name in names]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+            self.assertEqual(process.exitcode, 0)
+
+        with manifest_m.Manifest(self.manifest_path) as manifest:
+
+            num_rows = manifest.connection.execute(
+                "SELECT COUNT(*) FROM outputs").fetchone()[0]
+            self.assertEqual(num_rows, len(names) * _num_concurrent_updates)
+
+            for name in names:
+                for num_target in range(_num_concurrent_updates):
+
+                    target_path = os.path.join(
+                        self.target_dir, "{}_{}.md3".format(name, num_target))
+                    self.assertTrue(manifest.is_up_to_date(
+                        [target_path], "{}_{}".format(name, num_target)))
+
+
+if __name__ == "__main__":
+    unittest.main()
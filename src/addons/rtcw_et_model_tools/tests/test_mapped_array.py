@@ -0,0 +1,208 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8-80 compliant>
+
+"""Mapped Array Tests.
+
+Does not need blender or test files, models are synthetic. Example:
+
+    python -m unittest rtcw_et_model_tools.tests.test_mapped_array
+"""
+
+import unittest
+import unittest.mock
+import tempfile
+import os
+
+import numpy as np
+
+import rtcw_et_model_tools.common.mapped_array as mapped_array_m
+import rtcw_et_model_tools.common.reporter as reporter_m
+import rtcw_et_model_tools.tests.synthetic_models as synthetic_m
+
+
+class TestMappedArray(unittest.TestCase):
+    """Mapped Array Tests.
+    """
+
+    def setUp(self):
+
+        reporter_m.reset_state()
+
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+
+        self.temp_dir.cleanup()
+
+    def test_blocks(self):
+        """Blocks cover all rows in order, each within the block size.
+        """
+
+        mapped_array = mapped_array_m.MappedArray(None, (10, 2, 2),
+                                                  np.float32)
+        self.assertEqual(mapped_array.row_size, 16)
+        self.assertEqual(mapped_array.nbytes, 160)
+
+        self.assertEqual(mapped_array.calc_blocks(48),
+                         [(0, 3), (3, 6), (6, 9), (9, 10)])
+        self.assertEqual(mapped_array.calc_blocks(160), [(0, 10)])
+        self.assertEqual(mapped_array.calc_blocks(),
+                         [(0, 10)])
+
+        # a block holds at least one row
+        self.assertEqual(mapped_array.calc_blocks(8),
+                         [(num_row, num_row + 1) for num_row in range(10)])
+
+        with unittest.mock.patch.object(mapped_array_m.MappedArray,
+                                        "block_size", 64):
+            self.assertEqual(mapped_array.calc_blocks(),
+                             [(0, 4), (4, 8), (8, 10)])
+
+        mapped_array = mapped_array_m.MappedArray(None, (0, 3), np.float32)
+        self.assertEqual(mapped_array.calc_blocks(), [])
+
+    def test_scratch(self):
+        """Rows written to a scratch file a block at a time are read back.
+        """
+
+        rng = np.random.default_rng(0)
+        expected = rng.uniform(-1.0, 1.0, size=(25, 4, 3)) \
+            .astype(np.float32)
+
+        mapped_array = mapped_array_m.MappedArray.create_scratch(
+            expected.shape, np.float32, self.temp_dir.name)
+        self.assertEqual(len(mapped_array), 25)
+        np.testing.assert_array_equal(mapped_array[:], np.zeros_like(expected))
+
+        blocks = mapped_array.calc_blocks(7 * mapped_array.row_size)
+        self.assertEqual(len(blocks), 4)
+        for row_start, row_end in blocks:
+            mapped_array[row_start:row_end] = expected[row_start:row_end]
+
+        # the file holds the rows
+        mapped_array.file.seek(0)
+        data = mapped_array.file.read()
+        self.assertEqual(len(data), expected.nbytes)
+        np.testing.assert_array_equal(
+            np.frombuffer(data, dtype=np.float32).reshape(expected.shape),
+            expected)
+
+        np.testing.assert_array_equal(mapped_array[:], expected)
+        np.testing.assert_array_equal(mapped_array[3], expected[3])
+        np.testing.assert_array_equal(mapped_array[-1], expected[-1])
+        np.testing.assert_array_equal(mapped_array[5:9], expected[5:9])
+        np.testing.assert_array_equal(mapped_array[20:40], expected[20:])
+        np.testing.assert_array_equal(mapped_array[5:9, 1:3, 2],
+                                      expected[5:9, 1:3, 2])
+        np.testing.assert_array_equal(mapped_array[7, 2], expected[7, 2])
+        self.assertEqual(mapped_array[9:5].shape, (0, 4, 3))
+
+        # rows read are copies, rows written replace only their range
+        rows = mapped_array[10:12]
+        rows[...] = 0.0
+        np.testing.assert_array_equal(mapped_array[10:12], expected[10:12])
+
+        mapped_array[-2] = 1.0
+        expected[-2] = 1.0
+        mapped_array[0:0] = 2.0
+        np.testing.assert_array_equal(mapped_array[:], expected)
+
+        with self.assertRaises(IndexError):
+            mapped_array[25]
+        with self.assertRaises(IndexError):
+            mapped_array[-26]
+        with self.assertRaises(Exception):
+            mapped_array[0:10:2]
+
+        mapped_array.file.close()
+
+    def test_file(self):
+        """Arrays of files start at an offset, read only arrays can't be
+        written.
+        """
+
+        expected = np.arange(24, dtype=np.int16).reshape(6, 4)
+        header = b"header"
+
+        file_path = os.path.join(self.temp_dir.name, "rows.bin")
+        with open(file_path, 'wb') as file:
+            file.write(header + expected.tobytes() + b"end")
+
+        mapped_array = mapped_array_m.MappedArray(file_path, (6, 4),
+                                                  np.int16, len(header))
+        np.testing.assert_array_equal(mapped_array[:], expected)
+        with self.assertRaises(ValueError):
+            mapped_array[1:2] = 0
+
+        mapped_array = mapped_array_m.MappedArray(file_path, (6, 4),
+                                                  np.int16, len(header),
+                                                  mode='r+')
+        mapped_array[4:6] = -1
+        expected[4:6] = -1
+
+        with open(file_path, 'rb') as file:
+            data = file.read()
+        self.assertEqual(data, header + expected.tobytes() + b"end")
+
+    def test_mapped_frames(self):
+        """Frames read out of core a block at a time are those read into
+        memory, and are written to the same MD3 file.
+        """
+
+        import rtcw_et_model_tools.md3.facade as md3_facade_m
+
+        file_path = os.path.join(self.temp_dir.name, "synthetic.md3")
+        md3_facade_m.write(synthetic_m.create_morph_model(seed=6, side=6,
+                                                          num_frames=9),
+                           file_path)
+        mdi_model = md3_facade_m.read(file_path, 0)
+
+        # 2 frames of 2 arrays of 36 vertices of 3 floats per block
+        block_size = 2 * 2 * 36 * 3 * 4
+        with unittest.mock.patch.object(mapped_array_m.MappedArray,
+                                        "block_size", block_size):
+
+            mapped_model = md3_facade_m.read(file_path, 0, out_of_core=True,
+                                             scratch_dir=self.temp_dir.name)
+
+            for mdi_surface, mapped_surface in zip(mdi_model.surfaces,
+                                                   mapped_model.surfaces):
+
+                self.assertTrue(mapped_surface.is_out_of_core())
+                mdi_mapped_frames = \
+                    mapped_surface.vertices[0].locations.morph_frames
+                self.assertEqual(mdi_mapped_frames.calc_frame_blocks(),
+                                 [(0, 2), (2, 4), (4, 6), (6, 8), (8, 9)])
+
+                np.testing.assert_array_equal(
+                    mapped_surface.calc_morph_locations(9),
+                    mdi_surface.calc_morph_locations(9))
+                np.testing.assert_array_equal(
+                    mapped_surface.calc_morph_normals(9),
+                    mdi_surface.calc_morph_normals(9))
+
+            data = md3_facade_m.write_bytes(mapped_model,
+                                            scratch_dir=self.temp_dir.name)
+
+        self.assertEqual(data, md3_facade_m.write_bytes(mdi_model))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,393 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8-80 compliant>
+
+"""Math Backend Tests.
+
+Compares the pure python types of math_python with mathutils on random
+inputs, for the operations the core uses. Needs mathutils, not blender.
+Example:
+
+    python -m unittest rtcw_et_model_tools.tests.test_math_backend
+"""
+
+import unittest
+import tempfile
+import subprocess
+import random
+import math
+import sys
+import os
+
+import rtcw_et_model_tools.common.math_python as math_python_m
+import rtcw_et_model_tools.common.reporter as reporter_m
+import rtcw_et_model_tools.mdi.util as mdi_util_m
+
+try:
+    import mathutils
+except ImportError:
+    mathutils = None
+
+_num_samples = 500
+
+# tolerance of results which agree within single precision rounding
+_tolerance = 1.0e-6
+
+
+@unittest.skipIf(mathutils is None, "mathutils not available")
+class TestMathBackend(unittest.TestCase):
+    """Math Backend Tests.
+    """
+
+    def setUp(self):
+
+        reporter_m.reset_state()
+        self.rng = random.Random(0)
+
+    def _random_values(self, num_values, scale = 100.0):
+
+        return [self.rng.uniform(-scale, scale) for _ in range(num_values)]
+
+    def _random_euler(self):
+
+        return mathutils.Euler((self.rng.uniform(-math.pi, math.pi),
+                                self.rng.uniform(-math.pi / 2, math.pi / 2),
+                                self.rng.uniform(-math.pi, math.pi)))
+
+    def _random_quaternion(self):
+
+        return mathutils.Quaternion(self._random_values(4, 1.0)).normalized()
+
+    @staticmethod
+    def _to_python_matrix(matrix):
+
+        return math_python_m.Matrix([tuple(row) for row in matrix])
+
+    def _assert_same(self, python_value, mathutils_value):
+
+        self.assertEqual(list(python_value), list(mathutils_value))
+
+    def _assert_matrix_same(self, python_matrix, mathutils_matrix):
+
+        self.assertEqual([list(row) for row in python_matrix],
+                         [list(row) for row in mathutils_matrix])
+
+    def _assert_close(self, python_values, mathutils_values,
+                      tolerance = _tolerance):
+
+        for python_value, mathutils_value in zip(python_values,
+                                                 mathutils_values):
+            self.assertAlmostEqual(python_value, mathutils_value,
+                                   delta=tolerance)
+
+    def _assert_rotation_close(self, python_quaternion, mathutils_quaternion):
+
+        # q and -q are the same rotation
+        if python_quaternion.dot(math_python_m.Quaternion(
+                tuple(mathutils_quaternion))) < 0.0:
+            mathutils_quaternion = -mathutils_quaternion
+
+        self._assert_close(python_quaternion, mathutils_quaternion)
+
+    def test_float32_rounding(self):
+        """Components are stored in single precision like in mathutils.
+        """
+
+        values = [0.1, 1.0 / 3.0, 16777217.0, 1.0e-40, -2.5e38]
+        for num_values in range(2, 5):
+
+            self._assert_same(math_python_m.Vector(values[0:num_values]),
+                              mathutils.Vector(values[0:num_values]))
+
+        self._assert_same(math_python_m.Quaternion(values[0:4]),
+                          mathutils.Quaternion(values[0:4]))
+
+        python_vector = math_python_m.Vector((0.0, 0.0, 0.0))
+        mathutils_vector = mathutils.Vector((0.0, 0.0, 0.0))
+        python_vector[1] = 0.1
+        mathutils_vector[1] = 0.1
+        python_vector.z = 1.0 / 3.0
+        mathutils_vector.z = 1.0 / 3.0
+        self._assert_same(python_vector, mathutils_vector)
+
+    def test_vector_arithmetic(self):
+        """Vector arithmetic, dot, cross, length and lerp are identical.
+        """
+
+        for _ in range(_num_samples):
+
+            a = self._random_values(3)
+            b = self._random_values(3)
+            scalar = self.rng.uniform(-10.0, 10.0)
+            factor = self.rng.random()
+
+            python_a = math_python_m.Vector(a)
+            python_b = math_python_m.Vector(b)
+            mathutils_a = mathutils.Vector(a)
+            mathutils_b = mathutils.Vector(b)
+
+            self._assert_same(python_a + python_b, mathutils_a + mathutils_b)
+            self._assert_same(python_a - python_b, mathutils_a - mathutils_b)
+            self._assert_same(python_a * scalar, mathutils_a * scalar)
+            self._assert_same(scalar * python_a, scalar * mathutils_a)
+            self._assert_same(python_a / scalar, mathutils_a / scalar)
+            self._assert_same(-python_a, -mathutils_a)
+            self._assert_same(python_a.cross(python_b),
+                              mathutils_a.cross(mathutils_b))
+            self._assert_same(python_a.lerp(python_b, factor),
+                              mathutils_a.lerp(mathutils_b, factor))
+
+            self.assertEqual(python_a.dot(python_b),
+                             mathutils_a.dot(mathutils_b))
+            self.assertEqual(python_a @ python_b, mathutils_a @ mathutils_b)
+            self.assertEqual(python_a.length, mathutils_a.length)
+
+    def test_normalized(self):
+        """Vector.normalized() is identical, also for tiny and zero vectors.
+        """
+
+        samples = [self._random_values(3) for _ in range(_num_samples)]
+        samples.append([0.0, 0.0, 0.0])
+        samples.append([1.0e-20, 0.0, 0.0])
+        samples.append([3.0e-18, -2.0e-18, 1.0e-18])
+
+        for values in samples:
+
+            self._assert_same(math_python_m.Vector(values).normalized(),
+                              mathutils.Vector(values).normalized())
+
+        for _ in range(_num_samples):
+
+            values = self._random_values(4, 1.0)
+            self._assert_close(math_python_m.Quaternion(values).normalized(),
+                               mathutils.Quaternion(values).normalized())
+
+    def test_matmul(self):
+        """Matrix @ vector, vector @ matrix and matrix @ matrix are
+        identical.
+        """
+
+        for _ in range(_num_samples):
+
+            for size in (3, 4):
+
+                a = mathutils.Matrix([self._random_values(size)
+                                      for _ in range(size)])
+                b = mathutils.Matrix([self._random_values(size)
+                                      for _ in range(size)])
+                vector = mathutils.Vector(self._random_values(size))
+
+                python_a = self._to_python_matrix(a)
+                python_b = self._to_python_matrix(b)
+                python_vector = math_python_m.Vector(vector)
+
+                self._assert_matrix_same(python_a @ python_b, a @ b)
+                self._assert_same(python_a @ python_vector, a @ vector)
+                self._assert_same(python_vector @ python_a, vector @ a)
+                self._assert_matrix_same(python_a.transposed(),
+                                         a.transposed())
+
+                scalar = self.rng.uniform(-2.0, 2.0)
+                self._assert_matrix_same(python_a * scalar, a * scalar)
+                self._assert_matrix_same(python_a + python_b, a + b)
+
+    def test_to_quaternion(self):
+        """Matrix.to_quaternion() agrees for rotations, scaled rotations and
+        mirrored rotations.
+        """
+
+        for _ in range(_num_samples):
+
+            matrix = self._random_euler().to_matrix()
+            scale = mathutils.Matrix.Diagonal(
+                [self.rng.uniform(0.5, 2.0) for _ in range(3)])
+
+            for sample in (matrix, matrix @ scale, matrix * -1.0,
+                           matrix.to_4x4()):
+
+                python_quaternion = \
+                    self._to_python_matrix(sample).to_quaternion()
+                mathutils_quaternion = sample.to_quaternion()
+
+                self.assertGreaterEqual(python_quaternion.w, 0.0)
+                self._assert_rotation_close(python_quaternion,
+                                            mathutils_quaternion)
+
+    def test_to_matrix(self):
+        """Quaternion.to_matrix() agrees for unit quaternions.
+        """
+
+        for _ in range(_num_samples):
+
+            quaternion = self._random_quaternion()
+            python_matrix = \
+                math_python_m.Quaternion(quaternion).to_matrix()
+
+            for python_row, mathutils_row in \
+                zip(python_matrix, quaternion.to_matrix()):
+                self._assert_close(python_row, mathutils_row)
+
+    def test_slerp(self):
+        """Quaternion.slerp() agrees, also for nearly aligned and opposite
+        quaternions.
+        """
+
+        factors = (0.0, 0.25, 0.5, 0.75, 1.0)
+
+        for _ in range(_num_samples):
+
+            a = self._random_quaternion()
+            b = self._random_quaternion()
+
+            # nearly aligned, falls back to linear interpolation
+            c = (a + mathutils.Quaternion(
+                self._random_values(4, 1.0e-5))).normalized()
+
+            for other in (b, -b, c):
+
+                python_a = math_python_m.Quaternion(a)
+                python_other = math_python_m.Quaternion(other)
+
+                for factor in factors + (self.rng.random(),):
+
+                    self._assert_close(python_a.slerp(python_other, factor),
+                                       a.slerp(other, factor))
+
+    def test_inverted(self):
+        """The core inverts rotations by transposing them, which agrees with
+        Matrix.inverted() of mathutils. math_python has no inverted().
+        """
+
+        identity = mathutils.Matrix.Identity(3)
+
+        for _ in range(_num_samples):
+
+            matrix = self._random_euler().to_matrix()
+            python_matrix = self._to_python_matrix(matrix)
+
+            inverse = python_matrix.transposed()
+            for python_row, mathutils_row in zip(inverse, matrix.inverted()):
+                self._assert_close(python_row, mathutils_row)
+
+            for python_row, identity_row in zip(python_matrix @ inverse,
+                                                identity):
+                self._assert_close(python_row, identity_row)
+
+    def test_to_euler(self):
+        """The core converts matrices to angles with matrix_to_angles, which
+        agrees with Matrix.to_euler() of mathutils for python matrices.
+        math_python has no to_euler().
+        """
+
+        for _ in range(_num_samples):
+
+            matrix = self._random_euler().to_matrix()
+            euler = matrix.to_euler()
+
+            python_matrix = self._to_python_matrix(matrix)
+            yaw, pitch, roll = \
+                mdi_util_m.matrix_to_angles(python_matrix.transposed())
+            angles = (roll, pitch, yaw)
+
+            # mathutils picks either of the two solutions
+            if abs(euler.y) <= math.pi / 2:
+                self._assert_close(angles,
+                                   [math.degrees(angle) for angle in euler],
+                                   1.0e-3)
+
+            python_euler = mathutils.Euler([math.radians(angle)
+                                            for angle in angles])
+            for python_row, mathutils_row in \
+                zip(python_euler.to_matrix(), euler.to_matrix()):
+                self._assert_close(python_row, mathutils_row, 1.0e-4)
+
+            quaternion = python_matrix.to_quaternion()
+            python_euler = mathutils.Quaternion(tuple(quaternion)).to_euler()
+            for python_row, mathutils_row in \
+                zip(python_euler.to_matrix(), euler.to_matrix()):
+                self._assert_close(python_row, mathutils_row, 1.0e-4)
+
+    def test_python_backend_round_trip(self):
+        """Converting models with REMT_MATH_BACKEND=python gives the same
+        bytes as with mathutils.
+        """
+
+        import rtcw_et_model_tools.tests.synthetic_models as synthetic_m
+        import rtcw_et_model_tools.md3.facade as md3_facade_m
+        import rtcw_et_model_tools.mds.facade as mds_facade_m
+
+        package_dir = \
+            os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+        conversions = (("md3", "mdc"), ("mds", "md3"), ("mds", "mdmmdx"))
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+
+            source_dir = os.path.join(temp_dir, "source")
+            model_dir = os.path.join(source_dir, "models", "synthetic")
+            os.makedirs(model_dir)
+
+            md3_facade_m.write(synthetic_m.create_morph_model(seed=1),
+                               os.path.join(model_dir, "morph.md3"))
+            mds_facade_m.write(synthetic_m.create_skeletal_model(seed=2),
+                               os.path.join(model_dir, "skeletal.mds"), 0)
+
+            datas = {}
+            for backend_name in ("mathutils", "python"):
+
+                env = dict(os.environ)
+                env["REMT_MATH_BACKEND"] = backend_name
+                env["PYTHONPATH"] = os.pathsep.join(
+                    [package_dir] + sys.path)
+
+                for source_format, target_format in conversions:
+
+                    target_dir = os.path.join(temp_dir, backend_name,
+                                              target_format)
+                    subprocess.run([sys.executable, "-m",
+                                    "rtcw_et_model_tools.common." \
+                                    "batch_conversion",
+                                    "--from", source_format,
+                                    "--to", target_format,
+                                    "-o", target_dir, source_dir],
+                                   env=env, check=True,
+                                   stdout=subprocess.DEVNULL,
+                                   stderr=subprocess.DEVNULL)
+
+                datas[backend_name] = self._read_tree(
+                    os.path.join(temp_dir, backend_name))
+
+            self.assertEqual(len(datas["mathutils"]), 4)
+            self.assertEqual(datas["python"], datas["mathutils"])
+
+    @staticmethod
+    def _read_tree(directory):
+
+        datas = {}
+        for root, _, file_names in os.walk(directory):
+            for file_name in file_names:
+
+                file_path = os.path.join(root, file_name)
+                with open(file_path, 'rb') as file:
+                    datas[os.path.relpath(file_path, directory)] = file.read()
+
+        return datas
+
+
+if __name__ == "__main__":
+    unittest.main()
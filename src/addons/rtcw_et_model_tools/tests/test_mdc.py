@@ -0,0 +1,421 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8-80 compliant>
+
+"""MDC Tests.
+
+Does not need blender or test files, models are synthetic. Example:
+
+    python -m unittest rtcw_et_model_tools.tests.test_mdc
+"""
+
+import unittest
+import tempfile
+import random
+import os
+
+import numpy as np
+
+import rtcw_et_model_tools.mdc._mdc as mdc_m
+import rtcw_et_model_tools.mdc._mdc_mdi as mdc_mdi_m
+import rtcw_et_model_tools.mdc._mdc_encode as mdc_encode_m
+import rtcw_et_model_tools.mdc.facade as mdc_facade_m
+import rtcw_et_model_tools.common.reporter as reporter_m
+import rtcw_et_model_tools.common.math_backend as math_backend_m
+import rtcw_et_model_tools.tests.synthetic_models as synthetic_m
+
+
+def _random_walk(seed, num_frames, num_vertices, step):
+    """Vertex locations going back and forth, so that greedy base frame
+    selection is not optimal.
+    """
+
+    rng = np.random.default_rng(seed)
+
+    steps = rng.uniform(-step, step, size=(num_frames, num_vertices, 3))
+    steps[0] = rng.uniform(-50.0, 50.0, size=(num_vertices, 3))
+
+    return np.cumsum(steps, axis=0).astype(np.float32)
+
+def _can_compress_vertex(base_frame_location, cur_frame_location):
+    """Scalar check of a vertex against a base frame, as done before frames
+    were checked as arrays.
+    """
+
+    can_compress = True
+    delta = cur_frame_location - base_frame_location
+    for i in range(0, 3):
+        if abs(delta[i]) > mdc_m.MDC.max_dist:
+            can_compress = False
+
+    return can_compress
+
+def _compress_vertex(base_frame_location, cur_frame_location,
+                     normal = None, comp_frame_normals = None):
+    """Scalar compression of a vertex, as done before frames were encoded
+    as arrays. The normal is found by a linear search over all normals.
+    """
+
+    # location offset
+    off = cur_frame_location - base_frame_location
+
+    location_scale = mdc_m.MDCCompFrameVertex.location_scale
+    max_ofs = mdc_m.MDCCompFrameVertex.max_ofs
+
+    off_x = off[0] + location_scale * 0.5  # rounding
+    off_x = off_x / location_scale
+    off_x = int(off_x + max_ofs)
+
+    off_y = off[1] + location_scale * 0.5  # rounding
+    off_y = off_y / location_scale
+    off_y = int(off_y + max_ofs)
+
+    off_z = off[2] + location_scale * 0.5  # rounding
+    off_z = off_z / location_scale
+    off_z = int(off_z + max_ofs)
+
+    location_offset = (off_x, off_y, off_z)
+
+    # normal
+    compressed_normal = None
+    if normal != None:
+
+        best_normal = 0
+
+        # find best z group
+        z_group_start = 0
+        best_diff = 999
+        for i in range(0, len(comp_frame_normals)):
+
+            diff = abs(normal[2] - comp_frame_normals[i][2])
+            if diff < best_diff:
+                best_diff = diff
+                z_group_start = i
+
+        # within z group find best normal
+        z_group_val = comp_frame_normals[z_group_start][2]
+        best_diff = -999
+        for i in range(z_group_start, len(comp_frame_normals)):
+
+            if comp_frame_normals[i][2] != z_group_val:
+                break
+
+            diff = normal[0] * comp_frame_normals[i][0] + \
+                   normal[1] * comp_frame_normals[i][1] + \
+                   normal[2] * comp_frame_normals[i][2]
+
+            if diff > best_diff:
+                best_diff = diff
+                best_normal = i
+
+        compressed_normal = best_normal
+
+    return (location_offset, compressed_normal)
+
+def _select_base_frames_reference(locations):
+    """Optimal base frame selection by checking every pair of frames, and
+    scanning the range of next base frames, O(num_frames^2).
+    """
+
+    to_model = mdc_mdi_m.MDIToModel
+    num_frames = len(locations)
+
+    cost = [0] * (num_frames + 1)
+    for num_frame in range(num_frames - 1, -1, -1):
+
+        reach = num_frames
+        for end in range(num_frame + 1, num_frames):
+
+            if to_model._exceeds_max_dist(locations[num_frame],
+                                          locations[end:end + 1])[0]:
+                reach = end
+                break
+
+        cost[num_frame] = min(cost[num_frame + 1:reach + 1]) + 1
+
+    return cost[0]
+
+
+class TestMDCBaseFrames(unittest.TestCase):
+    """MDC Base Frame Selection Tests.
+    """
+
+    def setUp(self):
+
+        reporter_m.reset_state()
+
+    def _check_covered(self, locations, is_frame_compressed):
+        """Each compressed frame can be compressed against the last base
+        frame preceding it.
+        """
+
+        self.assertFalse(is_frame_compressed and is_frame_compressed[0])
+
+        last_base_frame = -1
+        for num_frame, is_compressed in enumerate(is_frame_compressed):
+
+            if not is_compressed:
+                last_base_frame = num_frame
+                continue
+
+            exceeds = mdc_mdi_m.MDIToModel._exceeds_max_dist(
+                locations[last_base_frame],
+                locations[num_frame:num_frame + 1])
+            self.assertFalse(exceeds[0])
+
+    def test_exceeds_max_dist(self):
+        """Frames are checked as the vertices were one by one, also for
+        differences close to the maximum distance.
+        """
+
+        rng = np.random.default_rng(0)
+
+        num_frames = 200
+        num_vertices = 20
+        max_dist = mdc_m.MDC.max_dist
+
+        # near the origin, as far away the difference of the locations is
+        # exact in single precision
+        base_frame_locations = rng.uniform(-max_dist, max_dist,
+                                           size=(num_vertices, 3)) \
+            .astype(np.float32)
+        signs = rng.choice([-1.0, 1.0], size=(num_frames, num_vertices, 3))
+        deltas = rng.uniform(0.0, max_dist, size=(num_frames, num_vertices, 3))
+        close = rng.random(size=(num_frames, num_vertices, 3)) < 0.01
+        deltas[close] = max_dist
+        cur_frame_locations = (base_frame_locations + signs * deltas) \
+            .astype(np.float32)
+
+        # a few steps of single precision around the maximum distance, where
+        # the rounding of the difference decides
+        steps = rng.integers(-3, 4, size=close.sum()).astype(np.float32)
+        cur_frame_locations[close] += \
+            steps * np.spacing(cur_frame_locations[close])
+
+        exceeds = mdc_mdi_m.MDIToModel._exceeds_max_dist(base_frame_locations,
+                                                         cur_frame_locations)
+
+        for num_frame in range(num_frames):
+
+            can_compress = True
+            for num_vertex in range(num_vertices):
+
+                base_frame_location = math_backend_m.Vector(
+                    base_frame_locations[num_vertex].tolist())
+                cur_frame_location = math_backend_m.Vector(
+                    cur_frame_locations[num_frame][num_vertex].tolist())
+                if not _can_compress_vertex(base_frame_location,
+                                            cur_frame_location):
+                    can_compress = False
+
+            self.assertEqual(exceeds[num_frame], not can_compress)
+
+        # the frames close to the maximum distance make both results likely
+        self.assertTrue(exceeds.any())
+        self.assertFalse(exceeds.all())
+
+    def test_optimal_selection(self):
+        """The optimal selection has the fewest base frames, never more than
+        the greedy selection.
+        """
+
+        to_model = mdc_mdi_m.MDIToModel
+
+        num_smaller = 0
+        for seed in range(40):
+
+            rng = random.Random(seed)
+            locations = _random_walk(seed, rng.randint(0, 150),
+                                     rng.randint(1, 4), rng.uniform(0.5, 4.0))
+
+            greedy = to_model._select_base_frames_greedy(locations)
+            for block_size in (1, 2, 8):
+
+                optimal = to_model._select_base_frames_optimal(locations,
+                                                               block_size)
+                self.assertEqual(len(optimal), len(locations))
+                self._check_covered(locations, optimal)
+                self.assertEqual(optimal.count(False),
+                                 _select_base_frames_reference(locations))
+                self.assertLessEqual(optimal.count(False),
+                                     greedy.count(False))
+
+            self._check_covered(locations, greedy)
+            if optimal.count(False) < greedy.count(False):
+                num_smaller += 1
+
+        # the walks are chosen such that it makes a difference
+        self.assertGreater(num_smaller, 0)
+
+    def test_optimal_file(self):
+        """An MDC file written with optimal base frame selection is not
+        larger than with greedy selection, and decodes within the precision
+        of compressed frames.
+        """
+
+        mdi_model = synthetic_m.create_morph_model(seed=3, side=4,
+                                                   num_frames=60, drift=0.4)
+
+        data_greedy = mdc_facade_m.write_bytes(mdi_model,
+                                               base_frame_selection="greedy")
+        data_optimal = mdc_facade_m.write_bytes(
+            mdi_model, base_frame_selection="optimal")
+        self.assertLessEqual(len(data_optimal), len(data_greedy))
+
+        # base frames are truncated, offsets of compressed frames rounded
+        max_error = mdc_m.MDCBaseFrameVertex.location_scale + \
+            mdc_m.MDCCompFrameVertex.location_scale / 2 + 1e-4
+
+        decoded_model = mdc_facade_m.read_bytes(data_optimal, bind_frame=0)
+        for mdi_surface, decoded_surface in zip(mdi_model.surfaces,
+                                                decoded_model.surfaces):
+
+            locations = mdi_surface.calc_morph_locations(60)
+            decoded_locations = decoded_surface.calc_morph_locations(60)
+            error = np.abs(decoded_locations - locations).max()
+            self.assertLessEqual(error, max_error)
+
+    def test_out_of_core(self):
+        """Models holding frames out of core are rejected, since base frame
+        selection needs all frames in memory.
+        """
+
+        import rtcw_et_model_tools.md3.facade as md3_facade_m
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+
+            file_path = os.path.join(temp_dir, "synthetic.md3")
+            md3_facade_m.write(synthetic_m.create_morph_model(seed=4),
+                               file_path)
+
+            mdi_model = md3_facade_m.read(file_path, 0, out_of_core=True,
+                                          scratch_dir=temp_dir)
+            self.assertTrue(mdi_model.surfaces[1].is_out_of_core())
+            with self.assertRaises(Exception) as context:
+                mdc_facade_m.write_bytes(mdi_model)
+            self.assertIn("surface_0", str(context.exception))
+            self.assertIn("out of core", str(context.exception))
+            del mdi_model
+
+            mdi_model = md3_facade_m.read(file_path, 0)
+            self.assertFalse(mdi_model.surfaces[1].is_out_of_core())
+            mdc_facade_m.write_bytes(mdi_model)
+
+
+class TestMDCCompFrames(unittest.TestCase):
+    """MDC Compressed Frame Encoding Tests.
+    """
+
+    def setUp(self):
+
+        reporter_m.reset_state()
+
+        self.comp_frame_normals, self.comp_frame_normals_index = \
+            mdc_mdi_m._get_comp_frame_normals()
+
+    def _create_normals(self, rng):
+        """Random normals, and normals for which ties decide.
+        """
+
+        normals = [rng.normal(size=(500, 3))]
+        normals[0] /= np.linalg.norm(normals[0], axis=1)[:, np.newaxis]
+
+        # the precalculated normals themselves and halfway between them
+        comp_frame_normals = np.array(self.comp_frame_normals)
+        normals.append(comp_frame_normals)
+        normals.append((comp_frame_normals[:-1] + comp_frame_normals[1:]) / 2)
+
+        # on the equator, at the poles, zero and not a number
+        angles = rng.uniform(-np.pi, np.pi, size=50)
+        normals.append(np.stack([np.cos(angles), np.sin(angles),
+                                 np.zeros(50)], axis=1))
+        normals.append(np.array([[0.0, 0.0, 1.0], [0.0, 0.0, -1.0],
+                                 [0.0, 0.0, 0.0], [np.nan, 0.0, 1.0],
+                                 [0.0, 0.0, np.nan]]))
+
+        return np.concatenate(normals).astype(np.float32)
+
+    def test_compress_normals(self):
+        """The lookup structure finds the same normals as the linear search.
+        """
+
+        rng = np.random.default_rng(0)
+        normals = self._create_normals(rng)
+
+        indices = self.comp_frame_normals_index.compress(normals)
+        self.assertEqual(indices.shape, (len(normals),))
+
+        zero = math_backend_m.Vector((0.0, 0.0, 0.0))
+        for normal, index in zip(normals, indices):
+
+            _, compressed_normal = _compress_vertex(
+                zero, zero, math_backend_m.Vector(normal.tolist()),
+                self.comp_frame_normals)
+            self.assertEqual(index, compressed_normal)
+
+        self.assertEqual(
+            len(self.comp_frame_normals_index.compress(np.zeros((0, 3)))), 0)
+
+    def test_compress_frame(self):
+        """Frames encoded as arrays are identical to vertices encoded one
+        by one.
+        """
+
+        rng = np.random.default_rng(1)
+        normals = self._create_normals(rng)
+        num_vertices = len(normals)
+
+        location_scale = mdc_m.MDCCompFrameVertex.location_scale
+        max_dist = mdc_m.MDC.max_dist
+
+        base_frame_locations = rng.uniform(-100.0, 100.0,
+                                           size=(num_vertices, 3))
+        offsets = rng.uniform(-max_dist, max_dist, size=(num_vertices, 3))
+
+        # some offsets halfway between two steps, where rounding decides
+        halfway = rng.random(size=(num_vertices, 3)) < 0.2
+        offsets[halfway] = (rng.integers(-127, 127, size=halfway.sum())
+                            + 0.5) * location_scale
+
+        base_frame_locations = base_frame_locations.astype(np.float32)
+        cur_frame_locations = (base_frame_locations + offsets) \
+            .astype(np.float32)
+
+        location_offsets, compressed_normals = mdc_encode_m.compress_frame(
+            base_frame_locations, cur_frame_locations, normals,
+            self.comp_frame_normals_index)
+
+        for num_vertex in range(num_vertices):
+
+            location_offset, compressed_normal = _compress_vertex(
+                math_backend_m.Vector(
+                    base_frame_locations[num_vertex].tolist()),
+                math_backend_m.Vector(
+                    cur_frame_locations[num_vertex].tolist()),
+                math_backend_m.Vector(normals[num_vertex].tolist()),
+                self.comp_frame_normals)
+
+            self.assertEqual(tuple(location_offsets[num_vertex].tolist()),
+                             location_offset)
+            self.assertEqual(compressed_normals[num_vertex],
+                             compressed_normal)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,716 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8-80 compliant>
+
+"""MDI Tests.
+
+Does not need blender or test files, models are synthetic. Example:
+
+    python -m unittest rtcw_et_model_tools.tests.test_mdi
+"""
+
+import unittest
+import math
+
+import numpy as np
+
+import rtcw_et_model_tools.mdi.mdi as mdi_m
+import rtcw_et_model_tools.md3.facade as md3_facade_m
+import rtcw_et_model_tools.mdc.facade as mdc_facade_m
+import rtcw_et_model_tools.mds.facade as mds_facade_m
+import rtcw_et_model_tools.mdmmdx.facade as mdmmdx_facade_m
+import rtcw_et_model_tools.common.math_backend as math_backend_m
+import rtcw_et_model_tools.common.reporter as reporter_m
+import rtcw_et_model_tools.tests.synthetic_models as synthetic_m
+
+
+def _to_tuples(mdi_weights):
+    """Weights as comparable values, rounded as stored in files.
+    """
+
+    return [(mdi_weight.parent_bone,
+             float(np.float32(mdi_weight.weight_value)),
+             tuple(np.float32(mdi_weight.location).tolist()))
+            for mdi_weight in mdi_weights]
+
+
+def _make_static(values, noise):
+    """Per frame values equal to the first frame, every second frame offset
+    by noise in each component.
+    """
+
+    offset = math_backend_m.Vector((noise, -noise, noise))
+
+    return [values[0] + offset * (num_frame % 2)
+            for num_frame in range(len(values))]
+
+def _create_static_models(noise):
+    """Creates a morph and a skeletal model in which some vertices, bones and
+    tags are static up to noise. Vertices 0, 4, 8, 12, bones 0, 2 and tag 0
+    are static, vertices 1, 5 and bone 3 only in their locations.
+    """
+
+    mdi_morph_model = synthetic_m.create_morph_model(seed=4, num_surfaces=1,
+                                                     side=4, num_frames=6,
+                                                     num_tags=2)
+    for num_vertex, mdi_vertex in \
+        enumerate(mdi_morph_model.surfaces[0].vertices):
+
+        if num_vertex % 4 in (0, 1) and num_vertex < 8 or \
+           num_vertex % 4 == 0:
+            mdi_vertex.locations = _make_static(mdi_vertex.locations, noise)
+        if num_vertex % 4 == 0:
+            mdi_vertex.normals = _make_static(mdi_vertex.normals, 0.0)
+
+    mdi_tag = mdi_morph_model.tags[0]
+    mdi_tag.locations = _make_static(mdi_tag.locations, noise)
+    mdi_tag.orientations = [mdi_tag.orientations[0].copy()
+                            for _ in mdi_tag.orientations]
+
+    mdi_skeletal_model = synthetic_m.create_skeletal_model(seed=4)
+    for num_bone in (0, 2, 3):
+
+        mdi_bone = mdi_skeletal_model.skeleton.bones[num_bone]
+        mdi_bone.locations = _make_static(mdi_bone.locations, noise)
+        if num_bone != 3:
+            mdi_bone.orientations = [mdi_bone.orientations[0].copy()
+                                     for _ in mdi_bone.orientations]
+
+    return (mdi_morph_model, mdi_skeletal_model)
+
+
+def _rotation(axis, angle):
+    """Orientation of a rotation by angle in degrees around axis.
+    """
+
+    axis = np.asarray(axis, dtype=np.float64)
+    axis = axis / np.linalg.norm(axis)
+    half_angle = math.radians(angle) / 2
+
+    return math_backend_m.Quaternion(
+        [math.cos(half_angle)] + (axis * math.sin(half_angle)).tolist()) \
+        .to_matrix()
+
+
+class TestMDIVertexWeights(unittest.TestCase):
+    """Weight Store Tests.
+    """
+
+    def setUp(self):
+
+        reporter_m.reset_state()
+
+    def test_round_trip(self):
+        """The store holds the same weights as the lists of weights.
+        """
+
+        mdi_model = synthetic_m.create_skeletal_model(seed=1)
+        mdi_vertices = mdi_model.surfaces[0].vertices
+        lists = [_to_tuples(mdi_vertex.weights)
+                 for mdi_vertex in mdi_vertices]
+
+        mdi_vertex_weights = \
+            mdi_m.MDIVertexWeights.from_rigged_vertices(mdi_vertices)
+        self.assertEqual(mdi_vertex_weights.num_vertices(),
+                         len(mdi_vertices))
+        for num_vertex, weights in enumerate(lists):
+
+            self.assertEqual(mdi_vertex_weights.num_weights(num_vertex),
+                             len(weights))
+            self.assertEqual(_to_tuples(
+                mdi_vertex_weights.get_vertex_weights(num_vertex)), weights)
+
+        # vertices bound to the store
+        bound_vertices = [mdi_m.MDIRiggedVertex(mdi_vertex.normal,
+                                                vertex_weights=\
+                                                    mdi_vertex_weights,
+                                                num_vertex=num_vertex)
+                          for num_vertex, mdi_vertex
+                          in enumerate(mdi_vertices)]
+        self.assertIs(
+            mdi_m.MDIVertexWeights.from_rigged_vertices(bound_vertices),
+            mdi_vertex_weights)
+
+        # a selection of vertices, some of them twice
+        vertex_indices = [5, 0, 5, 63, 17]
+        selection = mdi_m.MDIVertexWeights.from_rigged_vertices(
+            [bound_vertices[num_vertex] for num_vertex in vertex_indices])
+        self.assertEqual(selection.num_vertices(), len(vertex_indices))
+        for num_selected, num_vertex in enumerate(vertex_indices):
+            self.assertEqual(_to_tuples(
+                selection.get_vertex_weights(num_selected)),
+                lists[num_vertex])
+
+        # vertices of different stores and lists
+        mixed_vertices = bound_vertices[0:3] + mdi_vertices[3:6] + \
+            [mdi_m.MDIRiggedVertex(mdi_vertices[6].normal,
+                                   vertex_weights=selection, num_vertex=4)]
+        mixed = mdi_m.MDIVertexWeights.from_rigged_vertices(mixed_vertices)
+        for num_vertex in range(6):
+            self.assertEqual(_to_tuples(mixed.get_vertex_weights(num_vertex)),
+                             lists[num_vertex])
+        self.assertEqual(_to_tuples(mixed.get_vertex_weights(6)), lists[17])
+
+        empty = mdi_m.MDIVertexWeights.from_rigged_vertices([])
+        self.assertEqual(empty.num_vertices(), 0)
+
+    def test_detach(self):
+        """Reading the weights of a vertex detaches it from the store, so
+        changes to the weights are written.
+        """
+
+        data = mds_facade_m.write_bytes(
+            synthetic_m.create_skeletal_model(seed=2), 0)
+        mdi_model = mds_facade_m.read_bytes(data, 0, name="synthetic.mds")
+        mdi_surface = mdi_model.surfaces[0]
+        mdi_vertex_weights = mdi_surface.vertices[0].vertex_weights
+        self.assertIsNotNone(mdi_vertex_weights)
+
+        # calculations read the weights without detaching
+        mdi_surface.vertices[1].calc_location_ms(mdi_model.skeleton, 0)
+        self.assertIs(mdi_surface.vertices[1].vertex_weights,
+                      mdi_vertex_weights)
+
+        # change weights in place, all other vertices are still bound
+        weights = mdi_surface.vertices[1].weights
+        self.assertIsNone(mdi_surface.vertices[1].vertex_weights)
+        weights[0].location = math_backend_m.Vector((1.0, 2.0, 3.0))
+        written = self._check_written(mdi_model)
+        self.assertEqual(written[1][0][2], (1.0, 2.0, 3.0))
+
+        # replace and add weights
+        parent_bone = weights[0].parent_bone
+        mdi_surface.vertices[2].weights = [
+            mdi_m.MDIVertexWeight(parent_bone, 1.0,
+                                  math_backend_m.Vector((0.5, 0.0, 0.0)))]
+        self.assertIsNone(mdi_surface.vertices[2].vertex_weights)
+
+        mdi_surface.vertices[3].weights.append(
+            mdi_m.MDIVertexWeight(parent_bone, 0.0,
+                                  math_backend_m.Vector((0.0, 0.0, 0.0))))
+
+        self.assertIs(mdi_surface.vertices[4].vertex_weights,
+                      mdi_vertex_weights)
+        written = self._check_written(mdi_model)
+        self.assertEqual(len(written[2]), 1)
+        self.assertEqual(written[3][-1][1], 0.0)
+
+    def _check_written(self, mdi_model):
+        """Weights read back from MDS and MDM/MDX are those of the model,
+        returns them.
+        """
+
+        expected = [_to_tuples(mdi_vertex._get_weights())
+                    for mdi_vertex in mdi_model.surfaces[0].vertices]
+
+        data = mds_facade_m.write_bytes(mdi_model, 0)
+        mds_model = mds_facade_m.read_bytes(data, 0, name="synthetic.mds")
+
+        data_mdm, data_mdx = mdmmdx_facade_m.write_bytes(mdi_model, 0)
+        mdmmdx_model = mdmmdx_facade_m.read_bytes(data_mdm, data_mdx, 0,
+                                                  name="synthetic.mdm")
+
+        for written_model in (mds_model, mdmmdx_model):
+
+            written = [_to_tuples(mdi_vertex.weights)
+                       for mdi_vertex in written_model.surfaces[0].vertices]
+            self.assertEqual(written, expected)
+
+        return expected
+
+
+class TestMDIMorphFrames(unittest.TestCase):
+    """Morph Frame Compression Tests.
+    """
+
+    def setUp(self):
+
+        reporter_m.reset_state()
+
+    def _check_error(self, values, expected, location_scale):
+        """Error of reconstructed locations is bound by half the location
+        scale, plus rounding to single precision.
+        """
+
+        values = np.asarray(values, dtype=np.float64)
+        expected = np.asarray(expected, dtype=np.float64)
+
+        max_error = location_scale / 2 + \
+            float(np.spacing(np.float32(np.max(np.abs(expected)))))
+        self.assertLessEqual(float(np.max(np.abs(values - expected))),
+                             max_error)
+
+    def test_reconstruction(self):
+        """Frames, ranges of frames and vertices are reconstructed within
+        half the location scale.
+        """
+
+        rng = np.random.default_rng(0)
+        num_frames = 40
+        num_vertices = 30
+
+        # steps smaller than the range of deltas, jumps larger
+        location_scale = 1.0 / 1024
+        max_range = mdi_m.MDIMorphFrames.max_delta * location_scale
+        steps = rng.uniform(-1.0, 1.0, size=(num_frames, num_vertices, 3))
+        steps[0] = rng.uniform(-20.0, 20.0, size=(num_vertices, 3))
+        steps[[9, 10, 25]] *= 1.5 * max_range
+        locations = np.cumsum(steps, axis=0).astype(np.float32)
+
+        normals = rng.normal(size=(num_frames, num_vertices, 3))
+        normals /= np.linalg.norm(normals, axis=2, keepdims=True)
+        normals = normals.astype(np.float32)
+
+        mdi_morph_frames = mdi_m.MDIMorphFrames(locations, normals,
+                                                location_scale)
+
+        # a new key frame whenever a delta does not fit
+        frame_keys = mdi_morph_frames.frame_keys.tolist()
+        self.assertEqual(frame_keys[0], 0)
+        self.assertTrue(all(0 <= frame_keys[num_frame + 1] - \
+                            frame_keys[num_frame] <= 1
+                            for num_frame in range(num_frames - 1)))
+        self.assertGreaterEqual(frame_keys[-1], 3)
+        self.assertEqual(len(mdi_morph_frames.key_locations),
+                         frame_keys[-1] + 1)
+        self.assertLess(mdi_morph_frames.calc_num_bytes(),
+                        locations.nbytes + normals.nbytes)
+
+        for num_frame in range(num_frames):
+
+            frame_locations, frame_normals = \
+                mdi_morph_frames.get_frame(num_frame)
+            self._check_error(frame_locations, locations[num_frame],
+                              location_scale)
+            np.testing.assert_array_equal(frame_normals, normals[num_frame])
+
+            # values of each way of access are identical
+            frame_values = mdi_morph_frames.get_frame_values(num_frame)
+            self.assertEqual(frame_values[0], frame_locations.tolist())
+            self.assertEqual(frame_values[1], frame_normals.tolist())
+
+        all_locations, all_normals = mdi_morph_frames.get_frames(num_frames)
+        self._check_error(all_locations, locations, location_scale)
+        np.testing.assert_array_equal(all_normals, normals)
+
+        range_locations, _ = mdi_morph_frames.get_frames(7, frame_start=8)
+        np.testing.assert_array_equal(range_locations, all_locations[8:15])
+
+        for num_vertex in range(num_vertices):
+
+            vertex_locations, vertex_normals = \
+                mdi_morph_frames.get_vertex(num_vertex)
+            np.testing.assert_array_equal(vertex_locations,
+                                          all_locations[:, num_vertex])
+            np.testing.assert_array_equal(vertex_normals,
+                                          normals[:, num_vertex])
+
+    def test_model(self):
+        """Vertices of a compressed model read the reconstructed frames.
+        """
+
+        mdi_model = synthetic_m.create_morph_model(seed=3, num_frames=12,
+                                                   drift=20.0)
+        expected = [[(list(map(list, mdi_vertex.locations)),
+                      list(map(list, mdi_vertex.normals)))
+                     for mdi_vertex in mdi_surface.vertices]
+                    for mdi_surface in mdi_model.surfaces]
+
+        location_scale = 1.0 / 256
+        mdi_model.compress_morph_frames(location_scale)
+
+        for mdi_surface, surface_expected in zip(mdi_model.surfaces,
+                                                 expected):
+
+            mdi_morph_frames = \
+                mdi_surface.vertices[0].locations.morph_frames
+            self.assertGreater(len(mdi_morph_frames.key_locations), 1)
+
+            for mdi_vertex, (locations, normals) in \
+                zip(mdi_surface.vertices, surface_expected):
+
+                self.assertIsInstance(mdi_vertex.locations,
+                                      mdi_m.MDIMorphFramesView)
+                self._check_error(list(map(list, mdi_vertex.locations)),
+                                  locations, location_scale)
+                self._check_error([list(mdi_vertex.locations[num_frame])
+                                   for num_frame in range(12)],
+                                  locations, location_scale)
+                np.testing.assert_allclose(
+                    list(map(list, mdi_vertex.normals)), normals,
+                    rtol=0, atol=1e-6)
+
+            # vertex access reconstructs each frame once
+            cache = mdi_morph_frames.cache
+            self.assertEqual(cache.misses, 12)
+
+    def test_cache(self):
+        """Reconstructed frames are cached up to the cache size.
+        """
+
+        rng = np.random.default_rng(1)
+        num_vertices = 20
+        locations = rng.uniform(-10.0, 10.0, size=(10, num_vertices, 3))
+        normals = rng.uniform(-1.0, 1.0, size=(10, num_vertices, 3))
+
+        frame_size = num_vertices * 2 * 168
+        cache_size = 3 * frame_size + frame_size // 2
+        mdi_morph_frames = mdi_m.MDIMorphFrames(locations, normals,
+                                                cache_size=cache_size)
+        cache = mdi_morph_frames.cache
+
+        for num_frame in list(range(10)) + [4, 9, 8, 7, 9]:
+
+            frame = mdi_morph_frames.get_frame_values(num_frame)
+            self.assertLessEqual(cache.size, cache_size)
+            self.assertLessEqual(len(cache), 3)
+            self.assertIn(num_frame, cache)
+
+            frame_locations, frame_normals = \
+                mdi_morph_frames.get_frame(num_frame)
+            self.assertEqual(frame, (frame_locations.tolist(),
+                                     frame_normals.tolist()))
+
+        # the most recently used frames are kept
+        self.assertEqual([num_frame for num_frame in range(10)
+                          if num_frame in cache], [7, 8, 9])
+        self.assertEqual(cache.size, 3 * frame_size)
+        self.assertEqual(cache.hits, 3)
+        self.assertEqual(cache.misses, 12)
+
+        # frames larger than the cache are not cached
+        mdi_morph_frames = mdi_m.MDIMorphFrames(locations, normals,
+                                                cache_size=frame_size - 1)
+        mdi_morph_frames.get_frame_values(0)
+        self.assertEqual(len(mdi_morph_frames.cache), 0)
+        self.assertEqual(mdi_morph_frames.cache.size, 0)
+
+
+class TestMDIStaticFrames(unittest.TestCase):
+    """Static Frame Tests.
+    """
+
+    def setUp(self):
+
+        reporter_m.reset_state()
+
+    def test_tolerance(self):
+        """Vertices, bones and tags are static if all components are within
+        the tolerance of the first frame.
+        """
+
+        num_bytes_saved = []
+        for noise, tolerance, is_static in ((0.0, 0.0, True),
+                                            (1e-3, 2e-3, True),
+                                            (1e-3, 5e-4, False)):
+
+            mdi_morph_model, mdi_skeletal_model = \
+                _create_static_models(noise)
+            mdi_vertices = mdi_morph_model.surfaces[0].vertices
+            mdi_bones = mdi_skeletal_model.skeleton.bones
+            first_locations = [mdi_vertex.locations[0]
+                               for mdi_vertex in mdi_vertices]
+
+            morph_static_frames = \
+                mdi_morph_model.compact_static_frames(tolerance)
+            skeletal_static_frames = \
+                mdi_skeletal_model.compact_static_frames(tolerance)
+
+            self.assertEqual(morph_static_frames.num_static_vertices,
+                             4 if is_static else 0)
+            self.assertEqual(morph_static_frames.num_vertices, 16)
+            self.assertEqual(morph_static_frames.num_static_tags,
+                             1 if is_static else 0)
+            self.assertEqual(morph_static_frames.num_tags, 2)
+            self.assertEqual(skeletal_static_frames.num_static_bones,
+                             2 if is_static else 0)
+            self.assertEqual(skeletal_static_frames.num_bones, 12)
+            num_bytes_saved.append(
+                (morph_static_frames.num_bytes_saved,
+                 skeletal_static_frames.num_bytes_saved))
+
+            # static in locations only, values are those of the first frame
+            for num_vertex, mdi_vertex in enumerate(mdi_vertices):
+
+                is_repeated = is_static and \
+                    (num_vertex % 4 == 0 or num_vertex in (1, 5))
+                self.assertEqual(isinstance(mdi_vertex.locations,
+                                            mdi_m.MDIRepeatedValues),
+                                 is_repeated)
+                if is_repeated:
+                    self.assertEqual(len(mdi_vertex.locations), 6)
+                    self.assertEqual(list(mdi_vertex.locations),
+                                     [first_locations[num_vertex]] * 6)
+
+            self.assertEqual(isinstance(mdi_bones[3].locations,
+                                        mdi_m.MDIRepeatedValues),
+                             is_static)
+            self.assertNotIsInstance(mdi_bones[3].orientations,
+                                     mdi_m.MDIRepeatedValues)
+            self.assertNotIsInstance(mdi_bones[1].locations,
+                                     mdi_m.MDIRepeatedValues)
+
+        # static normals and orientations are stored once nonetheless
+        for num_model in range(2):
+            self.assertEqual(num_bytes_saved[0][num_model],
+                             num_bytes_saved[1][num_model])
+            self.assertGreater(num_bytes_saved[1][num_model],
+                               num_bytes_saved[2][num_model])
+            self.assertGreater(num_bytes_saved[2][num_model], 0)
+
+    def _write(self, mdi_morph_model, mdi_skeletal_model):
+
+        return (md3_facade_m.write_bytes(mdi_morph_model),
+                mdc_facade_m.write_bytes(mdi_morph_model),
+                mds_facade_m.write_bytes(mdi_skeletal_model, 0),
+                mdmmdx_facade_m.write_bytes(mdi_skeletal_model, 0),
+                md3_facade_m.write_bytes(mdi_skeletal_model))
+
+    def test_write(self):
+        """Writers expand static frames to the same bytes.
+        """
+
+        expected = self._write(*_create_static_models(0.0))
+
+        mdi_morph_model, mdi_skeletal_model = _create_static_models(0.0)
+        mdi_morph_model.compact_static_frames()
+        mdi_skeletal_model.compact_static_frames()
+        self.assertEqual(self._write(mdi_morph_model, mdi_skeletal_model),
+                         expected)
+
+        # readers compact static frames
+        mdi_model = md3_facade_m.read_bytes(expected[0], 0,
+                                            name="synthetic")
+        data_md3 = md3_facade_m.write_bytes(mdi_model)
+
+        mdi_vertices = mdi_model.surfaces[0].vertices
+        self.assertIsInstance(mdi_vertices[0].locations,
+                              mdi_m.MDIRepeatedValues)
+        for mdi_vertex in mdi_vertices:
+            mdi_vertex.locations = list(mdi_vertex.locations)
+            mdi_vertex.normals = list(mdi_vertex.normals)
+        for mdi_tag in mdi_model.tags:
+            mdi_tag.locations = list(mdi_tag.locations)
+            mdi_tag.orientations = list(mdi_tag.orientations)
+        self.assertEqual(md3_facade_m.write_bytes(mdi_model), data_md3)
+
+    def test_repeated_values(self):
+        """Repeated values act as a list, and become one once modified.
+        """
+
+        value = math_backend_m.Vector((1.0, 2.0, 3.0))
+        values = mdi_m.MDIRepeatedValues(value, 4)
+
+        self.assertTrue(values.is_repeated())
+        self.assertEqual(len(values), 4)
+        self.assertIs(values[0], value)
+        self.assertIs(values[-4], value)
+        self.assertEqual(values[1:3], [value, value])
+        self.assertEqual(values[::-1], [value] * 4)
+        self.assertEqual(list(values), [value] * 4)
+        with self.assertRaises(IndexError):
+            values[4]
+        with self.assertRaises(IndexError):
+            values[-5]
+
+        # other frames keep the value, but no longer share it
+        values[2] = math_backend_m.Vector((4.0, 5.0, 6.0))
+        self.assertFalse(values.is_repeated())
+        self.assertEqual(list(values), [value, value,
+                                        math_backend_m.Vector((4.0, 5.0,
+                                                               6.0)),
+                                        value])
+        values[0][0] = -1.0
+        self.assertEqual(values[1], value)
+        self.assertEqual(value, math_backend_m.Vector((1.0, 2.0, 3.0)))
+
+        values.append(value)
+        del values[0]
+        self.assertEqual(len(values), 4)
+        self.assertEqual(values[-1], value)
+
+    def test_modify(self):
+        """A frame set on a static vertex is written, other frames are not
+        affected.
+        """
+
+        location = math_backend_m.Vector((1.0, 2.0, 3.0))
+        normal = math_backend_m.Vector((0.0, 1.0, 0.0))
+
+        results = []
+        for compact in (False, True):
+
+            mdi_morph_model, _ = _create_static_models(0.0)
+            if compact:
+                mdi_morph_model.compact_static_frames()
+
+            mdi_vertex = mdi_morph_model.surfaces[0].vertices[4]
+            mdi_vertex.locations[2] = location
+            mdi_vertex.normals[3] = normal
+            mdi_morph_model.tags[0].locations[5] = location
+
+            results.append(md3_facade_m.write_bytes(mdi_morph_model))
+
+        self.assertEqual(results[1], results[0])
+
+        mdi_model = md3_facade_m.read_bytes(results[1], 0, name="synthetic")
+        locations = mdi_model.surfaces[0].vertices[4].locations
+        self.assertEqual(locations[2], location)
+        self.assertEqual(len(set(tuple(locations[num_frame])
+                                 for num_frame in (0, 1, 3, 4, 5))), 1)
+
+
+class TestMDIFrameSelection(unittest.TestCase):
+    """Frame Selection Tests.
+    """
+
+    def setUp(self):
+
+        reporter_m.reset_state()
+
+    def test_samples(self):
+        """Samples of ranges and steps.
+        """
+
+        def calc_samples(num_frames, *args):
+
+            return mdi_m.MDIFrameSelection(*args).calc_samples(num_frames)
+
+        self.assertEqual(calc_samples(4),
+                         [(0, 0, 0.0), (1, 1, 0.0), (2, 2, 0.0),
+                          (3, 3, 0.0)])
+        self.assertEqual(calc_samples(10, 2, -1, 3.0),
+                         [(2, 2, 0.0), (5, 5, 0.0), (8, 8, 0.0)])
+        self.assertEqual(calc_samples(10, 3, 3), [(3, 3, 0.0)])
+        self.assertEqual(calc_samples(1), [(0, 0, 0.0)])
+
+        # fractional steps take the preceding frame or interpolate
+        self.assertEqual(calc_samples(10, 0, 9, 2.5),
+                         [(0, 0, 0.0), (2, 2, 0.0), (5, 5, 0.0),
+                          (7, 7, 0.0)])
+        self.assertEqual(calc_samples(10, 0, 9, 2.5, True),
+                         [(0, 0, 0.0), (2, 3, 0.5), (5, 5, 0.0),
+                          (7, 8, 0.5)])
+        self.assertEqual(calc_samples(10, 1, 3, 0.75, True),
+                         [(1, 1, 0.0), (1, 2, 0.75), (2, 3, 0.5)])
+
+        samples = calc_samples(3, 0, -1, 0.25, True)
+        self.assertEqual(len(samples), 9)
+        self.assertEqual(samples[-1], (2, 2, 0.0))
+        for num_sample, (num_frame, num_next_frame, alpha) in \
+            enumerate(samples):
+
+            self.assertEqual(num_frame, num_sample // 4)
+            self.assertEqual(num_next_frame,
+                             num_frame + (1 if num_sample % 4 else 0))
+            self.assertEqual(alpha, (num_sample % 4) * 0.25)
+
+        # sample times off a frame by rounding are taken as on the frame,
+        # 90 * 0.7 is just below 63, 25 * 0.28 just above 7
+        samples = calc_samples(100, 0, -1, 0.7, True)
+        self.assertEqual(samples[90], (63, 63, 0.0))
+        self.assertEqual(len(samples), 142)
+        self.assertEqual(calc_samples(8, 0, -1, 0.28, True)[25:],
+                         [(7, 7, 0.0)])
+        self.assertEqual(calc_samples(8, 0, -1, 0.28)[-1], (7, 7, 0.0))
+
+        for args in ((10, 0, -1, 0.0), (10, 0, -1, -1.0), (10, 10),
+                     (10, -1), (10, 5, 4), (10, 0, 10)):
+            with self.assertRaises(Exception):
+                calc_samples(*args)
+
+    def _assert_orientation(self, orientation, expected):
+
+        np.testing.assert_allclose(np.array(orientation, dtype=np.float64),
+                                   np.array(expected, dtype=np.float64),
+                                   rtol=0, atol=1e-5)
+
+    def test_sample_orientation(self):
+        """Orientations are interpolated by the shortest rotation between
+        them.
+        """
+
+        sample_orientation = mdi_m.MDIFrameSelection.sample_orientation
+
+        axis = (1.0, -2.0, 0.5)
+        for angle, next_angle, alpha, expected_angle in \
+            ((10.0, 70.0, 0.5, 40.0),
+             (10.0, 70.0, 0.25, 25.0),
+             (-30.0, 120.0, 0.2, 0.0),
+             (0.0, 300.0, 0.5, -30.0),
+             (170.0, -170.0, 0.25, 175.0)):
+
+            orientation = sample_orientation(_rotation(axis, angle),
+                                             _rotation(axis, next_angle),
+                                             alpha)
+            self._assert_orientation(orientation,
+                                     _rotation(axis, expected_angle))
+
+            # still a rotation
+            orientation = np.array(orientation, dtype=np.float64)
+            np.testing.assert_allclose(orientation @ orientation.T,
+                                       np.identity(3), rtol=0, atol=1e-5)
+
+    def test_select_frames(self):
+        """Bones, tags and bounds of a model are sampled.
+        """
+
+        mdi_model = synthetic_m.create_skeletal_model(seed=5, num_bones=4,
+                                                      num_frames=4)
+        mdi_model.root_frame = 2
+        mdi_bones = mdi_model.skeleton.bones
+        locations = [list(mdi_bone.locations) for mdi_bone in mdi_bones]
+        orientations = [list(mdi_bone.orientations)
+                        for mdi_bone in mdi_bones]
+        mdi_bones[3].orientations = \
+            mdi_m.MDIRepeatedValues(orientations[3][0], 4)
+
+        mdi_model.select_frames(mdi_m.MDIFrameSelection(1, -1, 0.5, True))
+
+        self.assertEqual(len(mdi_model.bounds.aabbs), 5)
+        self.assertEqual(len(mdi_model.bounds.spheres), 5)
+        self.assertEqual(mdi_model.root_frame, 2)
+
+        for num_bone, mdi_bone in enumerate(mdi_bones[0:3]):
+
+            self.assertEqual(len(mdi_bone.locations), 5)
+            self.assertEqual(mdi_bone.locations[2], locations[num_bone][2])
+            self.assertEqual(mdi_bone.orientations[4],
+                             orientations[num_bone][3])
+
+            # half way between frames 2 and 3
+            np.testing.assert_allclose(
+                mdi_bone.locations[3],
+                (np.array(locations[num_bone][2]) + \
+                 np.array(locations[num_bone][3])) / 2,
+                rtol=0, atol=1e-5)
+
+            quaternion = orientations[num_bone][2].to_quaternion()
+            next_quaternion = orientations[num_bone][3].to_quaternion()
+            self._assert_orientation(
+                mdi_bone.orientations[3],
+                quaternion.slerp(next_quaternion, 0.5).to_matrix())
+
+        # static orientations stay static
+        self.assertTrue(mdi_bones[3].orientations.is_repeated())
+        self.assertEqual(len(mdi_bones[3].orientations), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
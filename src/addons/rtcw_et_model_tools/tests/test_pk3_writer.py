@@ -0,0 +1,145 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8-80 compliant>
+
+"""PK3 Writer Tests.
+
+Does not need blender or test files. Example:
+
+    python -m unittest rtcw_et_model_tools.tests.test_pk3_writer
+"""
+
+import unittest
+import tempfile
+import zipfile
+import random
+import os
+
+import rtcw_et_model_tools.common.pk3_writer as pk3_writer_m
+
+
+class TestPK3Writer(unittest.TestCase):
+    """PK3 Writer Tests.
+    """
+
+    def setUp(self):
+
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.temp_dir.name, "test.pk3")
+
+    def tearDown(self):
+
+        self.temp_dir.cleanup()
+
+    @staticmethod
+    def _create_members(num_members, size):
+
+        rng = random.Random(0)
+
+        members = []
+        for num_member in range(num_members):
+
+            # half random, so compression takes a while and does not store
+            data = rng.randbytes(size // 2) + bytes(size - size // 2)
+            members.append(("models/test/m{}.md3".format(num_member), data))
+
+        return members
+
+    def _check_pk3(self, members):
+
+        with zipfile.ZipFile(self.file_path, 'r') as zip_file:
+
+            self.assertIsNone(zip_file.testzip())
+            self.assertEqual(zip_file.namelist(),
+                             [name for name, _ in members])
+            for name, data in members:
+                self.assertEqual(zip_file.read(name), data)
+
+    def test_close_writes_pending_members(self):
+        """All members are written on close, also those still compressed.
+        """
+
+        members = self._create_members(20, 1024 * 1024)
+
+        pk3_writer = pk3_writer_m.PK3Writer(self.file_path, num_threads=1,
+                                            max_pending=100)
+        for name, data in members:
+            pk3_writer.add(name, data)
+        pk3_writer.close()
+
+        self.assertEqual(len(pk3_writer.members), len(members))
+        self._check_pk3(members)
+
+    def test_context_manager(self):
+        """Leaving the context closes the pk3 file, an exception aborts it.
+        """
+
+        members = self._create_members(8, 256 * 1024)
+
+        with pk3_writer_m.PK3Writer(self.file_path, num_threads=2,
+                                    max_pending=2) as pk3_writer:
+            for name, data in members:
+                pk3_writer.add(name, data)
+
+        self._check_pk3(members)
+
+        os.remove(self.file_path)
+        with self.assertRaises(ValueError):
+            with pk3_writer_m.PK3Writer(self.file_path) as pk3_writer:
+                pk3_writer.add(*members[0])
+                raise ValueError()
+
+        self.assertFalse(os.path.exists(self.file_path))
+        self.assertFalse(os.path.exists("{}.tmp".format(self.file_path)))
+
+    def test_reproducible(self):
+        """The same members in the same order give the same bytes.
+        """
+
+        members = self._create_members(4, 64 * 1024)
+
+        datas = []
+        for num_threads in (1, 4):
+
+            with pk3_writer_m.PK3Writer(self.file_path,
+                                        num_threads=num_threads) \
+                 as pk3_writer:
+                for name, data in members:
+                    pk3_writer.add(name, data)
+
+            with open(self.file_path, 'rb') as file:
+                datas.append(file.read())
+
+        self.assertEqual(datas[0], datas[1])
+
+    def test_duplicate_member(self):
+        """Member names differing only in case are refused.
+        """
+
+        with pk3_writer_m.PK3Writer(self.file_path) as pk3_writer:
+
+            pk3_writer.add("models/a.md3", b"a")
+            with self.assertRaises(Exception):
+                pk3_writer.add("MODELS/A.md3", b"b")
+
+        self._check_pk3([("models/a.md3", b"a")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -30,6 +30,7 @@ import rtcw_et_model_tools.mdc._mdc as mdc
 import rtcw_et_model_tools.mds._mds as mds
 import rtcw_et_model_tools.mdmmdx._mdm as mdm
 import rtcw_et_model_tools.mdmmdx._mdx as mdx
+import rtcw_et_model_tools.tag._tag as tag
 
 import rtcw_et_model_tools.tests.test_manager as test_manager
 
@@ -52,6 +53,7 @@ class TestReadWrite(unittest.TestCase):
             ".mds": mds.MDS,
             ".mdm": mdm.MDM,
             ".mdx": mdx.MDX,
+            ".tag": tag.TAG,
         }
 
         self.old_working_directory = os.getcwd()
@@ -61,6 +63,22 @@ class TestReadWrite(unittest.TestCase):
 
         os.chdir(self.old_working_directory)
 
+    def _find_test_files(self, suffix):
+
+        dir_list = \
+            os.listdir(test_manager.TestParameters.parameters.test_directory)
+
+        test_files = []
+        for file in dir_list:
+
+            file_path = os.path.abspath(file)
+
+            if file_path.endswith(suffix) and os.path.isfile(file_path):
+
+                test_files.append(file_path)
+
+        return test_files
+
     def test_binary_read_write(self):
         """Tests the modules binary read/write functions.
 
@@ -71,23 +89,10 @@ class TestReadWrite(unittest.TestCase):
         and written files.
         """
 
-        dir_list = \
-            os.listdir(test_manager.TestParameters.parameters.test_directory)
-
         for suffix, handler in self.suffix_handler_dict.items():
 
-            # find all test files ending with suffix
-            test_files = []
-            for file in dir_list:
-
-                file_path = os.path.abspath(file)
-
-                if file_path.endswith(suffix) and os.path.isfile(file_path):
-
-                        test_files.append(file_path)
-
-            # test the files
-            for test_file in test_files:
+            # test all files ending with suffix
+            for test_file in self._find_test_files(suffix):
 
                 file_path_in = test_file
                 file_path_out = "{}.out".format(test_file)
@@ -113,3 +118,37 @@ class TestReadWrite(unittest.TestCase):
 
                 with self.subTest(file_path=file_path_in):
                     self.assertEqual(hash_sum_in, hash_sum_out)
+
+    def test_bytes_read_write(self):
+        """Tests the modules bytes read/write functions.
+
+        Same test files as in test_binary_read_write. The found files are
+        read from bytes and immediately written back to bytes. The actual test
+        compares the written bytes with the original bytes and with the bytes
+        written by the file functions.
+        """
+
+        for suffix, handler in self.suffix_handler_dict.items():
+
+            for test_file in self._find_test_files(suffix):
+
+                file_path_in = test_file
+                file_path_out = "{}.out".format(test_file)
+                name = os.path.basename(test_file)
+
+                with open(file_path_in, 'rb') as file:
+                    data_in = file.read()
+
+                # read/write bytes
+                data_out = handler.from_bytes(data_in, name).to_bytes(name)
+
+                # read/write file
+                handler.read(file_path_in).write(file_path_out)
+                with open(file_path_out, 'rb') as file:
+                    data_file = file.read()
+
+                os.remove(file_path_out)
+
+                with self.subTest(file_path=file_path_in):
+                    self.assertEqual(data_in, data_out)
+                    self.assertEqual(data_file, data_out)
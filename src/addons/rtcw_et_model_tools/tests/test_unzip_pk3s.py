@@ -0,0 +1,235 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8-80 compliant>
+
+"""Unzip PK3s Tests.
+
+Does not need blender or test files. Example:
+
+    python -m unittest rtcw_et_model_tools.tests.test_unzip_pk3s
+"""
+
+import unittest
+import unittest.mock
+import tempfile
+import zipfile
+import random
+import os
+
+import rtcw_et_model_tools.common.unzip_pk3s as unzip_pk3s_m
+
+
+class TestUnzipPK3s(unittest.TestCase):
+    """Unzip PK3s Tests.
+    """
+
+    def setUp(self):
+
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.source_path = os.path.join(self.temp_dir.name, "source")
+        self.target_path = os.path.join(self.temp_dir.name, "target")
+
+        os.makedirs(self.source_path)
+        os.makedirs(self.target_path)
+
+    def tearDown(self):
+
+        self.temp_dir.cleanup()
+
+    def _write_pk3(self, pk3_name, members):
+
+        pk3_path = os.path.join(self.source_path, *pk3_name.split("/"))
+        os.makedirs(os.path.dirname(pk3_path), exist_ok=True)
+        with zipfile.ZipFile(pk3_path, 'w', zipfile.ZIP_DEFLATED) \
+                as zip_file:
+            for name, data in members:
+                zip_file.writestr(name, data)
+
+    def _read_tree(self, target_path = None):
+        """Returns relative path => content of all files.
+        """
+
+        target_path = target_path or self.target_path
+
+        tree = {}
+        for root, _, file_names in os.walk(target_path):
+            for file_name in file_names:
+
+                file_path = os.path.join(root, file_name)
+                rel_path = os.path.relpath(file_path, target_path)
+                with open(file_path, 'rb') as file:
+                    tree[rel_path.replace(os.sep, "/")] = file.read()
+
+        return tree
+
+    def _unzip(self, **kwargs):
+
+        return unzip_pk3s_m.unzip_dir_recursive(self.source_path,
+                                                self.target_path, **kwargs)
+
+    def test_filters(self):
+        """Members are selected by extension and by path.
+        """
+
+        self._write_pk3("pak0.pk3", [
+            ("models/players/hud/head.MD3", b"head"),
+            ("models/players/hud/head.skin", b"skin"),
+            ("models/mapobjects/box.mdc", b"box"),
+            ("textures/common/wall.tga", b"wall"),
+            ("scripts/models.shader", b"shader"),
+            ("maps/", b""),
+        ])
+
+        exts = unzip_pk3s_m.filter_exts['MODELS'] + \
+            unzip_pk3s_m.filter_exts['TEXTURES']
+        self.assertEqual(self._unzip(exts=exts), (3, 0))
+        self.assertEqual(sorted(self._read_tree()),
+                         ["models/mapobjects/box.mdc",
+                          "models/players/hud/head.MD3",
+                          "textures/common/wall.tga"])
+
+        self.assertEqual(self._unzip(path_filters=["\\Models\\Players"]),
+                         (1, 1))
+        self.assertIn("models/players/hud/head.skin", self._read_tree())
+
+        self.assertEqual(self._unzip(exts=["SHADER"],
+                                     path_filters=["scripts/", "maps/"]),
+                         (1, 0))
+        self.assertEqual(len(self._read_tree()), 5)
+
+    def test_last_pk3_wins(self):
+        """The pk3 file last in path order decides the content of a member,
+        regardless of the case of its name.
+        """
+
+        self._write_pk3("pak0.pk3", [("models/a.md3", b"pak0 a"),
+                                     ("models/b.md3", b"pak0 b"),
+                                     ("models/c.md3", b"pak0 c")])
+        self._write_pk3("pak1.pk3", [("MODELS/A.md3", b"pak1 a"),
+                                     ("models/b.md3", b"pak1 b")])
+        self._write_pk3("zz/pak2.pk3", [("models/a.md3", b"pak2 a")])
+
+        plan = unzip_pk3s_m._plan(
+            unzip_pk3s_m._find_pk3_files(self.source_path), None, None)
+        self.assertEqual([sorted(member_names) for member_names in plan],
+                         [["models/c.md3"], ["models/b.md3"],
+                          ["models/a.md3"]])
+
+        self.assertEqual(self._unzip(), (3, 0))
+        self.assertEqual(self._read_tree(),
+                         {"models/a.md3": b"pak2 a",
+                          "models/b.md3": b"pak1 b",
+                          "models/c.md3": b"pak0 c"})
+
+    def test_rerun(self):
+        """Extracting again writes only members which changed, checked by
+        size and CRC.
+        """
+
+        rng = random.Random(0)
+        members = [("models/m{}.md3".format(num_member), rng.randbytes(1000))
+                   for num_member in range(10)]
+        self._write_pk3("pak0.pk3", members)
+
+        self.assertEqual(self._unzip(), (10, 0))
+
+        crcs = []
+        is_up_to_date = unzip_pk3s_m._is_up_to_date
+
+        def check_crc(file_path, zip_info):
+
+            result = is_up_to_date(file_path, zip_info)
+            crcs.append(result)
+            return result
+
+        with unittest.mock.patch.object(unzip_pk3s_m, "_is_up_to_date",
+                                        check_crc):
+            self.assertEqual(self._unzip(), (0, 10))
+        self.assertEqual(crcs, [True] * 10)
+
+        # same size, other content
+        file_path = os.path.join(self.target_path, "models", "m3.md3")
+        with open(file_path, 'r+b') as file:
+            file.write(b"changed")
+
+        # other size
+        file_path = os.path.join(self.target_path, "models", "m5.md3")
+        with open(file_path, 'ab') as file:
+            file.write(b"appended")
+
+        os.remove(os.path.join(self.target_path, "models", "m7.md3"))
+
+        self.assertEqual(self._unzip(), (3, 7))
+        self.assertEqual(self._read_tree(),
+                         {name: data for name, data in members})
+
+    def test_threads(self):
+        """Extracting pk3 files in parallel gives the same tree.
+        """
+
+        rng = random.Random(0)
+        for num_pk3 in range(8):
+
+            members = []
+            for _ in range(20):
+
+                name = "models/m{}.md3".format(rng.randrange(40))
+                if name not in (member[0] for member in members):
+                    members.append((name, rng.randbytes(rng.randrange(2000))))
+
+            self._write_pk3("pak{}.pk3".format(num_pk3), members)
+
+        progress = []
+
+        def progress_callback(num_pk3s_done, num_pk3s):
+
+            progress.append((num_pk3s_done, num_pk3s))
+
+        self._unzip(num_threads=1)
+        tree = self._read_tree()
+
+        self.target_path = os.path.join(self.temp_dir.name, "parallel")
+        os.makedirs(self.target_path)
+        self._unzip(num_threads=4, progress_callback=progress_callback)
+        self.assertEqual(self._read_tree(), tree)
+
+        self.assertEqual(progress,
+                         [(num_done, 8) for num_done in range(0, 9)])
+
+    def test_target_file_path(self):
+        """Member names never leave the target directory.
+        """
+
+        target_path = self.target_path
+        self.assertEqual(
+            unzip_pk3s_m._to_target_file_path(target_path,
+                                              "../../models\\a.md3"),
+            os.path.join(target_path, "models", "a.md3"))
+        self.assertEqual(
+            unzip_pk3s_m._to_target_file_path(target_path,
+                                              "/models/./b/../c.md3"),
+            os.path.join(target_path, "models", "b", "c.md3"))
+
+        with self.assertRaises(Exception):
+            unzip_pk3s_m.unzip_dir_recursive(
+                os.path.join(self.temp_dir.name, "missing"), target_path)
+
+
+if __name__ == "__main__":
+    unittest.main()
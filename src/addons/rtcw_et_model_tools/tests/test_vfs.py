@@ -0,0 +1,252 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8-80 compliant>
+
+"""Virtual Filesystem Tests.
+
+Does not need blender or test files. Example:
+
+    python -m unittest rtcw_et_model_tools.tests.test_vfs
+"""
+
+import unittest
+import unittest.mock
+import tempfile
+import zipfile
+import os
+
+import rtcw_et_model_tools.common.vfs as vfs_m
+import rtcw_et_model_tools.common.reporter as reporter_m
+
+# fixed modification time of the test files, so that any change is noticed
+_mtime_ns = 1000000000 * 1000000000
+
+
+class TestVFS(unittest.TestCase):
+    """Virtual Filesystem Tests.
+    """
+
+    def setUp(self):
+
+        reporter_m.reset_state()
+
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.game_path = os.path.join(self.temp_dir.name, "etmain")
+        self.index_path = os.path.join(self.temp_dir.name, "index.json")
+        self.extract_dir = os.path.join(self.temp_dir.name, "extracted")
+
+        os.makedirs(self.game_path)
+
+    def tearDown(self):
+
+        self.temp_dir.cleanup()
+
+    def _write_loose(self, name, data):
+
+        file_path = os.path.join(self.game_path, *name.split("/"))
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, 'wb') as file:
+            file.write(data)
+
+    def _write_pk3(self, pk3_name, members):
+
+        pk3_path = os.path.join(self.game_path, pk3_name)
+        with zipfile.ZipFile(pk3_path, 'w') as zip_file:
+            for name, data in members:
+                zip_file.writestr(name, data)
+
+        return pk3_path
+
+    def _freeze_mtimes(self):
+        """Sets all files and directories to the same modification time.
+        """
+
+        for root, dir_names, file_names in os.walk(self.game_path):
+            for name in dir_names + file_names:
+                os.utime(os.path.join(root, name), ns=(_mtime_ns, _mtime_ns))
+
+        os.utime(self.game_path, ns=(_mtime_ns, _mtime_ns))
+
+    def _create_vfs(self):
+
+        return vfs_m.VFS(self.game_path, self.index_path, self.extract_dir)
+
+    def test_override(self):
+        """pk3 files override loose files, later pk3 files override earlier
+        ones.
+        """
+
+        self._write_loose("models/a.md3", b"loose a")
+        self._write_loose("models/b.md3", b"loose b")
+        self._write_loose("models/c.md3", b"loose c")
+        self._write_pk3("pak1.pk3", [("models/b.md3", b"pak1 b"),
+                                     ("models/d.md3", b"pak1 d")])
+        self._write_pk3("Pak2.pk3", [("MODELS/B.MD3", b"pak2 b"),
+                                     ("models/c.md3", b"pak2 c"),
+                                     ("models/d.md3", b"pak2 d")])
+
+        # pk3 files are searched only directly inside the game directory
+        self._write_loose("sub/pak3.pk3", b"not a pk3")
+
+        vfs = self._create_vfs()
+
+        self.assertEqual(vfs.read("models/a.md3"), b"loose a")
+        self.assertEqual(vfs.read("models/b.md3"), b"pak2 b")
+        self.assertEqual(vfs.read("models/c.md3"), b"pak2 c")
+        self.assertEqual(vfs.read("models/d.md3"), b"pak2 d")
+        self.assertEqual(vfs.read("sub/pak3.pk3"), b"not a pk3")
+
+        self.assertEqual(vfs.list_files(ext="md3"),
+                         ["models/a.md3", "models/b.md3", "models/c.md3",
+                          "models/d.md3"])
+        self.assertEqual(vfs.list_files(directory="sub"), ["sub/pak3.pk3"])
+
+    def test_find(self):
+        """Paths are case insensitive, extensions are tried in order.
+        """
+
+        self._write_loose("Textures/Wall.TGA", b"tga")
+        self._write_pk3("pak0.pk3", [("textures/wall.jpg", b"jpg"),
+                                     ("textures/floor.tga", b"tga")])
+
+        vfs = self._create_vfs()
+
+        self.assertTrue(vfs.exists("TEXTURES\\wall.tga"))
+        self.assertTrue(vfs.exists("./textures//WALL.jpg"))
+        self.assertFalse(vfs.exists("textures/wall.png"))
+
+        self.assertEqual(vfs.find("textures/WALL.tga", ["jpg", "tga"]),
+                         "textures/wall.jpg")
+        self.assertEqual(vfs.find("textures/wall", ["TGA", "jpg"]),
+                         "textures/wall.tga")
+        self.assertEqual(vfs.find("textures/floor.jpg", ["jpg", "tga"]),
+                         "textures/floor.tga")
+        self.assertIsNone(vfs.find("textures/floor", ["jpg", "png"]))
+        self.assertIsNone(vfs.find("textures/ceiling", ["jpg", "tga"]))
+
+        self.assertEqual(vfs.read(vfs.find("textures/wall", ["tga"])),
+                         b"tga")
+
+    def test_index(self):
+        """The persisted index is reused until the game directory changes.
+        """
+
+        self._write_loose("models/a.md3", b"a")
+        pk3_path = self._write_pk3("pak0.pk3", [("models/b.md3", b"b")])
+        self._freeze_mtimes()
+
+        self._create_vfs()
+        self.assertTrue(os.path.isfile(self.index_path))
+
+        take_snapshot = vfs_m.VFS._take_snapshot
+        num_snapshots = []
+
+        def count_snapshots(vfs):
+
+            num_snapshots.append(1)
+            return take_snapshot(vfs)
+
+        with unittest.mock.patch.object(vfs_m.VFS, "_take_snapshot",
+                                        count_snapshots):
+
+            vfs = self._create_vfs()
+            self.assertEqual(len(num_snapshots), 0)
+            self.assertEqual(vfs.read("models/b.md3"), b"b")
+
+            # refreshing an unchanged directory does nothing
+            vfs.refresh()
+            self.assertEqual(len(num_snapshots), 0)
+
+            # modification time of a pk3 file
+            os.utime(pk3_path, ns=(_mtime_ns, _mtime_ns + 1))
+            self._create_vfs()
+            self.assertEqual(len(num_snapshots), 1)
+            self._create_vfs()
+            self.assertEqual(len(num_snapshots), 1)
+
+            # size of a pk3 file, same modification time
+            self._write_pk3("pak0.pk3", [("models/b.md3", b"bb"),
+                                         ("models/c.md3", b"c")])
+            os.utime(pk3_path, ns=(_mtime_ns, _mtime_ns + 1))
+            vfs = self._create_vfs()
+            self.assertEqual(len(num_snapshots), 2)
+            self.assertEqual(vfs.read("models/b.md3"), b"bb")
+
+            # added directory, noticed by an existing instance on refresh
+            os.makedirs(os.path.join(self.game_path, "models", "new"))
+            self._write_loose("models/new/d.md3", b"d")
+            self.assertFalse(vfs.exists("models/new/d.md3"))
+            vfs.refresh()
+            self.assertEqual(len(num_snapshots), 3)
+            self.assertTrue(vfs.exists("models/new/d.md3"))
+
+            # the index of another game directory is not used
+            other_game_path = os.path.join(self.temp_dir.name, "main")
+            os.makedirs(other_game_path)
+            vfs_m.VFS(other_game_path, self.index_path, self.extract_dir)
+            self.assertEqual(len(num_snapshots), 4)
+
+        # an unreadable index is rebuilt
+        with open(self.index_path, 'w') as file:
+            file.write("{")
+        vfs = self._create_vfs()
+        self.assertTrue(vfs.exists("models/c.md3"))
+
+    def test_get_file_path(self):
+        """Files inside pk3 files are extracted once, and again if the pk3
+        file changes.
+        """
+
+        self._write_loose("textures/loose.tga", b"loose")
+        pk3_path = self._write_pk3("pak0.pk3",
+                                   [("textures/sub/packed.tga", b"packed")])
+
+        vfs = self._create_vfs()
+
+        self.assertEqual(vfs.get_file_path("TEXTURES/loose.tga"),
+                         os.path.join(self.game_path, "textures",
+                                      "loose.tga"))
+
+        file_path = vfs.get_file_path("textures/sub/packed.tga")
+        self.assertTrue(file_path.startswith(self.extract_dir))
+        self.assertTrue(file_path.endswith(os.path.join("textures", "sub",
+                                                        "packed.tga")))
+        with open(file_path, 'rb') as file:
+            self.assertEqual(file.read(), b"packed")
+
+        # up to date files are not extracted again
+        with unittest.mock.patch.object(zipfile.ZipFile, "extract") \
+                as extract:
+            self.assertEqual(vfs.get_file_path("textures/sub/packed.tga"),
+                             file_path)
+            extract.assert_not_called()
+
+        # a newer pk3 file is
+        self._write_pk3("pak0.pk3", [("textures/sub/packed.tga", b"new")])
+        stat = os.stat(file_path)
+        os.utime(pk3_path, ns=(stat.st_mtime_ns + 1, stat.st_mtime_ns + 1))
+        vfs.refresh()
+        self.assertEqual(vfs.get_file_path("textures/sub/packed.tga"),
+                         file_path)
+        with open(file_path, 'rb') as file:
+            self.assertEqual(file.read(), b"new")
+
+
+if __name__ == "__main__":
+    unittest.main()